@@ -51,7 +51,7 @@ from app.core.base_model import BaseModel
 # Import all models to register them with Base.metadata
 from app.tenants.models import Tenant, TenantSettings
 from app.tenants.modules import TenantModuleAccess
-from app.users.models import User, Role, Permission, StudentProfile, TeacherProfile, ParentProfile
+from app.users.models import User, Role, Permission, StudentProfile, TeacherProfile, ParentProfile, ParentStudentLink
 from app.users.pre_registration import PreRegisteredUser
 from app.auth.models import RefreshToken, PasswordResetToken, LoginAttempt
 from app.academics.models.structure import AcademicYear, Class, Section
@@ -64,6 +64,11 @@ from app.platform.gamification.models import Points, Badge, UserBadge
 from app.platform.audit.models import AuditLog
 from app.platform.admin.models import PlatformAdmin, PlatformSettings
 from app.platform.usage.tracking import FeatureUsage
+from app.platform.observability.models import MetricRollup
+from app.platform.control.models import UsageCounter, BillingSignalRecord
+from app.ai.quality_models import QuestionMinHash
+from app.core.jobs.models import JobExecution, QueuedJob
+from app.platform.files.models import FileUpload, StoredFile, TenantStorageUsage
 
 # Syllabus Engine (Phase 2)
 from app.academics.models.syllabus import (
@@ -0,0 +1,66 @@
+"""Analytics bulk snapshot upserts
+
+Revision ID: phase9_analytics_bulk_snapshots
+Revises: 47a545eb8e5a
+Create Date: 2026-10-18
+
+Adds unique (entity, period) constraints to the analytics snapshot tables
+so bulk generation can upsert with ON CONFLICT instead of inserting
+duplicate snapshots on every run. subject_id/class_id are nullable, so the
+constraints use NULLS NOT DISTINCT (PostgreSQL 15+; the upgrade stops
+with a clear error on older servers).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'phase9_analytics_bulk_snapshots'
+down_revision = '47a545eb8e5a'
+branch_labels = None
+depends_on = None
+
+
+_SNAPSHOT_KEYS = {
+    'analytics_student_snapshots': (
+        'uq_analytics_student_period',
+        ['tenant_id', 'student_id', 'class_id', 'subject_id', 'period_start', 'period_end'],
+    ),
+    'analytics_teacher_snapshots': (
+        'uq_analytics_teacher_period',
+        ['tenant_id', 'teacher_id', 'class_id', 'subject_id', 'period_start', 'period_end'],
+    ),
+    'analytics_class_snapshots': (
+        'uq_analytics_class_period',
+        ['tenant_id', 'class_id', 'subject_id', 'period_start', 'period_end'],
+    ),
+}
+
+
+def _require_postgres_15() -> None:
+    version = op.get_bind().execute(sa.text("SHOW server_version_num")).scalar()
+    if int(version) < 150000:
+        raise RuntimeError(
+            "phase9_analytics_bulk_snapshots needs PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT); "
+            f"server_version_num is {version}"
+        )
+
+
+def upgrade() -> None:
+    _require_postgres_15()
+    for table, (name, columns) in _SNAPSHOT_KEYS.items():
+        # Keep only the most recently generated snapshot per key
+        match = ' AND '.join(f'a.{c} IS NOT DISTINCT FROM b.{c}' for c in columns)
+        op.execute(
+            f'DELETE FROM {table} a USING {table} b '
+            f'WHERE {match} AND (a.generated_at, a.id) < (b.generated_at, b.id)'
+        )
+        op.create_unique_constraint(
+            name, table, columns, postgresql_nulls_not_distinct=True,
+        )
+
+
+def downgrade() -> None:
+    for table, (name, _) in _SNAPSHOT_KEYS.items():
+        op.drop_constraint(name, table, type_='unique')
@@ -0,0 +1,60 @@
+"""Analytics tenant rollup table
+
+Revision ID: phase9_analytics_tenant_rollup
+Revises: phase9_analytics_bulk_snapshots
+Create Date: 2026-10-18
+
+Adds the per-tenant, per-period rollup that serves the principal
+dashboard. Refreshed whenever class/teacher snapshots are generated.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_analytics_tenant_rollup'
+down_revision = 'phase9_analytics_bulk_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analytics_tenant_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('period_start', sa.Date, nullable=False),
+        sa.Column('period_end', sa.Date, nullable=False),
+
+        # School-wide counts
+        sa.Column('total_students', sa.Integer, default=0),
+        sa.Column('total_teachers', sa.Integer, default=0),
+        sa.Column('total_classes', sa.Integer, default=0),
+
+        # Averages
+        sa.Column('school_avg_mastery', sa.Numeric(5, 2), default=0),
+        sa.Column('school_avg_attendance', sa.Numeric(5, 2), default=0),
+        sa.Column('school_avg_activity', sa.Numeric(5, 2), default=0),
+        sa.Column('avg_syllabus_coverage', sa.Numeric(5, 2), default=0),
+        sa.Column('avg_teacher_engagement', sa.Numeric(5, 2), default=0),
+
+        # Attention areas
+        sa.Column('classes_needing_attention', sa.Integer, default=0),
+        sa.Column('subjects_with_low_mastery', sa.Integer, default=0),
+
+        # Metadata
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('tenant_id', 'period_start', 'period_end', name='uq_analytics_tenant_rollup_period'),
+    )
+    op.create_index('ix_analytics_tenant_rollups_tenant_id', 'analytics_tenant_rollups', ['tenant_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_tenant_rollups')
@@ -0,0 +1,142 @@
+"""Attendance daily rollups
+
+Revision ID: phase9_attendance_rollups
+Revises: phase9_analytics_tenant_rollup
+Create Date: 2026-10-18
+
+Adds the per-class, per-day attendance rollup maintained incrementally by
+the attendance write paths. section_id is nullable, so the unique key
+uses NULLS NOT DISTINCT (PostgreSQL 15+, as phase9_analytics_bulk_snapshots).
+
+Both rollups (attendance_summaries and class_attendance_daily) are
+rebuilt here from student_attendance, with the same counting rules as
+AttendanceRollup, so incremental deltas only ever apply to complete
+rows. AttendanceRollupBackfillJob remains for repairing a date range.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_attendance_rollups'
+down_revision = 'phase9_analytics_tenant_rollup'
+branch_labels = None
+depends_on = None
+
+
+# Statuses counted as school days in the monthly summary (SUMMARY_STATUS_COLUMNS)
+SCHOOL_DAY_STATUSES = "('present', 'absent', 'late', 'half_day', 'excused')"
+
+
+def upgrade() -> None:
+    # Columns the models have but older schemas may lack
+    op.execute("ALTER TABLE student_attendance ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN NOT NULL DEFAULT false")
+    op.execute("ALTER TABLE student_attendance ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ")
+    op.execute("ALTER TABLE attendance_summaries ADD COLUMN IF NOT EXISTS unexcused_days INTEGER NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE attendance_summaries ADD COLUMN IF NOT EXISTS participation_rate DOUBLE PRECISION NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE attendance_summaries ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN NOT NULL DEFAULT false")
+    op.execute("ALTER TABLE attendance_summaries ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ")
+
+    op.create_table(
+        'class_attendance_daily',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('class_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('classes.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('section_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('sections.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('attendance_date', sa.Date, nullable=False),
+
+        # Counts
+        sa.Column('total_students', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('present_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('absent_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('late_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('half_day_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('excused_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('holiday_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('not_marked_count', sa.Integer, nullable=False, server_default='0'),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint(
+            'tenant_id', 'class_id', 'section_id', 'attendance_date',
+            name='uq_class_attendance_daily',
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index('ix_class_attendance_daily_tenant_id', 'class_attendance_daily', ['tenant_id'])
+    op.create_index('ix_class_attendance_daily_date', 'class_attendance_daily', ['tenant_id', 'attendance_date'])
+
+    # Backfill. Status is compared lower-cased: it is stored as the enum
+    # name by the ORM and as the value by older writers.
+    op.execute("DELETE FROM attendance_summaries")
+    op.execute(f"""
+        INSERT INTO attendance_summaries (
+            id, tenant_id, student_id, year, month,
+            total_days, present_days, absent_days, late_days, half_days,
+            excused_days, unexcused_days, attendance_percentage, participation_rate,
+            calculated_at, created_at, updated_at, is_deleted
+        )
+        SELECT md5(c.tenant_id::text || c.student_id::text || c.year || '-' || c.month)::uuid,
+               c.tenant_id, c.student_id, c.year, c.month,
+               c.total_days, c.present_days, c.absent_days, c.late_days, c.half_days,
+               c.excused_days, c.absent_days,
+               COALESCE(ROUND((c.present_days + c.late_days + c.half_days * 0.5) * 100.0
+                              / NULLIF(c.total_days, 0), 2), 0),
+               COALESCE(ROUND((c.present_days + c.late_days + c.half_days * 0.5) * 100.0
+                              / NULLIF(c.total_days - c.excused_days, 0), 2), 0),
+               now(), now(), now(), false
+        FROM (
+            SELECT tenant_id, student_id,
+                   EXTRACT(YEAR FROM attendance_date)::int AS year,
+                   EXTRACT(MONTH FROM attendance_date)::int AS month,
+                   COUNT(*) FILTER (WHERE s IN {SCHOOL_DAY_STATUSES}) AS total_days,
+                   COUNT(*) FILTER (WHERE s = 'present') AS present_days,
+                   COUNT(*) FILTER (WHERE s = 'absent') AS absent_days,
+                   COUNT(*) FILTER (WHERE s = 'late') AS late_days,
+                   COUNT(*) FILTER (WHERE s = 'half_day') AS half_days,
+                   COUNT(*) FILTER (WHERE s = 'excused') AS excused_days
+            FROM (
+                SELECT tenant_id, student_id, attendance_date, lower(status::text) AS s
+                FROM student_attendance
+                WHERE NOT is_deleted
+            ) a
+            GROUP BY 1, 2, 3, 4
+            HAVING COUNT(*) FILTER (WHERE s IN {SCHOOL_DAY_STATUSES}) > 0
+        ) c
+    """)
+    op.execute("""
+        INSERT INTO class_attendance_daily (
+            id, tenant_id, class_id, section_id, attendance_date,
+            total_students, present_count, absent_count, late_count, half_day_count,
+            excused_count, holiday_count, not_marked_count,
+            created_at, updated_at, is_deleted
+        )
+        SELECT md5(tenant_id::text || class_id::text || COALESCE(section_id::text, '')
+                   || attendance_date::text)::uuid,
+               tenant_id, class_id, section_id, attendance_date,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE s = 'present'),
+               COUNT(*) FILTER (WHERE s = 'absent'),
+               COUNT(*) FILTER (WHERE s = 'late'),
+               COUNT(*) FILTER (WHERE s = 'half_day'),
+               COUNT(*) FILTER (WHERE s = 'excused'),
+               COUNT(*) FILTER (WHERE s = 'holiday'),
+               COUNT(*) FILTER (WHERE s = 'not_marked'),
+               now(), now(), false
+        FROM (
+            SELECT tenant_id, class_id, section_id, attendance_date, lower(status::text) AS s
+            FROM student_attendance
+            WHERE NOT is_deleted
+        ) a
+        GROUP BY tenant_id, class_id, section_id, attendance_date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('class_attendance_daily')
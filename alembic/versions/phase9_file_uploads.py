@@ -0,0 +1,59 @@
+"""File upload references
+
+Revision ID: phase9_file_uploads
+Revises: phase9_parent_student_links
+Create Date: 2026-10-18
+
+Adds file_uploads, one row per upload of a stored file, so a delete
+releases exactly one reference (and a repeated delete releases none).
+
+Existing stored_files references are backfilled as ref_count upload rows
+with no uploader.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_file_uploads'
+down_revision = 'phase9_parent_student_links'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'file_uploads',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('stored_file_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('stored_files.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('uploaded_by', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('original_name', sa.String(255), nullable=True),
+        sa.Column('folder', sa.String(255), nullable=True),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_file_uploads_tenant_id', 'file_uploads', ['tenant_id'])
+    op.create_index('ix_file_uploads_stored_file', 'file_uploads', ['stored_file_id'])
+
+    op.execute("""
+        INSERT INTO file_uploads (
+            id, tenant_id, stored_file_id, created_at, updated_at, is_deleted
+        )
+        SELECT md5(sf.id::text || n::text)::uuid, sf.tenant_id, sf.id,
+               sf.created_at, now(), false
+        FROM stored_files sf
+        CROSS JOIN LATERAL generate_series(1, sf.ref_count) AS n
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_file_uploads_stored_file', 'file_uploads')
+    op.drop_index('ix_file_uploads_tenant_id', 'file_uploads')
+    op.drop_table('file_uploads')
@@ -0,0 +1,188 @@
+"""Governance log partitions
+
+Revision ID: phase9_governance_log_partitions
+Revises: phase9_usage_counter_upserts
+Create Date: 2026-10-18
+
+Converts governance_audit_logs and governance_data_access_logs into
+tables partitioned by RANGE (timestamp), one partition per month, plus a
+DEFAULT partition. Existing rows are copied into the new partitions.
+
+Also:
+- (tenant_id, timestamp, id) indexes for keyset pagination
+- pg_trgm GIN indexes for substring search on audit logs
+- governance_partition_stats for cached per-month counts
+
+Future partitions are created by app.governance.partitions
+(run_partition_maintenance), at startup and from a daily cron.
+"""
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_governance_log_partitions'
+down_revision = 'phase9_usage_counter_upserts'
+branch_labels = None
+depends_on = None
+
+
+# Partitions created ahead of the current month (matches PARTITIONS_AHEAD)
+_MONTHS_AHEAD = 2
+
+# table -> (foreign keys, indexes)
+_TABLES = {
+    'governance_audit_logs': (
+        [
+            ('tenant_id', 'tenants', 'CASCADE'),
+            ('actor_user_id', 'users', 'SET NULL'),
+        ],
+        [
+            ('ix_governance_audit_logs_tenant_id', ['tenant_id']),
+            ('ix_audit_tenant_timestamp', ['tenant_id', 'timestamp', 'id']),
+            ('ix_audit_actor', ['actor_user_id']),
+            ('ix_audit_entity', ['entity_type', 'entity_id']),
+            ('ix_audit_action', ['action_type']),
+        ],
+    ),
+    'governance_data_access_logs': (
+        [
+            ('tenant_id', 'tenants', 'CASCADE'),
+            ('user_id', 'users', 'SET NULL'),
+        ],
+        [
+            ('ix_governance_data_access_logs_tenant_id', ['tenant_id']),
+            ('ix_data_access_tenant_timestamp', ['tenant_id', 'timestamp', 'id']),
+            ('ix_data_access_user', ['user_id']),
+            ('ix_data_access_resource', ['accessed_resource']),
+        ],
+    ),
+}
+
+_TRGM_INDEXES = [
+    ('ix_audit_description_trgm', 'description'),
+    ('ix_audit_entity_name_trgm', 'entity_name'),
+    ('ix_audit_actor_email_trgm', 'actor_email'),
+]
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months(first: date, last: date):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def _drop_indexes(table: str, indexes) -> None:
+    for name, _ in indexes:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    if table == 'governance_audit_logs':
+        for name, _ in _TRGM_INDEXES:
+            op.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def _create_indexes(table: str, indexes) -> None:
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+    if table == 'governance_audit_logs':
+        for name, column in _TRGM_INDEXES:
+            op.execute(
+                f'CREATE INDEX {name} ON {table} USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def _add_foreign_keys(table: str, foreign_keys) -> None:
+    for column, target, ondelete in foreign_keys:
+        op.create_foreign_key(
+            f'fk_{table}_{column}', table, target, [column], ['id'], ondelete=ondelete,
+        )
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    bind = op.get_bind()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+
+    for table, (foreign_keys, indexes) in _TABLES.items():
+        legacy = f'{table}_unpartitioned'
+
+        op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        _drop_indexes(table, indexes)
+
+        # Partitioned parent; the partition key must be part of the PK
+        op.execute(
+            f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (timestamp)'
+        )
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, timestamp)')
+        _add_foreign_keys(table, foreign_keys)
+
+        oldest = bind.execute(sa.text(f'SELECT min(timestamp) FROM {legacy}')).scalar()
+        first = oldest.date().replace(day=1) if oldest else current
+        for month in _months(first, _add_months(current, _MONTHS_AHEAD)):
+            end = _add_months(month, 1)
+            op.execute(
+                f'CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} '
+                f'PARTITION OF {table} '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+        op.execute(f'DROP TABLE {legacy}')
+
+        # Created on the parent so every partition inherits them
+        _create_indexes(table, indexes)
+
+    op.create_table(
+        'governance_partition_stats',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('table_name', sa.String(100), nullable=False),
+        sa.Column('month', sa.Date, nullable=False),
+        sa.Column('row_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('tenant_id', 'table_name', 'month', name='uq_governance_partition_stat'),
+    )
+    op.create_index('ix_governance_partition_stats_tenant_id', 'governance_partition_stats', ['tenant_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('governance_partition_stats')
+
+    for table, (foreign_keys, indexes) in _TABLES.items():
+        partitioned = f'{table}_partitioned'
+
+        op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+        _drop_indexes(table, indexes)
+        for column, _, _ in foreign_keys:
+            op.execute(f'ALTER TABLE {partitioned} DROP CONSTRAINT IF EXISTS fk_{table}_{column}')
+
+        op.execute(f'CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id)')
+        _add_foreign_keys(table, foreign_keys)
+
+        # Detached (archived) partitions are not copied back
+        op.execute(f'INSERT INTO {table} SELECT * FROM {partitioned}')
+        op.execute(f'DROP TABLE {partitioned} CASCADE')
+
+        for name, columns in indexes:
+            if name.endswith('_timestamp'):
+                columns = columns[:2]
+            op.create_index(name, table, columns)
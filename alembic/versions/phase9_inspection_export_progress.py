@@ -0,0 +1,30 @@
+"""Inspection export progress
+
+Revision ID: phase9_inspection_export_progress
+Revises: phase9_governance_log_partitions
+Create Date: 2026-10-18
+
+Progress columns for streamed inspection exports (InspectionExportJob).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'phase9_inspection_export_progress'
+down_revision = 'phase9_governance_log_partitions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('governance_inspection_exports', sa.Column('rows_total', sa.Integer, nullable=True))
+    op.add_column('governance_inspection_exports', sa.Column('rows_exported', sa.Integer, nullable=False, server_default='0'))
+    op.add_column('governance_inspection_exports', sa.Column('progress_updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('governance_inspection_exports', 'progress_updated_at')
+    op.drop_column('governance_inspection_exports', 'rows_exported')
+    op.drop_column('governance_inspection_exports', 'rows_total')
@@ -0,0 +1,81 @@
+"""Durable job queue
+
+Revision ID: phase9_job_queue
+Revises: phase9_question_minhashes
+Create Date: 2026-10-18
+
+Adds job_queue: jobs waiting for (or leased by) a JobRunner worker,
+claimed with FOR UPDATE SKIP LOCKED (see app.core.jobs.backends).
+Partial indexes cover the claim scan (queued rows), expired leases
+(running rows) and one active entry per (tenant_id, job_key).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_job_queue'
+down_revision = 'phase9_question_minhashes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_queue',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('job_class', sa.String(100), nullable=False),
+        sa.Column('job_key', sa.String(500), nullable=False),
+        sa.Column('job_type', sa.String(50), nullable=False),
+        sa.Column('params', postgresql.JSONB(), nullable=False, server_default='{}'),
+
+        # Lane and claim order
+        sa.Column('queue', sa.String(30), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='1'),
+
+        # Lease
+        sa.Column('locked_by', sa.String(100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+
+        # Context
+        sa.Column('actor_user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('request_id', sa.String(100), nullable=True),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_job_queue_tenant_id', 'job_queue', ['tenant_id'])
+    op.create_index(
+        'ix_job_queue_ready', 'job_queue', ['priority', 'run_at'],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        'ix_job_queue_leases', 'job_queue', ['locked_until'],
+        postgresql_where=sa.text("status = 'running'"),
+    )
+    op.create_index(
+        'ux_job_queue_active', 'job_queue', ['tenant_id', 'job_key'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_job_queue_active', 'job_queue')
+    op.drop_index('ix_job_queue_leases', 'job_queue')
+    op.drop_index('ix_job_queue_ready', 'job_queue')
+    op.drop_index('ix_job_queue_tenant_id', 'job_queue')
+    op.drop_table('job_queue')
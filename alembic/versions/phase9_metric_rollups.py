@@ -0,0 +1,67 @@
+"""Observability metric rollups
+
+Revision ID: phase9_metric_rollups
+Revises: phase9_inspection_export_progress
+Create Date: 2026-10-18
+
+Adds platform_metric_rollups: per tenant (or platform) and per 5m/1h/1d
+bucket counters plus a latency histogram, written additively by every
+worker (see app.platform.observability.rollups).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_metric_rollups'
+down_revision = 'phase9_inspection_export_progress'
+branch_labels = None
+depends_on = None
+
+
+_COUNTERS = (
+    'request_count',
+    'error_count',
+    'ai_call_count',
+    'ai_tokens_used',
+    'cache_hits',
+    'cache_misses',
+    'circuit_opens',
+    'db_queries',
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'platform_metric_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('resolution', sa.String(8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        *[
+            sa.Column(name, sa.BigInteger, nullable=False, server_default='0')
+            for name in _COUNTERS
+        ],
+        sa.Column('latency_buckets', postgresql.ARRAY(sa.BigInteger), nullable=False),
+        sa.Column('latency_sum_ms', sa.Float, nullable=False, server_default='0'),
+        sa.Column('latency_max_ms', sa.Float, nullable=False, server_default='0'),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('tenant_id', 'resolution', 'bucket_start', name='uq_metric_rollup_bucket'),
+    )
+    op.create_index(
+        'ix_metric_rollup_resolution_bucket', 'platform_metric_rollups',
+        ['resolution', 'bucket_start'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_metric_rollup_resolution_bucket', 'platform_metric_rollups')
+    op.drop_table('platform_metric_rollups')
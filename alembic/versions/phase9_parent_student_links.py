@@ -0,0 +1,74 @@
+"""Parent-student links
+
+Revision ID: phase9_parent_student_links
+Revises: phase9_webhook_inbox
+Create Date: 2026-10-18
+
+Adds parent_student_links (one row per parent and child), which the
+parent portal reads instead of parent_profiles.student_ids. The
+(tenant_id, student_id) index lets fee and attendance writes find the
+parents whose cached dashboards they invalidate.
+
+Links are backfilled from parent_profiles.student_ids; ids that are not
+UUIDs of a user in the same tenant are skipped.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_parent_student_links'
+down_revision = 'phase9_webhook_inbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'parent_student_links',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('parent_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('student_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('relationship_type', sa.String(20), nullable=False, server_default='parent'),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default='true'),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('tenant_id', 'parent_id', 'student_id', name='uq_parent_student_link'),
+    )
+    op.create_index('ix_parent_student_links_tenant_id', 'parent_student_links', ['tenant_id'])
+    op.create_index('ix_parent_student_link_student', 'parent_student_links', ['tenant_id', 'student_id'])
+
+    op.execute("""
+        INSERT INTO parent_student_links (
+            id, tenant_id, parent_id, student_id, relationship_type,
+            is_active, created_at, updated_at, is_deleted
+        )
+        SELECT md5(pp.id::text || s.id::text)::uuid, pp.tenant_id, pp.user_id, s.id,
+               COALESCE(pp.relationship_type, 'parent'), true, now(), now(), false
+        FROM parent_profiles pp
+        CROSS JOIN LATERAL json_array_elements_text(
+            CASE WHEN json_typeof(pp.student_ids::json) = 'array'
+                 THEN pp.student_ids::json ELSE '[]'::json END
+        ) AS linked(value)
+        JOIN users s
+          ON s.id = CASE
+                 WHEN linked.value ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+                 THEN linked.value::uuid
+             END
+         AND s.tenant_id = pp.tenant_id
+        ON CONFLICT ON CONSTRAINT uq_parent_student_link DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_parent_student_link_student', 'parent_student_links')
+    op.drop_index('ix_parent_student_links_tenant_id', 'parent_student_links')
+    op.drop_table('parent_student_links')
@@ -0,0 +1,52 @@
+"""Question MinHash / LSH index
+
+Revision ID: phase9_question_minhashes
+Revises: phase9_usage_limit_counters
+Create Date: 2026-10-18
+
+Adds question_minhashes: MinHash signature and LSH band keys per
+question, with a GIN index on the band keys for near-duplicate lookups
+(see app.ai.near_duplicates). Existing questions are indexed by the
+periodic signature backfill (app.ai.jobs).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_question_minhashes'
+down_revision = 'phase9_usage_limit_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'question_minhashes',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('question_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('signature', postgresql.ARRAY(sa.BigInteger), nullable=False),
+        sa.Column('bands', postgresql.ARRAY(sa.BigInteger), nullable=False),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('question_id', name='uq_question_minhash_question'),
+    )
+    op.create_index('ix_question_minhashes_tenant_id', 'question_minhashes', ['tenant_id'])
+    op.create_index(
+        'ix_qminhash_bands', 'question_minhashes', ['bands'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_qminhash_bands', 'question_minhashes')
+    op.drop_index('ix_question_minhashes_tenant_id', 'question_minhashes')
+    op.drop_table('question_minhashes')
@@ -0,0 +1,71 @@
+"""Content-addressed file storage and storage usage
+
+Revision ID: phase9_stored_files
+Revises: phase9_job_queue
+Create Date: 2026-10-18
+
+Adds stored_files (one row per tenant and content hash, with a
+reference count for deduplicated uploads) and tenant_storage_usage
+(bytes/files stored per tenant, kept current on upload and delete).
+Usage rows are seeded from a walk of the tenant's directory the first
+time they are needed.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_stored_files'
+down_revision = 'phase9_job_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stored_files',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('path', sa.String(500), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('mime_type', sa.String(100), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='1'),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('tenant_id', 'content_hash', name='uq_stored_file_hash'),
+    )
+    op.create_index('ix_stored_files_tenant_id', 'stored_files', ['tenant_id'])
+    op.create_index('ix_stored_files_tenant_path', 'stored_files', ['tenant_id', 'path'])
+
+    op.create_table(
+        'tenant_storage_usage',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('total_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('file_count', sa.Integer(), nullable=False, server_default='0'),
+
+        # Metadata
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+
+        sa.UniqueConstraint('tenant_id', name='uq_tenant_storage_usage_tenant'),
+    )
+    op.create_index('ix_tenant_storage_usage_tenant_id', 'tenant_storage_usage', ['tenant_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tenant_storage_usage_tenant_id', 'tenant_storage_usage')
+    op.drop_table('tenant_storage_usage')
+    op.drop_index('ix_stored_files_tenant_path', 'stored_files')
+    op.drop_index('ix_stored_files_tenant_id', 'stored_files')
+    op.drop_table('stored_files')
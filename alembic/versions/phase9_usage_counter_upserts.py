@@ -0,0 +1,70 @@
+"""Usage counter upserts
+
+Revision ID: phase9_usage_counter_upserts
+Revises: phase9_attendance_rollups
+Create Date: 2026-10-18
+
+Adds a unique (tenant, year, month) key to usage_limits so the
+write-behind usage counter can flush with INSERT ... ON CONFLICT DO UPDATE.
+Duplicate monthly rows are merged into the oldest row first.
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision = 'phase9_usage_counter_upserts'
+down_revision = 'phase9_attendance_rollups'
+branch_labels = None
+depends_on = None
+
+
+_COUNTER_COLUMNS = [
+    'student_count',
+    'teacher_count',
+    'question_count',
+    'ai_requests_used',
+    'ocr_requests_used',
+    'lesson_plan_gen_used',
+    'question_gen_used',
+    'doubt_solver_used',
+    'total_tokens_used',
+    'storage_used_mb',
+]
+
+
+def upgrade() -> None:
+    sums = ', '.join(f'{c} = totals.{c}' for c in _COUNTER_COLUMNS)
+    aggregates = ', '.join(f'SUM(COALESCE({c}, 0)) AS {c}' for c in _COUNTER_COLUMNS)
+    op.execute(f'''
+        WITH ranked AS (
+            SELECT id, tenant_id, year, month,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY tenant_id, year, month ORDER BY created_at, id
+                   ) AS rn
+            FROM usage_limits
+        ),
+        totals AS (
+            SELECT tenant_id, year, month, {aggregates}
+            FROM usage_limits
+            GROUP BY tenant_id, year, month
+            HAVING COUNT(*) > 1
+        )
+        UPDATE usage_limits u SET {sums}
+        FROM ranked, totals
+        WHERE ranked.id = u.id AND ranked.rn = 1
+          AND totals.tenant_id = u.tenant_id
+          AND totals.year = u.year AND totals.month = u.month
+    ''')
+    op.execute('''
+        DELETE FROM usage_limits a USING usage_limits b
+        WHERE a.tenant_id = b.tenant_id AND a.year = b.year AND a.month = b.month
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+    ''')
+    op.create_unique_constraint(
+        'uq_usage_limit_period', 'usage_limits', ['tenant_id', 'year', 'month'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_usage_limit_period', 'usage_limits', type_='unique')
@@ -0,0 +1,78 @@
+"""Shared usage-limit counters and billing signals
+
+Revision ID: phase9_usage_limit_counters
+Revises: phase9_metric_rollups
+Create Date: 2026-10-18
+
+Adds platform_usage_counters (per tenant, usage type and reset period;
+durable copy of the Redis quota counters) and platform_billing_signals
+(batched overage / limit signals), see app.platform.control.usage_store.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers
+revision = 'phase9_usage_limit_counters'
+down_revision = 'phase9_metric_rollups'
+branch_labels = None
+depends_on = None
+
+
+def _metadata_columns():
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'platform_usage_counters',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('usage_type', sa.String(50), nullable=False),
+        sa.Column('period_key', sa.String(10), nullable=False),
+        sa.Column('count', sa.BigInteger, nullable=False, server_default='0'),
+
+        # Metadata
+        *_metadata_columns(),
+
+        sa.UniqueConstraint('tenant_id', 'usage_type', 'period_key', name='uq_usage_counter_period'),
+    )
+
+    op.create_table(
+        'platform_billing_signals',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('signal_type', sa.String(30), nullable=False),
+        sa.Column('usage_type', sa.String(50), nullable=False),
+        sa.Column('amount', sa.BigInteger, nullable=False, server_default='0'),
+        sa.Column('cost', sa.Float, nullable=False, server_default='0'),
+        sa.Column('signal_count', sa.Integer, nullable=False, server_default='1'),
+        sa.Column('first_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+
+        # Metadata
+        *_metadata_columns(),
+    )
+    op.create_index(
+        'ix_billing_signal_tenant_last', 'platform_billing_signals',
+        ['tenant_id', 'last_at'],
+    )
+    op.create_index(
+        'ix_billing_signal_unprocessed', 'platform_billing_signals',
+        ['processed_at', 'last_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_billing_signal_unprocessed', 'platform_billing_signals')
+    op.drop_index('ix_billing_signal_tenant_last', 'platform_billing_signals')
+    op.drop_table('platform_billing_signals')
+    op.drop_table('platform_usage_counters')
@@ -0,0 +1,87 @@
+"""Payment webhook inbox
+
+Revision ID: phase9_webhook_inbox
+Revises: phase9_stored_files
+Create Date: 2026-10-18
+
+Turns webhook_events into a durable inbox (see app.payments.webhooks):
+- unique (gateway, event_id), so redeliveries are dropped on insert
+- status / attempts / next_attempt_at / locked_until for the background
+  consumer, ordering_key for per-order ordering
+- (tenant_id, gateway_order_id) and (tenant_id, gateway_refund_id)
+  indexes for the webhook handlers
+
+Existing processed events become "processed"; unprocessed ones become
+"dead" (they can be re-queued through the API). Duplicate events keep
+their oldest row.
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision = 'phase9_webhook_inbox'
+down_revision = 'phase9_stored_files'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Columns the model has but older schemas may lack
+    op.execute("ALTER TABLE webhook_events ADD COLUMN IF NOT EXISTS event_id VARCHAR(100)")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN IF NOT EXISTS is_deleted BOOLEAN NOT NULL DEFAULT false")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ")
+    op.execute("UPDATE webhook_events SET event_id = id::text WHERE event_id IS NULL")
+    op.execute("UPDATE webhook_events SET created_at = now() WHERE created_at IS NULL")
+    op.execute("UPDATE webhook_events SET updated_at = created_at WHERE updated_at IS NULL")
+
+    # Inbox state
+    op.execute("ALTER TABLE webhook_events ADD COLUMN ordering_key VARCHAR(200)")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'pending'")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now()")
+    op.execute("ALTER TABLE webhook_events ADD COLUMN locked_until TIMESTAMPTZ")
+    op.execute("""
+        UPDATE webhook_events
+        SET status = CASE WHEN is_processed THEN 'processed' ELSE 'dead' END,
+            ordering_key = COALESCE(
+                payload::jsonb #>> '{payload,payment,entity,order_id}',
+                payload::jsonb #>> '{payload,order,entity,id}',
+                payload::jsonb #>> '{payload,refund,entity,payment_id}'
+            )
+    """)
+
+    op.execute("""
+        DELETE FROM webhook_events w
+        USING webhook_events older
+        WHERE w.gateway = older.gateway
+          AND w.event_id = older.event_id
+          AND (older.created_at, older.id) < (w.created_at, w.id)
+    """)
+    op.execute("ALTER TABLE webhook_events ALTER COLUMN event_id SET NOT NULL")
+    op.create_unique_constraint('uq_webhook_gateway_event', 'webhook_events', ['gateway', 'event_id'])
+    op.create_index('ix_webhook_inbox', 'webhook_events', ['status', 'next_attempt_at'])
+    op.create_index('ix_webhook_ordering', 'webhook_events', ['ordering_key', 'created_at'])
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_payment_order_gateway_order "
+        "ON payment_orders (tenant_id, gateway_order_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_refund_gateway_refund "
+        "ON payment_refunds (tenant_id, gateway_refund_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_refund_gateway_refund")
+    op.execute("DROP INDEX IF EXISTS ix_payment_order_gateway_order")
+    op.drop_index('ix_webhook_ordering', 'webhook_events')
+    op.drop_index('ix_webhook_inbox', 'webhook_events')
+    op.drop_constraint('uq_webhook_gateway_event', 'webhook_events', type_='unique')
+    op.execute("ALTER TABLE webhook_events DROP COLUMN locked_until")
+    op.execute("ALTER TABLE webhook_events DROP COLUMN next_attempt_at")
+    op.execute("ALTER TABLE webhook_events DROP COLUMN attempts")
+    op.execute("ALTER TABLE webhook_events DROP COLUMN status")
+    op.execute("ALTER TABLE webhook_events DROP COLUMN ordering_key")
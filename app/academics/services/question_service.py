@@ -2,6 +2,7 @@
 CUSTOS Question Service
 """
 
+import logging
 from datetime import datetime, timezone
 from typing import Optional, List, Tuple
 from uuid import UUID
@@ -14,6 +15,8 @@ from app.academics.models.questions import (
     Question, QuestionType, DifficultyLevel, BloomLevel, QuestionStatus,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class QuestionService:
     """Question bank management."""
@@ -65,8 +68,20 @@ class QuestionService:
         self.session.add(question)
         await self.session.commit()
         await self.session.refresh(question)
+        await self._record_near_duplicates(question)
         return question
     
+    async def _record_near_duplicates(self, question: Question) -> None:
+        """Flag near-duplicates of a new question and index it (best effort)."""
+        from app.ai.quality_service import AIQualityService
+        
+        try:
+            await AIQualityService(self.session, self.tenant_id).index_questions([question])
+            await self.session.commit()
+        except Exception as e:
+            logger.warning(f"Near-duplicate indexing failed for question {question.id}: {e}")
+            await self.session.rollback()
+    
     async def get_questions(
         self,
         subject_id: Optional[UUID] = None,
@@ -0,0 +1,599 @@
+"""
+CUSTOS AI Gateway
+
+Single entry point for AI provider calls.
+
+- One provider (and one pooled HTTP client) per process: get_ai_gateway()
+- Concurrency caps: at most settings.ai_tenant_concurrency calls per
+  tenant and settings.ai_max_concurrency calls per process; a tenant
+  waits for its own slot before taking a global one
+- Request coalescing: identical requests in flight for a tenant share
+  one provider call
+- Response cache: content-addressed on (model, messages, schema,
+  temperature, max_tokens), per tenant, for deterministic requests
+  (temperature <= settings.ai_cache_max_temperature, or cache=True).
+  Redis when connected, a bounded in-process LRU otherwise
+- Token usage comes from the provider response (for streams, the usage
+  reported at the end of the stream); coalesced and cached responses
+  bill 0 tokens
+- Streaming (stream_structured): items of a JSON array are yielded as
+  they complete; streams hold a concurrency slot but are never cached
+  or coalesced
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.ai.providers.base import AIProvider, Completion, parse_json, structured_messages
+from app.ai.streaming import JSONArrayStreamParser
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AIResponse:
+    """A provider response as seen by services."""
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    data: Any = None  # Parsed JSON for structured calls
+    cached: bool = False  # Served from the cache or another caller's request
+    
+    @property
+    def tokens_used(self) -> int:
+        """Tokens this call cost (0 when it made no provider request)."""
+        if self.cached:
+            return 0
+        return self.prompt_tokens + self.completion_tokens
+
+
+class StructuredStream:
+    """
+    Objects of one JSON array in a streamed response, as they complete.
+    
+    Iterate once. Afterwards content holds the full text and data the
+    parsed response (or {array_key: items} if the whole text is not
+    valid JSON). Token counts are the usage the provider reports at the
+    end of the stream; until then (or if the stream is cut short)
+    completion_tokens counts content deltas (about one token each) and
+    prompt_tokens is estimated from the prompt length.
+    """
+    
+    def __init__(
+        self,
+        gateway: "AIGateway",
+        messages: List[dict],
+        tenant_id: Optional[UUID],
+        array_key: Optional[str],
+        schema: Optional[dict],
+        model: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        feature: str,
+    ):
+        self._gateway = gateway
+        self._messages = messages
+        self._tenant_id = tenant_id
+        self._array_key = array_key
+        self._schema = schema
+        self._model = model
+        self._max_tokens = max_tokens
+        self._temperature = temperature
+        self._feature = feature
+        
+        self.content = ""
+        self.data: Any = None
+        self.prompt_tokens = len(json.dumps(messages, default=str)) // 4
+        self.completion_tokens = 0
+    
+    @property
+    def tokens_used(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+    
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        parser = JSONArrayStreamParser(self._array_key)
+        pieces = []
+        try:
+            async with self._gateway._slot(self._tenant_id):
+                self._gateway.provider_calls += 1
+                async for delta in self._gateway.provider.stream(
+                    self._messages,
+                    model=self._model,
+                    max_tokens=self._max_tokens,
+                    temperature=self._temperature,
+                    schema=self._schema,
+                ):
+                    if isinstance(delta, Completion):
+                        self.prompt_tokens = delta.prompt_tokens
+                        self.completion_tokens = delta.completion_tokens
+                        continue
+                    pieces.append(delta)
+                    self.completion_tokens += 1
+                    for item in parser.feed(delta):
+                        yield item
+        finally:
+            self.content = "".join(pieces)
+            if self._tenant_id is not None:
+                self._gateway._record_usage(self._tenant_id, self.tokens_used, self._feature)
+        
+        try:
+            self.data = parse_json(self.content)
+        except json.JSONDecodeError as e:
+            if not parser.items:
+                raise ValueError(f"AI response is not valid JSON: {e}") from e
+            self.data = {self._array_key: parser.items} if self._array_key else parser.items
+
+
+class AIGateway:
+    """Concurrency-limited, coalescing, caching front of an AIProvider."""
+    
+    MAX_LOCAL_ENTRIES = 512
+    
+    def __init__(
+        self,
+        provider: AIProvider,
+        max_concurrency: Optional[int] = None,
+        tenant_concurrency: Optional[int] = None,
+        cache_ttl: Optional[int] = None,
+    ):
+        self.provider = provider
+        self.max_concurrency = max_concurrency or settings.ai_max_concurrency
+        self.tenant_concurrency = tenant_concurrency or settings.ai_tenant_concurrency
+        self.cache_ttl = cache_ttl if cache_ttl is not None else settings.ai_cache_ttl_seconds
+        
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._tenants: Dict[Optional[UUID], asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._local: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        
+        self.provider_calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+    
+    # ============================================
+    # Core
+    # ============================================
+    
+    async def complete(
+        self,
+        messages: List[dict],
+        tenant_id: Optional[UUID] = None,
+        *,
+        model: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        schema: Optional[dict] = None,
+        cache: Optional[bool] = None,
+        feature: str = "ai",
+    ) -> AIResponse:
+        """
+        Run a completion through the gateway.
+        
+        With a schema the content is parsed into AIResponse.data (ValueError
+        if it is not valid JSON; such responses are never cached).
+        """
+        digest = self._digest(messages, model, max_tokens, temperature, schema)
+        key = f"{tenant_id}:{digest}"
+        cacheable = cache if cache is not None else temperature <= settings.ai_cache_max_temperature
+        
+        if cacheable and self.cache_ttl > 0:
+            hit = await self._cache_get(tenant_id, digest)
+            if hit is not None:
+                self.cache_hits += 1
+                return AIResponse(cached=True, **hit)
+        
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            response = await asyncio.shield(pending)
+            return replace(response, cached=True)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._slot(tenant_id):
+                self.provider_calls += 1
+                completion = await self.provider.complete(
+                    messages,
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    schema=schema,
+                )
+            response = self._response(completion, schema)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when no one else waits
+            raise
+        finally:
+            del self._inflight[key]
+        
+        future.set_result(response)
+        
+        if tenant_id is not None:
+            self._record_usage(tenant_id, response.tokens_used, feature)
+        if cacheable and self.cache_ttl > 0:
+            await self._cache_set(tenant_id, digest, response)
+        return response
+    
+    @staticmethod
+    def _response(completion: Completion, schema: Optional[dict]) -> AIResponse:
+        data = None
+        if schema is not None:
+            try:
+                data = parse_json(completion.content)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"AI response is not valid JSON: {e}") from e
+        return AIResponse(
+            content=completion.content,
+            model=completion.model,
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+            data=data,
+        )
+    
+    @staticmethod
+    def _digest(messages, model, max_tokens, temperature, schema) -> str:
+        payload = json.dumps(
+            {
+                "model": model or settings.openai_model,
+                "messages": messages,
+                "schema": schema,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    @asynccontextmanager
+    async def _slot(self, tenant_id: Optional[UUID]):
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            tenant = self._tenants[tenant_id] = asyncio.Semaphore(self.tenant_concurrency)
+        async with tenant:
+            async with self._global:
+                yield
+    
+    @staticmethod
+    def _record_usage(tenant_id: UUID, tokens: int, feature: str) -> None:
+        try:
+            from app.platform.observability.metrics import record_ai_call
+            record_ai_call(tenant_id, tokens_used=tokens, feature=feature)
+        except Exception as e:
+            logger.debug(f"AI usage metric not recorded: {e}")
+    
+    # ============================================
+    # Response cache
+    # ============================================
+    
+    async def _cache_get(self, tenant_id: Optional[UUID], digest: str) -> Optional[dict]:
+        from app.core.cache import CacheKeys, get_cache
+        
+        cache = await get_cache()
+        if cache.is_connected:
+            return await cache.get(CacheKeys.ai_response(tenant_id, digest))
+        
+        entry = self._local.get(f"{tenant_id}:{digest}")
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._local[f"{tenant_id}:{digest}"]
+            return None
+        self._local.move_to_end(f"{tenant_id}:{digest}")
+        return value
+    
+    async def _cache_set(self, tenant_id: Optional[UUID], digest: str, response: AIResponse) -> None:
+        from app.core.cache import CacheKeys, get_cache
+        
+        value = {
+            "content": response.content,
+            "model": response.model,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+            "data": response.data,
+        }
+        cache = await get_cache()
+        if cache.is_connected:
+            await cache.set(CacheKeys.ai_response(tenant_id, digest), value, ttl=self.cache_ttl)
+            return
+        
+        self._local[f"{tenant_id}:{digest}"] = (time.monotonic() + self.cache_ttl, value)
+        self._local.move_to_end(f"{tenant_id}:{digest}")
+        while len(self._local) > self.MAX_LOCAL_ENTRIES:
+            self._local.popitem(last=False)
+    
+    # ============================================
+    # Convenience
+    # ============================================
+    
+    async def generate_text(
+        self,
+        prompt: str,
+        tenant_id: Optional[UUID] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        feature: str = "ai_text",
+    ) -> AIResponse:
+        """Plain text completion."""
+        return await self.complete(
+            [{"role": "user", "content": prompt}],
+            tenant_id,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            feature=feature,
+        )
+    
+    async def generate_structured(
+        self,
+        prompt: str,
+        schema: dict,
+        tenant_id: Optional[UUID] = None,
+        temperature: float = 0.5,
+        cache: Optional[bool] = None,
+        feature: str = "ai_structured",
+    ) -> AIResponse:
+        """JSON completion matching schema (parsed into .data)."""
+        return await self.complete(
+            structured_messages(prompt, schema),
+            tenant_id,
+            max_tokens=settings.openai_max_tokens,
+            temperature=temperature,
+            schema=schema,
+            cache=cache,
+            feature=feature,
+        )
+    
+    def stream_structured(
+        self,
+        prompt: str,
+        schema: dict,
+        array_key: Optional[str],
+        tenant_id: Optional[UUID] = None,
+        temperature: float = 0.5,
+        feature: str = "ai_structured",
+    ) -> StructuredStream:
+        """Stream a JSON completion, yielding the objects of data[array_key]."""
+        return StructuredStream(
+            self,
+            structured_messages(prompt, schema),
+            tenant_id,
+            array_key,
+            schema,
+            model=None,
+            max_tokens=settings.openai_max_tokens,
+            temperature=temperature,
+            feature=feature,
+        )
+    
+    async def generate_lesson_plan(
+        self,
+        tenant_id: UUID,
+        subject: str,
+        topic: str,
+        grade_level: int,
+        duration_minutes: int = 45,
+    ) -> AIResponse:
+        """Generate lesson plan."""
+        prompt = f"""Create a detailed lesson plan for:
+Subject: {subject}
+Topic: {topic}
+Grade Level: {grade_level}
+Duration: {duration_minutes} minutes
+
+Include:
+1. Learning objectives (3-5)
+2. Introduction/Hook (5 min)
+3. Main content with activities
+4. Assessment questions
+5. Homework assignment
+6. Resources needed"""
+
+        schema = {
+            "objectives": ["list of objectives"],
+            "introduction": "string",
+            "content": ["list of content sections"],
+            "activities": ["list of activities"],
+            "assessment": ["list of questions"],
+            "homework": "string",
+            "resources": ["list of resources"]
+        }
+        
+        return await self.generate_structured(prompt, schema, tenant_id, feature="lesson_plan")
+    
+    async def generate_questions(
+        self,
+        tenant_id: UUID,
+        subject: str,
+        topic: str,
+        question_type: str,
+        count: int,
+        difficulty: str = "medium",
+    ) -> AIResponse:
+        """Generate questions (data["questions"])."""
+        prompt = f"""Generate {count} {question_type} questions about:
+Subject: {subject}
+Topic: {topic}
+Difficulty: {difficulty}
+
+For MCQ, include 4 options with correct answer marked.
+For short answer, include expected answer.
+Include explanation for each answer."""
+
+        schema = {
+            "questions": [
+                {
+                    "question": "string",
+                    "type": question_type,
+                    "options": ["for MCQ only"],
+                    "correct_answer": "string",
+                    "explanation": "string"
+                }
+            ]
+        }
+        
+        return await self.generate_structured(prompt, schema, tenant_id, feature="question_gen")
+    
+    async def solve_doubt(
+        self,
+        tenant_id: UUID,
+        question: str,
+        subject: str,
+        context: Optional[str] = None,
+    ) -> AIResponse:
+        """Answer student doubt."""
+        context_text = f"\nContext: {context}" if context else ""
+        
+        prompt = f"""A student has a doubt about {subject}:{context_text}
+
+Question: {question}
+
+Provide:
+1. A clear, step-by-step explanation
+2. Examples if helpful
+3. Related concepts to review
+4. Practice problems"""
+
+        schema = {
+            "answer": "string",
+            "steps": ["step by step explanation"],
+            "examples": ["optional examples"],
+            "related_concepts": ["concepts to review"],
+            "practice_problems": ["practice questions"]
+        }
+        
+        return await self.generate_structured(prompt, schema, tenant_id, feature="doubt_solver")
+    
+    async def process_exam_ocr(
+        self,
+        tenant_id: UUID,
+        image_base64: str,
+        image_type: str = "image/jpeg",
+        exam_context: Optional[str] = None,
+    ) -> AIResponse:
+        """
+        Process exam answer sheet using GPT-4 Vision.
+        
+        Extracts:
+        - Student identifiers (name/roll number)
+        - Total marks
+        - Marks obtained
+        - Wrong question numbers
+        
+        Never cached (student marks). Unparseable output is returned as a
+        failed result in .data.
+        """
+        context_text = f"\n{exam_context}" if exam_context else ""
+        
+        prompt = f"""Analyze this exam answer sheet or marks register image.{context_text}
+
+Extract the following information for each student visible:
+1. Student identifier (name or roll number)
+2. Total marks possible
+3. Marks obtained
+4. List of attempted question numbers (if visible)
+5. List of wrong question numbers (questions marked wrong or with deductions)
+
+Be precise with numbers. If you cannot read something clearly, indicate low confidence."""
+
+        schema = {
+            "success": "boolean",
+            "exam_title": "title if visible, else null",
+            "total_students": "number of students extracted",
+            "students": [
+                {
+                    "student_identifier": "name or roll number",
+                    "total_marks": "number",
+                    "marks_obtained": "number",
+                    "attempted_questions": ["list of integers"],
+                    "wrong_questions": ["list of integers"],
+                    "confidence": "0.0 to 1.0"
+                }
+            ],
+            "errors": ["any issues encountered"]
+        }
+        
+        messages = structured_messages(
+            prompt,
+            schema,
+            system="""You are an expert OCR system specialized in reading exam answer sheets and mark registers.
+You must extract student results accurately.""",
+        )
+        messages[1]["content"] = [
+            {"type": "text", "text": prompt},
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{image_type};base64,{image_base64}",
+                    "detail": "high"
+                }
+            }
+        ]
+        
+        try:
+            return await self.complete(
+                messages,
+                tenant_id,
+                model=getattr(settings, 'openai_vision_model', 'gpt-4o'),
+                max_tokens=settings.openai_max_tokens,
+                temperature=0.2,  # Low temperature for accuracy
+                schema=schema,
+                cache=False,
+                feature="ocr",
+            )
+        except ValueError:
+            return AIResponse(
+                content="",
+                model=getattr(settings, 'openai_vision_model', 'gpt-4o'),
+                data={
+                    "success": False,
+                    "exam_title": None,
+                    "total_students": 0,
+                    "students": [],
+                    "errors": ["Failed to parse OCR response as JSON"]
+                },
+            )
+    
+    async def close(self) -> None:
+        await self.provider.close()
+
+
+# ============================================
+# Global gateway
+# ============================================
+
+_gateway: Optional[AIGateway] = None
+
+
+def get_ai_gateway() -> AIGateway:
+    """Get the process's AI gateway (provider from settings.ai_provider)."""
+    global _gateway
+    if _gateway is None:
+        if settings.ai_provider == "stub":
+            from app.ai.providers.stub import StubProvider
+            provider: AIProvider = StubProvider()
+        else:
+            from app.ai.providers.openai import OpenAIProvider
+            provider = OpenAIProvider()
+        _gateway = AIGateway(provider)
+    return _gateway
+
+
+async def close_ai_gateway() -> None:
+    """Close the gateway's provider connections (shutdown)."""
+    global _gateway
+    if _gateway is not None:
+        await _gateway.close()
+        _gateway = None
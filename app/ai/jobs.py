@@ -0,0 +1,74 @@
+"""
+CUSTOS AI Background Jobs
+"""
+
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.jobs import AbstractJob, JobType, register_job, register_periodic
+
+
+@register_periodic("question_signature_backfill", interval_seconds=15 * 60)
+async def question_signature_backfill() -> None:
+    """Every 15 minutes: index questions missing from the near-duplicate index."""
+    from app.ai.near_duplicates import backfill_signatures
+
+    await backfill_signatures()
+
+
+@register_job
+class OCRProcessJob(AbstractJob):
+    """
+    Run OCR for an uploaded answer sheet (all its pages).
+    
+    Queued by OCRService.upload_and_create_job; the OCR job's status
+    (pending -> processing -> completed/failed) is what clients poll.
+    """
+    
+    job_type = JobType.OCR_PROCESS
+    
+    def __init__(
+        self,
+        tenant_id: UUID,
+        ocr_job_id: UUID,
+        run_number: int = 1,
+        requested_by: Optional[UUID] = None,
+    ):
+        super().__init__(tenant_id)
+        # Queued jobs are rebuilt from their string params
+        self.ocr_job_id = UUID(str(ocr_job_id))
+        self.run_number = int(run_number)
+        self.requested_by = UUID(str(requested_by)) if requested_by else None
+        self._actor_user_id = self.requested_by
+    
+    def get_job_key(self) -> str:
+        """Unique per processing run, so a failed job can be reprocessed."""
+        return f"ocr_process:{self.ocr_job_id}:{self.run_number}"
+    
+    def get_entity_type(self) -> str:
+        return "OCR_JOB"
+    
+    def get_entity_id(self) -> Optional[UUID]:
+        return self.ocr_job_id
+    
+    def _get_serializable_params(self) -> dict:
+        return {
+            "ocr_job_id": str(self.ocr_job_id),
+            "run_number": self.run_number,
+            "requested_by": str(self.requested_by) if self.requested_by else None,
+        }
+    
+    async def execute(self, session: AsyncSession) -> Any:
+        """Process the OCR job."""
+        from app.ai.ocr_service import OCRService
+        
+        service = OCRService(session, self.tenant_id)
+        job = await service.process_job(self.ocr_job_id)
+        
+        return {
+            "ocr_job_id": str(self.ocr_job_id),
+            "status": job.status.value,
+            "results_extracted": job.results_extracted,
+        }
@@ -9,7 +9,7 @@ Generates structured lesson plans using AI with:
 """
 
 from datetime import datetime, date
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 from uuid import UUID
 import json
 
@@ -32,7 +32,8 @@ from app.ai.schemas import (
     AITopicAllocation,
     AIOutputSnapshot,
 )
-from app.ai.providers.openai import OpenAIProvider
+from app.ai.gateway import AIResponse, get_ai_gateway
+from app.platform.usage.counter import usage_counter
 from app.academics.models.lesson_plans import LessonPlan, LessonPlanUnit, LessonPlanStatus
 from app.academics.models.syllabus import SyllabusSubject, Chapter, SyllabusTopic
 from app.academics.models.structure import Class
@@ -66,7 +67,7 @@ class AILessonPlanService:
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
-        self.provider = OpenAIProvider()
+        self.gateway = get_ai_gateway()
     
     async def generate_lesson_plan(
         self,
@@ -84,6 +85,90 @@ class AILessonPlanService:
         5. Create lesson plan and units
         6. Update job with result
         """
+        job, context = await self._start_job(teacher_id, request)
+        
+        try:
+            # 6. Call AI for period allocation
+            response = await self._call_ai_for_allocation(
+                topics=context["topics"],
+                total_periods=context["total_periods"],
+                preferences=request.preferences,
+                class_name=context["class_info"]["name"],
+                subject_name=context["subject_info"]["name"],
+            )
+            
+            return await self._finish_job(
+                job, teacher_id, request, context, response.data, response.tokens_used,
+            )
+            
+        except Exception as e:
+            await self._fail_job(job, e)
+            raise
+    
+    async def stream_lesson_plan(
+        self,
+        teacher_id: UUID,
+        request: GenerateAILessonPlanRequest,
+    ) -> AsyncIterator[dict]:
+        """
+        Generate AI lesson plan, yielding each topic allocation as the
+        model produces it. The plan is created once the response is
+        complete.
+        
+        Yields:
+            {"event": "job", "data": {job_id, total_topics, total_periods}}
+            {"event": "unit", "data": {topic_id, topic_name, estimated_periods, notes, order}}
+            {"event": "done", "data": <GenerateAILessonPlanResponse>}
+        """
+        job, context = await self._start_job(teacher_id, request)
+        topics = context["topics"]
+        yield {"event": "job", "data": {
+            "job_id": str(job.id),
+            "total_topics": len(topics),
+            "total_periods": context["total_periods"],
+        }}
+        
+        try:
+            prompt, schema = self._allocation_prompt(
+                topics=topics,
+                total_periods=context["total_periods"],
+                preferences=request.preferences,
+                class_name=context["class_info"]["name"],
+                subject_name=context["subject_info"]["name"],
+            )
+            stream = self.gateway.stream_structured(
+                prompt, schema, "allocations", self.tenant_id, feature="lesson_plan",
+            )
+            order = 0
+            async for alloc in stream:
+                topic = self._topic_for_allocation(alloc, topics)
+                if topic is None:
+                    continue
+                order += 1
+                yield {"event": "unit", "data": {
+                    "topic_id": str(topic["id"]),
+                    "topic_name": topic["name"],
+                    "estimated_periods": alloc.get("estimated_periods", 1),
+                    "notes": alloc.get("notes"),
+                    "order": order,
+                }}
+            
+            result = await self._finish_job(
+                job, teacher_id, request, context, stream.data, stream.tokens_used,
+            )
+            
+        except Exception as e:
+            await self._fail_job(job, e)
+            raise
+        
+        yield {"event": "done", "data": result.model_dump(mode="json")}
+    
+    async def _start_job(
+        self,
+        teacher_id: UUID,
+        request: GenerateAILessonPlanRequest,
+    ) -> Tuple[AILessonPlanJob, dict]:
+        """Quota check, input gathering and a RUNNING job record."""
         # 1. Check usage quota
         await self._check_ai_quota()
         
@@ -128,81 +213,92 @@ class AILessonPlanService:
             input_snapshot=input_snapshot,
         )
         
-        try:
-            # 5. Update job status
-            job.status = AIJobStatus.RUNNING
-            job.started_at = datetime.utcnow()
-            await self.session.flush()
-            
-            # 6. Call AI for period allocation
-            ai_response = await self._call_ai_for_allocation(
-                topics=topics,
-                total_periods=total_periods,
-                preferences=request.preferences,
-                class_name=class_info["name"],
-                subject_name=subject_info["name"],
-            )
-            
-            job.output_snapshot = ai_response
-            
-            # 7. Parse AI response
-            allocations = self._parse_ai_response(ai_response, topics)
-            
-            # 8. Create lesson plan
-            title = request.title or f"{subject_info['name']} Lesson Plan - {class_info['name']}"
-            
-            lesson_plan = await self._create_lesson_plan(
-                teacher_id=teacher_id,
-                class_id=request.class_id,
-                section_id=request.section_id,
-                subject_id=request.subject_id,
-                syllabus_subject_id=request.syllabus_subject_id,
-                title=title,
-                start_date=request.start_date,
-                end_date=request.end_date,
-                allocations=allocations,
-                topics=topics,
-            )
-            
-            # 9. Update job
-            job.status = AIJobStatus.COMPLETED
-            job.completed_at = datetime.utcnow()
-            job.lesson_plan_id = lesson_plan.id
-            await self.session.flush()
-            
-            # 10. Increment usage
-            await self._increment_ai_usage()
-            
-            # Build response
-            units_info = [
-                GeneratedUnitInfo(
-                    topic_id=unit.topic_id,
-                    topic_name=next((t["name"] for t in topics if str(t["id"]) == str(unit.topic_id)), ""),
-                    estimated_periods=unit.estimated_periods,
-                    notes=unit.notes,
-                    order=unit.order,
-                )
-                for unit in lesson_plan.units
-            ]
-            
-            return GenerateAILessonPlanResponse(
-                job_id=job.id,
-                lesson_plan_id=lesson_plan.id,
-                title=title,
-                total_units=len(lesson_plan.units),
-                total_periods=lesson_plan.total_periods,
-                start_date=request.start_date,
-                end_date=request.end_date,
-                units=units_info,
+        # 5. Update job status
+        job.status = AIJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        await self.session.flush()
+        
+        return job, {
+            "topics": topics,
+            "class_info": class_info,
+            "subject_info": subject_info,
+            "total_periods": total_periods,
+        }
+    
+    async def _finish_job(
+        self,
+        job: AILessonPlanJob,
+        teacher_id: UUID,
+        request: GenerateAILessonPlanRequest,
+        context: dict,
+        ai_response: dict,
+        tokens_used: int,
+    ) -> GenerateAILessonPlanResponse:
+        """Create the plan from the AI response and complete the job."""
+        topics = context["topics"]
+        class_info = context["class_info"]
+        subject_info = context["subject_info"]
+        
+        job.output_snapshot = ai_response
+        job.tokens_used = tokens_used
+        
+        # 7. Parse AI response
+        allocations = self._parse_ai_response(ai_response, topics)
+        
+        # 8. Create lesson plan
+        title = request.title or f"{subject_info['name']} Lesson Plan - {class_info['name']}"
+        
+        lesson_plan = await self._create_lesson_plan(
+            teacher_id=teacher_id,
+            class_id=request.class_id,
+            section_id=request.section_id,
+            subject_id=request.subject_id,
+            syllabus_subject_id=request.syllabus_subject_id,
+            title=title,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            allocations=allocations,
+            topics=topics,
+        )
+        
+        # 9. Update job
+        job.status = AIJobStatus.COMPLETED
+        job.completed_at = datetime.utcnow()
+        job.lesson_plan_id = lesson_plan.id
+        await self.session.flush()
+        
+        # 10. Increment usage
+        await self._increment_ai_usage()
+        
+        # Build response
+        units_info = [
+            GeneratedUnitInfo(
+                topic_id=unit.topic_id,
+                topic_name=next((t["name"] for t in topics if str(t["id"]) == str(unit.topic_id)), ""),
+                estimated_periods=unit.estimated_periods,
+                notes=unit.notes,
+                order=unit.order,
             )
-            
-        except Exception as e:
-            # Update job with error
-            job.status = AIJobStatus.FAILED
-            job.error_message = str(e)
-            job.completed_at = datetime.utcnow()
-            await self.session.flush()
-            raise
+            for unit in lesson_plan.units
+        ]
+        
+        return GenerateAILessonPlanResponse(
+            job_id=job.id,
+            lesson_plan_id=lesson_plan.id,
+            title=title,
+            total_units=len(lesson_plan.units),
+            total_periods=lesson_plan.total_periods,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            units=units_info,
+        )
+    
+    async def _fail_job(self, job: AILessonPlanJob, error: Exception) -> None:
+        # Update job with error
+        job.status = AIJobStatus.FAILED
+        job.error_message = str(error)
+        job.completed_at = datetime.utcnow()
+        await self.session.flush()
     
     # ============================================
     # Data Gathering
@@ -364,8 +460,24 @@ class AILessonPlanService:
         preferences: LessonPlanPreferences,
         class_name: str,
         subject_name: str,
-    ) -> dict:
+    ) -> AIResponse:
         """Call AI to allocate periods to topics."""
+        prompt, schema = self._allocation_prompt(
+            topics, total_periods, preferences, class_name, subject_name,
+        )
+        return await self.gateway.generate_structured(
+            prompt, schema, self.tenant_id, feature="lesson_plan",
+        )
+    
+    def _allocation_prompt(
+        self,
+        topics: List[dict],
+        total_periods: int,
+        preferences: LessonPlanPreferences,
+        class_name: str,
+        subject_name: str,
+    ) -> Tuple[str, dict]:
+        """Prompt and response schema for period allocation."""
         # Build prompt
         topics_text = "\n".join([
             f"{i+1}. {t['name']} (Unit: {t['unit_name']})"
@@ -418,7 +530,19 @@ Return a JSON object with allocations."""
             "teaching_notes": "optional overall notes"
         }
         
-        return await self.provider.generate_structured(prompt, schema)
+        return prompt, schema
+    
+    def _topic_for_allocation(self, alloc: dict, topics: List[dict]) -> Optional[dict]:
+        """Topic an allocation refers to (topic_index is 1-indexed)."""
+        topic_index = alloc.get("topic_index", 0)
+        if isinstance(topic_index, str):
+            try:
+                topic_index = int(topic_index)
+            except ValueError:
+                return None
+        if isinstance(topic_index, int) and 1 <= topic_index <= len(topics):
+            return topics[topic_index - 1]
+        return None
     
     def _parse_ai_response(
         self,
@@ -431,16 +555,8 @@ Return a JSON object with allocations."""
         raw_allocations = response.get("allocations", [])
         
         for alloc in raw_allocations:
-            # Get topic index (1-indexed)
-            topic_index = alloc.get("topic_index", 0)
-            if isinstance(topic_index, str):
-                try:
-                    topic_index = int(topic_index)
-                except ValueError:
-                    continue
-            
-            if 1 <= topic_index <= len(topics):
-                topic = topics[topic_index - 1]
+            topic = self._topic_for_allocation(alloc, topics)
+            if topic is not None:
                 allocations.append(AITopicAllocation(
                     topic_id=str(topic["id"]),
                     estimated_periods=alloc.get("estimated_periods", 1),
@@ -540,7 +656,7 @@ Return a JSON object with allocations."""
             syllabus_subject_id=syllabus_subject_id,
             input_snapshot=input_snapshot,
             status=AIJobStatus.PENDING,
-            ai_provider="openai",
+            ai_provider=self.gateway.provider.name,
         )
         self.session.add(job)
         await self.session.flush()
@@ -594,48 +710,24 @@ Return a JSON object with allocations."""
         from app.billing.models import UsageLimit
         
         now = datetime.now()
-        query = select(UsageLimit).where(
+        query = select(UsageLimit.ai_requests_used).where(
             UsageLimit.tenant_id == self.tenant_id,
             UsageLimit.year == now.year,
             UsageLimit.month == now.month,
         )
         result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
+        used = (result.scalar() or 0) + await usage_counter.pending_limit(
+            self.tenant_id, "ai_requests_used",
+        )
         
-        if usage:
-            # Get limit from subscription (hardcoded for now)
-            max_requests = 100
-            if usage.ai_requests_used >= max_requests:
-                raise UsageLimitExceededError(
-                    "AI requests", usage.ai_requests_used, max_requests
-                )
+        # Get limit from subscription (hardcoded for now)
+        max_requests = 100
+        if used >= max_requests:
+            raise UsageLimitExceededError("AI requests", used, max_requests)
     
     async def _increment_ai_usage(self) -> None:
-        """Increment AI usage counter."""
-        from app.billing.models import UsageLimit
-        
-        now = datetime.now()
-        query = select(UsageLimit).where(
-            UsageLimit.tenant_id == self.tenant_id,
-            UsageLimit.year == now.year,
-            UsageLimit.month == now.month,
-        )
-        result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
-        
-        if usage:
-            usage.ai_requests_used += 1
-        else:
-            # Create usage record if doesn't exist
-            usage = UsageLimit(
-                tenant_id=self.tenant_id,
-                year=now.year,
-                month=now.month,
-                ai_requests_used=1,
-            )
-            self.session.add(usage)
-        
-        await self.session.flush()
+        """Increment AI usage counter (write-behind, see usage_counter)."""
+        await usage_counter.add_limit(self.tenant_id, "ai_requests_used")
     
     async def get_usage(self) -> dict:
         """Get current AI usage."""
@@ -0,0 +1,379 @@
+"""
+CUSTOS Near-Duplicate Index
+
+MinHash / LSH index over question texts.
+
+Each question's word set gets a MinHash signature of NUM_PERM values;
+the signature is cut into BANDS bands of ROWS values and every band is
+hashed to one key. Two questions with word-set Jaccard similarity s
+share at least one band key with probability 1 - (1 - s^ROWS)^BANDS:
+~99% at s = 0.85 (the duplicate threshold) and ~5% at s = 0.5.
+
+Band keys are stored per question (question_minhashes.bands, GIN
+indexed), so:
+- a new question's candidates are the questions sharing a band key,
+  one index lookup instead of a scan of the topic/subject
+- a full-bank scan groups questions by band key in the database and
+  only compares questions that collide
+
+Candidates are always confirmed with the exact Jaccard similarity, so
+LSH only decides which pairs are compared.
+
+Signatures for a batch are computed in a worker thread (signatures()),
+so indexing a large bank does not stall the event loop.
+
+Keeping the index current:
+- new questions are indexed when created (AIQualityService.index_questions)
+- questions whose text is edited through the ORM are re-indexed after
+  the edit commits
+- backfill_signatures (a periodic task, app.ai.jobs) indexes questions
+  without a signature or updated since, e.g. banks that predate the
+  index and bulk updates
+"""
+
+import asyncio
+import logging
+import random
+import re
+import struct
+from datetime import datetime, timezone
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from app.ai.quality_models import QuestionMinHash
+from app.academics.models.questions import Question
+
+logger = logging.getLogger(__name__)
+
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Buckets larger than this (templated questions) are compared against
+# their first member only, keeping the scan linear
+MAX_BUCKET_SIZE = 200
+
+# Rows per indexing / text loading batch
+BATCH_SIZE = 1000
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)  # Fixed: signatures must be stable across processes
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+# ============================================
+# Signatures
+# ============================================
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    if not text:
+        return ""
+    text = text.lower().strip()
+    text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
+    text = re.sub(r'\s+', ' ', text)     # Normalize whitespace
+    return text
+
+
+def word_set(text: str) -> Set[str]:
+    return set(normalize_text(text).split())
+
+
+def jaccard(set1: Set[str], set2: Set[str]) -> float:
+    if not set1 or not set2:
+        return 0.0
+    return len(set1 & set2) / len(set1 | set2)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(blake2b(token.encode(), digest_size=8).digest(), "big") & _PRIME
+
+
+def minhash(words: Iterable[str]) -> List[int]:
+    """MinHash signature of a word set (empty for no words)."""
+    hashes = [_token_hash(word) for word in set(words)]
+    if not hashes:
+        return []
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: Sequence[int]) -> List[int]:
+    """One signed 64-bit key per band (fits BIGINT)."""
+    if not signature:
+        return []
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(struct.pack(f">H{ROWS}Q", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def signatures(texts: Iterable[str]) -> List[Tuple[List[int], List[int]]]:
+    """(signature, band keys) per text. CPU-bound: run via asyncio.to_thread."""
+    result = []
+    for text in texts:
+        signature = minhash(word_set(text))
+        result.append((signature, band_keys(signature)))
+    return result
+
+
+# ============================================
+# Index
+# ============================================
+
+def _needs_signature():
+    """Questions without a signature, or updated since it was computed."""
+    return or_(
+        QuestionMinHash.id.is_(None),
+        Question.updated_at > QuestionMinHash.updated_at,
+    )
+
+
+class NearDuplicateIndex:
+    """LSH index of a tenant's question bank."""
+
+    def __init__(self, session: AsyncSession, tenant_id: UUID):
+        self.session = session
+        self.tenant_id = tenant_id
+
+    async def index(self, questions: Iterable[Tuple[UUID, str]]) -> int:
+        """Store (or refresh) signatures for (question_id, text) pairs."""
+        questions = list(questions)
+        computed = await asyncio.to_thread(signatures, [text for _, text in questions])
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": uuid4(),
+                "tenant_id": self.tenant_id,
+                "question_id": question_id,
+                "signature": signature,
+                "bands": bands,
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": False,
+            }
+            for (question_id, _), (signature, bands) in zip(questions, computed)
+        ]
+
+        for start in range(0, len(rows), BATCH_SIZE):
+            stmt = pg_insert(QuestionMinHash).values(rows[start:start + BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_question_minhash_question",
+                set_={
+                    "signature": stmt.excluded.signature,
+                    "bands": stmt.excluded.bands,
+                    "updated_at": now,
+                },
+            )
+            await self.session.execute(stmt)
+        return len(rows)
+
+    async def ensure_indexed(self) -> int:
+        """Index questions without a signature or edited since; returns how many."""
+        total = 0
+        while True:
+            query = (
+                select(Question.id, Question.question_text)
+                .outerjoin(QuestionMinHash, QuestionMinHash.question_id == Question.id)
+                .where(
+                    Question.tenant_id == self.tenant_id,
+                    Question.deleted_at.is_(None),
+                    _needs_signature(),
+                )
+                .limit(BATCH_SIZE)
+            )
+            result = await self.session.execute(query)
+            batch = [(row.id, row.question_text) for row in result]
+            if not batch:
+                return total
+            total += await self.index(batch)
+            await self.session.flush()
+            if len(batch) < BATCH_SIZE:
+                return total
+
+    async def find_similar(
+        self,
+        text: str,
+        threshold: float,
+        topic_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+        exclude_ids: Iterable[UUID] = (),
+    ) -> List[Tuple[UUID, float]]:
+        """Indexed questions at or above threshold, most similar first."""
+        words = word_set(text)
+        bands = band_keys(minhash(words))
+        if not bands:
+            return []
+
+        query = (
+            select(Question.id, Question.question_text)
+            .join(QuestionMinHash, QuestionMinHash.question_id == Question.id)
+            .where(
+                QuestionMinHash.tenant_id == self.tenant_id,
+                QuestionMinHash.bands.overlap(bands),
+                Question.deleted_at.is_(None),
+            )
+        )
+        if topic_id:
+            query = query.where(Question.topic_id == topic_id)
+        if subject_id:
+            query = query.where(Question.subject_id == subject_id)
+        excluded = set(exclude_ids)
+        if excluded:
+            query = query.where(Question.id.notin_(excluded))
+
+        result = await self.session.execute(query)
+        matches = []
+        for row in result:
+            similarity = jaccard(words, word_set(row.question_text))
+            if similarity >= threshold:
+                matches.append((row.id, similarity))
+        matches.sort(key=lambda x: x[1], reverse=True)
+        return matches
+
+    async def candidate_pairs(self, topic_id: Optional[UUID] = None) -> Set[Tuple[UUID, UUID]]:
+        """Question pairs sharing a band key, as (smaller id, larger id)."""
+        bucket = func.unnest(QuestionMinHash.bands).label("bucket")
+        inner = (
+            select(QuestionMinHash.question_id, bucket)
+            .join(Question, Question.id == QuestionMinHash.question_id)
+            .where(
+                QuestionMinHash.tenant_id == self.tenant_id,
+                Question.deleted_at.is_(None),
+            )
+        )
+        if topic_id:
+            inner = inner.where(Question.topic_id == topic_id)
+        buckets = inner.subquery()
+
+        query = (
+            select(func.array_agg(buckets.c.question_id))
+            .group_by(buckets.c.bucket)
+            .having(func.count() > 1)
+        )
+        result = await self.session.execute(query)
+
+        pairs: Set[Tuple[UUID, UUID]] = set()
+        for (members,) in result:
+            members = sorted(members, key=str)
+            if len(members) > MAX_BUCKET_SIZE:
+                logger.info(f"LSH bucket of {len(members)} questions compared to its first member")
+                first = members[0]
+                pairs.update((first, other) for other in members[1:])
+                continue
+            for i, q1 in enumerate(members):
+                for q2 in members[i + 1:]:
+                    pairs.add((q1, q2))
+        return pairs
+
+    async def word_sets(self, question_ids: Iterable[UUID]) -> Dict[UUID, Set[str]]:
+        """Word sets of questions, loaded in batches."""
+        ids = list(question_ids)
+        sets: Dict[UUID, Set[str]] = {}
+        for start in range(0, len(ids), BATCH_SIZE):
+            result = await self.session.execute(
+                select(Question.id, Question.question_text).where(
+                    Question.id.in_(ids[start:start + BATCH_SIZE])
+                )
+            )
+            for row in result:
+                sets[row.id] = word_set(row.question_text)
+        return sets
+
+
+# ============================================
+# Backfill and edits
+# ============================================
+
+async def backfill_signatures() -> int:
+    """Index every tenant's unindexed or updated questions. Never raises."""
+    from app.core.database import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Question.tenant_id)
+                .outerjoin(QuestionMinHash, QuestionMinHash.question_id == Question.id)
+                .where(Question.deleted_at.is_(None), _needs_signature())
+                .distinct()
+            )
+            tenant_ids = list(result.scalars().all())
+    except Exception as e:
+        logger.error(f"Question signature backfill failed: {e}")
+        return 0
+
+    total = 0
+    for tenant_id in tenant_ids:
+        try:
+            async with AsyncSessionLocal() as session:
+                total += await NearDuplicateIndex(session, tenant_id).ensure_indexed()
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Question signature backfill failed for tenant {tenant_id}: {e}")
+    if total:
+        logger.info(f"Indexed {total} questions for near-duplicate detection")
+    return total
+
+
+# Edited questions to re-index when a session commits:
+# question_id -> (tenant_id, text)
+_EDITED_QUESTIONS = "edited_question_texts"
+
+_pending_reindex: Set[asyncio.Task] = set()
+
+
+async def _reindex(edited: Dict[UUID, Tuple[UUID, str]]) -> None:
+    from app.core.database import AsyncSessionLocal
+
+    by_tenant: Dict[UUID, List[Tuple[UUID, str]]] = {}
+    for question_id, (tenant_id, text) in edited.items():
+        by_tenant.setdefault(tenant_id, []).append((question_id, text))
+    try:
+        async with AsyncSessionLocal() as session:
+            for tenant_id, questions in by_tenant.items():
+                await NearDuplicateIndex(session, tenant_id).index(questions)
+            await session.commit()
+    except Exception as e:
+        # The periodic backfill picks them up (updated_at is newer)
+        logger.warning(f"Re-indexing {len(edited)} edited questions failed: {e}")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_edited_questions(session: Session, flush_context) -> None:
+    for instance in session.dirty:
+        if not isinstance(instance, Question):
+            continue
+        if attributes.get_history(instance, "question_text").has_changes():
+            edited = session.info.setdefault(_EDITED_QUESTIONS, {})
+            edited[instance.id] = (instance.tenant_id, instance.question_text)
+
+
+@event.listens_for(Session, "after_commit")
+def _reindex_edited_questions(session: Session) -> None:
+    edited = session.info.pop(_EDITED_QUESTIONS, None)
+    if not edited:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning(f"Edited questions not re-indexed (no event loop): {len(edited)}")
+        return
+    task = loop.create_task(_reindex(edited))
+    _pending_reindex.add(task)
+    task.add_done_callback(_pending_reindex.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_edited_questions(session: Session) -> None:
+    session.info.pop(_EDITED_QUESTIONS, None)
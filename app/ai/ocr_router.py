@@ -4,7 +4,7 @@ CUSTOS OCR Engine Router
 API endpoints for offline exam OCR processing.
 """
 
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query, UploadFile, File, Form, HTTPException
@@ -19,6 +19,7 @@ from app.ai.ocr_schemas import (
     OCRJobResponse,
     OCRJobWithDetails,
     OCRJobUploadResponse,
+    OCRJobStatusResponse,
     OCRJobResultsResponse,
     ImportOCRResultsRequest,
     ImportOCRResultsResponse,
@@ -38,6 +39,9 @@ async def upload_ocr_image(
     file: UploadFile = File(..., description="Exam answer sheet or marks register image"),
     exam_type: ExamType = Form(..., description="Type of exam: weekly or lesson"),
     exam_id: UUID = Form(..., description="ID of the weekly test or lesson evaluation"),
+    additional_pages: List[UploadFile] = File(
+        default=[], description="Further pages of the same answer sheet"
+    ),
     user: CurrentUser = None,
     db: AsyncSession = Depends(get_db),
     _=Depends(require_permission(Permission.AI_OCR_PROCESS)),
@@ -47,15 +51,16 @@ async def upload_ocr_image(
     
     Accepts:
     - JPEG, PNG, WebP, GIF images
-    - Max size: 10MB
+    - Max size: 10MB per page, up to 10 pages
     
     Process:
-    1. Validates file and exam
-    2. Saves image
-    3. Processes with AI OCR
+    1. Validates files and exam
+    2. Saves images
+    3. Queues AI OCR in the background (pages processed concurrently)
     4. Extracts student results
     
-    Returns job ID for tracking.
+    Returns job ID right after the images are saved; poll
+    GET /jobs/{job_id}/status until it is completed or failed.
     """
     service = OCRService(db, user.tenant_id)
     return await service.upload_and_create_job(
@@ -63,6 +68,7 @@ async def upload_ocr_image(
         exam_type=exam_type,
         exam_id=exam_id,
         uploaded_by=user.id,
+        additional_pages=additional_pages,
     )
 
 
@@ -138,6 +144,32 @@ async def get_ocr_job(
 # Results Endpoints
 # ============================================
 
+@router.get("/jobs/{job_id}/status", response_model=OCRJobStatusResponse)
+async def get_ocr_job_status(
+    job_id: UUID,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permission(Permission.AI_OCR_PROCESS)),
+):
+    """Poll the processing status of an OCR job."""
+    service = OCRService(db, user.tenant_id)
+    job = await service.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    
+    return OCRJobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        pages=len((job.input_snapshot or {}).get("pages", [])) or 1,
+        results_extracted=job.results_extracted,
+        tokens_used=job.tokens_used,
+        error_message=job.error_message,
+        started_at=job.started_at,
+        completed_at=job.completed_at,
+    )
+
+
 @router.get("/jobs/{job_id}/results", response_model=OCRJobResultsResponse)
 async def get_ocr_job_results(
     job_id: UUID,
@@ -195,7 +227,8 @@ async def reprocess_ocr_job(
     """
     Reprocess a failed OCR job.
     
-    Useful if OCR failed due to transient errors.
+    Useful if OCR failed due to transient errors. Processing is queued;
+    poll GET /jobs/{job_id}/status.
     """
     service = OCRService(db, user.tenant_id)
     job = await service.get_job(job_id)
@@ -209,7 +242,7 @@ async def reprocess_ocr_job(
             detail="Only failed or pending jobs can be reprocessed"
         )
     
-    job = await service.process_job(job_id)
+    await service.queue_processing(job, user.id)
     return OCRJobResponse.model_validate(job)
 
 
@@ -79,6 +79,18 @@ class OCRJobUploadResponse(BaseModel):
     exam_id: UUID
 
 
+class OCRJobStatusResponse(BaseModel):
+    """Lightweight job status for polling after upload."""
+    job_id: UUID
+    status: OCRJobStatus
+    pages: int
+    results_extracted: int
+    tokens_used: int
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
 # ============================================
 # Parsed Result Schemas
 # ============================================
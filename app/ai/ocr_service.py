@@ -4,11 +4,10 @@ CUSTOS OCR Engine Service
 Processes uploaded exam answer sheets and converts them to structured results.
 """
 
-import base64
-import os
+import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from uuid import UUID
 
 from sqlalchemy import select, func
@@ -29,7 +28,10 @@ from app.ai.ocr_schemas import (
     OCRStudentResult,
     OCRStats,
 )
-from app.ai.providers.openai import OpenAIProvider
+from app.ai.gateway import get_ai_gateway
+from app.ai.ocr_preprocess import prepare_page
+from app.platform.files.service import save_upload
+from app.platform.usage.counter import usage_counter
 from app.learning.models.weekly_tests import WeeklyTest, WeeklyTestResult
 from app.learning.models.lesson_evaluation import LessonEvaluation, LessonEvaluationResult
 from app.users.models import User
@@ -40,8 +42,10 @@ class OCRService:
     OCR Engine Service.
     
     Workflow:
-    1. Teacher uploads exam answer sheet image
-    2. AI extracts marks and wrong questions
+    1. Teacher uploads exam answer sheet image(s); the request returns
+       once the pages are saved and an OCRProcessJob is queued
+    2. In the background, pages are preprocessed (process pool) and
+       AI extracts marks and wrong questions, pages concurrently
     3. System matches students
     4. Creates result records (WeeklyTestResult or LessonEvaluationResult)
     5. Updates mastery via existing services
@@ -50,11 +54,12 @@ class OCRService:
     # Supported image types
     ALLOWED_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MAX_PAGES = 10
     
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
-        self.provider = OpenAIProvider()
+        self.gateway = get_ai_gateway()
     
     # ============================================
     # Upload & Create Job
@@ -66,23 +71,29 @@ class OCRService:
         exam_type: ExamType,
         exam_id: UUID,
         uploaded_by: UUID,
+        additional_pages: Sequence[UploadFile] = (),
     ) -> OCRJobUploadResponse:
         """
-        Upload image and create OCR job.
+        Upload image(s) and queue an OCR job.
         
         Steps:
-        1. Validate file
+        1. Validate files
         2. Check AI quota
-        3. Save image
+        3. Save images
         4. Create job record
-        5. Process immediately (or queue for later)
+        5. Queue processing (poll the job for status)
         """
-        # 1. Validate file
-        if file.content_type not in self.ALLOWED_TYPES:
-            raise ValidationError(
-                f"Unsupported file type: {file.content_type}. "
-                f"Allowed: {', '.join(self.ALLOWED_TYPES)}"
-            )
+        files = [file, *additional_pages]
+        
+        # 1. Validate files
+        if len(files) > self.MAX_PAGES:
+            raise ValidationError(f"At most {self.MAX_PAGES} pages per upload")
+        for upload in files:
+            if upload.content_type not in self.ALLOWED_TYPES:
+                raise ValidationError(
+                    f"Unsupported file type: {upload.content_type}. "
+                    f"Allowed: {', '.join(self.ALLOWED_TYPES)}"
+                )
         
         # 2. Validate exam exists
         await self._validate_exam(exam_type, exam_id)
@@ -90,8 +101,16 @@ class OCRService:
         # 3. Check AI quota
         await self._check_ai_quota()
         
-        # 4. Save image
-        image_path, original_filename = await self._save_image(file, exam_id)
+        # 4. Save images
+        pages = []
+        for number, upload in enumerate(files, start=1):
+            image_path, original_filename = await self._save_image(upload, exam_id, number)
+            pages.append({
+                "path": image_path,
+                "original_filename": original_filename,
+                "file_size": upload.size,
+                "content_type": upload.content_type,
+            })
         
         # 5. Create job
         job = OCRJob(
@@ -99,56 +118,63 @@ class OCRService:
             uploaded_by=uploaded_by,
             exam_type=exam_type,
             exam_id=exam_id,
-            image_path=image_path,
-            original_filename=original_filename,
+            image_path=pages[0]["path"],
+            original_filename=pages[0]["original_filename"],
             status=OCRJobStatus.PENDING,
-            ai_provider="openai",
+            ai_provider=self.gateway.provider.name,
             input_snapshot={
                 "exam_type": exam_type.value,
                 "exam_id": str(exam_id),
-                "original_filename": original_filename,
-                "file_size": file.size,
-                "content_type": file.content_type,
+                "original_filename": pages[0]["original_filename"],
+                "file_size": pages[0]["file_size"],
+                "content_type": pages[0]["content_type"],
+                "pages": pages,
             },
         )
         self.session.add(job)
         await self.session.flush()
         
-        # 6. Process immediately
-        await self.process_job(job.id)
-        
-        # Refresh to get updated status
-        await self.session.refresh(job)
+        # 6. Queue processing (commits)
+        await self.queue_processing(job, uploaded_by)
         
         return OCRJobUploadResponse(
             job_id=job.id,
             status=job.status,
-            message="OCR processing completed" if job.status == OCRJobStatus.COMPLETED else "OCR processing started",
+            message=f"OCR processing queued ({len(pages)} page{'s' if len(pages) > 1 else ''})",
             exam_type=exam_type,
             exam_id=exam_id,
         )
     
+    async def queue_processing(self, job: OCRJob, requested_by: Optional[UUID] = None) -> dict:
+        """Queue an OCRProcessJob for this job (commits the session)."""
+        from app.ai.jobs import OCRProcessJob
+        from app.core.jobs import enqueue
+        
+        runs = job.input_snapshot.get("runs", 0) + 1
+        job.input_snapshot = {**job.input_snapshot, "runs": runs}
+        return await enqueue(
+            OCRProcessJob(self.tenant_id, job.id, run_number=runs, requested_by=requested_by),
+            self.session,
+        )
+    
     async def _save_image(
         self,
         file: UploadFile,
         exam_id: UUID,
+        page: int = 1,
     ) -> Tuple[str, str]:
-        """Save uploaded image to filesystem."""
-        # Create uploads directory
-        upload_dir = Path(settings.upload_dir) / "ocr" / str(self.tenant_id)
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        """Stream uploaded image to the filesystem (rejects oversized files early)."""
+        upload_dir = Path(settings.storage_path) / "ocr" / str(self.tenant_id)
         
         # Generate filename
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         ext = Path(file.filename).suffix or ".jpg"
-        filename = f"{exam_id}_{timestamp}{ext}"
+        filename = f"{exam_id}_{timestamp}_p{page}{ext}"
         
         file_path = upload_dir / filename
         
         # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        await save_upload(file, file_path, self.MAX_FILE_SIZE)
         
         return str(file_path), file.filename
     
@@ -180,11 +206,11 @@ class OCRService:
     
     async def process_job(self, job_id: UUID) -> OCRJob:
         """
-        Process an OCR job.
+        Process an OCR job (run by OCRProcessJob).
         
         Steps:
-        1. Load image
-        2. Call AI OCR
+        1. Preprocess pages (process pool, concurrently)
+        2. Call AI OCR per page (concurrently)
         3. Parse results
         4. Store parsed results
         5. Update job status
@@ -197,26 +223,38 @@ class OCRService:
             return job  # Already processed or processing
         
         try:
-            # Update status
+            # Update status (committed so pollers see it)
             job.status = OCRJobStatus.PROCESSING
             job.started_at = datetime.utcnow()
-            await self.session.flush()
+            job.error_message = None
+            await self.session.commit()
+            
+            pages = [page["path"] for page in job.input_snapshot.get("pages", [])] or [job.image_path]
             
-            # 1. Load image
-            image_base64, image_type = self._load_image(job.image_path)
+            # 1. Preprocess pages
+            try:
+                images = await asyncio.gather(*(prepare_page(path) for path in pages))
+            except FileNotFoundError as e:
+                raise ValidationError(f"Image file not found: {e}")
             
             # 2. Get exam context
             exam_context = await self._get_exam_context(job.exam_type, job.exam_id)
             
             # 3. Call AI OCR
-            ocr_result = await self.provider.process_exam_ocr(
-                image_base64=image_base64,
-                image_type=image_type,
-                exam_context=exam_context,
-            )
+            responses = await asyncio.gather(*(
+                self.gateway.process_exam_ocr(
+                    tenant_id=self.tenant_id,
+                    image_base64=image_base64,
+                    image_type=image_type,
+                    exam_context=exam_context,
+                )
+                for image_base64, image_type in images
+            ))
+            ocr_result = self._merge_page_results([response.data for response in responses])
             
             # Store raw output
             job.output_snapshot = ocr_result
+            job.tokens_used = sum(response.tokens_used for response in responses)
             
             if not ocr_result.get("success", False):
                 job.status = OCRJobStatus.FAILED
@@ -268,35 +306,32 @@ class OCRService:
             
             return job
             
-        except Exception as e:
+        except (Exception, asyncio.CancelledError) as e:
+            # Cancelled = job timeout; FAILED lets the retry pick it up again
             job.status = OCRJobStatus.FAILED
-            job.error_message = str(e)
+            job.error_message = str(e) or type(e).__name__
             job.completed_at = datetime.utcnow()
             await self.session.flush()
             raise
     
-    def _load_image(self, image_path: str) -> Tuple[str, str]:
-        """Load image and convert to base64."""
-        path = Path(image_path)
-        
-        if not path.exists():
-            raise ValidationError(f"Image file not found: {image_path}")
-        
-        with open(path, "rb") as f:
-            image_data = f.read()
-        
-        # Determine type
-        ext = path.suffix.lower()
-        type_map = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".webp": "image/webp",
-            ".gif": "image/gif",
+    @staticmethod
+    def _merge_page_results(results: List[dict]) -> dict:
+        """Combine per-page OCR outputs into one result."""
+        if len(results) == 1:
+            return results[0]
+        
+        merged = {
+            "success": any(result.get("success", False) for result in results),
+            "students": [],
+            "errors": [],
+            "pages": results,
         }
-        image_type = type_map.get(ext, "image/jpeg")
-        
-        return base64.b64encode(image_data).decode("utf-8"), image_type
+        for number, result in enumerate(results, start=1):
+            merged["students"].extend(result.get("students", []))
+            merged["errors"].extend(
+                f"Page {number}: {error}" for error in result.get("errors", [])
+            )
+        return merged
     
     async def _get_exam_context(
         self,
@@ -605,47 +640,25 @@ class OCRService:
     # ============================================
     
     async def _check_ai_quota(self) -> None:
-        """Check if tenant has AI credits."""
+        """Check if tenant has AI credits remaining."""
         from app.billing.models import UsageLimit
         
         now = datetime.now()
-        query = select(UsageLimit).where(
+        query = select(UsageLimit.ai_requests_used).where(
             UsageLimit.tenant_id == self.tenant_id,
             UsageLimit.year == now.year,
             UsageLimit.month == now.month,
         )
         result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
+        used = (result.scalar() or 0) + await usage_counter.pending_limit(
+            self.tenant_id, "ai_requests_used",
+        )
         
-        if usage:
-            max_requests = 100  # Would get from subscription
-            if usage.ai_requests_used >= max_requests:
-                raise UsageLimitExceededError(
-                    "AI requests", usage.ai_requests_used, max_requests
-                )
+        # Get limit from subscription (hardcoded for now)
+        max_requests = 100
+        if used >= max_requests:
+            raise UsageLimitExceededError("AI requests", used, max_requests)
     
     async def _increment_ai_usage(self) -> None:
-        """Increment AI usage counter."""
-        from app.billing.models import UsageLimit
-        
-        now = datetime.now()
-        query = select(UsageLimit).where(
-            UsageLimit.tenant_id == self.tenant_id,
-            UsageLimit.year == now.year,
-            UsageLimit.month == now.month,
-        )
-        result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
-        
-        if usage:
-            usage.ai_requests_used += 1
-        else:
-            usage = UsageLimit(
-                tenant_id=self.tenant_id,
-                year=now.year,
-                month=now.month,
-                ai_requests_used=1,
-            )
-            self.session.add(usage)
-        
-        await self.session.flush()
+        """Increment AI usage counter (write-behind, see usage_counter)."""
+        await usage_counter.add_limit(self.tenant_id, "ai_requests_used")
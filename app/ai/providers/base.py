@@ -2,14 +2,93 @@
 CUSTOS AI Base Provider
 """
 
+import json
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional, Union
+
+
+@dataclass
+class Completion:
+    """One chat completion with the usage reported by the API."""
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+def structured_messages(prompt: str, schema: dict, system: Optional[str] = None) -> List[dict]:
+    """Messages asking for JSON matching schema."""
+    system_prompt = f"""{system or "You are a helpful assistant that responds only in valid JSON."}
+Your response must match this schema: {json.dumps(schema)}
+Respond with ONLY valid JSON, no other text."""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def parse_json(content: str) -> Any:
+    """Parse a JSON response, tolerating a Markdown code fence."""
+    content = (content or "").strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return json.loads(content.strip())
 
 
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
     
+    name = "base"
+    
     @abstractmethod
+    async def complete(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        schema: Optional[dict] = None,
+    ) -> Completion:
+        """
+        Run one chat completion.
+        
+        schema is the JSON shape already described in the messages;
+        providers may use it to constrain or synthesize the output.
+        """
+        pass
+    
+    async def stream(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        schema: Optional[dict] = None,
+    ) -> AsyncIterator[Union[str, Completion]]:
+        """
+        Yield the completion's content as it is generated.
+        
+        Content arrives as str deltas. A provider that knows the usage
+        ends with a Completion carrying it (its content is not part of
+        the stream). Providers without streaming yield the whole content
+        once, then its Completion.
+        """
+        completion = await self.complete(messages, model, max_tokens, temperature, schema)
+        yield completion.content
+        yield completion
+    
+    async def close(self) -> None:
+        """Release connections (process shutdown)."""
+    
     async def generate_text(
         self,
         prompt: str,
@@ -17,13 +96,22 @@ class AIProvider(ABC):
         temperature: float = 0.7,
     ) -> str:
         """Generate text completion."""
-        pass
+        completion = await self.complete(
+            [{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        return completion.content
     
-    @abstractmethod
     async def generate_structured(
         self,
         prompt: str,
         schema: dict,
     ) -> dict:
         """Generate structured output."""
-        pass
+        completion = await self.complete(
+            structured_messages(prompt, schema),
+            temperature=0.5,
+            schema=schema,
+        )
+        return parse_json(completion.content)
@@ -0,0 +1,102 @@
+"""
+CUSTOS Stub AI Provider
+
+Offline provider for development and tests (settings.ai_provider =
+"stub"). Structured calls get a response synthesized from the schema;
+token usage is the word count of the messages and the response.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, List, Optional, Union
+
+from app.ai.providers.base import AIProvider, Completion
+
+
+def sample_from_schema(schema: Any, key: str = "value") -> Any:
+    """Example value shaped like a schema in this codebase's style."""
+    if isinstance(schema, dict):
+        return {k: sample_from_schema(v, k) for k, v in schema.items()}
+    if isinstance(schema, list):
+        return [sample_from_schema(schema[0], key)] if schema else []
+    if isinstance(schema, str):
+        lowered = schema.lower()
+        if "boolean" in lowered:
+            return True
+        if lowered.startswith(("number", "integer", "0.0")) or "integers" in lowered:
+            return 1
+        return f"stub {key}"
+    return schema
+
+
+class StubProvider(AIProvider):
+    """Deterministic, network-free provider."""
+    
+    name = "stub"
+    
+    def __init__(
+        self,
+        responder: Optional[Callable[[List[dict]], str]] = None,
+        latency_seconds: float = 0.0,
+    ):
+        self.responder = responder
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+    
+    async def complete(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        schema: Optional[dict] = None,
+    ) -> Completion:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._completion(messages, model, schema)
+    
+    async def stream(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        schema: Optional[dict] = None,
+    ) -> AsyncIterator[Union[str, Completion]]:
+        """
+        The complete() content in small pieces, latency spread across
+        them, then its usage.
+        """
+        self.calls += 1
+        completion = self._completion(messages, model, schema)
+        content = completion.content
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        for piece in pieces:
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds / len(pieces))
+            yield piece
+        yield completion
+    
+    def _completion(self, messages: List[dict], model: Optional[str], schema: Optional[dict]) -> Completion:
+        if self.responder:
+            content = self.responder(messages)
+        elif schema is not None:
+            content = json.dumps(sample_from_schema(schema))
+        else:
+            content = f"stub response to: {_text(messages[-1])[:200]}"
+        
+        prompt_words = sum(len(_text(m).split()) for m in messages)
+        return Completion(
+            content=content,
+            model=model or "stub",
+            prompt_tokens=prompt_words,
+            completion_tokens=len(content.split()),
+        )
+
+
+def _text(message: dict) -> str:
+    content = message.get("content", "")
+    if isinstance(content, list):  # Vision messages
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
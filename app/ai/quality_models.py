@@ -10,8 +10,9 @@ from typing import Optional, List
 from uuid import UUID
 
 from sqlalchemy import String, Text, Integer, Float, Boolean, DateTime, ForeignKey, Index, JSON
+from sqlalchemy import BigInteger, UniqueConstraint
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.base_model import TenantBaseModel
@@ -195,3 +196,31 @@ class CurriculumAlignment(TenantBaseModel):
     # Status
     is_aligned: Mapped[bool] = mapped_column(Boolean, default=True)
     needs_review: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+class QuestionMinHash(TenantBaseModel):
+    """
+    MinHash signature and LSH band keys of a question's text.
+    
+    Near-duplicate lookups match band keys through the GIN index
+    (bands && :bands) instead of comparing against every question.
+    See app.ai.near_duplicates.
+    """
+    __tablename__ = "question_minhashes"
+    
+    __table_args__ = (
+        UniqueConstraint("question_id", name="uq_question_minhash_question"),
+        Index("ix_qminhash_bands", "bands", postgresql_using="gin"),
+    )
+    
+    question_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("questions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    
+    # NUM_PERM minimum hashes; empty for questions without words
+    signature: Mapped[List[int]] = mapped_column(ARRAY(BigInteger), nullable=False)
+    
+    # One key per band (band index folded into the hash)
+    bands: Mapped[List[int]] = mapped_column(ARRAY(BigInteger), nullable=False)
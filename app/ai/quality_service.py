@@ -4,8 +4,7 @@ CUSTOS AI Quality Service
 Handles question quality, duplicate detection, and curriculum alignment.
 """
 
-import re
-from typing import Optional, List, Tuple
+from typing import Iterable, Optional, List, Sequence, Tuple
 from uuid import UUID
 
 from sqlalchemy import select, func
@@ -18,6 +17,7 @@ from app.ai.quality_models import (
     QuestionDuplicate,
     CurriculumAlignment,
 )
+from app.ai.near_duplicates import NearDuplicateIndex, jaccard, normalize_text, word_set
 from app.academics.models.questions import Question
 
 
@@ -38,6 +38,7 @@ class AIQualityService:
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
+        self.near_duplicates = NearDuplicateIndex(session, tenant_id)
     
     # ============================================
     # Prompt Version Management
@@ -179,67 +180,72 @@ class AIQualityService:
     
     def _normalize_text(self, text: str) -> str:
         """Normalize text for comparison."""
-        if not text:
-            return ""
-        text = text.lower().strip()
-        text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-        text = re.sub(r'\s+', ' ', text)     # Normalize whitespace
-        return text
+        return normalize_text(text)
     
     def _word_set(self, text: str) -> set:
         """Convert text to word set."""
-        return set(self._normalize_text(text).split())
+        return word_set(text)
     
     def _jaccard_similarity(self, set1: set, set2: set) -> float:
         """Calculate Jaccard similarity between two sets."""
-        if not set1 or not set2:
-            return 0.0
-        
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-        
-        return intersection / union if union > 0 else 0.0
+        return jaccard(set1, set2)
     
     async def check_duplicate(
         self,
         question_text: str,
         topic_id: Optional[UUID] = None,
         subject_id: Optional[UUID] = None,
+        exclude_ids: Iterable[UUID] = (),
     ) -> List[Tuple[UUID, float]]:
         """
         Check if a question is a duplicate of existing questions.
         
+        Candidates come from the LSH index (questions are indexed when
+        created; scan_for_duplicates backfills the rest) and are
+        confirmed with the exact Jaccard similarity.
+        
         Returns list of (question_id, similarity_score) for potential duplicates.
         """
-        # Build query
-        query = select(Question).where(
-            Question.tenant_id == self.tenant_id,
-            Question.deleted_at.is_(None),
+        return await self.near_duplicates.find_similar(
+            question_text,
+            self.DUPLICATE_THRESHOLD,
+            topic_id=topic_id,
+            subject_id=subject_id,
+            exclude_ids=exclude_ids,
         )
+    
+    async def index_questions(self, questions: Sequence[Question]) -> List[Tuple[UUID, UUID, float]]:
+        """
+        Record duplicates of new questions and add them to the index.
         
-        if topic_id:
-            query = query.where(Question.topic_id == topic_id)
-        if subject_id:
-            query = query.where(Question.subject_id == subject_id)
-        
-        result = await self.session.execute(query)
-        existing = result.scalars().all()
-        
-        # Compare with existing questions
-        new_words = self._word_set(question_text)
-        duplicates = []
-        
-        for q in existing:
-            existing_words = self._word_set(q.question_text)
-            similarity = self._jaccard_similarity(new_words, existing_words)
+        Each question is checked against the indexed bank (same topic)
+        and against the questions before it in the batch, so AI batches
+        that repeat themselves are caught too. Returns the recorded
+        (original_id, duplicate_id, similarity) triples.
+        """
+        found = []
+        batch_ids = [q.id for q in questions]
+        for i, question in enumerate(questions):
+            matches = await self.check_duplicate(
+                question.question_text,
+                topic_id=question.topic_id,
+                exclude_ids=batch_ids,
+            )
+            words = self._word_set(question.question_text)
+            for earlier in questions[:i]:
+                if earlier.topic_id != question.topic_id:
+                    continue
+                similarity = self._jaccard_similarity(words, self._word_set(earlier.question_text))
+                if similarity >= self.DUPLICATE_THRESHOLD:
+                    matches.append((earlier.id, similarity))
             
-            if similarity >= self.DUPLICATE_THRESHOLD:
-                duplicates.append((q.id, similarity))
+            for original_id, similarity in matches:
+                await self.record_duplicate(original_id, question.id, similarity)
+                found.append((original_id, question.id, similarity))
         
-        # Sort by similarity descending
-        duplicates.sort(key=lambda x: x[1], reverse=True)
-        
-        return duplicates
+        await self.near_duplicates.index((q.id, q.question_text) for q in questions)
+        await self.session.flush()
+        return found
     
     async def record_duplicate(
         self,
@@ -359,34 +365,47 @@ class AIQualityService:
     async def scan_for_duplicates(
         self,
         topic_id: Optional[UUID] = None,
-        limit: int = 100,
+        limit: Optional[int] = None,
     ) -> int:
-        """Scan and record duplicates among questions."""
-        query = select(Question).where(
-            Question.tenant_id == self.tenant_id,
-            Question.deleted_at.is_(None),
-        )
-        
-        if topic_id:
-            query = query.where(Question.topic_id == topic_id)
+        """
+        Scan the question bank and record new duplicates.
         
-        query = query.limit(limit)
+        Indexes questions missing from the LSH index first, then compares
+        only questions sharing a band key, so the whole bank is covered
+        (not just the first N questions). Pairs already recorded are
+        skipped. limit caps the new duplicates recorded per scan.
+        """
+        await self.near_duplicates.ensure_indexed()
+        pairs = await self.near_duplicates.candidate_pairs(topic_id)
+        if not pairs:
+            return 0
+        
+        # Already recorded, in either direction
+        result = await self.session.execute(
+            select(
+                QuestionDuplicate.original_question_id,
+                QuestionDuplicate.duplicate_question_id,
+            ).where(
+                QuestionDuplicate.tenant_id == self.tenant_id,
+                QuestionDuplicate.deleted_at.is_(None),
+            )
+        )
+        recorded = set()
+        for original_id, duplicate_id in result:
+            recorded.add((original_id, duplicate_id))
+            recorded.add((duplicate_id, original_id))
+        pairs = sorted((p for p in pairs if p not in recorded), key=str)
         
-        result = await self.session.execute(query)
-        questions = list(result.scalars().all())
+        words = await self.near_duplicates.word_sets({q for pair in pairs for q in pair})
         
         duplicates_found = 0
-        
-        for i, q1 in enumerate(questions):
-            q1_words = self._word_set(q1.question_text)
-            
-            for q2 in questions[i+1:]:
-                q2_words = self._word_set(q2.question_text)
-                similarity = self._jaccard_similarity(q1_words, q2_words)
-                
-                if similarity >= self.DUPLICATE_THRESHOLD:
-                    await self.record_duplicate(q1.id, q2.id, similarity)
-                    duplicates_found += 1
+        for q1, q2 in pairs:
+            similarity = self._jaccard_similarity(words.get(q1, set()), words.get(q2, set()))
+            if similarity >= self.DUPLICATE_THRESHOLD:
+                await self.record_duplicate(q1, q2, similarity)
+                duplicates_found += 1
+                if limit and duplicates_found >= limit:
+                    break
         
         await self.session.flush()
         return duplicates_found
@@ -10,11 +10,12 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.auth.dependencies import CurrentUser, require_permission
 from app.users.rbac import Permission
 from app.ai.question_gen_service import AIQuestionGenService
 from app.ai.models import AIJobStatus
+from app.ai.streaming import sse_response
 from app.ai.question_gen_schemas import (
     GenerateQuestionsRequest,
     GenerateQuestionsResponse,
@@ -75,6 +76,32 @@ async def generate_questions(
     )
 
 
+@router.post("/questions/generate/stream")
+async def stream_questions(
+    request: GenerateQuestionsRequest,
+    user: CurrentUser,
+    _=Depends(require_permission(Permission.AI_QUESTION_GEN)),
+):
+    """
+    Generate AI questions as Server-Sent Events.
+    
+    Events: `job` (job id), one `question` per saved question as soon as
+    the AI completes it, then `done` with the same body as
+    /questions/generate, or `error`. Quota and limits as above.
+    """
+    async def events():
+        # Own session: the request's session closes before streaming
+        async with AsyncSessionLocal() as session:
+            service = AIQuestionGenService(session, user.tenant_id)
+            async for event in service.stream_questions(
+                request=request.model_dump(),
+                teacher_id=user.user_id,
+            ):
+                yield event
+    
+    return sse_response(events())
+
+
 # ============================================
 # Job Management
 # ============================================
@@ -4,10 +4,11 @@ CUSTOS AI Question Generation Service
 Generates questions from syllabus topics and saves them to QuestionBank.
 """
 
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Optional, List, Tuple
+from typing import AsyncIterator, Optional, List, Tuple
 from uuid import UUID
 
 from sqlalchemy import select, func
@@ -21,7 +22,9 @@ from app.ai.models import (
     QuestionGenType,
 )
 from app.ai.quota_manager import AIQuotaManager
-from app.ai.providers.openai import OpenAIProvider
+from app.ai.quality_service import AIQualityService
+from app.ai.gateway import get_ai_gateway
+from app.ai.near_duplicates import jaccard, word_set
 from app.academics.models.questions import Question, QuestionType, DifficultyLevel, BloomLevel, QuestionStatus
 from app.academics.models.syllabus import SyllabusTopic, Chapter, SyllabusSubject
 
@@ -48,6 +51,23 @@ QUESTION_TYPE_MAP = {
     QuestionGenType.MIXED: QuestionType.MCQ,  # Default for mixed
 }
 
+# Fan-out: requests are split into chunks of about CHUNK_SIZE questions,
+# generated concurrently (bounded by the tenant's AI gateway slots)
+CHUNK_SIZE = 10
+CHUNK_ATTEMPTS = 2
+
+# Per-chunk emphasis, so parallel chunks don't produce the same questions
+CHUNK_FOCUS = (
+    "Focus on key facts, terms and definitions.",
+    "Focus on conceptual understanding and explanations.",
+    "Focus on applying the concepts to new situations and examples.",
+    "Focus on analysing relationships, causes and comparisons.",
+    "Focus on evaluation, reasoning and multi-step problems.",
+)
+
+# Chunk difficulties for a "mixed" request (about 30/50/20 overall)
+MIXED_CHUNK_DIFFICULTIES = ("medium", "easy", "medium", "hard", "easy", "medium")
+
 
 class AIQuestionGenService:
     """
@@ -67,7 +87,7 @@ class AIQuestionGenService:
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
-        self.provider = OpenAIProvider()
+        self.gateway = get_ai_gateway()
         self.quota_manager = AIQuotaManager(session, tenant_id)
     
     async def generate_questions(
@@ -88,6 +108,114 @@ class AIQuestionGenService:
         Returns:
             {job_id, status, questions_created, question_ids}
         """
+        job, topic = await self._start_job(request, teacher_id)
+        
+        try:
+            # 6-8. Generate in parallel chunks, creating questions as
+            # chunks finish; store the output snapshot
+            ai_response, questions = await self._generate_and_create(
+                input_snapshot=job.input_snapshot,
+                topic=topic,
+                subject_id=job.subject_id,
+                teacher_id=teacher_id,
+                difficulty=job.difficulty,
+                question_type=job.question_type,
+            )
+            return await self._complete_job(job, ai_response, questions)
+            
+        except Exception as e:
+            await self._fail_job(job, e)
+            raise
+    
+    async def stream_questions(
+        self,
+        request: dict,
+        teacher_id: UUID,
+    ) -> AsyncIterator[dict]:
+        """
+        Generate AI questions, yielding each one as soon as it is saved.
+        
+        Same request, quota and job tracking as generate_questions, but
+        chunks are streamed: every question object is created as soon as
+        the model closes it.
+        
+        Yields:
+            {"event": "job", "data": {job_id, count}}
+            {"event": "question", "data": {question_id, question, ...}}
+            {"event": "done", "data": <generate_questions result>}
+        """
+        job, topic = await self._start_job(request, teacher_id)
+        yield {"event": "job", "data": {"job_id": str(job.id), "count": job.count}}
+        
+        events: asyncio.Queue = asyncio.Queue()
+        plan = self._plan_chunks(job.input_snapshot["parameters"])
+        tasks = [
+            asyncio.ensure_future(self._stream_chunk(job.input_snapshot, params, events))
+            for params in plan
+        ]
+        
+        accepted: List[set] = []
+        generated: List[dict] = []
+        questions: List[Question] = []
+        chunks = []
+        tokens_used = 0
+        try:
+            while len(chunks) < len(tasks):
+                kind, payload = await events.get()
+                if kind == "chunk":
+                    tokens_used += payload.pop("tokens_used")
+                    chunks.append(payload)
+                    continue
+                
+                fresh = self._dedup_batch([payload], accepted)
+                if not fresh or len(generated) >= job.count:
+                    continue
+                created = await self._create_questions(
+                    ai_response={"questions": fresh},
+                    topic=topic,
+                    subject_id=job.subject_id,
+                    teacher_id=teacher_id,
+                    difficulty=job.difficulty,
+                    question_type=job.question_type,
+                    record_duplicates=False,
+                )
+                generated.extend(fresh)
+                questions.extend(created)
+                for question in created:
+                    yield {"event": "question", "data": {
+                        "question_id": str(question.id),
+                        "index": len(generated),
+                        "question": question.question_text,
+                        "question_type": question.question_type.value,
+                        "difficulty": question.difficulty.value,
+                        "options": question.options,
+                        "correct_answer": question.correct_answer,
+                        "explanation": question.answer_explanation,
+                    }}
+            
+            if not generated:
+                errors = "; ".join(c["error"] for c in chunks if c["error"])
+                raise ValidationError(f"AI generation failed: {errors or 'no questions returned'}")
+            
+            await self._record_near_duplicates(questions)
+            result = await self._complete_job(job, {
+                "questions": generated,
+                "tokens_used": tokens_used,
+                "chunks": chunks,
+            }, questions)
+            
+        except Exception as e:
+            await self._fail_job(job, e)
+            raise
+        finally:
+            # Also on client disconnect (nothing is committed then)
+            for task in tasks:
+                task.cancel()
+        
+        yield {"event": "done", "data": result}
+    
+    async def _start_job(self, request: dict, teacher_id: UUID) -> Tuple[AIQuestionGenJob, SyllabusTopic]:
+        """Steps 1-5: quota, topic context, input snapshot, RUNNING job record."""
         class_id = request["class_id"]
         subject_id = request["subject_id"] 
         topic_id = request["topic_id"]
@@ -122,55 +250,48 @@ class AIQuestionGenService:
         self.session.add(job)
         await self.session.flush()
         
-        try:
-            # 5. Update status to RUNNING
-            job.status = AIJobStatus.RUNNING
-            job.started_at = datetime.now(timezone.utc)
-            await self.session.flush()
-            
-            # 6. Call AI provider
-            ai_response = await self._generate_with_ai(input_snapshot)
-            
-            # 7. Store output snapshot
-            job.output_snapshot = ai_response
-            job.tokens_used = ai_response.get("tokens_used", 0)
-            
-            # 8. Validate and create questions
-            questions = await self._create_questions(
-                ai_response=ai_response,
-                topic=topic,
-                subject_id=subject_id,
-                teacher_id=teacher_id,
-                difficulty=difficulty,
-                question_type=question_type,
-            )
-            
-            # 9. Update job with results
-            job.status = AIJobStatus.COMPLETED
-            job.completed_at = datetime.now(timezone.utc)
-            job.questions_created = len(questions)
-            job.created_question_ids = [str(q.id) for q in questions]
-            
-            # 10. Increment usage
-            await self._increment_usage(len(questions))
-            
-            await self.session.commit()
-            
-            return {
-                "job_id": str(job.id),
-                "status": job.status.value,
-                "questions_created": job.questions_created,
-                "question_ids": job.created_question_ids,
-                "tokens_used": job.tokens_used,
-            }
-            
-        except Exception as e:
-            logger.exception(f"Question generation failed: {e}")
-            job.status = AIJobStatus.FAILED
-            job.error_message = str(e)
-            job.completed_at = datetime.now(timezone.utc)
-            await self.session.commit()
-            raise
+        # 5. Update status to RUNNING
+        job.status = AIJobStatus.RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        
+        return job, topic
+    
+    async def _complete_job(
+        self,
+        job: AIQuestionGenJob,
+        ai_response: dict,
+        questions: List[Question],
+    ) -> dict:
+        """Steps 9-10: record results, count usage, commit."""
+        job.output_snapshot = ai_response
+        job.tokens_used = ai_response.get("tokens_used", 0)
+        
+        # 9. Update job with results
+        job.status = AIJobStatus.COMPLETED
+        job.completed_at = datetime.now(timezone.utc)
+        job.questions_created = len(questions)
+        job.created_question_ids = [str(q.id) for q in questions]
+        
+        # 10. Increment usage
+        await self._increment_usage(len(questions))
+        
+        await self.session.commit()
+        
+        return {
+            "job_id": str(job.id),
+            "status": job.status.value,
+            "questions_created": job.questions_created,
+            "question_ids": job.created_question_ids,
+            "tokens_used": job.tokens_used,
+        }
+    
+    async def _fail_job(self, job: AIQuestionGenJob, error: Exception) -> None:
+        logger.exception(f"Question generation failed: {error}")
+        job.status = AIJobStatus.FAILED
+        job.error_message = str(error)
+        job.completed_at = datetime.now(timezone.utc)
+        await self.session.commit()
     
     async def _check_quota(self, count: int) -> None:
         """Check if tenant has quota for question generation."""
@@ -243,8 +364,182 @@ class AIQuestionGenService:
             },
         }
     
+    # ============================================
+    # Fan-out generation
+    # ============================================
+    
+    def _plan_chunks(self, params: dict) -> List[dict]:
+        """Split a request into chunks of about CHUNK_SIZE questions."""
+        count = params["count"]
+        n = max(1, -(-count // CHUNK_SIZE))
+        if n == 1:
+            return [dict(params)]
+        
+        base, extra = divmod(count, n)
+        chunks = []
+        for i in range(n):
+            difficulty = params["difficulty"]
+            if difficulty == QuestionGenDifficulty.MIXED.value:
+                difficulty = MIXED_CHUNK_DIFFICULTIES[i % len(MIXED_CHUNK_DIFFICULTIES)]
+            chunks.append({
+                **params,
+                "count": base + (1 if i < extra else 0),
+                "difficulty": difficulty,
+                "variation": f"This is set {i + 1} of {n}. {CHUNK_FOCUS[i % len(CHUNK_FOCUS)]}",
+            })
+        return chunks
+    
+    async def _generate_chunk(self, input_snapshot: dict, params: dict) -> dict:
+        """Generate one chunk, retrying failed or malformed responses."""
+        tokens_used = 0
+        error = None
+        for attempt in range(1, CHUNK_ATTEMPTS + 1):
+            try:
+                result = await self._generate_with_ai({**input_snapshot, "parameters": params})
+            except ValidationError as e:
+                error = str(e)
+                continue
+            tokens_used += result["tokens_used"]
+            questions = [q for q in result["questions"] if isinstance(q, dict) and q.get("question")]
+            if questions:
+                return {
+                    "questions": questions[:params["count"]],
+                    "tokens_used": tokens_used,
+                    "attempts": attempt,
+                }
+            error = "No questions in AI response"
+        return {"questions": [], "tokens_used": tokens_used, "attempts": CHUNK_ATTEMPTS, "error": error}
+    
+    async def _stream_chunk(self, input_snapshot: dict, params: dict, events: asyncio.Queue) -> None:
+        """
+        Stream one chunk into events: ("question", q_data) per question,
+        then ("chunk", summary). A failed attempt is retried for the
+        questions it did not deliver.
+        """
+        topic = input_snapshot["topic"]
+        chapter = input_snapshot["chapter"]
+        subject = input_snapshot["subject"]
+        schema = self._get_response_schema(params["question_type"])
+        
+        delivered = 0
+        tokens_used = 0
+        error = None
+        attempt = 0
+        while attempt < CHUNK_ATTEMPTS and delivered < params["count"]:
+            attempt += 1
+            remaining = {**params, "count": params["count"] - delivered}
+            stream = self.gateway.stream_structured(
+                self._build_prompt(topic, chapter, subject, remaining),
+                schema,
+                "questions",
+                self.tenant_id,
+                feature="question_gen",
+            )
+            try:
+                # Read to the end (extra questions are dropped) so the
+                # stream releases its slot and reports its usage
+                async for q_data in stream:
+                    if not q_data.get("question") or delivered >= params["count"]:
+                        continue
+                    await events.put(("question", q_data))
+                    delivered += 1
+                error = None if delivered else "No questions in AI response"
+            except Exception as e:
+                logger.error(f"AI generation failed: {e}")
+                error = str(e)
+            finally:
+                tokens_used += stream.tokens_used
+        
+        await events.put(("chunk", {
+            "received": delivered,
+            "attempts": attempt,
+            "error": error,
+            "tokens_used": tokens_used,
+        }))
+    
+    def _dedup_batch(self, generated: List[dict], accepted: List[set]) -> List[dict]:
+        """Drop questions near-identical to ones already accepted in this request."""
+        fresh = []
+        for q_data in generated:
+            words = word_set(q_data.get("question", ""))
+            if not words:
+                continue
+            if any(jaccard(words, other) >= AIQualityService.DUPLICATE_THRESHOLD for other in accepted):
+                continue
+            accepted.append(words)
+            fresh.append(q_data)
+        return fresh
+    
+    async def _generate_and_create(
+        self,
+        input_snapshot: dict,
+        topic: SyllabusTopic,
+        subject_id: UUID,
+        teacher_id: UUID,
+        difficulty: QuestionGenDifficulty,
+        question_type: QuestionGenType,
+    ) -> Tuple[dict, List[Question]]:
+        """
+        Generate the requested questions in parallel chunks.
+        
+        Chunks run concurrently; each finished chunk is deduplicated
+        against the questions accepted so far and created right away
+        (the session is only used here, never by the chunk tasks). A
+        chunk that still fails after CHUNK_ATTEMPTS is reported in the
+        output snapshot; the request fails only if no chunk succeeds.
+        
+        Returns:
+            (output snapshot, created questions)
+        """
+        plan = self._plan_chunks(input_snapshot["parameters"])
+        tasks = [
+            asyncio.ensure_future(self._generate_chunk(input_snapshot, params))
+            for params in plan
+        ]
+        
+        accepted: List[set] = []
+        generated: List[dict] = []
+        questions: List[Question] = []
+        chunks = []
+        tokens_used = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                tokens_used += result["tokens_used"]
+                fresh = self._dedup_batch(result["questions"], accepted)
+                chunks.append({
+                    "received": len(result["questions"]),
+                    "accepted": len(fresh),
+                    "attempts": result["attempts"],
+                    "error": result.get("error"),
+                })
+                if not fresh:
+                    continue
+                generated.extend(fresh)
+                questions.extend(await self._create_questions(
+                    ai_response={"questions": fresh},
+                    topic=topic,
+                    subject_id=subject_id,
+                    teacher_id=teacher_id,
+                    difficulty=difficulty,
+                    question_type=question_type,
+                ))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        if not generated:
+            errors = "; ".join(c["error"] for c in chunks if c["error"])
+            raise ValidationError(f"AI generation failed: {errors or 'no questions returned'}")
+        
+        return {
+            "questions": generated,
+            "tokens_used": tokens_used,
+            "chunks": chunks,
+        }, questions
+    
     async def _generate_with_ai(self, input_snapshot: dict) -> dict:
-        """Call AI provider to generate questions."""
+        """Call AI provider to generate questions (one call)."""
         topic = input_snapshot["topic"]
         chapter = input_snapshot["chapter"]
         subject = input_snapshot["subject"]
@@ -258,10 +553,12 @@ class AIQuestionGenService:
         
         # Call AI
         try:
-            result = await self.provider.generate_structured(prompt, schema)
+            response = await self.gateway.generate_structured(
+                prompt, schema, self.tenant_id, feature="question_gen",
+            )
             return {
-                "questions": result.get("questions", []),
-                "tokens_used": 0,  # Would get from response if available
+                "questions": response.data.get("questions", []),
+                "tokens_used": response.tokens_used,
             }
         except Exception as e:
             logger.error(f"AI generation failed: {e}")
@@ -355,6 +652,9 @@ REQUIREMENTS:
 
 Generate exactly {count} questions."""
 
+        if params.get("variation"):
+            prompt += f"\n\n{params['variation']}"
+
         return prompt
     
     def _get_response_schema(self, question_type: str) -> dict:
@@ -384,6 +684,7 @@ Generate exactly {count} questions."""
         teacher_id: UUID,
         difficulty: QuestionGenDifficulty,
         question_type: QuestionGenType,
+        record_duplicates: bool = True,
     ) -> List[Question]:
         """Create Question records from AI response."""
         questions = []
@@ -407,8 +708,22 @@ Generate exactly {count} questions."""
                 continue
         
         await self.session.flush()
+        if record_duplicates:
+            await self._record_near_duplicates(questions)
         return questions
     
+    async def _record_near_duplicates(self, questions: List[Question]) -> None:
+        """Flag near-duplicates of the new questions and index them (best effort)."""
+        if not questions:
+            return
+        try:
+            async with self.session.begin_nested():
+                found = await AIQualityService(self.session, self.tenant_id).index_questions(questions)
+            if found:
+                logger.info(f"{len(found)} generated questions flagged as near-duplicates")
+        except Exception as e:
+            logger.warning(f"Near-duplicate indexing failed: {e}")
+    
     def _create_single_question(
         self,
         q_data: dict,
@@ -13,6 +13,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import UsageLimitExceededError
+from app.platform.usage.counter import usage_counter
 
 
 class SubscriptionTier(str, Enum):
@@ -56,6 +57,15 @@ TIER_AI_LIMITS: Dict[SubscriptionTier, dict] = {
 }
 
 
+# Quota type -> UsageLimit counter column
+QUOTA_COUNTER_COLUMNS: Dict[str, str] = {
+    "ai_requests": "ai_requests_used",
+    "ocr_requests": "ocr_requests_used",
+    "lesson_plan_gen": "lesson_plan_gen_used",
+    "question_gen": "question_gen_used",
+}
+
+
 class AIQuotaManager:
     """
     Manages AI quotas per subscription tier.
@@ -106,7 +116,7 @@ class AIQuotaManager:
         return TIER_AI_LIMITS.get(tier, TIER_AI_LIMITS[SubscriptionTier.STARTER])
     
     async def get_usage(self) -> dict:
-        """Get current month's AI usage."""
+        """Get current month's AI usage (including unflushed increments)."""
         from app.billing.models import UsageLimit
         
         now = datetime.now()
@@ -118,20 +128,14 @@ class AIQuotaManager:
         result = await self.session.execute(query)
         usage = result.scalar_one_or_none()
         
-        if usage:
-            return {
-                "ai_requests": usage.ai_requests_used,
-                "ocr_requests": getattr(usage, 'ocr_requests_used', 0),
-                "lesson_plan_gen": getattr(usage, 'lesson_plan_gen_used', 0),
-                "question_gen": getattr(usage, 'question_gen_used', 0),
-            }
-        
-        return {
-            "ai_requests": 0,
-            "ocr_requests": 0,
-            "lesson_plan_gen": 0,
-            "question_gen": 0,
-        }
+        totals = {}
+        for quota_type in QUOTA_COUNTER_COLUMNS:
+            column = QUOTA_COUNTER_COLUMNS[quota_type]
+            stored = getattr(usage, column, 0) if usage else 0
+            totals[quota_type] = (stored or 0) + await usage_counter.pending_limit(
+                self.tenant_id, column,
+            )
+        return totals
     
     async def check_quota(
         self,
@@ -162,37 +166,9 @@ class AIQuotaManager:
         quota_type: str = "ai_requests",
         count: int = 1,
     ) -> None:
-        """Increment usage counter."""
-        from app.billing.models import UsageLimit
-        
-        now = datetime.now()
-        query = select(UsageLimit).where(
-            UsageLimit.tenant_id == self.tenant_id,
-            UsageLimit.year == now.year,
-            UsageLimit.month == now.month,
-        )
-        result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
-        
-        if not usage:
-            usage = UsageLimit(
-                tenant_id=self.tenant_id,
-                year=now.year,
-                month=now.month,
-            )
-            self.session.add(usage)
-        
-        # Increment the appropriate counter
-        current = getattr(usage, f"{quota_type}_used", 0) if hasattr(usage, f"{quota_type}_used") else 0
-        
-        if quota_type == "ai_requests":
-            usage.ai_requests_used = current + count
-        elif hasattr(usage, f"{quota_type}_used"):
-            setattr(usage, f"{quota_type}_used", current + count)
-        else:
-            usage.ai_requests_used += count
-        
-        await self.session.flush()
+        """Increment usage counter (write-behind, see usage_counter)."""
+        column = QUOTA_COUNTER_COLUMNS.get(quota_type, "ai_requests_used")
+        await usage_counter.add_limit(self.tenant_id, column, count)
     
     async def get_quota_status(self) -> dict:
         """Get complete quota status."""
@@ -10,12 +10,13 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.auth.dependencies import CurrentUser, require_permission
 from app.users.rbac import Permission
 from app.ai.service import AIService
 from app.ai.lesson_plan_generator import AILessonPlanService
 from app.ai.models import AIJobStatus
+from app.ai.streaming import sse_response
 from app.ai.schemas import (
     GenerateAILessonPlanRequest,
     GenerateAILessonPlanResponse,
@@ -62,6 +63,31 @@ async def generate_ai_lesson_plan(
     )
 
 
+@router.post("/lesson-plan/generate/stream")
+async def stream_ai_lesson_plan(
+    request: GenerateAILessonPlanRequest,
+    user: CurrentUser,
+    _=Depends(require_permission(Permission.AI_LESSON_PLAN_GENERATE)),
+):
+    """
+    Generate AI lesson plan as Server-Sent Events.
+    
+    Events: `job` (job id), one `unit` per topic allocation as the AI
+    produces it, then `done` with the same body as /lesson-plan/generate,
+    or `error`.
+    """
+    async def events():
+        # Own session: the request's session closes before streaming
+        async with AsyncSessionLocal() as session:
+            service = AILessonPlanService(session, user.tenant_id)
+            async for event in service.stream_lesson_plan(teacher_id=user.user_id, request=request):
+                if event["event"] == "done":
+                    await session.commit()
+                yield event
+    
+    return sse_response(events())
+
+
 @router.get("/lesson-plan/jobs", response_model=dict)
 async def list_lesson_plan_jobs(
     user: CurrentUser,
@@ -7,8 +7,9 @@ from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.ai.providers.openai import OpenAIProvider
+from app.ai.gateway import get_ai_gateway
 from app.core.exceptions import UsageLimitExceededError
+from app.platform.usage.counter import usage_counter
 
 
 class AIService:
@@ -17,7 +18,7 @@ class AIService:
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
-        self.provider = OpenAIProvider()
+        self.gateway = get_ai_gateway()
     
     async def _check_usage(self) -> None:
         """Check if tenant has AI credits."""
@@ -26,40 +27,24 @@ class AIService:
         from datetime import datetime
         
         now = datetime.now()
-        query = select(UsageLimit).where(
+        query = select(UsageLimit.ai_requests_used).where(
             UsageLimit.tenant_id == self.tenant_id,
             UsageLimit.year == now.year,
             UsageLimit.month == now.month,
         )
         result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
+        used = (result.scalar() or 0) + await usage_counter.pending_limit(
+            self.tenant_id, "ai_requests_used",
+        )
         
-        if usage:
-            # Check limit (would get from subscription plan)
-            max_requests = 100  # Default
-            if usage.ai_requests_used >= max_requests:
-                raise UsageLimitExceededError(
-                    "AI requests", usage.ai_requests_used, max_requests
-                )
+        # Check limit (would get from subscription plan)
+        max_requests = 100  # Default
+        if used >= max_requests:
+            raise UsageLimitExceededError("AI requests", used, max_requests)
     
     async def _increment_usage(self) -> None:
-        """Increment AI usage counter."""
-        from app.billing.models import UsageLimit
-        from sqlalchemy import select
-        from datetime import datetime
-        
-        now = datetime.now()
-        query = select(UsageLimit).where(
-            UsageLimit.tenant_id == self.tenant_id,
-            UsageLimit.year == now.year,
-            UsageLimit.month == now.month,
-        )
-        result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
-        
-        if usage:
-            usage.ai_requests_used += 1
-            await self.session.commit()
+        """Increment AI usage counter (write-behind, see usage_counter)."""
+        await usage_counter.add_limit(self.tenant_id, "ai_requests_used")
     
     async def generate_lesson_plan(
         self,
@@ -71,7 +56,8 @@ class AIService:
         """Generate AI lesson plan."""
         await self._check_usage()
         
-        result = await self.provider.generate_lesson_plan(
+        response = await self.gateway.generate_lesson_plan(
+            tenant_id=self.tenant_id,
             subject=subject,
             topic=topic,
             grade_level=grade_level,
@@ -79,7 +65,7 @@ class AIService:
         )
         
         await self._increment_usage()
-        return result
+        return response.data
     
     async def generate_questions(
         self,
@@ -92,7 +78,8 @@ class AIService:
         """Generate AI questions."""
         await self._check_usage()
         
-        result = await self.provider.generate_questions(
+        response = await self.gateway.generate_questions(
+            tenant_id=self.tenant_id,
             subject=subject,
             topic=topic,
             question_type=question_type,
@@ -101,7 +88,7 @@ class AIService:
         )
         
         await self._increment_usage()
-        return result
+        return response.data.get("questions", [])
     
     async def solve_doubt(
         self,
@@ -112,14 +99,15 @@ class AIService:
         """AI doubt solver."""
         await self._check_usage()
         
-        result = await self.provider.solve_doubt(
+        response = await self.gateway.solve_doubt(
+            tenant_id=self.tenant_id,
             question=question,
             subject=subject,
             context=context,
         )
         
         await self._increment_usage()
-        return result
+        return response.data
     
     async def get_usage(self) -> dict:
         """Get AI usage for current month."""
@@ -0,0 +1,154 @@
+"""
+CUSTOS AI Streaming
+
+Helpers for streaming AI responses to clients.
+
+- JSONArrayStreamParser: fed the response text as it arrives, returns
+  each object of a JSON array (e.g. "questions") as soon as it closes
+- sse_response: Server-Sent Events response from an async iterator of
+  {"event": ..., "data": ...} dicts
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.core.exceptions import CustosException
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for the objects of one JSON array.
+    
+    With key, the array is the value of that property (e.g.
+    {"questions": [{...}, {...}]}); without, the first array in the
+    text. Text outside JSON (a Markdown fence) is ignored. Objects that
+    are not valid JSON on their own are skipped.
+    """
+    
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.items: List[Dict[str, Any]] = []
+        
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._array_depth: Optional[int] = None  # Depth of the target array's contents
+        self._array_done = False
+        self._item: Optional[List[str]] = None
+    
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume more text; returns the objects completed by it."""
+        completed = []
+        for c in text:
+            if self._item is not None:
+                self._item.append(c)
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string)
+                else:
+                    self._string.append(c)
+                continue
+            
+            if c == '"':
+                self._in_string = True
+                self._string = []
+            elif c == ":":
+                self._pending_key = self._last_string
+            elif c == ",":
+                self._pending_key = None
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._is_target():
+                    self._array_depth = self._depth
+                elif (
+                    c == "{"
+                    and self._item is None
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._item = ["{"]
+                self._pending_key = None
+            elif c in "}]":
+                if (
+                    c == "}"
+                    and self._item is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    item = self._finish_item()
+                    if item is not None:
+                        completed.append(item)
+                if self._array_depth is not None and self._depth == self._array_depth:
+                    self._array_depth = None
+                    self._array_done = True
+                self._depth -= 1
+        
+        self.items.extend(completed)
+        return completed
+    
+    def _is_target(self) -> bool:
+        if self._array_done or self._array_depth is not None:
+            return False
+        if self.key is None:
+            return True
+        return self._pending_key == self.key
+    
+    def _finish_item(self) -> Optional[Dict[str, Any]]:
+        text = "".join(self._item)
+        self._item = None
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping malformed streamed item: {text[:100]}")
+            return None
+        return item if isinstance(item, dict) else None
+
+
+# ============================================
+# Server-Sent Events
+# ============================================
+
+def format_sse(event: str, data: Any) -> str:
+    """One SSE message."""
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Stream {"event", "data"} dicts as Server-Sent Events.
+    
+    An exception ends the stream with an "error" event (the HTTP status
+    is already sent).
+    """
+    async def body():
+        try:
+            async for event in events:
+                yield format_sse(event["event"], event.get("data"))
+        except CustosException as e:
+            yield format_sse("error", {"error": e.code, "message": e.message})
+        except Exception as e:
+            logger.exception(f"Event stream failed: {e}")
+            yield format_sse("error", {"error": "INTERNAL_ERROR", "message": "Generation failed"})
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Don't buffer in nginx
+        },
+    )
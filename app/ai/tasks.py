@@ -60,7 +60,6 @@ def process_question_generation_batch(
         from app.ai.models import AIQuestionGenJob, AIJobStatus
         from app.ai.question_gen_service import AIQuestionGenService
         from app.ai.quota_manager import AIQuotaManager
-        from app.ai.providers.openai import OpenAIProvider
         from app.academics.models.syllabus import SyllabusTopic
         
         # Create database connection
@@ -95,20 +94,17 @@ def process_question_generation_batch(
                 input_snapshot = service._build_input_snapshot(topic, diff, q_type, count)
                 job.input_snapshot = input_snapshot
                 
-                # Generate with AI
-                ai_response = await service._generate_with_ai(input_snapshot)
-                job.output_snapshot = ai_response
-                job.tokens_used = ai_response.get("tokens_used", 0)
-                
-                # Create questions
-                questions = await service._create_questions(
-                    ai_response=ai_response,
+                # Generate with AI (parallel chunks) and create questions
+                ai_response, questions = await service._generate_and_create(
+                    input_snapshot=input_snapshot,
                     topic=topic,
                     subject_id=UUIDType(subject_id),
                     teacher_id=UUIDType(teacher_id),
                     difficulty=diff,
                     question_type=q_type,
                 )
+                job.output_snapshot = ai_response
+                job.tokens_used = ai_response.get("tokens_used", 0)
                 
                 # Update job
                 job.status = AIJobStatus.COMPLETED
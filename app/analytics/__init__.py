@@ -15,6 +15,7 @@ from app.analytics.models import (
     StudentAnalyticsSnapshot,
     TeacherAnalyticsSnapshot,
     ClassAnalyticsSnapshot,
+    TenantAnalyticsRollup,
     AnalyticsPeriod,
 )
 from app.analytics.service import AnalyticsService
@@ -25,6 +26,7 @@ __all__ = [
     "StudentAnalyticsSnapshot",
     "TeacherAnalyticsSnapshot",
     "ClassAnalyticsSnapshot",
+    "TenantAnalyticsRollup",
     "AnalyticsPeriod",
     # Service
     "AnalyticsService",
@@ -53,6 +53,13 @@ class StudentAnalyticsSnapshot(TenantBaseModel):
     __tablename__ = "analytics_student_snapshots"
     
     __table_args__ = (
+        # Upsert target for bulk generation (subject_id may be NULL)
+        UniqueConstraint(
+            "tenant_id", "student_id", "class_id", "subject_id",
+            "period_start", "period_end",
+            name="uq_analytics_student_period",
+            postgresql_nulls_not_distinct=True,
+        ),
         Index("ix_analytics_student_tenant", "tenant_id", "student_id"),
         Index("ix_analytics_student_class", "class_id"),
         Index("ix_analytics_student_period", "period_start", "period_end"),
@@ -170,6 +177,12 @@ class TeacherAnalyticsSnapshot(TenantBaseModel):
     __tablename__ = "analytics_teacher_snapshots"
     
     __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "teacher_id", "class_id", "subject_id",
+            "period_start", "period_end",
+            name="uq_analytics_teacher_period",
+            postgresql_nulls_not_distinct=True,
+        ),
         Index("ix_analytics_teacher_tenant", "tenant_id", "teacher_id"),
         Index("ix_analytics_teacher_period", "period_start", "period_end"),
     )
@@ -257,6 +270,12 @@ class ClassAnalyticsSnapshot(TenantBaseModel):
     __tablename__ = "analytics_class_snapshots"
     
     __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "class_id", "subject_id",
+            "period_start", "period_end",
+            name="uq_analytics_class_period",
+            postgresql_nulls_not_distinct=True,
+        ),
         Index("ix_analytics_class_tenant", "tenant_id", "class_id"),
         Index("ix_analytics_class_period", "period_start", "period_end"),
     )
@@ -320,3 +339,55 @@ class ClassAnalyticsSnapshot(TenantBaseModel):
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True,
     )
+
+
+# ============================================
+# Tenant Analytics Rollup
+# ============================================
+
+class TenantAnalyticsRollup(TenantBaseModel):
+    """
+    Tenant-level analytics rollup for a period.
+    
+    One row per tenant per period, derived from class and teacher
+    snapshots whenever they are (re)generated. Serves the principal
+    dashboard without re-aggregating snapshots on every page load.
+    
+    VISIBILITY RULES:
+    - Admin/Principal only
+    - Aggregates only, NO individual data
+    """
+    __tablename__ = "analytics_tenant_rollups"
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "period_start", "period_end",
+            name="uq_analytics_tenant_rollup_period",
+        ),
+    )
+    
+    # Period
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    period_end: Mapped[date] = mapped_column(Date, nullable=False)
+    
+    # School-wide counts
+    total_students: Mapped[int] = mapped_column(Integer, default=0)
+    total_teachers: Mapped[int] = mapped_column(Integer, default=0)
+    total_classes: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # Averages across class snapshots
+    school_avg_mastery: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=0)
+    school_avg_attendance: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=0)
+    school_avg_activity: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=0)
+    avg_syllabus_coverage: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=0)
+    
+    # Average across teacher snapshots
+    avg_teacher_engagement: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=0)
+    
+    # Attention areas (counts only, NOT names)
+    classes_needing_attention: Mapped[int] = mapped_column(Integer, default=0)
+    subjects_with_low_mastery: Mapped[int] = mapped_column(Integer, default=0)
+    
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
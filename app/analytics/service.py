@@ -13,9 +13,10 @@ CORE PRINCIPLES:
 from datetime import datetime, date, timezone, timedelta
 from decimal import Decimal
 from typing import Optional, List, Tuple, Dict
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, cast, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import ResourceNotFoundError, ValidationError
@@ -23,8 +24,26 @@ from app.analytics.models import (
     StudentAnalyticsSnapshot,
     TeacherAnalyticsSnapshot,
     ClassAnalyticsSnapshot,
+    TenantAnalyticsRollup,
     AnalyticsPeriod,
 )
+from app.academics.models.lesson_plans import (
+    LessonPlan,
+    LessonPlanStatus,
+    LessonPlanUnit,
+    ProgressStatus,
+)
+from app.academics.models.structure import Section
+from app.academics.models.syllabus import SyllabusTopic
+from app.academics.models.teaching_assignments import TeachingAssignment
+from app.academics.participation import ParticipationStatus
+from app.attendance.models import StudentAttendance, AttendanceStatus
+from app.learning.models.daily_loops import DailyLoopSession, DailyLoopAttempt
+from app.learning.models.weekly_tests import WeeklyTest, WeeklyTestResult
+from app.learning.models.lesson_evaluation import LessonEvaluation, LessonEvaluationResult
+from app.scheduling.models.schedule import ScheduleEntry, ScheduleEntryStatus
+from app.students.lifecycle import StudentLifecycleState
+from app.users.models import StudentProfile
 
 
 class AnalyticsService:
@@ -54,6 +73,43 @@ class AnalyticsService:
     SCHEDULE_ADHERENCE_WEIGHT = 0.30
     STUDENT_PARTICIPATION_WEIGHT = 0.40
     
+    # Class aggregate field -> student snapshot field it averages
+    _CLASS_AVERAGE_FIELDS = {
+        "avg_mastery_pct": "overall_mastery_pct",
+        "avg_activity_score": "activity_score",
+        "avg_attendance_pct": "attendance_pct",
+        "daily_loop_participation_avg": "daily_loop_participation_pct",
+        "weekly_test_participation_avg": "weekly_test_participation_pct",
+        "lesson_eval_participation_avg": "lesson_eval_participation_pct",
+    }
+    
+    # Rows per multi-row INSERT ... ON CONFLICT statement
+    UPSERT_BATCH_SIZE = 500
+    
+    # Class/subject average mastery below this needs attention
+    LOW_MASTERY_THRESHOLD = 60
+    
+    # Daily loop accuracy bands for a student's weak/strong concepts
+    # (same bands as MasteryLevel); topics with fewer attempts are skipped
+    STRONG_CONCEPT_PCT = 70
+    WEAK_CONCEPT_PCT = 40
+    CONCEPT_MIN_ATTEMPTS = 3
+    CONCEPT_LIST_LIMIT = 10
+    
+    # TenantAnalyticsRollup fields served by the principal dashboard
+    _ROLLUP_FIELDS = (
+        "total_students",
+        "total_teachers",
+        "total_classes",
+        "school_avg_mastery",
+        "school_avg_attendance",
+        "school_avg_activity",
+        "avg_syllabus_coverage",
+        "avg_teacher_engagement",
+        "classes_needing_attention",
+        "subjects_with_low_mastery",
+    )
+    
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
@@ -80,27 +136,72 @@ class AnalyticsService:
         - Weekly tests
         - Lesson evaluations
         - Attendance records
+        
+        Uses the same grouped aggregates as generate_all_snapshots,
+        filtered to one student.
         """
-        # Fetch raw data (would query actual tables in production)
-        daily_data = await self._get_daily_loop_data(
-            student_id, period_start, period_end, subject_id
+        metrics = await self._compute_student_metrics(
+            period_start, period_end,
+            class_id=class_id, subject_id=subject_id, student_id=student_id,
         )
-        weekly_data = await self._get_weekly_test_data(
+        
+        # Get concepts analysis
+        weak_concepts, strong_concepts = await self._analyze_concepts(
             student_id, period_start, period_end, subject_id
         )
-        lesson_data = await self._get_lesson_eval_data(
-            student_id, period_start, period_end, subject_id
+        
+        row = self._build_student_snapshot_row(
+            student_id=student_id,
+            class_id=class_id,
+            metrics=metrics.get((student_id, class_id)) or self._empty_student_metrics(),
+            period_start=period_start,
+            period_end=period_end,
+            period_type=period_type,
+            subject_id=subject_id,
+            generated_by=generated_by,
+            weak_concepts=weak_concepts,
+            strong_concepts=strong_concepts,
         )
-        attendance_data = await self._get_attendance_data(
-            student_id, period_start, period_end
+        await self._upsert_snapshots(
+            StudentAnalyticsSnapshot, "uq_analytics_student_period", [row]
         )
+        await self.session.commit()
         
-        # Calculate activity score (participation only)
+        return await self._fetch_snapshot(
+            StudentAnalyticsSnapshot,
+            student_id=student_id,
+            class_id=class_id,
+            subject_id=subject_id,
+            period_start=period_start,
+            period_end=period_end,
+        )
+    
+    def _build_student_snapshot_row(
+        self,
+        student_id: UUID,
+        class_id: UUID,
+        metrics: Dict,
+        period_start: date,
+        period_end: date,
+        period_type: AnalyticsPeriod,
+        subject_id: Optional[UUID] = None,
+        generated_by: Optional[UUID] = None,
+        weak_concepts: Optional[List] = None,
+        strong_concepts: Optional[List] = None,
+    ) -> Dict:
+        """Build StudentAnalyticsSnapshot column values from computed metrics."""
+        daily_data = metrics["daily"]
+        weekly_data = metrics["weekly"]
+        lesson_data = metrics["lesson"]
+        attendance_data = metrics["attendance"]
+        
+        # Calculate activity score (participation only).
+        # Attendance uses participation rate so excused absences don't penalize.
         activity_score = self._calculate_activity_score(
             daily_data["participation_pct"],
             weekly_data["participation_pct"],
             lesson_data["participation_pct"],
-            attendance_data["attendance_pct"],
+            attendance_data["participation_rate"],
         )
         
         # Calculate actual performance score (mastery)
@@ -110,58 +211,52 @@ class AnalyticsService:
             lesson_data["mastery_pct"],
         )
         
-        # Get concepts analysis
-        weak_concepts, strong_concepts = await self._analyze_concepts(
-            student_id, period_start, period_end, subject_id
-        )
-        
-        # Create snapshot
-        snapshot = StudentAnalyticsSnapshot(
-            tenant_id=self.tenant_id,
-            student_id=student_id,
-            class_id=class_id,
-            subject_id=subject_id,
-            period_type=period_type,
-            period_start=period_start,
-            period_end=period_end,
+        return {
+            "tenant_id": self.tenant_id,
+            "student_id": student_id,
+            "class_id": class_id,
+            "subject_id": subject_id,
+            "period_type": period_type,
+            "period_start": period_start,
+            "period_end": period_end,
             
             # Activity Score (student-visible)
-            activity_score=Decimal(str(activity_score)),
-            daily_loop_participation_pct=Decimal(str(daily_data["participation_pct"])),
-            weekly_test_participation_pct=Decimal(str(weekly_data["participation_pct"])),
-            lesson_eval_participation_pct=Decimal(str(lesson_data["participation_pct"])),
-            attendance_pct=Decimal(str(attendance_data["attendance_pct"])),
+            "activity_score": Decimal(str(round(activity_score, 2))),
+            "daily_loop_participation_pct": Decimal(str(daily_data["participation_pct"])),
+            "weekly_test_participation_pct": Decimal(str(weekly_data["participation_pct"])),
+            "lesson_eval_participation_pct": Decimal(str(lesson_data["participation_pct"])),
+            "attendance_pct": Decimal(str(attendance_data["attendance_pct"])),
             
             # Actual Performance Score (hidden from students)
-            actual_score=Decimal(str(actual_score)),
-            daily_mastery_pct=Decimal(str(daily_data["mastery_pct"])),
-            weekly_test_mastery_pct=Decimal(str(weekly_data["mastery_pct"])),
-            lesson_eval_mastery_pct=Decimal(str(lesson_data["mastery_pct"])),
-            overall_mastery_pct=Decimal(str(actual_score)),
+            "actual_score": Decimal(str(round(actual_score, 2))),
+            "daily_mastery_pct": Decimal(str(daily_data["mastery_pct"])),
+            "weekly_test_mastery_pct": Decimal(str(weekly_data["mastery_pct"])),
+            "lesson_eval_mastery_pct": Decimal(str(lesson_data["mastery_pct"])),
+            "overall_mastery_pct": Decimal(str(round(actual_score, 2))),
             
             # Raw counts
-            daily_loops_total=daily_data["total"],
-            daily_loops_completed=daily_data["completed"],
-            weekly_tests_total=weekly_data["total"],
-            weekly_tests_completed=weekly_data["completed"],
-            lesson_evals_total=lesson_data["total"],
-            lesson_evals_completed=lesson_data["completed"],
-            school_days_total=attendance_data["total_days"],
-            school_days_present=attendance_data["present_days"],
+            "daily_loops_total": daily_data["total"],
+            "daily_loops_completed": daily_data["completed"],
+            "weekly_tests_total": weekly_data["total"],
+            "weekly_tests_completed": weekly_data["completed"],
+            "lesson_evals_total": lesson_data["total"],
+            "lesson_evals_completed": lesson_data["completed"],
+            "school_days_total": attendance_data["total_days"],
+            "school_days_present": attendance_data["present_days"],
+            
+            # Absence tracking
+            "excused_absence_count": attendance_data["excused_days"],
+            "unexcused_absence_count": attendance_data["unexcused_days"],
+            "participation_rate": Decimal(str(attendance_data["participation_rate"])),
             
             # Concepts
-            weak_concepts_json=weak_concepts,
-            strong_concepts_json=strong_concepts,
+            "weak_concepts_json": weak_concepts or None,
+            "strong_concepts_json": strong_concepts or None,
             
             # Metadata
-            generated_at=datetime.now(timezone.utc),
-            generated_by=generated_by,
-        )
-        
-        self.session.add(snapshot)
-        await self.session.commit()
-        await self.session.refresh(snapshot)
-        return snapshot
+            "generated_at": datetime.now(timezone.utc),
+            "generated_by": generated_by,
+        }
     
     def _calculate_activity_score(
         self,
@@ -203,75 +298,353 @@ class AnalyticsService:
         )
         return min(100.0, max(0.0, score))
     
+    @staticmethod
+    def _pct(numerator: float, denominator: float) -> float:
+        """Percentage rounded to 2 places, capped at 100; 0 when nothing to divide."""
+        if not denominator:
+            return 0.0
+        return round(min(100.0, float(numerator) / float(denominator) * 100), 2)
+    
+    @staticmethod
+    def _empty_student_metrics() -> Dict:
+        """Metrics for a student with no recorded activity in the period."""
+        empty_activity = {
+            "total": 0,
+            "completed": 0,
+            "participation_pct": 0.0,
+            "mastery_pct": 0.0,
+        }
+        return {
+            "daily": dict(empty_activity),
+            "weekly": dict(empty_activity),
+            "lesson": dict(empty_activity),
+            "attendance": {
+                "total_days": 0,
+                "present_days": 0,
+                "excused_days": 0,
+                "unexcused_days": 0,
+                "attendance_pct": 0.0,
+                "participation_rate": 0.0,
+            },
+        }
+    
+    async def _compute_student_metrics(
+        self,
+        period_start: date,
+        period_end: date,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+        student_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], Dict]:
+        """
+        Compute participation and mastery metrics for every student in scope.
+        
+        One grouped aggregate per source table, keyed by (student_id, class_id).
+        A student who changed class mid-period gets one entry per class.
+        Active students with no activity in the period get an all-zero entry.
+        """
+        enrolled = await self._get_enrolled_students(class_id, student_id)
+        session_totals = await self._count_daily_loop_sessions(
+            period_start, period_end, class_id, subject_id
+        )
+        daily = await self._get_daily_loop_data(
+            period_start, period_end, class_id, subject_id, student_id
+        )
+        weekly = await self._get_weekly_test_data(
+            period_start, period_end, class_id, subject_id, student_id
+        )
+        lesson = await self._get_lesson_eval_data(
+            period_start, period_end, class_id, subject_id, student_id
+        )
+        attendance = await self._get_attendance_data(
+            period_start, period_end, class_id, student_id
+        )
+        
+        class_session_totals: Dict[UUID, int] = {}
+        for (session_class_id, _), count in session_totals.items():
+            class_session_totals[session_class_id] = (
+                class_session_totals.get(session_class_id, 0) + count
+            )
+        
+        metrics: Dict[Tuple[UUID, UUID], Dict] = {}
+        for key in enrolled | set(daily) | set(weekly) | set(lesson) | set(attendance):
+            entry = self._empty_student_metrics()
+            
+            if key in daily:
+                sessions, attempts, correct = daily[key]
+                total = max(class_session_totals.get(key[1], 0), sessions)
+                entry["daily"] = {
+                    "total": total,
+                    "completed": sessions,
+                    "participation_pct": self._pct(sessions, total),
+                    "mastery_pct": self._pct(correct, attempts),
+                }
+            elif key[1] in class_session_totals:
+                entry["daily"]["total"] = class_session_totals[key[1]]
+            
+            for source, rows in (("weekly", weekly), ("lesson", lesson)):
+                if key in rows:
+                    total, completed, excused, mastery = rows[key]
+                    entry[source] = {
+                        "total": total,
+                        "completed": completed,
+                        # Excused absences are excluded from the denominator
+                        "participation_pct": self._pct(completed, total - excused),
+                        "mastery_pct": round(float(mastery or 0), 2),
+                    }
+            
+            if key in attendance:
+                total, attended, half_days, excused, unexcused = attendance[key]
+                entry["attendance"] = {
+                    "total_days": total,
+                    "present_days": attended + half_days,
+                    "excused_days": excused,
+                    "unexcused_days": unexcused,
+                    "attendance_pct": self._pct(attended + half_days * 0.5, total),
+                    "participation_rate": self._pct(
+                        attended + half_days * 0.5, total - excused
+                    ),
+                }
+            
+            metrics[key] = entry
+        
+        return metrics
+    
+    async def _get_enrolled_students(
+        self,
+        class_id: Optional[UUID] = None,
+        student_id: Optional[UUID] = None,
+    ) -> set:
+        """(student_id, class_id) of active students, from their current section."""
+        query = select(StudentProfile.user_id, Section.class_id).join(
+            Section, StudentProfile.section_id == Section.id
+        ).where(
+            StudentProfile.tenant_id == self.tenant_id,
+            StudentProfile.current_lifecycle_state == StudentLifecycleState.ACTIVE.value,
+            StudentProfile.is_deleted == False,
+            Section.is_deleted == False,
+        )
+        if class_id:
+            query = query.where(Section.class_id == class_id)
+        if student_id:
+            query = query.where(StudentProfile.user_id == student_id)
+        
+        result = await self.session.execute(query)
+        return {(row[0], row[1]) for row in result.all()}
+    
+    async def _count_daily_loop_sessions(
+        self,
+        period_start: date,
+        period_end: date,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], int]:
+        """Count active daily loop sessions per (class_id, subject_id)."""
+        query = select(
+            DailyLoopSession.class_id,
+            DailyLoopSession.subject_id,
+            func.count(DailyLoopSession.id),
+        ).where(
+            DailyLoopSession.tenant_id == self.tenant_id,
+            DailyLoopSession.date >= period_start,
+            DailyLoopSession.date <= period_end,
+            DailyLoopSession.is_active == True,
+            DailyLoopSession.is_deleted == False,
+        ).group_by(DailyLoopSession.class_id, DailyLoopSession.subject_id)
+        
+        if class_id:
+            query = query.where(DailyLoopSession.class_id == class_id)
+        if subject_id:
+            query = query.where(DailyLoopSession.subject_id == subject_id)
+        
+        result = await self.session.execute(query)
+        return {(row[0], row[1]): row[2] for row in result.all()}
+    
     async def _get_daily_loop_data(
         self,
-        student_id: UUID,
         period_start: date,
         period_end: date,
+        class_id: Optional[UUID] = None,
         subject_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch daily loop participation and mastery data."""
-        # In production, this would query the daily_loop_sessions table
-        # For now, return placeholder structure
-        # TODO: Integrate with actual DailyLoopSession model
+        student_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], Tuple[int, int, int]]:
+        """
+        Daily loop attempts grouped by student and class.
         
-        return {
-            "total": 0,
-            "completed": 0,
-            "participation_pct": 0.0,
-            "mastery_pct": 0.0,
-        }
+        Returns {(student_id, class_id): (sessions_attempted, attempts, correct)}.
+        """
+        query = select(
+            DailyLoopAttempt.student_id,
+            DailyLoopSession.class_id,
+            func.count(func.distinct(DailyLoopAttempt.session_id)),
+            func.count(DailyLoopAttempt.id),
+            func.count(DailyLoopAttempt.id).filter(DailyLoopAttempt.is_correct == True),
+        ).join(
+            DailyLoopSession, DailyLoopAttempt.session_id == DailyLoopSession.id
+        ).where(
+            DailyLoopSession.tenant_id == self.tenant_id,
+            DailyLoopSession.date >= period_start,
+            DailyLoopSession.date <= period_end,
+            DailyLoopSession.is_deleted == False,
+            DailyLoopAttempt.is_deleted == False,
+        ).group_by(DailyLoopAttempt.student_id, DailyLoopSession.class_id)
+        
+        if class_id:
+            query = query.where(DailyLoopSession.class_id == class_id)
+        if subject_id:
+            query = query.where(DailyLoopSession.subject_id == subject_id)
+        if student_id:
+            query = query.where(DailyLoopAttempt.student_id == student_id)
+        
+        result = await self.session.execute(query)
+        return {(row[0], row[1]): (row[2], row[3], row[4]) for row in result.all()}
     
-    async def _get_weekly_test_data(
+    async def _get_assessment_result_data(
         self,
-        student_id: UUID,
+        test_model,
+        result_model,
+        result_test_fk,
+        test_date_column,
         period_start: date,
         period_end: date,
+        class_id: Optional[UUID] = None,
         subject_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch weekly test participation and mastery data."""
-        # In production, this would query the weekly_test_sessions table
-        # TODO: Integrate with actual WeeklyTestSession model
+        student_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], Tuple[int, int, int, Optional[float]]]:
+        """
+        Offline assessment results grouped by student and class.
+        
+        Shared by weekly tests and lesson evaluations, which have the same
+        result shape. Mastery follows the participation rules: excused
+        absences are excluded, unexcused absences count as zero.
+        
+        Returns {(student_id, class_id): (total, participated, excused, mastery_pct)}.
+        """
+        not_counted = (
+            ParticipationStatus.EXCUSED_ABSENT.value,
+            ParticipationStatus.NOT_SCHEDULED.value,
+        )
+        status = result_model.participation_status
+        
+        query = select(
+            result_model.student_id,
+            test_model.class_id,
+            func.count(result_model.id),
+            func.count(result_model.id).filter(
+                status == ParticipationStatus.PARTICIPATED.value
+            ),
+            func.count(result_model.id).filter(status.in_(not_counted)),
+            func.avg(func.coalesce(result_model.percentage, 0)).filter(
+                status.notin_(not_counted)
+            ),
+        ).join(
+            test_model, result_test_fk == test_model.id
+        ).where(
+            test_model.tenant_id == self.tenant_id,
+            test_date_column >= period_start,
+            test_date_column <= period_end,
+            test_model.is_deleted == False,
+            result_model.is_deleted == False,
+        ).group_by(result_model.student_id, test_model.class_id)
         
+        if class_id:
+            query = query.where(test_model.class_id == class_id)
+        if subject_id:
+            query = query.where(test_model.subject_id == subject_id)
+        if student_id:
+            query = query.where(result_model.student_id == student_id)
+        
+        result = await self.session.execute(query)
         return {
-            "total": 0,
-            "completed": 0,
-            "participation_pct": 0.0,
-            "mastery_pct": 0.0,
+            (row[0], row[1]): (row[2], row[3], row[4], row[5])
+            for row in result.all()
         }
     
+    async def _get_weekly_test_data(
+        self,
+        period_start: date,
+        period_end: date,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+        student_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], Tuple[int, int, int, Optional[float]]]:
+        """Weekly test results grouped by student and class."""
+        return await self._get_assessment_result_data(
+            WeeklyTest,
+            WeeklyTestResult,
+            WeeklyTestResult.weekly_test_id,
+            func.coalesce(WeeklyTest.test_date, WeeklyTest.end_date),
+            period_start, period_end, class_id, subject_id, student_id,
+        )
+    
     async def _get_lesson_eval_data(
         self,
-        student_id: UUID,
         period_start: date,
         period_end: date,
+        class_id: Optional[UUID] = None,
         subject_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch lesson evaluation participation and mastery data."""
-        # In production, this would query the lesson_test_sessions table
-        # TODO: Integrate with actual LessonTestSession model
-        
-        return {
-            "total": 0,
-            "completed": 0,
-            "participation_pct": 0.0,
-            "mastery_pct": 0.0,
-        }
+        student_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], Tuple[int, int, int, Optional[float]]]:
+        """Lesson evaluation results grouped by student and class."""
+        return await self._get_assessment_result_data(
+            LessonEvaluation,
+            LessonEvaluationResult,
+            LessonEvaluationResult.lesson_evaluation_id,
+            func.coalesce(
+                LessonEvaluation.test_date,
+                cast(LessonEvaluation.conducted_at, Date),
+            ),
+            period_start, period_end, class_id, subject_id, student_id,
+        )
     
     async def _get_attendance_data(
         self,
-        student_id: UUID,
         period_start: date,
         period_end: date,
-    ) -> Dict:
-        """Fetch attendance data."""
-        # In production, this would query the attendance_records table
-        # TODO: Integrate with actual AttendanceRecord model
+        class_id: Optional[UUID] = None,
+        student_id: Optional[UUID] = None,
+    ) -> Dict[Tuple[UUID, UUID], Tuple[int, int, int, int, int]]:
+        """
+        Attendance grouped by student and class.
+        
+        Returns {(student_id, class_id): (total, present_or_late, half_days,
+        excused, unexcused)}. Holidays and unmarked days are not counted.
+        """
+        status = StudentAttendance.status
+        counted = (
+            AttendanceStatus.PRESENT,
+            AttendanceStatus.ABSENT,
+            AttendanceStatus.LATE,
+            AttendanceStatus.HALF_DAY,
+            AttendanceStatus.EXCUSED,
+        )
         
+        query = select(
+            StudentAttendance.student_id,
+            StudentAttendance.class_id,
+            func.count(StudentAttendance.id).filter(status.in_(counted)),
+            func.count(StudentAttendance.id).filter(
+                status.in_((AttendanceStatus.PRESENT, AttendanceStatus.LATE))
+            ),
+            func.count(StudentAttendance.id).filter(status == AttendanceStatus.HALF_DAY),
+            func.count(StudentAttendance.id).filter(status == AttendanceStatus.EXCUSED),
+            func.count(StudentAttendance.id).filter(status == AttendanceStatus.ABSENT),
+        ).where(
+            StudentAttendance.tenant_id == self.tenant_id,
+            StudentAttendance.attendance_date >= period_start,
+            StudentAttendance.attendance_date <= period_end,
+            StudentAttendance.is_deleted == False,
+        ).group_by(StudentAttendance.student_id, StudentAttendance.class_id)
+        
+        if class_id:
+            query = query.where(StudentAttendance.class_id == class_id)
+        if student_id:
+            query = query.where(StudentAttendance.student_id == student_id)
+        
+        result = await self.session.execute(query)
         return {
-            "total_days": 0,
-            "present_days": 0,
-            "attendance_pct": 0.0,
+            (row[0], row[1]): (row[2], row[3], row[4], row[5], row[6])
+            for row in result.all()
         }
     
     async def _analyze_concepts(
@@ -287,10 +660,78 @@ class AnalyticsService:
         Returns (weak_concepts, strong_concepts) lists.
         This is for personal improvement, NOT for comparison.
         """
-        # In production, this would analyze question-level data
-        # TODO: Integrate with actual mastery tracking
+        concepts = await self._compute_student_concepts(
+            period_start, period_end, subject_id=subject_id, student_id=student_id
+        )
+        return concepts.get(student_id, ([], []))
+    
+    async def _compute_student_concepts(
+        self,
+        period_start: date,
+        period_end: date,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+        student_id: Optional[UUID] = None,
+    ) -> Dict[UUID, Tuple[List, List]]:
+        """
+        Weak and strong concepts of every student in scope.
+        
+        One grouped aggregate of daily loop attempts per (student, topic).
+        A topic is weak below WEAK_CONCEPT_PCT accuracy and strong from
+        STRONG_CONCEPT_PCT, once attempted CONCEPT_MIN_ATTEMPTS times.
+        Returns {student_id: (weak_concepts, strong_concepts)}.
+        """
+        attempts = func.count(DailyLoopAttempt.id)
+        query = select(
+            DailyLoopAttempt.student_id,
+            DailyLoopSession.topic_id,
+            SyllabusTopic.name,
+            attempts,
+            func.count(DailyLoopAttempt.id).filter(DailyLoopAttempt.is_correct == True),
+        ).join(
+            DailyLoopSession, DailyLoopAttempt.session_id == DailyLoopSession.id
+        ).join(
+            SyllabusTopic, DailyLoopSession.topic_id == SyllabusTopic.id
+        ).where(
+            DailyLoopSession.tenant_id == self.tenant_id,
+            DailyLoopSession.date >= period_start,
+            DailyLoopSession.date <= period_end,
+            DailyLoopSession.is_deleted == False,
+            DailyLoopAttempt.is_deleted == False,
+        ).group_by(
+            DailyLoopAttempt.student_id, DailyLoopSession.topic_id, SyllabusTopic.name
+        ).having(attempts >= self.CONCEPT_MIN_ATTEMPTS)
+        
+        if class_id:
+            query = query.where(DailyLoopSession.class_id == class_id)
+        if subject_id:
+            query = query.where(DailyLoopSession.subject_id == subject_id)
+        if student_id:
+            query = query.where(DailyLoopAttempt.student_id == student_id)
         
-        return [], []
+        result = await self.session.execute(query)
+        concepts: Dict[UUID, Tuple[List, List]] = {}
+        for row_student_id, topic_id, name, total, correct in result.all():
+            weak, strong = concepts.setdefault(row_student_id, ([], []))
+            concept = {
+                "topic_id": str(topic_id),
+                "name": name,
+                "attempts": total,
+                "accuracy_pct": self._pct(correct, total),
+            }
+            if concept["accuracy_pct"] < self.WEAK_CONCEPT_PCT:
+                weak.append(concept)
+            elif concept["accuracy_pct"] >= self.STRONG_CONCEPT_PCT:
+                strong.append(concept)
+        
+        # Weakest and strongest first
+        return {
+            key: (
+                sorted(weak, key=lambda c: c["accuracy_pct"])[:self.CONCEPT_LIST_LIMIT],
+                sorted(strong, key=lambda c: -c["accuracy_pct"])[:self.CONCEPT_LIST_LIMIT],
+            )
+            for key, (weak, strong) in concepts.items()
+        }
     
     # ============================================
     # Teacher Snapshot Generation
@@ -314,21 +755,59 @@ class AnalyticsService:
         - Schedule records
         - Student participation rates
         - Assessment creation activity
+        
+        Uses the same grouped aggregates as generate_all_snapshots,
+        filtered to one teacher.
         """
-        # Fetch raw data
-        lesson_data = await self._get_teacher_lesson_data(
-            teacher_id, period_start, period_end, subject_id, class_id
+        metrics = await self._compute_teacher_metrics(
+            period_start, period_end,
+            class_id=class_id, subject_id=subject_id, teacher_id=teacher_id,
         )
-        schedule_data = await self._get_teacher_schedule_data(
-            teacher_id, period_start, period_end, subject_id, class_id
-        )
-        participation_data = await self._get_class_participation_data(
-            teacher_id, period_start, period_end, subject_id, class_id
+        teacher_metrics = metrics.get(teacher_id) or self._empty_teacher_metrics()
+        
+        row = self._build_teacher_snapshot_row(
+            teacher_id=teacher_id,
+            lesson_data=teacher_metrics["lesson"],
+            schedule_data=teacher_metrics["schedule"],
+            participation_data=teacher_metrics["participation"],
+            assessment_data=teacher_metrics["assessment"],
+            period_start=period_start,
+            period_end=period_end,
+            period_type=period_type,
+            subject_id=subject_id,
+            class_id=class_id,
+            generated_by=generated_by,
         )
-        assessment_data = await self._get_teacher_assessment_data(
-            teacher_id, period_start, period_end, subject_id
+        await self._upsert_snapshots(
+            TeacherAnalyticsSnapshot, "uq_analytics_teacher_period", [row]
         )
+        await self.refresh_tenant_rollup(period_start, period_end)
+        await self.session.commit()
         
+        return await self._fetch_snapshot(
+            TeacherAnalyticsSnapshot,
+            teacher_id=teacher_id,
+            class_id=class_id,
+            subject_id=subject_id,
+            period_start=period_start,
+            period_end=period_end,
+        )
+    
+    def _build_teacher_snapshot_row(
+        self,
+        teacher_id: UUID,
+        lesson_data: Dict,
+        schedule_data: Dict,
+        participation_data: Dict,
+        assessment_data: Dict,
+        period_start: date,
+        period_end: date,
+        period_type: AnalyticsPeriod,
+        subject_id: Optional[UUID] = None,
+        class_id: Optional[UUID] = None,
+        generated_by: Optional[UUID] = None,
+    ) -> Dict:
+        """Build TeacherAnalyticsSnapshot column values."""
         # Calculate engagement score
         engagement_score = self._calculate_teacher_engagement_score(
             lesson_data["coverage_pct"],
@@ -336,45 +815,39 @@ class AnalyticsService:
             participation_data["participation_pct"],
         )
         
-        # Create snapshot
-        snapshot = TeacherAnalyticsSnapshot(
-            tenant_id=self.tenant_id,
-            teacher_id=teacher_id,
-            subject_id=subject_id,
-            class_id=class_id,
-            period_type=period_type,
-            period_start=period_start,
-            period_end=period_end,
+        return {
+            "tenant_id": self.tenant_id,
+            "teacher_id": teacher_id,
+            "subject_id": subject_id,
+            "class_id": class_id,
+            "period_type": period_type,
+            "period_start": period_start,
+            "period_end": period_end,
             
             # Teaching metrics
-            syllabus_coverage_pct=Decimal(str(lesson_data["coverage_pct"])),
-            lessons_planned=lesson_data["planned"],
-            lessons_completed=lesson_data["completed"],
-            schedule_adherence_pct=Decimal(str(schedule_data["adherence_pct"])),
-            periods_scheduled=schedule_data["scheduled"],
-            periods_conducted=schedule_data["conducted"],
+            "syllabus_coverage_pct": Decimal(str(lesson_data["coverage_pct"])),
+            "lessons_planned": lesson_data["planned"],
+            "lessons_completed": lesson_data["completed"],
+            "schedule_adherence_pct": Decimal(str(schedule_data["adherence_pct"])),
+            "periods_scheduled": schedule_data["scheduled"],
+            "periods_conducted": schedule_data["conducted"],
             
             # Student engagement
-            student_participation_pct=Decimal(str(participation_data["participation_pct"])),
-            class_mastery_avg=Decimal(str(participation_data["mastery_avg"])),
+            "student_participation_pct": Decimal(str(participation_data["participation_pct"])),
+            "class_mastery_avg": Decimal(str(participation_data["mastery_avg"])),
             
             # Assessment activity
-            daily_loops_created=assessment_data["daily_loops"],
-            weekly_tests_created=assessment_data["weekly_tests"],
-            lesson_evals_created=assessment_data["lesson_evals"],
+            "daily_loops_created": assessment_data["daily_loops"],
+            "weekly_tests_created": assessment_data["weekly_tests"],
+            "lesson_evals_created": assessment_data["lesson_evals"],
             
             # Overall score
-            engagement_score=Decimal(str(engagement_score)),
+            "engagement_score": Decimal(str(round(engagement_score, 2))),
             
             # Metadata
-            generated_at=datetime.now(timezone.utc),
-            generated_by=generated_by,
-        )
-        
-        self.session.add(snapshot)
-        await self.session.commit()
-        await self.session.refresh(snapshot)
-        return snapshot
+            "generated_at": datetime.now(timezone.utc),
+            "generated_by": generated_by,
+        }
     
     def _calculate_teacher_engagement_score(
         self,
@@ -390,67 +863,282 @@ class AnalyticsService:
         )
         return min(100.0, max(0.0, score))
     
-    async def _get_teacher_lesson_data(
+    @staticmethod
+    def _empty_teacher_metrics() -> Dict:
+        """Metrics for a teacher with no recorded activity in the period."""
+        return {
+            "lesson": {"planned": 0, "completed": 0, "coverage_pct": 0.0},
+            "schedule": {"scheduled": 0, "conducted": 0, "adherence_pct": 0.0},
+            "participation": {"participation_pct": 0.0, "mastery_avg": 0.0},
+            "assessment": {"daily_loops": 0, "weekly_tests": 0, "lesson_evals": 0},
+        }
+    
+    async def _compute_teacher_metrics(
         self,
-        teacher_id: UUID,
         period_start: date,
         period_end: date,
+        class_id: Optional[UUID] = None,
         subject_id: Optional[UUID] = None,
+        teacher_id: Optional[UUID] = None,
+    ) -> Dict[UUID, Dict]:
+        """
+        Compute teaching, engagement and assessment metrics for every teacher in scope.
+        
+        One grouped aggregate per source. Participation and mastery are over
+        the assessment results of the (class, subject) pairs a teacher is
+        assigned to, so a teacher is measured on their own subjects only.
+        """
+        assignments = await self._get_teaching_assignments(class_id, subject_id, teacher_id)
+        lessons = await self._get_lesson_plan_progress(
+            period_start, period_end, class_id, subject_id, teacher_id
+        )
+        schedule = await self._get_schedule_adherence(
+            period_start, period_end, class_id, subject_id, teacher_id
+        )
+        results = await self._get_assessment_results_by_pair(
+            period_start, period_end, class_id, subject_id
+        )
+        session_counts = await self._count_daily_loop_sessions(
+            period_start, period_end, class_id, subject_id
+        )
+        weekly_created = await self._count_assessments_by_creator(
+            WeeklyTest,
+            func.coalesce(WeeklyTest.test_date, WeeklyTest.end_date),
+            period_start, period_end, class_id, subject_id,
+        )
+        lesson_created = await self._count_assessments_by_creator(
+            LessonEvaluation,
+            func.coalesce(
+                LessonEvaluation.test_date,
+                cast(LessonEvaluation.conducted_at, Date),
+            ),
+            period_start, period_end, class_id, subject_id,
+        )
+        
+        metrics: Dict[UUID, Dict] = {}
+        for key in set(assignments) | set(lessons) | set(schedule):
+            entry = self._empty_teacher_metrics()
+            pairs = assignments.get(key, set())
+            
+            if key in lessons:
+                planned, completed = lessons[key]
+                entry["lesson"] = {
+                    "planned": planned,
+                    "completed": completed,
+                    "coverage_pct": self._pct(completed, planned),
+                }
+            
+            if key in schedule:
+                scheduled, conducted = schedule[key]
+                entry["schedule"] = {
+                    "scheduled": scheduled,
+                    "conducted": conducted,
+                    "adherence_pct": self._pct(conducted, scheduled),
+                }
+            
+            counted = participated = 0
+            mastery_total = 0.0
+            for pair in pairs:
+                pair_counted, pair_participated, pair_mastery = results.get(pair, (0, 0, 0.0))
+                counted += pair_counted
+                participated += pair_participated
+                mastery_total += float(pair_mastery or 0)
+            entry["participation"] = {
+                "participation_pct": self._pct(participated, counted),
+                "mastery_avg": round(mastery_total / counted, 2) if counted else 0.0,
+            }
+            
+            entry["assessment"] = {
+                "daily_loops": sum(session_counts.get(pair, 0) for pair in pairs),
+                "weekly_tests": weekly_created.get(key, 0),
+                "lesson_evals": lesson_created.get(key, 0),
+            }
+            
+            metrics[key] = entry
+        
+        return metrics
+    
+    async def _get_teaching_assignments(
+        self,
         class_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch teacher's lesson plan data."""
-        # TODO: Integrate with LessonPlan model
-        return {
-            "planned": 0,
-            "completed": 0,
-            "coverage_pct": 0.0,
-        }
+        subject_id: Optional[UUID] = None,
+        teacher_id: Optional[UUID] = None,
+    ) -> Dict[UUID, set]:
+        """Active (class_id, subject_id) pairs per teacher."""
+        query = select(
+            TeachingAssignment.teacher_id,
+            TeachingAssignment.class_id,
+            TeachingAssignment.subject_id,
+        ).where(
+            TeachingAssignment.tenant_id == self.tenant_id,
+            TeachingAssignment.is_active == True,
+            TeachingAssignment.is_deleted == False,
+        )
+        if class_id:
+            query = query.where(TeachingAssignment.class_id == class_id)
+        if subject_id:
+            query = query.where(TeachingAssignment.subject_id == subject_id)
+        if teacher_id:
+            query = query.where(TeachingAssignment.teacher_id == teacher_id)
+        
+        result = await self.session.execute(query)
+        assignments: Dict[UUID, set] = {}
+        for assigned_teacher_id, assigned_class_id, assigned_subject_id in result.all():
+            assignments.setdefault(assigned_teacher_id, set()).add(
+                (assigned_class_id, assigned_subject_id)
+            )
+        return assignments
     
-    async def _get_teacher_schedule_data(
+    async def _get_lesson_plan_progress(
         self,
-        teacher_id: UUID,
         period_start: date,
         period_end: date,
-        subject_id: Optional[UUID] = None,
         class_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch teacher's schedule adherence data."""
-        # TODO: Integrate with Schedule model
-        return {
-            "scheduled": 0,
-            "conducted": 0,
-            "adherence_pct": 0.0,
-        }
+        subject_id: Optional[UUID] = None,
+        teacher_id: Optional[UUID] = None,
+        key_column=LessonPlan.teacher_id,
+    ) -> Dict[UUID, Tuple[int, int]]:
+        """
+        Lesson plan units grouped by teacher (or by key_column, e.g.
+        LessonPlan.class_id).
+        
+        Counts the units of active or completed plans running during the
+        period. Returns {key: (planned_units, completed_units)}.
+        """
+        query = select(
+            key_column,
+            func.count(LessonPlanUnit.id),
+            func.count(LessonPlanUnit.id).filter(
+                LessonPlanUnit.status == ProgressStatus.COMPLETED
+            ),
+        ).join(
+            LessonPlan, LessonPlanUnit.lesson_plan_id == LessonPlan.id
+        ).where(
+            LessonPlan.tenant_id == self.tenant_id,
+            LessonPlan.status.in_((LessonPlanStatus.ACTIVE, LessonPlanStatus.COMPLETED)),
+            LessonPlan.start_date <= period_end,
+            LessonPlan.end_date >= period_start,
+            LessonPlan.is_deleted == False,
+            LessonPlanUnit.is_deleted == False,
+        ).group_by(key_column)
+        
+        if class_id:
+            query = query.where(LessonPlan.class_id == class_id)
+        if subject_id:
+            query = query.where(LessonPlan.subject_id == subject_id)
+        if teacher_id:
+            query = query.where(LessonPlan.teacher_id == teacher_id)
+        
+        result = await self.session.execute(query)
+        return {row[0]: (row[1], row[2]) for row in result.all()}
     
-    async def _get_class_participation_data(
+    async def _get_schedule_adherence(
         self,
-        teacher_id: UUID,
         period_start: date,
         period_end: date,
-        subject_id: Optional[UUID] = None,
         class_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch class participation data for a teacher."""
-        # TODO: Integrate with session models
-        return {
-            "participation_pct": 0.0,
-            "mastery_avg": 0.0,
-        }
+        subject_id: Optional[UUID] = None,
+        teacher_id: Optional[UUID] = None,
+    ) -> Dict[UUID, Tuple[int, int]]:
+        """
+        Scheduled periods grouped by teacher.
+        
+        Only periods up to today count (future ones cannot have been
+        conducted yet). Returns {teacher_id: (scheduled, conducted)}.
+        """
+        query = select(
+            ScheduleEntry.teacher_id,
+            func.count(ScheduleEntry.id),
+            func.count(ScheduleEntry.id).filter(
+                ScheduleEntry.status == ScheduleEntryStatus.COMPLETED
+            ),
+        ).where(
+            ScheduleEntry.tenant_id == self.tenant_id,
+            ScheduleEntry.date >= period_start,
+            ScheduleEntry.date <= min(period_end, date.today()),
+            ScheduleEntry.is_deleted == False,
+        ).group_by(ScheduleEntry.teacher_id)
+        
+        if class_id:
+            query = query.where(ScheduleEntry.class_id == class_id)
+        if subject_id:
+            query = query.where(ScheduleEntry.subject_id == subject_id)
+        if teacher_id:
+            query = query.where(ScheduleEntry.teacher_id == teacher_id)
+        
+        result = await self.session.execute(query)
+        return {row[0]: (row[1], row[2]) for row in result.all()}
     
-    async def _get_teacher_assessment_data(
+    async def _get_assessment_results_by_pair(
         self,
-        teacher_id: UUID,
         period_start: date,
         period_end: date,
+        class_id: Optional[UUID] = None,
         subject_id: Optional[UUID] = None,
-    ) -> Dict:
-        """Fetch teacher's assessment creation data."""
-        # TODO: Integrate with assessment models
-        return {
-            "daily_loops": 0,
-            "weekly_tests": 0,
-            "lesson_evals": 0,
-        }
+    ) -> Dict[Tuple[UUID, UUID], Tuple[int, int, float]]:
+        """
+        Weekly test and lesson evaluation results grouped by (class, subject).
+        
+        Uses the student participation rules: excused absences are not
+        counted, unexcused absences count as zero mastery.
+        
+        Returns {(class_id, subject_id): (counted, participated, mastery_sum)}.
+        """
+        not_counted = (
+            ParticipationStatus.EXCUSED_ABSENT.value,
+            ParticipationStatus.NOT_SCHEDULED.value,
+        )
+        sources = (
+            (
+                WeeklyTest, WeeklyTestResult, WeeklyTestResult.weekly_test_id,
+                func.coalesce(WeeklyTest.test_date, WeeklyTest.end_date),
+            ),
+            (
+                LessonEvaluation, LessonEvaluationResult, LessonEvaluationResult.lesson_evaluation_id,
+                func.coalesce(
+                    LessonEvaluation.test_date,
+                    cast(LessonEvaluation.conducted_at, Date),
+                ),
+            ),
+        )
+        
+        totals: Dict[Tuple[UUID, UUID], Tuple[int, int, float]] = {}
+        for test_model, result_model, result_test_fk, test_date_column in sources:
+            status = result_model.participation_status
+            query = select(
+                test_model.class_id,
+                test_model.subject_id,
+                func.count(result_model.id).filter(status.notin_(not_counted)),
+                func.count(result_model.id).filter(
+                    status == ParticipationStatus.PARTICIPATED.value
+                ),
+                func.sum(func.coalesce(result_model.percentage, 0)).filter(
+                    status.notin_(not_counted)
+                ),
+            ).join(
+                test_model, result_test_fk == test_model.id
+            ).where(
+                test_model.tenant_id == self.tenant_id,
+                test_date_column >= period_start,
+                test_date_column <= period_end,
+                test_model.is_deleted == False,
+                result_model.is_deleted == False,
+            ).group_by(test_model.class_id, test_model.subject_id)
+            
+            if class_id:
+                query = query.where(test_model.class_id == class_id)
+            if subject_id:
+                query = query.where(test_model.subject_id == subject_id)
+            
+            result = await self.session.execute(query)
+            for pair_class_id, pair_subject_id, counted, participated, mastery in result.all():
+                previous = totals.get((pair_class_id, pair_subject_id), (0, 0, 0.0))
+                totals[(pair_class_id, pair_subject_id)] = (
+                    previous[0] + counted,
+                    previous[1] + participated,
+                    previous[2] + float(mastery or 0),
+                )
+        return totals
     
     # ============================================
     # Class Snapshot Generation
@@ -471,103 +1159,174 @@ class AnalyticsService:
         This creates AGGREGATE data only.
         NO individual student data is exposed.
         """
-        # Get student snapshots for this class and period
-        student_snapshots = await self._get_class_student_snapshots(
+        # Aggregate the needed columns in SQL (no ORM snapshot loading)
+        total_students, averages = await self._get_class_student_aggregates(
             class_id, period_start, period_end, subject_id
         )
+        topics = None
+        syllabus_coverage = 0.0
         
-        total_students = len(student_snapshots)
-        
-        if total_students == 0:
-            # No data, return empty snapshot
-            snapshot = ClassAnalyticsSnapshot(
-                tenant_id=self.tenant_id,
-                class_id=class_id,
-                subject_id=subject_id,
-                period_type=period_type,
-                period_start=period_start,
-                period_end=period_end,
-                total_students=0,
-                avg_mastery_pct=Decimal("0"),
-                avg_activity_score=Decimal("0"),
-                avg_attendance_pct=Decimal("0"),
-                daily_loop_participation_avg=Decimal("0"),
-                weekly_test_participation_avg=Decimal("0"),
-                lesson_eval_participation_avg=Decimal("0"),
-                syllabus_coverage_pct=Decimal("0"),
-                generated_at=datetime.now(timezone.utc),
-                generated_by=generated_by,
-            )
-        else:
-            # Calculate aggregates (averages only, no ranking)
-            avg_mastery = sum(s.overall_mastery_pct for s in student_snapshots) / total_students
-            avg_activity = sum(s.activity_score for s in student_snapshots) / total_students
-            avg_attendance = sum(s.attendance_pct for s in student_snapshots) / total_students
-            avg_daily_participation = sum(s.daily_loop_participation_pct for s in student_snapshots) / total_students
-            avg_weekly_participation = sum(s.weekly_test_participation_pct for s in student_snapshots) / total_students
-            avg_lesson_participation = sum(s.lesson_eval_participation_pct for s in student_snapshots) / total_students
-            
+        if total_students > 0:
             # Analyze common topics (patterns, not rankings)
-            common_weak, common_strong, weak_count, strong_count = await self._analyze_class_topics(
-                student_snapshots
+            topics = await self._analyze_class_topics(
+                await self._get_class_student_concepts(
+                    class_id, period_start, period_end, subject_id
+                )
             )
             
             # Get syllabus coverage from teacher data
             syllabus_coverage = await self._get_class_syllabus_coverage(
                 class_id, subject_id, period_start, period_end
             )
-            
-            snapshot = ClassAnalyticsSnapshot(
-                tenant_id=self.tenant_id,
-                class_id=class_id,
-                subject_id=subject_id,
-                period_type=period_type,
-                period_start=period_start,
-                period_end=period_end,
-                total_students=total_students,
-                avg_mastery_pct=avg_mastery,
-                avg_activity_score=avg_activity,
-                avg_attendance_pct=avg_attendance,
-                daily_loop_participation_avg=avg_daily_participation,
-                weekly_test_participation_avg=avg_weekly_participation,
-                lesson_eval_participation_avg=avg_lesson_participation,
-                common_weak_topics_json=common_weak,
-                common_strong_topics_json=common_strong,
-                weak_topic_count=weak_count,
-                strong_topic_count=strong_count,
-                syllabus_coverage_pct=Decimal(str(syllabus_coverage)),
-                generated_at=datetime.now(timezone.utc),
-                generated_by=generated_by,
-            )
         
-        self.session.add(snapshot)
+        row = self._build_class_snapshot_row(
+            class_id=class_id,
+            total_students=total_students,
+            averages=averages,
+            period_start=period_start,
+            period_end=period_end,
+            period_type=period_type,
+            subject_id=subject_id,
+            generated_by=generated_by,
+            topics=topics,
+            syllabus_coverage=syllabus_coverage,
+        )
+        await self._upsert_snapshots(
+            ClassAnalyticsSnapshot, "uq_analytics_class_period", [row]
+        )
+        await self.refresh_tenant_rollup(period_start, period_end)
         await self.session.commit()
-        await self.session.refresh(snapshot)
-        return snapshot
+        
+        return await self._fetch_snapshot(
+            ClassAnalyticsSnapshot,
+            class_id=class_id,
+            subject_id=subject_id,
+            period_start=period_start,
+            period_end=period_end,
+        )
     
-    async def _get_class_student_snapshots(
+    def _build_class_snapshot_row(
         self,
         class_id: UUID,
+        total_students: int,
+        averages: Dict[str, float],
         period_start: date,
         period_end: date,
+        period_type: AnalyticsPeriod,
         subject_id: Optional[UUID] = None,
-    ) -> List[StudentAnalyticsSnapshot]:
-        """Get existing student snapshots for a class."""
-        query = select(StudentAnalyticsSnapshot).where(
+        generated_by: Optional[UUID] = None,
+        topics: Optional[Tuple[List, List, int, int]] = None,
+        syllabus_coverage: float = 0.0,
+    ) -> Dict:
+        """
+        Build ClassAnalyticsSnapshot column values.
+        
+        averages maps each _CLASS_AVERAGE_FIELDS key to its class average
+        (averages only, no ranking).
+        """
+        common_weak, common_strong, weak_count, strong_count = topics or (None, None, 0, 0)
+        
+        row = {
+            "tenant_id": self.tenant_id,
+            "class_id": class_id,
+            "subject_id": subject_id,
+            "period_type": period_type,
+            "period_start": period_start,
+            "period_end": period_end,
+            "total_students": total_students,
+            "common_weak_topics_json": common_weak or None,
+            "common_strong_topics_json": common_strong or None,
+            "weak_topic_count": weak_count,
+            "strong_topic_count": strong_count,
+            "syllabus_coverage_pct": Decimal(str(syllabus_coverage)),
+            "generated_at": datetime.now(timezone.utc),
+            "generated_by": generated_by,
+        }
+        for class_field in self._CLASS_AVERAGE_FIELDS:
+            row[class_field] = Decimal(str(round(float(averages.get(class_field) or 0), 2)))
+        return row
+    
+    def _average_student_rows(self, student_rows: List[Dict]) -> Dict[str, float]:
+        """Class averages over in-memory student rows (bulk generation path)."""
+        count = len(student_rows)
+        if not count:
+            return {}
+        return {
+            class_field: sum(float(r[student_field]) for r in student_rows) / count
+            for class_field, student_field in self._CLASS_AVERAGE_FIELDS.items()
+        }
+    
+    def _class_student_filters(
+        self,
+        class_id: UUID,
+        period_start: date,
+        period_end: date,
+        subject_id: Optional[UUID] = None,
+    ) -> List:
+        """WHERE clauses selecting a class's student snapshots for a period."""
+        filters = [
             StudentAnalyticsSnapshot.tenant_id == self.tenant_id,
             StudentAnalyticsSnapshot.class_id == class_id,
             StudentAnalyticsSnapshot.period_start == period_start,
             StudentAnalyticsSnapshot.period_end == period_end,
-        )
+        ]
         if subject_id:
-            query = query.where(StudentAnalyticsSnapshot.subject_id == subject_id)
+            filters.append(StudentAnalyticsSnapshot.subject_id == subject_id)
+        return filters
+    
+    async def _get_class_student_aggregates(
+        self,
+        class_id: UUID,
+        period_start: date,
+        period_end: date,
+        subject_id: Optional[UUID] = None,
+    ) -> Tuple[int, Dict[str, float]]:
+        """
+        COUNT and AVG of student snapshot columns for a class in one query.
+        
+        Returns (total_students, {class_field: average}).
+        """
+        query = select(
+            func.count(StudentAnalyticsSnapshot.id),
+            *(
+                func.avg(getattr(StudentAnalyticsSnapshot, student_field)).label(class_field)
+                for class_field, student_field in self._CLASS_AVERAGE_FIELDS.items()
+            ),
+        ).where(*self._class_student_filters(class_id, period_start, period_end, subject_id))
         
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        row = result.one()
+        averages = {
+            class_field: float(getattr(row, class_field) or 0)
+            for class_field in self._CLASS_AVERAGE_FIELDS
+        }
+        return row[0], averages
+    
+    async def _get_class_student_concepts(
+        self,
+        class_id: UUID,
+        period_start: date,
+        period_end: date,
+        subject_id: Optional[UUID] = None,
+    ) -> List:
+        """Load only the concept columns of a class's student snapshots."""
+        query = select(
+            StudentAnalyticsSnapshot.weak_concepts_json,
+            StudentAnalyticsSnapshot.strong_concepts_json,
+        ).where(
+            *self._class_student_filters(class_id, period_start, period_end, subject_id),
+            or_(
+                StudentAnalyticsSnapshot.weak_concepts_json.isnot(None),
+                StudentAnalyticsSnapshot.strong_concepts_json.isnot(None),
+            ),
+        )
+        
+        result = await self.session.execute(query)
+        return list(result.all())
     
     async def _analyze_class_topics(
         self,
-        snapshots: List[StudentAnalyticsSnapshot],
+        snapshots: List,
     ) -> Tuple[List, List, int, int]:
         """
         Analyze common topic patterns in a class.
@@ -611,8 +1370,30 @@ class AnalyticsService:
         period_end: date,
     ) -> float:
         """Get syllabus coverage for a class."""
-        # TODO: Integrate with lesson plan completion
-        return 0.0
+        coverage = await self._get_class_syllabus_coverages(
+            period_start, period_end, class_id, subject_id
+        )
+        return coverage.get(class_id, 0.0)
+    
+    async def _get_class_syllabus_coverages(
+        self,
+        period_start: date,
+        period_end: date,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+    ) -> Dict[UUID, float]:
+        """
+        Completed share of lesson plan units per class, across the
+        class's teachers (same units as teacher syllabus coverage).
+        """
+        progress = await self._get_lesson_plan_progress(
+            period_start, period_end, class_id, subject_id,
+            key_column=LessonPlan.class_id,
+        )
+        return {
+            key: self._pct(completed, planned)
+            for key, (planned, completed) in progress.items()
+        }
     
     # ============================================
     # Bulk Generation
@@ -630,21 +1411,192 @@ class AnalyticsService:
         """
         Generate all analytics snapshots for a period.
         
+        Pipeline:
+        1. One grouped aggregate per source (daily loops, weekly tests,
+           lesson evaluations, attendance) for every student in scope
+        2. Bulk upsert of student snapshots
+        3. Class snapshots derived from the computed student rows
+        4. Teacher snapshots from grouped lesson plan, schedule and
+           assessment aggregates (participation per assigned class/subject)
+        5. Tenant rollup refresh (principal dashboard)
+        
+        Everything is written in a single transaction.
+        
         Returns (students_count, teachers_count, classes_count).
         """
-        students_count = 0
-        teachers_count = 0
-        classes_count = 0
+        metrics = await self._compute_student_metrics(
+            period_start, period_end, class_id=class_id, subject_id=subject_id
+        )
+        concepts = await self._compute_student_concepts(
+            period_start, period_end, class_id=class_id, subject_id=subject_id
+        )
+        
+        # 1-2. Student snapshots
+        student_rows = [
+            self._build_student_snapshot_row(
+                student_id=student_id,
+                class_id=student_class_id,
+                metrics=student_metrics,
+                period_start=period_start,
+                period_end=period_end,
+                period_type=period_type,
+                subject_id=subject_id,
+                generated_by=generated_by,
+                weak_concepts=concepts.get(student_id, ([], []))[0],
+                strong_concepts=concepts.get(student_id, ([], []))[1],
+            )
+            for (student_id, student_class_id), student_metrics in metrics.items()
+        ]
+        await self._upsert_snapshots(
+            StudentAnalyticsSnapshot, "uq_analytics_student_period", student_rows
+        )
+        
+        # 3. Class snapshots (from in-memory student rows, no re-query)
+        rows_by_class: Dict[UUID, List[Dict]] = {}
+        for row in student_rows:
+            rows_by_class.setdefault(row["class_id"], []).append(row)
+        coverage = await self._get_class_syllabus_coverages(
+            period_start, period_end, class_id, subject_id
+        )
+        
+        class_rows = [
+            self._build_class_snapshot_row(
+                class_id=row_class_id,
+                total_students=len(rows),
+                averages=self._average_student_rows(rows),
+                period_start=period_start,
+                period_end=period_end,
+                period_type=period_type,
+                subject_id=subject_id,
+                generated_by=generated_by,
+                syllabus_coverage=coverage.get(row_class_id, 0.0),
+            )
+            for row_class_id, rows in rows_by_class.items()
+        ]
+        await self._upsert_snapshots(
+            ClassAnalyticsSnapshot, "uq_analytics_class_period", class_rows
+        )
+        
+        # 4. Teacher snapshots
+        teacher_rows = await self._derive_teacher_snapshot_rows(
+            period_start=period_start,
+            period_end=period_end,
+            period_type=period_type,
+            class_id=class_id,
+            subject_id=subject_id,
+            generated_by=generated_by,
+        )
+        await self._upsert_snapshots(
+            TeacherAnalyticsSnapshot, "uq_analytics_teacher_period", teacher_rows
+        )
+        
+        # 5. Tenant rollup for the principal dashboard
+        await self.refresh_tenant_rollup(period_start, period_end)
+        
+        await self.session.commit()
+        
+        return len(student_rows), len(teacher_rows), len(class_rows)
+    
+    async def _derive_teacher_snapshot_rows(
+        self,
+        period_start: date,
+        period_end: date,
+        period_type: AnalyticsPeriod,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+        generated_by: Optional[UUID] = None,
+    ) -> List[Dict]:
+        """Build teacher snapshot rows for every teacher in scope (grouped queries)."""
+        metrics = await self._compute_teacher_metrics(
+            period_start, period_end, class_id=class_id, subject_id=subject_id
+        )
+        return [
+            self._build_teacher_snapshot_row(
+                teacher_id=teacher_id,
+                lesson_data=teacher_metrics["lesson"],
+                schedule_data=teacher_metrics["schedule"],
+                participation_data=teacher_metrics["participation"],
+                assessment_data=teacher_metrics["assessment"],
+                period_start=period_start,
+                period_end=period_end,
+                period_type=period_type,
+                subject_id=subject_id,
+                class_id=class_id,
+                generated_by=generated_by,
+            )
+            for teacher_id, teacher_metrics in metrics.items()
+        ]
+    
+    async def _count_assessments_by_creator(
+        self,
+        test_model,
+        test_date_column,
+        period_start: date,
+        period_end: date,
+        class_id: Optional[UUID] = None,
+        subject_id: Optional[UUID] = None,
+    ) -> Dict[UUID, int]:
+        """Count weekly tests / lesson evaluations per creating teacher."""
+        query = select(
+            test_model.created_by,
+            func.count(test_model.id),
+        ).where(
+            test_model.tenant_id == self.tenant_id,
+            test_date_column >= period_start,
+            test_date_column <= period_end,
+            test_model.is_deleted == False,
+        ).group_by(test_model.created_by)
+        
+        if class_id:
+            query = query.where(test_model.class_id == class_id)
+        if subject_id:
+            query = query.where(test_model.subject_id == subject_id)
+        
+        result = await self.session.execute(query)
+        return {row[0]: row[1] for row in result.all()}
+    
+    async def _upsert_snapshots(
+        self,
+        model,
+        constraint: str,
+        rows: List[Dict],
+    ) -> None:
+        """
+        Insert or replace snapshot rows with multi-row INSERT ... ON CONFLICT.
+        
+        Rows are keyed by the model's (entity, period) unique constraint;
+        regenerating a period overwrites the previous values in place.
+        Does not commit.
+        """
+        if not rows:
+            return
         
-        # TODO: Implement bulk generation
-        # 1. Get all active students (optionally filter by class)
-        # 2. Generate student snapshots
-        # 3. Get all active teachers
-        # 4. Generate teacher snapshots
-        # 5. Get all classes
-        # 6. Generate class snapshots
+        now = datetime.now(timezone.utc)
+        immutable = {"id", "tenant_id", "created_at"}
         
-        return students_count, teachers_count, classes_count
+        for start in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+            batch = [
+                {"id": uuid4(), "created_at": now, "updated_at": now, "is_deleted": False, **row}
+                for row in rows[start:start + self.UPSERT_BATCH_SIZE]
+            ]
+            stmt = pg_insert(model).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                constraint=constraint,
+                set_={
+                    column: stmt.excluded[column]
+                    for column in batch[0]
+                    if column not in immutable
+                },
+            )
+            await self.session.execute(stmt)
+    
+    async def _fetch_snapshot(self, model, **key):
+        """Load a snapshot by its exact unique key (None matches NULL)."""
+        query = select(model).where(model.tenant_id == self.tenant_id).where(
+            *(getattr(model, column) == value for column, value in key.items())
+        ).execution_options(populate_existing=True)
+        result = await self.session.execute(query)
+        return result.scalar_one()
     
     # ============================================
     # Query Methods
@@ -814,50 +1766,133 @@ class AnalyticsService:
         Get principal dashboard summary.
         
         Aggregate insights only, NO individual student data.
+        Served from the tenant rollup row; the rollup is built on first
+        access if snapshots were generated before it existed.
         """
-        # Get all class snapshots
-        class_snapshots = await self.get_all_classes_analytics(period_start, period_end)
+        query = select(TenantAnalyticsRollup).where(
+            TenantAnalyticsRollup.tenant_id == self.tenant_id,
+            TenantAnalyticsRollup.period_start == period_start,
+            TenantAnalyticsRollup.period_end == period_end,
+        )
+        result = await self.session.execute(query)
+        rollup = result.scalar_one_or_none()
         
-        # Get all teacher snapshots
-        teacher_snapshots = await self.get_all_teachers_analytics(period_start, period_end)
+        if rollup is None:
+            values = await self._compute_tenant_rollup(period_start, period_end)
+        else:
+            values = {
+                field: getattr(rollup, field) for field in self._ROLLUP_FIELDS
+            }
         
-        total_students = sum(s.total_students for s in class_snapshots)
-        total_teachers = len(teacher_snapshots)
-        total_classes = len(class_snapshots)
+        return {
+            "period_start": period_start,
+            "period_end": period_end,
+            **{
+                field: float(value) if isinstance(value, Decimal) else value
+                for field, value in values.items()
+            },
+        }
+    
+    async def refresh_tenant_rollup(
+        self,
+        period_start: date,
+        period_end: date,
+    ) -> None:
+        """
+        Recompute the tenant rollup for a period and upsert it.
         
-        if total_classes > 0:
-            school_avg_mastery = sum(float(s.avg_mastery_pct) for s in class_snapshots) / total_classes
-            school_avg_attendance = sum(float(s.avg_attendance_pct) for s in class_snapshots) / total_classes
-            school_avg_activity = sum(float(s.avg_activity_score) for s in class_snapshots) / total_classes
-            avg_syllabus_coverage = sum(float(s.syllabus_coverage_pct) for s in class_snapshots) / total_classes
-        else:
-            school_avg_mastery = 0.0
-            school_avg_attendance = 0.0
-            school_avg_activity = 0.0
-            avg_syllabus_coverage = 0.0
+        Called by the snapshot generators; does not commit.
+        """
+        values = await self._compute_tenant_rollup(period_start, period_end)
+        now = datetime.now(timezone.utc)
         
-        if total_teachers > 0:
-            avg_teacher_engagement = sum(float(s.engagement_score) for s in teacher_snapshots) / total_teachers
-        else:
-            avg_teacher_engagement = 0.0
+        stmt = pg_insert(TenantAnalyticsRollup).values(
+            id=uuid4(),
+            tenant_id=self.tenant_id,
+            period_start=period_start,
+            period_end=period_end,
+            refreshed_at=now,
+            created_at=now,
+            updated_at=now,
+            is_deleted=False,
+            **values,
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_analytics_tenant_rollup_period",
+            set_={**values, "refreshed_at": now, "updated_at": now},
+        )
+        await self.session.execute(stmt)
+    
+    async def _compute_tenant_rollup(
+        self,
+        period_start: date,
+        period_end: date,
+    ) -> Dict:
+        """
+        Aggregate class and teacher snapshots with SQL AVG / COUNT FILTER.
+        
+        Three single-row queries; no snapshot objects are loaded.
+        """
+        threshold = self.LOW_MASTERY_THRESHOLD
+        
+        class_query = select(
+            func.coalesce(func.sum(ClassAnalyticsSnapshot.total_students), 0),
+            func.count(ClassAnalyticsSnapshot.id),
+            func.coalesce(func.avg(ClassAnalyticsSnapshot.avg_mastery_pct), 0),
+            func.coalesce(func.avg(ClassAnalyticsSnapshot.avg_attendance_pct), 0),
+            func.coalesce(func.avg(ClassAnalyticsSnapshot.avg_activity_score), 0),
+            func.coalesce(func.avg(ClassAnalyticsSnapshot.syllabus_coverage_pct), 0),
+            func.count(ClassAnalyticsSnapshot.id).filter(
+                ClassAnalyticsSnapshot.avg_mastery_pct < threshold
+            ),
+        ).where(
+            ClassAnalyticsSnapshot.tenant_id == self.tenant_id,
+            ClassAnalyticsSnapshot.period_start == period_start,
+            ClassAnalyticsSnapshot.period_end == period_end,
+        )
+        class_row = (await self.session.execute(class_query)).one()
+        
+        teacher_query = select(
+            func.count(TeacherAnalyticsSnapshot.id),
+            func.coalesce(func.avg(TeacherAnalyticsSnapshot.engagement_score), 0),
+        ).where(
+            TeacherAnalyticsSnapshot.tenant_id == self.tenant_id,
+            TeacherAnalyticsSnapshot.period_start == period_start,
+            TeacherAnalyticsSnapshot.period_end == period_end,
+        )
+        teacher_row = (await self.session.execute(teacher_query)).one()
+        
+        # Subjects whose class-average mastery is below threshold
+        subject_avgs = select(
+            ClassAnalyticsSnapshot.subject_id,
+        ).where(
+            ClassAnalyticsSnapshot.tenant_id == self.tenant_id,
+            ClassAnalyticsSnapshot.period_start == period_start,
+            ClassAnalyticsSnapshot.period_end == period_end,
+            ClassAnalyticsSnapshot.subject_id.isnot(None),
+        ).group_by(
+            ClassAnalyticsSnapshot.subject_id,
+        ).having(
+            func.avg(ClassAnalyticsSnapshot.avg_mastery_pct) < threshold
+        ).subquery()
+        low_subjects = await self.session.scalar(
+            select(func.count()).select_from(subject_avgs)
+        )
         
-        # Attention areas (below 60% threshold)
-        classes_needing_attention = sum(1 for s in class_snapshots if float(s.avg_mastery_pct) < 60)
-        subjects_with_low_mastery = 0  # TODO: Calculate per subject
+        def _round(value) -> Decimal:
+            return Decimal(str(round(float(value), 2)))
         
         return {
-            "period_start": period_start,
-            "period_end": period_end,
-            "total_students": total_students,
-            "total_teachers": total_teachers,
-            "total_classes": total_classes,
-            "school_avg_mastery": school_avg_mastery,
-            "school_avg_attendance": school_avg_attendance,
-            "school_avg_activity": school_avg_activity,
-            "avg_syllabus_coverage": avg_syllabus_coverage,
-            "avg_teacher_engagement": avg_teacher_engagement,
-            "classes_needing_attention": classes_needing_attention,
-            "subjects_with_low_mastery": subjects_with_low_mastery,
+            "total_students": int(class_row[0]),
+            "total_teachers": teacher_row[0],
+            "total_classes": class_row[1],
+            "school_avg_mastery": _round(class_row[2]),
+            "school_avg_attendance": _round(class_row[3]),
+            "school_avg_activity": _round(class_row[4]),
+            "avg_syllabus_coverage": _round(class_row[5]),
+            "avg_teacher_engagement": _round(teacher_row[1]),
+            "classes_needing_attention": class_row[6],
+            "subjects_with_low_mastery": low_subjects or 0,
         }
     
     async def get_teacher_dashboard(
@@ -880,6 +1915,7 @@ class AnalyticsService:
         snapshots = list(result.scalars().all())
         
         total_classes = len(set(s.class_id for s in snapshots if s.class_id))
+        total_students = await self._count_teacher_students(teacher_id)
         
         if snapshots:
             avg_syllabus_coverage = sum(float(s.syllabus_coverage_pct) for s in snapshots) / len(snapshots)
@@ -897,9 +1933,29 @@ class AnalyticsService:
             "period_start": period_start,
             "period_end": period_end,
             "total_classes": total_classes,
-            "total_students": 0,  # TODO: Calculate
+            "total_students": total_students,
             "avg_syllabus_coverage": avg_syllabus_coverage,
             "avg_student_participation": avg_student_participation,
             "avg_class_mastery": avg_class_mastery,
             "engagement_score": engagement_score,
         }
+    
+    async def _count_teacher_students(self, teacher_id: UUID) -> int:
+        """Active students in the classes a teacher is assigned to (one query)."""
+        assigned_classes = select(TeachingAssignment.class_id).where(
+            TeachingAssignment.tenant_id == self.tenant_id,
+            TeachingAssignment.teacher_id == teacher_id,
+            TeachingAssignment.is_active == True,
+            TeachingAssignment.is_deleted == False,
+        )
+        query = select(func.count(func.distinct(StudentProfile.user_id))).join(
+            Section, StudentProfile.section_id == Section.id
+        ).where(
+            StudentProfile.tenant_id == self.tenant_id,
+            StudentProfile.current_lifecycle_state == StudentLifecycleState.ACTIVE.value,
+            StudentProfile.is_deleted == False,
+            Section.is_deleted == False,
+            Section.class_id.in_(assigned_classes),
+        )
+        result = await self.session.execute(query)
+        return result.scalar() or 0
@@ -9,6 +9,7 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.cache import cache
+from app.core.metrics import get_metrics
 import time
 
 router = APIRouter(tags=["Health"])
@@ -80,3 +81,9 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
 async def liveness_check():
     """Kubernetes liveness probe."""
     return {"status": "alive"}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (request, query and audit metrics)."""
+    return await get_metrics()
@@ -7,6 +7,7 @@ Student and teacher attendance management.
 from app.attendance.models import (
     StudentAttendance,
     AttendanceSummary,
+    ClassAttendanceDaily,
     LeaveRequest,
     TeacherAttendance,
     AttendanceStatus,
@@ -19,6 +20,7 @@ from app.attendance.router import router as attendance_router
 __all__ = [
     "StudentAttendance",
     "AttendanceSummary",
+    "ClassAttendanceDaily",
     "LeaveRequest",
     "TeacherAttendance",
     "AttendanceStatus",
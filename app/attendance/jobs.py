@@ -0,0 +1,64 @@
+"""
+CUSTOS Attendance Background Jobs
+"""
+
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.jobs import AbstractJob, JobType, register_job
+
+
+@register_job
+class AttendanceRollupBackfillJob(AbstractJob):
+    """
+    Rebuild attendance rollups (monthly summaries and class-day counts)
+    from raw StudentAttendance records for a date range.
+
+    Used once after deploying the rollup tables, and to repair a range
+    after bulk imports or manual data fixes.
+    """
+
+    job_type = JobType.ANALYTICS_AGGREGATE
+
+    def __init__(
+        self,
+        tenant_id: UUID,
+        start_date: str,  # ISO format
+        end_date: str,  # ISO format
+    ):
+        super().__init__(tenant_id)
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def get_job_key(self) -> str:
+        """Unique key for idempotency."""
+        return f"attendance_rollup_backfill:{self.start_date}:{self.end_date}"
+
+    def get_entity_type(self) -> str:
+        return "ATTENDANCE"
+
+    def _get_serializable_params(self) -> dict:
+        return {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+        }
+
+    async def execute(self, session: AsyncSession) -> Any:
+        """Execute the backfill."""
+        from datetime import date
+        from app.attendance.service import AttendanceService
+
+        service = AttendanceService(session, self.tenant_id)
+        summary_rows, class_day_rows = await service.rebuild_rollups(
+            date.fromisoformat(self.start_date),
+            date.fromisoformat(self.end_date),
+        )
+
+        return {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "summary_rows": summary_rows,
+            "class_day_rows": class_day_rows,
+        }
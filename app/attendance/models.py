@@ -196,6 +196,48 @@ class AttendanceSummary(TenantBaseModel):
     )
 
 
+class ClassAttendanceDaily(TenantBaseModel):
+    """
+    Daily attendance rollup per class (and section).
+    
+    Maintained incrementally by the attendance write paths
+    (see app/attendance/rollups.py). One row per class/section per day.
+    """
+    __tablename__ = "class_attendance_daily"
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "class_id", "section_id", "attendance_date",
+            name="uq_class_attendance_daily",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index("ix_class_attendance_daily_date", "tenant_id", "attendance_date"),
+    )
+    
+    class_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("classes.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    section_id: Mapped[Optional[UUID]] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("sections.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    
+    attendance_date: Mapped[date] = mapped_column(Date, nullable=False)
+    
+    # Counts (one per status)
+    total_students: Mapped[int] = mapped_column(default=0)
+    present_count: Mapped[int] = mapped_column(default=0)
+    absent_count: Mapped[int] = mapped_column(default=0)
+    late_count: Mapped[int] = mapped_column(default=0)
+    half_day_count: Mapped[int] = mapped_column(default=0)
+    excused_count: Mapped[int] = mapped_column(default=0)
+    holiday_count: Mapped[int] = mapped_column(default=0)
+    not_marked_count: Mapped[int] = mapped_column(default=0)
+
+
 class LeaveRequest(TenantBaseModel):
     """
     Leave request from parent/student.
@@ -0,0 +1,330 @@
+"""
+CUSTOS Attendance Rollups
+
+Incremental maintenance of attendance rollup rows.
+
+Two rollups are kept in step with StudentAttendance writes:
+- AttendanceSummary: per student per month
+- ClassAttendanceDaily: per class/section per day
+
+Write paths describe what changed (old status -> new status) and the
+rollup applies the net count deltas with one multi-row
+INSERT ... ON CONFLICT DO UPDATE per table, so readers get O(1) rows
+instead of scanning raw attendance records.
+
+USAGE:
+
+    rollup = AttendanceRollup(session, tenant_id)
+    rollup.record(student_id, class_id, section_id, day, old_status, new_status)
+    await rollup.flush()      # same transaction as the attendance write
+"""
+
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import Numeric, cast, delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.attendance.models import (
+    AttendanceStatus,
+    AttendanceSummary,
+    ClassAttendanceDaily,
+    StudentAttendance,
+)
+
+
+# Statuses that count as a school day in the monthly summary
+SUMMARY_STATUS_COLUMNS: Dict[AttendanceStatus, Tuple[str, ...]] = {
+    AttendanceStatus.PRESENT: ("present_days",),
+    AttendanceStatus.ABSENT: ("absent_days", "unexcused_days"),
+    AttendanceStatus.LATE: ("late_days",),
+    AttendanceStatus.HALF_DAY: ("half_days",),
+    AttendanceStatus.EXCUSED: ("excused_days",),
+}
+
+SUMMARY_COUNT_COLUMNS = (
+    "total_days",
+    "present_days",
+    "absent_days",
+    "late_days",
+    "half_days",
+    "excused_days",
+    "unexcused_days",
+)
+
+# Every status has a class-day counter
+CLASS_DAILY_STATUS_COLUMNS: Dict[AttendanceStatus, str] = {
+    AttendanceStatus.PRESENT: "present_count",
+    AttendanceStatus.ABSENT: "absent_count",
+    AttendanceStatus.LATE: "late_count",
+    AttendanceStatus.HALF_DAY: "half_day_count",
+    AttendanceStatus.EXCUSED: "excused_count",
+    AttendanceStatus.HOLIDAY: "holiday_count",
+    AttendanceStatus.NOT_MARKED: "not_marked_count",
+}
+
+CLASS_DAILY_COUNT_COLUMNS = ("total_students",) + tuple(CLASS_DAILY_STATUS_COLUMNS.values())
+
+
+@dataclass(frozen=True)
+class AttendanceChange:
+    """A single student-day status transition (None = no record)."""
+    student_id: UUID
+    class_id: UUID
+    section_id: Optional[UUID]
+    attendance_date: date
+    old_status: Optional[AttendanceStatus]
+    new_status: Optional[AttendanceStatus]
+
+
+class AttendanceRollup:
+    """
+    Accumulates attendance status changes and applies them as deltas.
+
+    Not thread-safe; create one per service call / transaction.
+    flush() does not commit.
+    """
+
+    # Rows per multi-row INSERT (keeps bind parameters under the PG limit)
+    BATCH_SIZE = 1000
+
+    def __init__(self, session: AsyncSession, tenant_id: UUID):
+        self.session = session
+        self.tenant_id = tenant_id
+        self._summary_deltas: Dict[Tuple[UUID, int, int], Dict[str, int]] = {}
+        self._class_deltas: Dict[Tuple[UUID, Optional[UUID], date], Dict[str, int]] = {}
+
+    def record(
+        self,
+        student_id: UUID,
+        class_id: UUID,
+        section_id: Optional[UUID],
+        attendance_date: date,
+        old_status: Optional[AttendanceStatus],
+        new_status: Optional[AttendanceStatus],
+    ) -> None:
+        """Record a status transition for one student-day."""
+        if old_status == new_status:
+            return
+
+        month_key = (student_id, attendance_date.year, attendance_date.month)
+        summary = self._summary_deltas.setdefault(month_key, {})
+        day_key = (class_id, section_id, attendance_date)
+        class_day = self._class_deltas.setdefault(day_key, {})
+
+        for status, sign in ((old_status, -1), (new_status, 1)):
+            if status is None:
+                continue
+            status = AttendanceStatus(status)
+
+            if status in SUMMARY_STATUS_COLUMNS:
+                summary["total_days"] = summary.get("total_days", 0) + sign
+                for column in SUMMARY_STATUS_COLUMNS[status]:
+                    summary[column] = summary.get(column, 0) + sign
+
+            column = CLASS_DAILY_STATUS_COLUMNS[status]
+            class_day[column] = class_day.get(column, 0) + sign
+
+        # A new record adds a student to the class-day; a removed one drops it
+        if old_status is None:
+            class_day["total_students"] = class_day.get("total_students", 0) + 1
+        if new_status is None:
+            class_day["total_students"] = class_day.get("total_students", 0) - 1
+
+    def record_change(self, change: AttendanceChange) -> None:
+        """Record an AttendanceChange."""
+        self.record(
+            change.student_id,
+            change.class_id,
+            change.section_id,
+            change.attendance_date,
+            change.old_status,
+            change.new_status,
+        )
+
+    async def flush(self) -> None:
+        """Apply accumulated deltas (one upsert per rollup table)."""
+        summary_deltas = {
+            key: delta for key, delta in self._summary_deltas.items()
+            if any(delta.values())
+        }
+        class_deltas = {
+            key: delta for key, delta in self._class_deltas.items()
+            if any(delta.values())
+        }
+        self._summary_deltas = {}
+        self._class_deltas = {}
+
+        now = datetime.now(timezone.utc)
+
+        if summary_deltas:
+            rows = [
+                {
+                    "student_id": student_id,
+                    "year": year,
+                    "month": month,
+                    **{c: delta.get(c, 0) for c in SUMMARY_COUNT_COLUMNS},
+                }
+                for (student_id, year, month), delta in summary_deltas.items()
+            ]
+            await self._apply_deltas(
+                AttendanceSummary, "uq_attendance_summary_month",
+                SUMMARY_COUNT_COLUMNS, rows, now,
+            )
+            await self._refresh_summary_rates(list(summary_deltas), now)
+
+            # Parent dashboards show the month's attendance
+            from app.parents.dashboard import invalidate_family_dashboards
+
+            await invalidate_family_dashboards(
+                self.session, self.tenant_id, {key[0] for key in summary_deltas},
+            )
+
+        if class_deltas:
+            rows = [
+                {
+                    "class_id": class_id,
+                    "section_id": section_id,
+                    "attendance_date": attendance_date,
+                    **{c: delta.get(c, 0) for c in CLASS_DAILY_COUNT_COLUMNS},
+                }
+                for (class_id, section_id, attendance_date), delta in class_deltas.items()
+            ]
+            await self._apply_deltas(
+                ClassAttendanceDaily, "uq_class_attendance_daily",
+                CLASS_DAILY_COUNT_COLUMNS, rows, now,
+            )
+
+    async def _apply_deltas(
+        self,
+        model,
+        constraint: str,
+        count_columns: Tuple[str, ...],
+        rows: list,
+        now: datetime,
+    ) -> None:
+        """INSERT delta rows; on conflict add them to the existing counters."""
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            batch = [
+                {
+                    "id": uuid4(),
+                    "tenant_id": self.tenant_id,
+                    "created_at": now,
+                    "updated_at": now,
+                    "is_deleted": False,
+                    **row,
+                }
+                for row in rows[start:start + self.BATCH_SIZE]
+            ]
+            stmt = pg_insert(model).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                constraint=constraint,
+                set_={
+                    **{c: getattr(model, c) + stmt.excluded[c] for c in count_columns},
+                    "updated_at": now,
+                },
+            )
+            await self.session.execute(stmt)
+
+    async def _refresh_summary_rates(
+        self,
+        keys: list,
+        now: datetime,
+    ) -> None:
+        """Recompute percentage columns for the touched summary rows."""
+        attended = (
+            AttendanceSummary.present_days
+            + AttendanceSummary.late_days
+            + AttendanceSummary.half_days * 0.5
+        )
+
+        def _rate(denominator):
+            return func.coalesce(
+                func.round(
+                    cast(attended * 100.0 / func.nullif(denominator, 0), Numeric),
+                    2,
+                ),
+                0,
+            )
+
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            stmt = update(AttendanceSummary).where(
+                AttendanceSummary.tenant_id == self.tenant_id,
+                tuple_(
+                    AttendanceSummary.student_id,
+                    AttendanceSummary.year,
+                    AttendanceSummary.month,
+                ).in_(keys[start:start + self.BATCH_SIZE]),
+            ).values(
+                attendance_percentage=_rate(AttendanceSummary.total_days),
+                # Excused absences are excluded from the denominator
+                participation_rate=_rate(
+                    AttendanceSummary.total_days - AttendanceSummary.excused_days
+                ),
+                calculated_at=now,
+            ).execution_options(synchronize_session=False)
+            await self.session.execute(stmt)
+
+    # ============================================
+    # Backfill
+    # ============================================
+
+    async def rebuild(self, start_date: date, end_date: date) -> Tuple[int, int]:
+        """
+        Rebuild both rollups from raw records for a date range.
+
+        The range is widened to whole months so monthly summaries are
+        complete. Existing rollup rows in range are replaced. Does not commit.
+
+        Returns (summary_rows, class_day_rows).
+        """
+        start_date = start_date.replace(day=1)
+        end_month = end_date.replace(day=1)
+
+        await self.session.execute(
+            delete(AttendanceSummary).where(
+                AttendanceSummary.tenant_id == self.tenant_id,
+                tuple_(AttendanceSummary.year, AttendanceSummary.month)
+                >= (start_date.year, start_date.month),
+                tuple_(AttendanceSummary.year, AttendanceSummary.month)
+                <= (end_month.year, end_month.month),
+            )
+        )
+
+        _, last_day = monthrange(end_date.year, end_date.month)
+        range_end = date(end_date.year, end_date.month, last_day)
+
+        await self.session.execute(
+            delete(ClassAttendanceDaily).where(
+                ClassAttendanceDaily.tenant_id == self.tenant_id,
+                ClassAttendanceDaily.attendance_date >= start_date,
+                ClassAttendanceDaily.attendance_date <= range_end,
+            )
+        )
+
+        # One grouped scan: replay every record as a "new" status
+        query = select(
+            StudentAttendance.student_id,
+            StudentAttendance.class_id,
+            StudentAttendance.section_id,
+            StudentAttendance.attendance_date,
+            StudentAttendance.status,
+        ).where(
+            StudentAttendance.tenant_id == self.tenant_id,
+            StudentAttendance.attendance_date >= start_date,
+            StudentAttendance.attendance_date <= range_end,
+            StudentAttendance.is_deleted == False,
+        ).execution_options(yield_per=5000)
+
+        result = await self.session.stream(query)
+        async for row in result:
+            self.record(row[0], row[1], row[2], row[3], None, row[4])
+
+        summary_rows = len(self._summary_deltas)
+        class_rows = len(self._class_deltas)
+        await self.flush()
+        return summary_rows, class_rows
@@ -143,6 +143,8 @@ class LeaveRequestReview(BaseModel):
     """Schema for reviewing a leave request."""
     status: LeaveRequestStatus
     review_notes: Optional[str] = Field(None, max_length=500)
+    # Pre-create EXCUSED records for upcoming leave days
+    excuse_future_days: bool = False
 
 
 # ============================================
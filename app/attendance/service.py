@@ -4,19 +4,24 @@ CUSTOS Attendance Service
 Business logic for attendance management.
 """
 
-from datetime import datetime, date, timezone
+from datetime import datetime, date, timedelta, timezone
 from typing import Optional, List, Tuple, Dict
-from uuid import UUID
+from uuid import UUID, uuid4
 from calendar import monthrange
 
 from sqlalchemy import select, func, and_, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import ResourceNotFoundError, ValidationError
+from app.academics.participation import ParticipationStatus
+from app.scheduling.models.schedule import AcademicCalendarDay
 from app.attendance.models import (
-    StudentAttendance, AttendanceSummary, LeaveRequest, TeacherAttendance,
+    StudentAttendance, AttendanceSummary, ClassAttendanceDaily,
+    LeaveRequest, TeacherAttendance,
     AttendanceStatus, LeaveRequestStatus, LeaveType,
 )
+from app.attendance.rollups import AttendanceRollup
 from app.attendance.schemas import (
     MarkAttendanceRequest, BulkAttendanceRequest,
     LeaveRequestCreate, LeaveRequestReview,
@@ -46,43 +51,21 @@ class AttendanceService:
         academic_year_id: Optional[UUID] = None,
     ) -> StudentAttendance:
         """Mark attendance for a single student."""
-        # Check if already exists
+        # Check if already exists (locked: the rollup delta depends on the old status)
         query = select(StudentAttendance).where(
             StudentAttendance.tenant_id == self.tenant_id,
             StudentAttendance.student_id == data.student_id,
             StudentAttendance.attendance_date == attendance_date,
-        )
+        ).with_for_update()
         result = await self.session.execute(query)
         existing = result.scalar_one_or_none()
         
-        if existing:
-            # Update existing
-            existing.status = data.status
-            existing.check_in_time = data.check_in_time
-            existing.check_out_time = data.check_out_time
-            existing.late_minutes = data.late_minutes
-            existing.remarks = data.remarks
-            existing.marked_by = marked_by
-            existing.marked_at = datetime.now(timezone.utc)
-            attendance = existing
-        else:
-            # Create new
-            attendance = StudentAttendance(
-                tenant_id=self.tenant_id,
-                student_id=data.student_id,
-                class_id=class_id,
-                section_id=section_id,
-                attendance_date=attendance_date,
-                status=data.status,
-                check_in_time=data.check_in_time,
-                check_out_time=data.check_out_time,
-                late_minutes=data.late_minutes,
-                remarks=data.remarks,
-                marked_by=marked_by,
-                marked_at=datetime.now(timezone.utc),
-                academic_year_id=academic_year_id,
-            )
-            self.session.add(attendance)
+        rollup = AttendanceRollup(self.session, self.tenant_id)
+        attendance = self._apply_attendance_mark(
+            existing, attendance_date, class_id, data, marked_by,
+            section_id, academic_year_id, rollup,
+        )
+        await rollup.flush()
         
         await self.session.commit()
         await self.session.refresh(attendance)
@@ -94,21 +77,91 @@ class AttendanceService:
         marked_by: UUID,
         academic_year_id: Optional[UUID] = None,
     ) -> int:
-        """Mark attendance for multiple students."""
+        """
+        Mark attendance for multiple students.
+        
+        One SELECT for existing records, one rollup flush and one commit
+        for the whole class. Existing records are locked (in student
+        order, so concurrent bulk marks cannot deadlock) because the
+        rollup deltas depend on their old status.
+        """
+        student_ids = [record.student_id for record in data.records]
+        query = select(StudentAttendance).where(
+            StudentAttendance.tenant_id == self.tenant_id,
+            StudentAttendance.attendance_date == data.attendance_date,
+            StudentAttendance.student_id.in_(student_ids),
+        ).order_by(StudentAttendance.student_id).with_for_update()
+        result = await self.session.execute(query)
+        existing = {a.student_id: a for a in result.scalars().all()}
+        
+        rollup = AttendanceRollup(self.session, self.tenant_id)
         count = 0
         for record in data.records:
-            await self.mark_student_attendance(
-                attendance_date=data.attendance_date,
-                class_id=data.class_id,
-                data=record,
-                marked_by=marked_by,
-                section_id=data.section_id,
-                academic_year_id=academic_year_id,
+            existing[record.student_id] = self._apply_attendance_mark(
+                existing.get(record.student_id),
+                data.attendance_date,
+                data.class_id,
+                record,
+                marked_by,
+                data.section_id,
+                academic_year_id,
+                rollup,
             )
             count += 1
         
+        await rollup.flush()
+        await self.session.commit()
         return count
     
+    def _apply_attendance_mark(
+        self,
+        existing: Optional[StudentAttendance],
+        attendance_date: date,
+        class_id: UUID,
+        data: MarkAttendanceRequest,
+        marked_by: UUID,
+        section_id: Optional[UUID],
+        academic_year_id: Optional[UUID],
+        rollup: AttendanceRollup,
+    ) -> StudentAttendance:
+        """Create or update one attendance record and record the rollup delta."""
+        if existing:
+            # Update existing
+            rollup.record(
+                existing.student_id, existing.class_id, existing.section_id,
+                attendance_date, existing.status, data.status,
+            )
+            existing.status = data.status
+            existing.check_in_time = data.check_in_time
+            existing.check_out_time = data.check_out_time
+            existing.late_minutes = data.late_minutes
+            existing.remarks = data.remarks
+            existing.marked_by = marked_by
+            existing.marked_at = datetime.now(timezone.utc)
+            return existing
+        
+        # Create new
+        attendance = StudentAttendance(
+            tenant_id=self.tenant_id,
+            student_id=data.student_id,
+            class_id=class_id,
+            section_id=section_id,
+            attendance_date=attendance_date,
+            status=data.status,
+            check_in_time=data.check_in_time,
+            check_out_time=data.check_out_time,
+            late_minutes=data.late_minutes,
+            remarks=data.remarks,
+            marked_by=marked_by,
+            marked_at=datetime.now(timezone.utc),
+            academic_year_id=academic_year_id,
+        )
+        self.session.add(attendance)
+        rollup.record(
+            data.student_id, class_id, section_id, attendance_date, None, data.status,
+        )
+        return attendance
+    
     async def get_student_attendance(
         self,
         student_id: UUID,
@@ -151,8 +204,12 @@ class AttendanceService:
         year: int,
         month: int,
     ) -> StudentAttendanceSummaryResponse:
-        """Get or calculate attendance summary for a month."""
-        # Check for cached summary
+        """
+        Get attendance summary for a month.
+        
+        Served from the AttendanceSummary rollup. Months not yet covered
+        by the rollup (before backfill) fall back to a grouped count.
+        """
         query = select(AttendanceSummary).where(
             AttendanceSummary.tenant_id == self.tenant_id,
             AttendanceSummary.student_id == student_id,
@@ -170,14 +227,24 @@ class AttendanceService:
         _, last_day = monthrange(year, month)
         end_date = date(year, month, last_day)
         
-        records = await self.get_student_attendance(student_id, start_date, end_date)
+        query = select(
+            StudentAttendance.status,
+            func.count(StudentAttendance.id),
+        ).where(
+            StudentAttendance.tenant_id == self.tenant_id,
+            StudentAttendance.student_id == student_id,
+            StudentAttendance.attendance_date >= start_date,
+            StudentAttendance.attendance_date <= end_date,
+        ).group_by(StudentAttendance.status)
+        result = await self.session.execute(query)
+        counts = {status: count for status, count in result.all()}
         
         # Count each status
-        present = sum(1 for r in records if r.status == AttendanceStatus.PRESENT)
-        absent = sum(1 for r in records if r.status == AttendanceStatus.ABSENT)
-        late = sum(1 for r in records if r.status == AttendanceStatus.LATE)
-        half_day = sum(1 for r in records if r.status == AttendanceStatus.HALF_DAY)
-        excused = sum(1 for r in records if r.status == AttendanceStatus.EXCUSED)
+        present = counts.get(AttendanceStatus.PRESENT, 0)
+        absent = counts.get(AttendanceStatus.ABSENT, 0)
+        late = counts.get(AttendanceStatus.LATE, 0)
+        half_day = counts.get(AttendanceStatus.HALF_DAY, 0)
+        excused = counts.get(AttendanceStatus.EXCUSED, 0)
         
         total = present + absent + late + half_day + excused
         percentage = (present + late + half_day * 0.5) / total * 100 if total > 0 else 0
@@ -206,14 +273,25 @@ class AttendanceService:
         _, last_day = monthrange(year, month)
         end_date = date(year, month, last_day)
         
-        records = await self.get_student_attendance(student_id, start_date, end_date)
+        # Only the columns the calendar shows
+        query = select(
+            StudentAttendance.attendance_date,
+            StudentAttendance.status,
+            StudentAttendance.remarks,
+        ).where(
+            StudentAttendance.tenant_id == self.tenant_id,
+            StudentAttendance.student_id == student_id,
+            StudentAttendance.attendance_date >= start_date,
+            StudentAttendance.attendance_date <= end_date,
+        ).order_by(StudentAttendance.attendance_date)
+        result = await self.session.execute(query)
         
         days = []
-        for record in records:
+        for attendance_date, status, remarks in result.all():
             days.append(AttendanceCalendarDay(
-                date=record.attendance_date,
-                status=record.status,
-                remarks=record.remarks,
+                date=attendance_date,
+                status=status,
+                remarks=remarks,
             ))
         
         summary = await self.get_attendance_summary(student_id, year, month)
@@ -226,6 +304,25 @@ class AttendanceService:
             "summary": summary.model_dump(),
         }
     
+    async def rebuild_rollups(
+        self,
+        start_date: date,
+        end_date: date,
+    ) -> Tuple[int, int]:
+        """
+        Backfill attendance rollups from raw records.
+        
+        Covers whole months from start_date to end_date.
+        Returns (summary_rows, class_day_rows).
+        """
+        if start_date > end_date:
+            raise ValidationError("End date must be after start date")
+        
+        rollup = AttendanceRollup(self.session, self.tenant_id)
+        counts = await rollup.rebuild(start_date, end_date)
+        await self.session.commit()
+        return counts
+    
     # ============================================
     # Leave Requests
     # ============================================
@@ -286,32 +383,174 @@ class AttendanceService:
         
         # If approved, mark attendance as excused
         if data.status == LeaveRequestStatus.APPROVED:
-            await self._mark_leave_period_as_excused(leave_request)
+            await self._mark_leave_period_as_excused(
+                leave_request,
+                precreate_future=data.excuse_future_days,
+                marked_by=reviewed_by,
+            )
         
         await self.session.commit()
         await self.session.refresh(leave_request)
         return leave_request
     
-    async def _mark_leave_period_as_excused(self, leave_request: LeaveRequest) -> None:
-        """Mark attendance as excused for approved leave period."""
-        current = leave_request.start_date
-        while current <= leave_request.end_date:
-            # Check if record exists
-            query = select(StudentAttendance).where(
+    async def _mark_leave_period_as_excused(
+        self,
+        leave_request: LeaveRequest,
+        precreate_future: bool = False,
+        marked_by: Optional[UUID] = None,
+    ) -> None:
+        """
+        Mark attendance as excused for approved leave period.
+        
+        Existing records in the range are updated with one set-based UPDATE.
+        With precreate_future, EXCUSED rows are inserted for the remaining
+        (future, working) days of the leave in one INSERT. Rollups get one
+        delta flush. Does not commit.
+        """
+        remarks = f"Leave approved: {leave_request.reason[:100]}"
+        reference = str(leave_request.id)
+        rollup = AttendanceRollup(self.session, self.tenant_id)
+        
+        # Capture the previous status alongside the update for rollup deltas
+        previous = select(
+            StudentAttendance.id,
+            StudentAttendance.status.label("old_status"),
+        ).where(
+            StudentAttendance.tenant_id == self.tenant_id,
+            StudentAttendance.student_id == leave_request.student_id,
+            StudentAttendance.attendance_date.between(
+                leave_request.start_date, leave_request.end_date
+            ),
+            StudentAttendance.is_deleted == False,
+        ).with_for_update().subquery()
+        
+        stmt = update(StudentAttendance).where(
+            StudentAttendance.id == previous.c.id,
+        ).values(
+            status=AttendanceStatus.EXCUSED,
+            participation_status=ParticipationStatus.EXCUSED_ABSENT.value,
+            reference_document_id=reference,
+            remarks=remarks,
+        ).returning(
+            StudentAttendance.class_id,
+            StudentAttendance.section_id,
+            StudentAttendance.attendance_date,
+            previous.c.old_status,
+        ).execution_options(synchronize_session=False)
+        
+        updated = (await self.session.execute(stmt)).all()
+        for class_id, section_id, attendance_date, old_status in updated:
+            rollup.record(
+                leave_request.student_id, class_id, section_id,
+                attendance_date, old_status, AttendanceStatus.EXCUSED,
+            )
+        
+        if precreate_future:
+            await self._precreate_excused_days(
+                leave_request, remarks, reference, marked_by, rollup,
+            )
+        
+        await rollup.flush()
+    
+    async def _precreate_excused_days(
+        self,
+        leave_request: LeaveRequest,
+        remarks: str,
+        reference: str,
+        marked_by: Optional[UUID],
+        rollup: AttendanceRollup,
+    ) -> None:
+        """
+        Insert EXCUSED rows for future leave days that have no record yet.
+        
+        Class/section come from the student's latest attendance record;
+        days marked non-working in the academic calendar are skipped.
+        Days already marked (e.g. concurrently) are left untouched.
+        """
+        first_day = max(leave_request.start_date, date.today() + timedelta(days=1))
+        if first_day > leave_request.end_date:
+            return
+        
+        latest = (await self.session.execute(
+            select(StudentAttendance.class_id, StudentAttendance.section_id).where(
                 StudentAttendance.tenant_id == self.tenant_id,
                 StudentAttendance.student_id == leave_request.student_id,
-                StudentAttendance.attendance_date == current,
+                StudentAttendance.is_deleted == False,
+            ).order_by(StudentAttendance.attendance_date.desc()).limit(1)
+        )).first()
+        if not latest:
+            return
+        class_id, section_id = latest
+        
+        non_working = set((await self.session.execute(
+            select(AcademicCalendarDay.date).where(
+                AcademicCalendarDay.tenant_id == self.tenant_id,
+                AcademicCalendarDay.date.between(first_day, leave_request.end_date),
+                AcademicCalendarDay.is_working_day == False,
+                AcademicCalendarDay.is_deleted == False,
             )
-            result = await self.session.execute(query)
-            existing = result.scalar_one_or_none()
-            
-            if existing:
-                existing.status = AttendanceStatus.EXCUSED
-                existing.remarks = f"Leave approved: {leave_request.reason[:100]}"
-            
-            # Move to next day
-            from datetime import timedelta
-            current = current + timedelta(days=1)
+        )).scalars().all())
+        
+        now = datetime.now(timezone.utc)
+        rows = []
+        for offset in range((leave_request.end_date - first_day).days + 1):
+            day = first_day + timedelta(days=offset)
+            if day in non_working:
+                continue
+            rows.append({
+                "id": uuid4(),
+                "tenant_id": self.tenant_id,
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": False,
+                "student_id": leave_request.student_id,
+                "class_id": class_id,
+                "section_id": section_id,
+                "attendance_date": day,
+                "status": AttendanceStatus.EXCUSED,
+                "participation_status": ParticipationStatus.EXCUSED_ABSENT.value,
+                "reference_document_id": reference,
+                "late_minutes": 0,
+                "remarks": remarks,
+                "marked_by": marked_by,
+                "marked_at": now,
+            })
+        if not rows:
+            return
+        
+        stmt = pg_insert(StudentAttendance).values(rows).on_conflict_do_nothing(
+            constraint="uq_student_attendance_date",
+        ).returning(StudentAttendance.attendance_date)
+        inserted = (await self.session.execute(stmt)).scalars().all()
+        for attendance_date in inserted:
+            rollup.record(
+                leave_request.student_id, class_id, section_id,
+                attendance_date, None, AttendanceStatus.EXCUSED,
+            )
+    
+    async def excuse_teacher_attendance(
+        self,
+        teacher_id: UUID,
+        start_date: date,
+        end_date: date,
+        remarks: str,
+    ) -> int:
+        """
+        Mark a teacher's existing attendance as excused for a leave range.
+        
+        One set-based UPDATE. Does not commit. Returns rows updated.
+        """
+        stmt = update(TeacherAttendance).where(
+            TeacherAttendance.tenant_id == self.tenant_id,
+            TeacherAttendance.teacher_id == teacher_id,
+            TeacherAttendance.attendance_date.between(start_date, end_date),
+            TeacherAttendance.is_deleted == False,
+        ).values(
+            status=AttendanceStatus.EXCUSED,
+            remarks=remarks[:500],
+        ).execution_options(synchronize_session=False)
+        result = await self.session.execute(stmt)
+        return result.rowcount or 0
     
     async def get_student_leave_requests(
         self,
@@ -415,22 +654,58 @@ class AttendanceService:
         attendance_date: date,
         section_id: Optional[UUID] = None,
     ) -> Dict:
-        """Get daily attendance report for a class."""
-        records = await self.get_class_attendance(class_id, attendance_date, section_id)
+        """
+        Get daily attendance report for a class.
+        
+        Read from the ClassAttendanceDaily rollup (one row per section).
+        """
+        query = select(
+            func.count(ClassAttendanceDaily.id),
+            func.coalesce(func.sum(ClassAttendanceDaily.total_students), 0),
+            func.coalesce(func.sum(ClassAttendanceDaily.present_count), 0),
+            func.coalesce(func.sum(ClassAttendanceDaily.absent_count), 0),
+            func.coalesce(func.sum(ClassAttendanceDaily.late_count), 0),
+            func.coalesce(func.sum(ClassAttendanceDaily.not_marked_count), 0),
+        ).where(
+            ClassAttendanceDaily.tenant_id == self.tenant_id,
+            ClassAttendanceDaily.class_id == class_id,
+            ClassAttendanceDaily.attendance_date == attendance_date,
+        )
+        if section_id:
+            query = query.where(ClassAttendanceDaily.section_id == section_id)
         
-        present = sum(1 for r in records if r.status == AttendanceStatus.PRESENT)
-        absent = sum(1 for r in records if r.status == AttendanceStatus.ABSENT)
-        late = sum(1 for r in records if r.status == AttendanceStatus.LATE)
-        not_marked = sum(1 for r in records if r.status == AttendanceStatus.NOT_MARKED)
+        result = await self.session.execute(query)
+        rollup_rows, total, present, absent, late, not_marked = result.one()
+        
+        if not rollup_rows:
+            # Day not covered by the rollup yet; count raw records
+            query = select(
+                StudentAttendance.status,
+                func.count(StudentAttendance.id),
+            ).where(
+                StudentAttendance.tenant_id == self.tenant_id,
+                StudentAttendance.class_id == class_id,
+                StudentAttendance.attendance_date == attendance_date,
+            ).group_by(StudentAttendance.status)
+            if section_id:
+                query = query.where(StudentAttendance.section_id == section_id)
+            
+            result = await self.session.execute(query)
+            counts = {status: count for status, count in result.all()}
+            total = sum(counts.values())
+            present = counts.get(AttendanceStatus.PRESENT, 0)
+            absent = counts.get(AttendanceStatus.ABSENT, 0)
+            late = counts.get(AttendanceStatus.LATE, 0)
+            not_marked = counts.get(AttendanceStatus.NOT_MARKED, 0)
         
         return {
             "attendance_date": attendance_date.isoformat(),
             "class_id": str(class_id),
             "section_id": str(section_id) if section_id else None,
-            "total_students": len(records),
+            "total_students": total,
             "present_count": present,
             "absent_count": absent,
             "late_count": late,
             "not_marked_count": not_marked,
-            "attendance_percentage": round(present / len(records) * 100, 2) if records else 0,
+            "attendance_percentage": round(present / total * 100, 2) if total else 0,
         }
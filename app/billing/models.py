@@ -9,7 +9,7 @@ from enum import Enum
 from typing import Optional, TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import String, Text, Boolean, Integer, Float, DateTime, JSON, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy import String, Text, Boolean, Integer, Float, DateTime, JSON, ForeignKey, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -101,6 +101,7 @@ class UsageLimit(TenantBaseModel):
     __tablename__ = "usage_limits"
     
     __table_args__ = (
+        UniqueConstraint("tenant_id", "year", "month", name="uq_usage_limit_period"),
         Index("ix_usage_tenant_period", "tenant_id", "year", "month"),
     )
     
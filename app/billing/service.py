@@ -4,13 +4,25 @@ CUSTOS Billing Service
 
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import ResourceNotFoundError, ValidationError
 from app.billing.models import Plan, Subscription, UsageLimit, SubscriptionStatus, BillingCycle
+from app.platform.usage.counter import usage_counter
+from app.platform.control.enforcement import invalidate_entitlements
+
+
+# Billing usage type -> UsageLimit counter column
+USAGE_COUNTER_COLUMNS = {
+    "students": "student_count",
+    "teachers": "teacher_count",
+    "questions": "question_count",
+    "ai_requests": "ai_requests_used",
+}
 
 
 class BillingService:
@@ -75,6 +87,7 @@ class BillingService:
         self.session.add(subscription)
         await self.session.commit()
         await self.session.refresh(subscription)
+        invalidate_entitlements(self.tenant_id)
         return subscription
     
     async def cancel_subscription(self) -> Subscription:
@@ -87,6 +100,7 @@ class BillingService:
         subscription.cancelled_at = datetime.now(timezone.utc)
         
         await self.session.commit()
+        invalidate_entitlements(self.tenant_id)
         return subscription
     
     async def get_usage(self) -> UsageLimit:
@@ -101,15 +115,20 @@ class BillingService:
         usage = result.scalar_one_or_none()
         
         if not usage:
-            # Create new usage record
-            usage = UsageLimit(
-                tenant_id=self.tenant_id,
-                year=now.year,
-                month=now.month,
+            # Create new usage record; the usage counter may insert it concurrently
+            await self.session.execute(
+                pg_insert(UsageLimit).values(
+                    id=uuid4(),
+                    tenant_id=self.tenant_id,
+                    year=now.year,
+                    month=now.month,
+                    created_at=now,
+                    updated_at=now,
+                    is_deleted=False,
+                ).on_conflict_do_nothing(constraint="uq_usage_limit_period")
             )
-            self.session.add(usage)
             await self.session.commit()
-            await self.session.refresh(usage)
+            usage = (await self.session.execute(query)).scalar_one()
         
         return usage
     
@@ -130,19 +149,14 @@ class BillingService:
         }
         
         current, max_limit = limits.get(limit_type, (0, 0))
+        if limit_type in USAGE_COUNTER_COLUMNS:
+            current += await usage_counter.pending_limit(
+                self.tenant_id, USAGE_COUNTER_COLUMNS[limit_type],
+            )
         return current < max_limit
     
     async def increment_usage(self, usage_type: str, amount: int = 1) -> None:
-        """Increment usage counter."""
-        usage = await self.get_usage()
-        
-        if usage_type == "students":
-            usage.student_count += amount
-        elif usage_type == "teachers":
-            usage.teacher_count += amount
-        elif usage_type == "questions":
-            usage.question_count += amount
-        elif usage_type == "ai_requests":
-            usage.ai_requests_used += amount
-        
-        await self.session.commit()
+        """Increment usage counter (write-behind, see usage_counter)."""
+        column = USAGE_COUNTER_COLUMNS.get(usage_type)
+        if column:
+            await usage_counter.add_limit(self.tenant_id, column, amount)
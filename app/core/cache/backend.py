@@ -201,6 +201,53 @@ class CacheBackend:
         except Exception:
             return False
     
+    async def incr(
+        self,
+        key: str,
+        amount: int = 1,
+        ttl: Optional[Union[int, timedelta]] = None,
+    ) -> Optional[int]:
+        """
+        Atomically add amount to an integer counter (INCRBY).
+        
+        Sets ttl on the key when given. Returns the new value, or None
+        if Redis is unavailable. Never raises.
+        """
+        if not self.is_connected:
+            return None
+        
+        try:
+            if isinstance(ttl, timedelta):
+                ttl = int(ttl.total_seconds())
+            
+            pipe = self._client.pipeline()
+            pipe.incrby(key, amount)
+            if ttl:
+                pipe.expire(key, ttl)
+            results = await pipe.execute()
+            return int(results[0])
+            
+        except Exception as e:
+            logger.debug(f"Cache incr failed for {key}: {e}")
+            return None
+    
+    async def get_int(self, key: str) -> Optional[int]:
+        """
+        Get an integer counter written by incr().
+        
+        Returns 0 if the key does not exist, None if Redis is unavailable.
+        Never raises.
+        """
+        if not self.is_connected:
+            return None
+        
+        try:
+            value = await self._client.get(key)
+            return int(value) if value is not None else 0
+        except Exception as e:
+            logger.debug(f"Cache get_int failed for {key}: {e}")
+            return None
+    
     async def get_ttl(self, key: str) -> int:
         """Get remaining TTL for key. Returns -1 if not found."""
         if not self.is_connected:
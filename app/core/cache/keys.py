@@ -25,6 +25,8 @@ class CachePrefix:
     QUOTA = "quota"
     CLASS = "class"
     SUBJECT = "subject"
+    AI = "ai"
+    PARENT = "parent"
 
 
 class CacheKeys:
@@ -225,6 +227,34 @@ class CacheKeys:
         """
         return f"custos:{tenant_id}:{CachePrefix.QUOTA}:insights"
     
+    # ============================================
+    # AI Response Keys (TTL: 24h)
+    # ============================================
+    
+    @staticmethod
+    def ai_response(tenant_id: Optional[UUID], digest: str) -> str:
+        """
+        Cached AI response, addressed by the request's content hash.
+        
+        TTL: settings.ai_cache_ttl_seconds
+        """
+        return f"custos:{tenant_id or 'platform'}:{CachePrefix.AI}:response:{digest}"
+    
+    # ============================================
+    # Parent Dashboard Keys (TTL: 5min)
+    # ============================================
+    
+    @staticmethod
+    def parent_dashboard(tenant_id: UUID, parent_id: UUID, view: str) -> str:
+        """
+        A parent's dashboard (one key per dashboard view).
+        
+        TTL: 5 minutes
+        Invalidate on: fee account/invoice/payment and attendance changes
+        for any linked child
+        """
+        return f"custos:{tenant_id}:{CachePrefix.PARENT}:dashboard:{parent_id}:{view}"
+    
     # ============================================
     # Class/Subject Keys (TTL: 1h)
     # ============================================
@@ -270,3 +300,5 @@ class CacheTTL:
     SHORT = 300           # 5 minutes
     MEDIUM = 3600         # 1 hour
     LONG = 86400          # 24 hours
+    AI_RESPONSE = 86400   # 24 hours
+    PARENT_DASHBOARD = 300  # 5 minutes
@@ -54,6 +54,28 @@ class Settings(BaseSettings):
     openai_max_tokens: int = 4096
     openai_temperature: float = 0.7
     
+    # AI gateway (app.ai.gateway): "openai" or "stub" (offline)
+    ai_provider: str = "openai"
+    ai_max_concurrency: int = 16  # Provider calls in flight per process
+    ai_tenant_concurrency: int = 6  # ... per tenant (a 50-question request is 5 chunks)
+    ai_http_max_connections: int = 20
+    ai_request_timeout_seconds: float = 120.0
+    # Responses of requests at or below this temperature are cached
+    ai_cache_max_temperature: float = 0.2
+    ai_cache_ttl_seconds: int = 86400
+    
+    # OCR image preprocessing (app.ai.ocr_preprocess)
+    ocr_preprocess_workers: int = 2  # Processes in the preprocessing pool
+    ocr_max_image_dimension: int = 2048  # Longest side sent to the model
+    
+    # Payment gateway HTTP (app.payments.clients)
+    payment_http_max_connections: int = 50
+    payment_http_timeout_seconds: float = 15.0
+    payment_http_connect_timeout_seconds: float = 5.0
+    payment_http_retries: int = 2
+    # Background handling of the webhook inbox (app.payments.webhooks)
+    payment_webhook_consumer_enabled: bool = True
+    
     # SaaS
     trial_days: int = 14
     
@@ -61,11 +83,40 @@ class Settings(BaseSettings):
     storage_provider: str = "local"
     storage_path: str = "./uploads"
     max_file_size_mb: int = 50
+    # Let the front proxy send file bodies: "" (app serves them),
+    # "nginx" (X-Accel-Redirect to file_accel_prefix, an internal
+    # location aliased to storage_path) or "sendfile" (X-Sendfile)
+    file_accel_mode: str = ""
+    file_accel_prefix: str = "/protected-files"
+    
+    # Audit trail writer
+    audit_flush_interval_ms: int = 250
+    audit_flush_batch_size: int = 200
+    audit_queue_max_size: int = 10000
+    audit_spill_path: str = "./audit_spill"
+    
+    # Observability rollups (cross-worker metrics, Postgres only)
+    metrics_rollup_enabled: bool = True
+    
+    # SQL instrumentation: a statement fingerprint run more than this many
+    # times in one request is reported as a possible N+1
+    db_n_plus_one_threshold: int = 10
     
     # Rate Limiting
     rate_limit_requests: int = 100
     rate_limit_window_seconds: int = 60
     
+    # Circuit breakers: share state across workers through Redis
+    circuit_shared_state_enabled: bool = True
+    
+    # Background jobs (app.core.jobs.runner): run a runner in each web
+    # process; job_runner_queues limits it to some lanes (comma-separated,
+    # empty = all). job_queue_backend: "postgres" or "redis"
+    job_runner_enabled: bool = True
+    job_runner_concurrency: int = 4
+    job_runner_queues: str = ""
+    job_queue_backend: str = "postgres"
+    
     # Redis (for background tasks)
     redis_url: str = "redis://localhost:6379/0"
     redis_password: Optional[str] = None
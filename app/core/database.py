@@ -14,6 +14,7 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.core.query_stats import install_query_hooks
 
 
 class Base(DeclarativeBase):
@@ -38,6 +39,9 @@ else:
         pool_pre_ping=True,
     )
 
+# Query count/time per request and per statement fingerprint
+install_query_hooks(engine)
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -191,3 +191,15 @@ class ForbiddenError(CustosException):
             details=details,
         )
 
+
+
+class ConflictError(CustosException):
+    """Request conflicts with the current state of a resource."""
+    
+    def __init__(self, message: str = "Conflict", details: Optional[dict] = None):
+        super().__init__(
+            message=message,
+            code="CONFLICT",
+            status_code=409,
+            details=details,
+        )
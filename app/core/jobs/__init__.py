@@ -9,6 +9,7 @@ FEATURES:
 - Timeout enforcement
 - Audit integration
 - Job registry security
+- Durable queue with priority lanes, run by JobRunner workers
 
 USAGE:
 
@@ -57,6 +58,8 @@ from app.core.jobs.policies import (
     JobStatus,
     JobPolicy,
     JOB_POLICIES,
+    TaskQueues,
+    QUEUE_PRIORITIES,
     get_policy,
     is_retryable_error,
     RetryableError,
@@ -72,6 +75,13 @@ from app.core.jobs.queue import (
     get_queue,
 )
 
+# Runner
+from app.core.jobs.runner import (
+    JobRunner,
+    get_runner,
+    register_periodic,
+)
+
 # Registry
 from app.core.jobs.registry import (
     register_job,
@@ -84,7 +94,7 @@ from app.core.jobs.registry import (
 )
 
 # Models
-from app.core.jobs.models import JobExecution
+from app.core.jobs.models import JobExecution, QueuedJob
 
 __all__ = [
     # Base
@@ -95,6 +105,8 @@ __all__ = [
     "JobStatus",
     "JobPolicy",
     "JOB_POLICIES",
+    "TaskQueues",
+    "QUEUE_PRIORITIES",
     "get_policy",
     "is_retryable_error",
     "RetryableError",
@@ -105,6 +117,10 @@ __all__ = [
     "cancel_job",
     "list_jobs",
     "get_queue",
+    # Runner
+    "JobRunner",
+    "get_runner",
+    "register_periodic",
     # Registry
     "register_job",
     "register_job_class",
@@ -115,4 +131,5 @@ __all__ = [
     "JobCategory",
     # Models
     "JobExecution",
+    "QueuedJob",
 ]
@@ -0,0 +1,480 @@
+"""
+CUSTOS Job Queue Backends
+
+Durable storage for queued jobs, used by enqueue() and the JobRunner.
+
+BACKENDS:
+- PostgresJobBackend (default): the job_queue table. Workers claim with
+  UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED), so claims
+  never block each other. Enqueue joins the caller's transaction.
+- RedisJobBackend (optional, settings.job_queue_backend = "redis"):
+  sorted sets per lane scored by run time, claimed by a Lua script.
+  Uses the async Redis client; enqueue falls back to Postgres when Redis
+  is down, and runners always drain the Postgres queue as well. Redis
+  enqueues do not wait for the caller's transaction.
+
+Both lease claimed jobs for a visibility timeout. The runner renews
+leases with heartbeats; a job whose lease expires (its worker died) is
+claimed again by another worker.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.jobs.models import QueuedJob
+from app.core.jobs.policies import JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ClaimedJob:
+    """A job leased to this worker."""
+    id: str
+    tenant_id: UUID
+    job_class: str
+    job_key: str
+    params: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    actor_user_id: Optional[UUID] = None
+    request_id: Optional[str] = None
+
+
+class JobQueueBackend:
+    """Interface shared by the queue backends."""
+
+    name = "base"
+
+    async def enqueue(self, session: AsyncSession, entry: Dict[str, Any]) -> Optional[str]:
+        """Store a job; returns its queue id, or None if the key is already queued."""
+        raise NotImplementedError
+
+    async def claim(
+        self,
+        queues: Sequence[str],
+        limit: int,
+        worker_id: str,
+        visibility_seconds: int,
+    ) -> List[ClaimedJob]:
+        """Lease up to limit ready jobs (and jobs with expired leases)."""
+        raise NotImplementedError
+
+    async def heartbeat(self, job_ids: Sequence[str], worker_id: str, visibility_seconds: int) -> None:
+        """Extend the leases of running jobs."""
+        raise NotImplementedError
+
+    async def complete(self, job_id: str, worker_id: str, error: Optional[str] = None) -> None:
+        """Finish a job (failed when error is given)."""
+        raise NotImplementedError
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        """Return an unfinished job to its queue (worker shutting down)."""
+        raise NotImplementedError
+
+    async def cancel(self, session: AsyncSession, tenant_id: UUID, job_key: str) -> bool:
+        """Cancel a job that has not started."""
+        raise NotImplementedError
+
+    async def get_entry(self, session: AsyncSession, tenant_id: UUID, job_key: str) -> Optional[dict]:
+        """Queue state of a job that has not produced an execution record yet."""
+        raise NotImplementedError
+
+
+# ============================================
+# Postgres
+# ============================================
+
+class PostgresJobBackend(JobQueueBackend):
+    """job_queue table with SKIP LOCKED claims."""
+
+    name = "postgres"
+
+    async def enqueue(self, session: AsyncSession, entry: Dict[str, Any]) -> Optional[str]:
+        now = datetime.now(timezone.utc)
+        job_id = uuid4()
+        stmt = (
+            pg_insert(QueuedJob)
+            .values(
+                id=job_id,
+                created_at=now,
+                updated_at=now,
+                is_deleted=False,
+                status="queued",
+                attempts=0,
+                **entry,
+            )
+            .on_conflict_do_nothing(
+                index_elements=["tenant_id", "job_key"],
+                index_where=QueuedJob.status.in_(["queued", "running"]),
+            )
+            .returning(QueuedJob.id)
+        )
+        result = await session.execute(stmt)
+        inserted = result.scalar_one_or_none()
+        return str(inserted) if inserted else None
+
+    async def claim(
+        self,
+        queues: Sequence[str],
+        limit: int,
+        worker_id: str,
+        visibility_seconds: int,
+    ) -> List[ClaimedJob]:
+        from app.core.database import AsyncSessionLocal
+
+        now = datetime.now(timezone.utc)
+        ready = (
+            select(QueuedJob.id)
+            .where(
+                QueuedJob.queue.in_(list(queues)),
+                or_(
+                    and_(QueuedJob.status == "queued", QueuedJob.run_at <= now),
+                    and_(QueuedJob.status == "running", QueuedJob.locked_until < now),
+                ),
+            )
+            .order_by(QueuedJob.priority, QueuedJob.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(QueuedJob)
+            .where(QueuedJob.id.in_(ready.scalar_subquery()))
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_seconds),
+                heartbeat_at=now,
+                attempts=QueuedJob.attempts + 1,
+                updated_at=now,
+            )
+            .returning(
+                QueuedJob.id,
+                QueuedJob.tenant_id,
+                QueuedJob.job_class,
+                QueuedJob.job_key,
+                QueuedJob.params,
+                QueuedJob.attempts,
+                QueuedJob.max_attempts,
+                QueuedJob.actor_user_id,
+                QueuedJob.request_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(stmt)
+            rows = result.all()
+            await session.commit()
+
+        return [
+            ClaimedJob(
+                id=str(row.id),
+                tenant_id=row.tenant_id,
+                job_class=row.job_class,
+                job_key=row.job_key,
+                params=row.params or {},
+                attempts=row.attempts,
+                max_attempts=row.max_attempts,
+                actor_user_id=row.actor_user_id,
+                request_id=row.request_id,
+            )
+            for row in rows
+        ]
+
+    async def _update_leased(self, job_ids: Sequence[str], worker_id: str, **values) -> None:
+        from app.core.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(QueuedJob)
+                .where(
+                    QueuedJob.id.in_([UUID(job_id) for job_id in job_ids]),
+                    QueuedJob.locked_by == worker_id,
+                    QueuedJob.status == "running",
+                )
+                .values(updated_at=datetime.now(timezone.utc), **values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def heartbeat(self, job_ids: Sequence[str], worker_id: str, visibility_seconds: int) -> None:
+        now = datetime.now(timezone.utc)
+        await self._update_leased(
+            job_ids, worker_id,
+            heartbeat_at=now,
+            locked_until=now + timedelta(seconds=visibility_seconds),
+        )
+
+    async def complete(self, job_id: str, worker_id: str, error: Optional[str] = None) -> None:
+        await self._update_leased(
+            [job_id], worker_id,
+            status="failed" if error else "completed",
+            last_error=error,
+            finished_at=datetime.now(timezone.utc),
+            locked_until=None,
+        )
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        await self._update_leased(
+            [job_id], worker_id,
+            status="queued",
+            run_at=datetime.now(timezone.utc),
+            locked_by=None,
+            locked_until=None,
+            attempts=QueuedJob.attempts - 1,  # Interrupted, not failed
+        )
+
+    async def cancel(self, session: AsyncSession, tenant_id: UUID, job_key: str) -> bool:
+        result = await session.execute(
+            update(QueuedJob)
+            .where(
+                QueuedJob.tenant_id == tenant_id,
+                QueuedJob.job_key == job_key,
+                QueuedJob.status == "queued",
+            )
+            .values(
+                status=JobStatus.CANCELLED.value,
+                finished_at=datetime.now(timezone.utc),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    async def get_entry(self, session: AsyncSession, tenant_id: UUID, job_key: str) -> Optional[dict]:
+        result = await session.execute(
+            select(QueuedJob)
+            .where(QueuedJob.tenant_id == tenant_id, QueuedJob.job_key == job_key)
+            .order_by(QueuedJob.created_at.desc())
+            .limit(1)
+        )
+        entry = result.scalar_one_or_none()
+        if entry is None:
+            return None
+        return {
+            "queue_id": str(entry.id),
+            "queue": entry.queue,
+            "status": JobStatus.QUEUED.value if entry.status == "queued" else entry.status,
+            "run_at": entry.run_at.isoformat() if entry.run_at else None,
+            "attempt": entry.attempts,
+            "max_attempts": entry.max_attempts,
+            "error_message": entry.last_error,
+        }
+
+
+# ============================================
+# Redis
+# ============================================
+
+_REDIS_PREFIX = "jobs"
+
+# KEYS: running zset, lane zsets (priority order)
+# ARGV: now, lease deadline, limit
+_CLAIM = """
+local limit = tonumber(ARGV[3])
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, limit)
+for i = 2, #KEYS do
+    if #ids >= limit then break end
+    local ready = redis.call('ZRANGEBYSCORE', KEYS[i], '-inf', ARGV[1], 'LIMIT', 0, limit - #ids)
+    for _, id in ipairs(ready) do
+        redis.call('ZREM', KEYS[i], id)
+        table.insert(ids, id)
+    end
+end
+local result = {}
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[1], ARGV[2], id)
+    local entry = 'jobs:entry:' .. id
+    local attempts = redis.call('HINCRBY', entry, 'attempts', 1)
+    table.insert(result, id)
+    table.insert(result, redis.call('HGET', entry, 'payload') or '')
+    table.insert(result, attempts)
+end
+return result
+"""
+
+
+class RedisJobBackend(JobQueueBackend):
+    """
+    Lane sorted sets in Redis.
+
+    jobs:lane:{queue}     zset of job ids scored by run time
+    jobs:running          zset of leased job ids scored by lease deadline
+    jobs:entry:{id}       hash: payload (JSON), queue, attempts
+    jobs:key:{tenant}:{key}  id of the active job for a key (dedup)
+
+    Finished jobs are removed; their outcome is in JobExecution.
+    """
+
+    name = "redis"
+
+    # Entries of jobs that never finish are dropped after this long
+    ENTRY_TTL_SECONDS = 7 * 86400
+
+    def __init__(self, client):
+        self._client = client
+        self._claim_script = client.register_script(_CLAIM)
+
+    @staticmethod
+    def _lane_key(queue: str) -> str:
+        return f"{_REDIS_PREFIX}:lane:{queue}"
+
+    @staticmethod
+    def _entry_key(job_id: str) -> str:
+        return f"{_REDIS_PREFIX}:entry:{job_id}"
+
+    @staticmethod
+    def _dedup_key(tenant_id: UUID, job_key: str) -> str:
+        return f"{_REDIS_PREFIX}:key:{tenant_id}:{job_key}"
+
+    _RUNNING = f"{_REDIS_PREFIX}:running"
+
+    async def enqueue(self, session: AsyncSession, entry: Dict[str, Any]) -> Optional[str]:
+        job_id = str(uuid4())
+        dedup_key = self._dedup_key(entry["tenant_id"], entry["job_key"])
+        if not await self._client.set(dedup_key, job_id, nx=True, ex=self.ENTRY_TTL_SECONDS):
+            return None
+
+        payload = {
+            "tenant_id": str(entry["tenant_id"]),
+            "job_class": entry["job_class"],
+            "job_key": entry["job_key"],
+            "params": entry["params"],
+            "max_attempts": entry["max_attempts"],
+            "actor_user_id": str(entry["actor_user_id"]) if entry.get("actor_user_id") else None,
+            "request_id": entry.get("request_id"),
+        }
+        pipe = self._client.pipeline(transaction=True)
+        pipe.hset(self._entry_key(job_id), mapping={
+            "payload": json.dumps(payload),
+            "queue": entry["queue"],
+            "attempts": 0,
+        })
+        pipe.expire(self._entry_key(job_id), self.ENTRY_TTL_SECONDS)
+        pipe.zadd(self._lane_key(entry["queue"]), {job_id: entry["run_at"].timestamp()})
+        await pipe.execute()
+        return job_id
+
+    async def claim(
+        self,
+        queues: Sequence[str],
+        limit: int,
+        worker_id: str,
+        visibility_seconds: int,
+    ) -> List[ClaimedJob]:
+        now = time.time()
+        result = await self._claim_script(
+            keys=[self._RUNNING, *[self._lane_key(q) for q in queues]],
+            args=[now, now + visibility_seconds, limit],
+        )
+
+        claimed = []
+        for i in range(0, len(result), 3):
+            job_id, payload, attempts = result[i], result[i + 1], int(result[i + 2])
+            if not payload:
+                await self._client.zrem(self._RUNNING, job_id)  # Entry expired
+                continue
+            data = json.loads(payload)
+            claimed.append(ClaimedJob(
+                id=job_id,
+                tenant_id=UUID(data["tenant_id"]),
+                job_class=data["job_class"],
+                job_key=data["job_key"],
+                params=data["params"] or {},
+                attempts=attempts,
+                max_attempts=data["max_attempts"],
+                actor_user_id=UUID(data["actor_user_id"]) if data.get("actor_user_id") else None,
+                request_id=data.get("request_id"),
+            ))
+        return claimed
+
+    async def heartbeat(self, job_ids: Sequence[str], worker_id: str, visibility_seconds: int) -> None:
+        deadline = time.time() + visibility_seconds
+        await self._client.zadd(self._RUNNING, {job_id: deadline for job_id in job_ids}, xx=True)
+
+    async def complete(self, job_id: str, worker_id: str, error: Optional[str] = None) -> None:
+        payload = await self._client.hget(self._entry_key(job_id), "payload")
+        pipe = self._client.pipeline(transaction=True)
+        pipe.zrem(self._RUNNING, job_id)
+        pipe.delete(self._entry_key(job_id))
+        if payload:
+            data = json.loads(payload)
+            pipe.delete(self._dedup_key(data["tenant_id"], data["job_key"]))
+        await pipe.execute()
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        queue = await self._client.hget(self._entry_key(job_id), "queue")
+        if not queue:
+            return
+        pipe = self._client.pipeline(transaction=True)
+        pipe.zrem(self._RUNNING, job_id)
+        pipe.hincrby(self._entry_key(job_id), "attempts", -1)
+        pipe.zadd(self._lane_key(queue), {job_id: time.time()})
+        await pipe.execute()
+
+    async def cancel(self, session: AsyncSession, tenant_id: UUID, job_key: str) -> bool:
+        dedup_key = self._dedup_key(tenant_id, job_key)
+        job_id = await self._client.get(dedup_key)
+        if not job_id:
+            return False
+        queue = await self._client.hget(self._entry_key(job_id), "queue")
+        if not queue or not await self._client.zrem(self._lane_key(queue), job_id):
+            return False  # Already running
+        await self._client.delete(self._entry_key(job_id), dedup_key)
+        return True
+
+    async def get_entry(self, session: AsyncSession, tenant_id: UUID, job_key: str) -> Optional[dict]:
+        job_id = await self._client.get(self._dedup_key(tenant_id, job_key))
+        if not job_id:
+            return None
+        entry = await self._client.hgetall(self._entry_key(job_id))
+        if not entry:
+            return None
+        running = await self._client.zscore(self._RUNNING, job_id) is not None
+        return {
+            "queue_id": job_id,
+            "queue": entry.get("queue"),
+            "status": JobStatus.PROCESSING.value if running else JobStatus.QUEUED.value,
+            "attempt": int(entry.get("attempts", 0)),
+        }
+
+
+# ============================================
+# Selection
+# ============================================
+
+_postgres = PostgresJobBackend()
+_redis: Optional[RedisJobBackend] = None
+
+
+async def get_backend() -> JobQueueBackend:
+    """The configured backend; Postgres when Redis is not configured or down."""
+    global _redis
+    from app.core.config import settings
+
+    if settings.job_queue_backend != "redis":
+        return _postgres
+
+    from app.core.cache import get_cache
+
+    cache = await get_cache()
+    if not cache.is_connected:
+        logger.warning("Redis job queue unavailable, using Postgres")
+        return _postgres
+    if _redis is None or _redis._client is not cache._client:
+        _redis = RedisJobBackend(cache._client)
+    return _redis
+
+
+async def active_backends() -> List[JobQueueBackend]:
+    """Backends a runner drains: Redis (when in use) and always Postgres."""
+    backend = await get_backend()
+    return [backend] if backend is _postgres else [backend, _postgres]
@@ -159,6 +159,15 @@ class AbstractJob(ABC):
         """
         return self.get_job_key()
     
+    def _get_serializable_params(self) -> dict:
+        """
+        Constructor arguments (besides tenant_id) as JSON-safe values.
+        
+        Queued jobs are rebuilt from these in the worker; override in
+        every job that is enqueued.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be queued")
+    
     def set_context(
         self,
         actor_user_id: Optional[UUID] = None,
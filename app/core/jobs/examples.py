@@ -125,6 +125,7 @@ class AnalyticsSnapshotJob(AbstractJob):
     async def execute(self, session: AsyncSession) -> Any:
         """Execute snapshot generation."""
         from app.analytics.service import AnalyticsService
+        from app.analytics.models import AnalyticsPeriod
         from datetime import date
         
         service = AnalyticsService(session, self.tenant_id)
@@ -137,7 +138,10 @@ class AnalyticsSnapshotJob(AbstractJob):
         elif self.target_type == "class" and self.target_id:
             count = await service.generate_class_snapshot(self.target_id, target_date)
         else:
-            count = await service.generate_all_snapshots(target_date)
+            students, teachers, classes = await service.generate_all_snapshots(
+                target_date, target_date, period_type=AnalyticsPeriod.DAILY
+            )
+            count = students + teachers + classes
         
         return {
             "date": self.target_date,
@@ -192,7 +196,7 @@ class ExportInspectionJob(AbstractJob):
         service = GovernanceService(session, self.tenant_id)
         
         # Generate the export
-        export = await service.generate_export(self.export_id)
+        export = await service.generate_inspection_export(self.export_id)
         
         return {
             "export_id": str(self.export_id),
@@ -7,13 +7,14 @@ This provides:
 - Persistent idempotency (prevent duplicate execution)
 - Execution history
 - Retry tracking
+- The durable job queue (QueuedJob)
 """
 
 from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Index
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -183,3 +184,72 @@ class JobExecution(TenantBaseModel):
         if self.started_at and self.completed_at:
             return (self.completed_at - self.started_at).total_seconds()
         return None
+
+
+class QueuedJob(TenantBaseModel):
+    """
+    A job waiting in (or claimed from) the Postgres job queue.
+    
+    Workers claim ready rows with FOR UPDATE SKIP LOCKED, so concurrent
+    workers never block on or double-claim a row. A claimed row is
+    leased until locked_until; heartbeats extend the lease, and a row
+    whose lease ran out (worker died) is claimed again.
+    """
+    
+    __tablename__ = "job_queue"
+    
+    job_class: Mapped[str] = mapped_column(String(100), nullable=False)
+    job_key: Mapped[str] = mapped_column(String(500), nullable=False)
+    job_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    
+    # Lane (TaskQueues) and claim order within the lanes
+    queue: Mapped[str] = mapped_column(String(30), nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # queued, running, completed, failed, cancelled
+    status: Mapped[str] = mapped_column(String(20), default="queued")
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    
+    # Claims so far; a job claimed more than max_attempts times is failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=1)
+    
+    # Lease
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    # Context passed to the job (audit)
+    actor_user_id: Mapped[Optional[UUID]] = mapped_column(PGUUID(as_uuid=True), nullable=True)
+    request_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    
+    __table_args__ = (
+        # Claim scan: ready rows in lane priority order
+        Index(
+            "ix_job_queue_ready",
+            "priority",
+            "run_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        # Expired leases
+        Index(
+            "ix_job_queue_leases",
+            "locked_until",
+            postgresql_where=text("status = 'running'"),
+        ),
+        # One active entry per job key (enqueue is idempotent)
+        Index(
+            "ux_job_queue_active",
+            "tenant_id",
+            "job_key",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<QueuedJob {self.job_class}:{self.job_key} ({self.status})>"
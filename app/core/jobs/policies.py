@@ -45,6 +45,23 @@ class JobType(str, Enum):
     NOTIFICATION_BULK = "notification_bulk"
 
 
+class TaskQueues:
+    """Named queues (priority lanes) for background work."""
+    HIGH = "custos_high"      # Critical operations
+    DEFAULT = "custos"        # Normal AI operations  
+    LOW = "custos_low"        # Bulk/batch operations
+    AI_BATCH = "custos_ai"    # Large AI batches only
+
+
+# Claim order between lanes (lower first)
+QUEUE_PRIORITIES: dict[str, int] = {
+    TaskQueues.HIGH: 0,
+    TaskQueues.DEFAULT: 10,
+    TaskQueues.AI_BATCH: 20,
+    TaskQueues.LOW: 30,
+}
+
+
 class JobStatus(str, Enum):
     """Job execution status."""
     PENDING = "pending"
@@ -93,6 +110,7 @@ class JobPolicy:
     retry_delay_seconds: int
     idempotent: bool = True  # All jobs MUST be idempotent
     audit_action: str = "PROCESS"  # Default audit action
+    queue: str = TaskQueues.DEFAULT  # Priority lane
 
 
 # ============================================
@@ -124,6 +142,7 @@ JOB_POLICIES: dict[JobType, JobPolicy] = {
         max_retries=2,
         retry_delay_seconds=30,
         audit_action="GENERATE",
+        queue=TaskQueues.AI_BATCH,
     ),
     JobType.AI_INSIGHT: JobPolicy(
         timeout_seconds=600,
@@ -152,12 +171,14 @@ JOB_POLICIES: dict[JobType, JobPolicy] = {
         max_retries=1,
         retry_delay_seconds=10,
         audit_action="GENERATE",
+        queue=TaskQueues.LOW,
     ),
     JobType.ANALYTICS_AGGREGATE: JobPolicy(
         timeout_seconds=120,
         max_retries=1,
         retry_delay_seconds=10,
         audit_action="GENERATE",
+        queue=TaskQueues.LOW,
     ),
     
     # Payroll Jobs - Critical, no retry (human review needed)
@@ -166,32 +187,37 @@ JOB_POLICIES: dict[JobType, JobPolicy] = {
         max_retries=0,  # NO automatic retry for payroll
         retry_delay_seconds=0,
         audit_action="PROCESS",
+        queue=TaskQueues.HIGH,
     ),
     JobType.PAYROLL_GENERATE: JobPolicy(
         timeout_seconds=300,
         max_retries=0,  # NO automatic retry
         retry_delay_seconds=0,
         audit_action="GENERATE",
+        queue=TaskQueues.HIGH,
     ),
     
     # Export Jobs
     JobType.EXPORT_INSPECTION: JobPolicy(
-        timeout_seconds=180,
+        timeout_seconds=3600,  # Streams whole tenants; progress is on the export
         max_retries=2,
         retry_delay_seconds=30,
         audit_action="EXPORT",
+        queue=TaskQueues.LOW,
     ),
     JobType.EXPORT_REPORT: JobPolicy(
         timeout_seconds=180,
         max_retries=2,
         retry_delay_seconds=30,
         audit_action="EXPORT",
+        queue=TaskQueues.LOW,
     ),
     JobType.EXPORT_ANALYTICS: JobPolicy(
         timeout_seconds=180,
         max_retries=2,
         retry_delay_seconds=30,
         audit_action="EXPORT",
+        queue=TaskQueues.LOW,
     ),
     
     # Notification Jobs
@@ -200,12 +226,14 @@ JOB_POLICIES: dict[JobType, JobPolicy] = {
         max_retries=3,
         retry_delay_seconds=10,
         audit_action="PROCESS",
+        queue=TaskQueues.HIGH,
     ),
     JobType.NOTIFICATION_BULK: JobPolicy(
         timeout_seconds=180,
         max_retries=2,
         retry_delay_seconds=30,
         audit_action="PROCESS",
+        queue=TaskQueues.LOW,
     ),
 }
 
@@ -4,82 +4,54 @@ CUSTOS Job Queue
 Queue management for background jobs.
 
 FEATURES:
-- Redis Queue (RQ) for async execution
-- Synchronous fallback if Redis unavailable
+- Durable queue (Postgres by default, optional Redis; see backends.py)
+- Jobs run in JobRunner workers, never inside the request that queued them
+- Priority lanes (TaskQueues) and delayed jobs
 - Never silently fail
 """
 
 import logging
-from typing import Optional, Any, Type
+from typing import Optional, Any
 from uuid import UUID
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.jobs.backends import JobQueueBackend, get_backend
 from app.core.jobs.base import AbstractJob
-from app.core.jobs.policies import JobStatus
-from app.core.jobs.registry import is_job_allowed, get_job_class
+from app.core.jobs.policies import JobStatus, QUEUE_PRIORITIES
+from app.core.jobs.registry import is_job_allowed
 
 logger = logging.getLogger(__name__)
 
 
-# Global flag for RQ availability
-_RQ_AVAILABLE = False
-_redis_conn = None
-
-try:
-    from redis import Redis
-    from rq import Queue
-    _RQ_AVAILABLE = True
-except ImportError:
-    logger.warning("RQ not installed - jobs will run synchronously")
-
-
-async def get_queue() -> Optional[Any]:
-    """
-    Get RQ queue instance.
-    
-    Returns None if RQ is not available.
-    """
-    global _redis_conn
-    
-    if not _RQ_AVAILABLE:
-        return None
-    
-    try:
-        from app.core.config import settings
-        
-        redis_url = getattr(settings, 'redis_url', 'redis://localhost:6379/0')
-        
-        if _redis_conn is None:
-            _redis_conn = Redis.from_url(redis_url)
-            # Test connection
-            _redis_conn.ping()
-        
-        return Queue(connection=_redis_conn)
-        
-    except Exception as e:
-        logger.warning(f"Redis queue unavailable: {e}")
-        return None
+async def get_queue() -> JobQueueBackend:
+    """Get the configured job queue backend."""
+    return await get_backend()
 
 
 async def enqueue(
     job: AbstractJob,
     session: AsyncSession,
     delay_seconds: int = 0,
+    queue: Optional[str] = None,
 ) -> dict:
     """
     Enqueue a job for background execution.
     
-    If Redis is unavailable, runs synchronously as fallback.
+    With the Postgres backend the job is written in the caller's session
+    and the session is committed, so the job never runs before the data
+    it refers to is visible. Enqueueing a job_key that is already queued
+    or running returns the existing entry's status ("duplicate").
     
     Args:
         job: Job instance to execute
-        session: Database session
+        session: Database session (committed)
         delay_seconds: Optional delay before execution
+        queue: Lane override (defaults to the job policy's lane)
         
     Returns:
-        Dict with job_id, status, and execution mode
+        Dict with job_key, status, and execution mode
     """
     job_key = job.get_job_key()
     job_type = job.job_type.value if job.job_type else "unknown"
@@ -93,92 +65,50 @@ async def enqueue(
             "reason": "unauthorized_job_type",
         }
     
-    # Try to enqueue to Redis
-    queue = await get_queue()
+    lane = queue or job.policy.queue
+    run_at = datetime.now(timezone.utc) + timedelta(seconds=max(delay_seconds, 0))
     
-    if queue is not None:
-        try:
-            # RQ available - enqueue for async execution
-            rq_job = queue.enqueue(
-                _execute_job_sync,
-                job.__class__.__name__,
-                job.tenant_id,
-                job._get_serializable_params(),  # Must implement in job
-                job_id=job_key,
-                job_timeout=job.policy.timeout_seconds,
-                retry=job.policy.max_retries,
-            )
-            
-            logger.info(f"Job enqueued: {job_key} (RQ job ID: {rq_job.id})")
-            
-            return {
-                "job_key": job_key,
-                "job_type": job_type,
-                "status": JobStatus.QUEUED.value,
-                "execution_mode": "async",
-                "rq_job_id": rq_job.id,
-            }
-            
-        except Exception as e:
-            logger.warning(f"Failed to enqueue job: {e} - falling back to sync")
-    
-    # Fallback: Run synchronously
-    logger.info(f"Running job synchronously: {job_key}")
+    backend = await get_backend()
+    queue_id = await backend.enqueue(session, {
+        "tenant_id": job.tenant_id,
+        "job_class": type(job).__name__,
+        "job_key": job_key,
+        "job_type": job_type,
+        "params": job._get_serializable_params(),
+        "queue": lane,
+        "priority": QUEUE_PRIORITIES.get(lane, 100),
+        "run_at": run_at,
+        "max_attempts": job.policy.max_retries + 1,
+        "actor_user_id": job._actor_user_id,
+        "request_id": job._request_id,
+    })
+    await session.commit()
     
-    try:
-        result = await job.run(session)
-        
-        status = JobStatus.COMPLETED.value
-        if isinstance(result, dict) and result.get("error"):
-            status = JobStatus.FAILED.value
-        
-        return {
-            "job_key": job_key,
-            "job_type": job_type,
-            "status": status,
-            "execution_mode": "sync",
-            "result": result,
-        }
-        
-    except Exception as e:
-        logger.error(f"Sync job execution failed: {e}")
-        
+    if queue_id is None:
+        logger.info(f"Job already queued: {job_key}")
         return {
             "job_key": job_key,
             "job_type": job_type,
-            "status": JobStatus.FAILED.value,
-            "execution_mode": "sync",
-            "error": str(e),
+            "status": "duplicate",
+            "execution_mode": "async",
         }
-
-
-def _execute_job_sync(
-    job_class_name: str,
-    tenant_id: UUID,
-    params: dict,
-) -> dict:
-    """
-    Sync wrapper for RQ worker.
-    
-    This function is called by RQ worker in a separate process.
-    """
-    import asyncio
-    from app.common.database import get_session
     
-    # Get job class from registry
-    job_class = get_job_class(job_class_name)
-    if not job_class:
-        return {"error": f"Unknown job class: {job_class_name}"}
+    logger.info(f"Job enqueued: {job_key} ({backend.name}:{lane}, id {queue_id})")
     
-    # Create job instance
-    job = job_class(tenant_id=tenant_id, **params)
+    # A local runner picks it up without waiting for its next poll
+    if delay_seconds <= 0:
+        from app.core.jobs.runner import get_runner
+        get_runner().wake()
     
-    # Run in async context
-    async def run_job():
-        async with get_session() as session:
-            return await job.run(session)
-    
-    return asyncio.run(run_job())
+    return {
+        "job_key": job_key,
+        "job_type": job_type,
+        "status": JobStatus.QUEUED.value,
+        "execution_mode": "async",
+        "queue": lane,
+        "queue_id": queue_id,
+        "run_at": run_at.isoformat(),
+    }
 
 
 async def get_job_status(job_key: str, tenant_id: UUID, session: AsyncSession) -> dict:
@@ -193,10 +123,15 @@ async def get_job_status(job_key: str, tenant_id: UUID, session: AsyncSession) -
         JobExecution.tenant_id == tenant_id,
     ).order_by(JobExecution.created_at.desc())
     
-    result = await session.execute(query)
+    result = await session.execute(query.limit(1))
     execution = result.scalar_one_or_none()
     
     if not execution:
+        # Not started yet: report the queue entry
+        backend = await get_backend()
+        entry = await backend.get_entry(session, tenant_id, job_key)
+        if entry:
+            return {"job_key": job_key, **entry}
         return {"job_key": job_key, "status": "not_found"}
     
     return {
@@ -218,9 +153,12 @@ async def cancel_job(job_key: str, tenant_id: UUID, session: AsyncSession) -> bo
     
     Cannot cancel jobs that are already processing or completed.
     """
-    from sqlalchemy import select, update
+    from sqlalchemy import update
     from app.core.jobs.models import JobExecution
     
+    backend = await get_backend()
+    dequeued = await backend.cancel(session, tenant_id, job_key)
+    
     # Find pending jobs
     query = update(JobExecution).where(
         JobExecution.job_key == job_key,
@@ -234,7 +172,7 @@ async def cancel_job(job_key: str, tenant_id: UUID, session: AsyncSession) -> bo
     result = await session.execute(query)
     await session.commit()
     
-    if result.rowcount > 0:
+    if dequeued or result.rowcount > 0:
         logger.info(f"Job cancelled: {job_key}")
         return True
     
@@ -164,6 +164,7 @@ JOB_CATEGORIES = {
     JobCategory.ANALYTICS: [
         "AnalyticsSnapshotJob",
         "AnalyticsAggregateJob",
+        "AttendanceRollupBackfillJob",
     ],
     JobCategory.PAYROLL: [
         "PayrollProcessJob",
@@ -171,6 +172,7 @@ JOB_CATEGORIES = {
     ],
     JobCategory.EXPORT: [
         "ExportInspectionJob",
+        "InspectionExportJob",
         "ExportReportJob",
         "ExportAnalyticsJob",
     ],
@@ -0,0 +1,316 @@
+"""
+CUSTOS Job Runner
+
+Asyncio worker that executes queued AbstractJobs.
+
+- Runs up to `concurrency` jobs at once as coroutines on one event loop
+- Claims from the lanes in TaskQueues priority order (QUEUE_PRIORITIES);
+  delayed jobs are claimed once their run_at has passed
+- Renews the lease of every running job each HEARTBEAT_INTERVAL_SECONDS;
+  a job whose worker dies is claimed again once its lease
+  (VISIBILITY_TIMEOUT_SECONDS) runs out, up to its max_attempts
+- On shutdown, waits SHUTDOWN_GRACE_SECONDS for running jobs, then
+  returns the unfinished ones to the queue
+- Runs registered periodic tasks (register_periodic) on their interval;
+  these are system-wide maintenance, not tenant jobs, and must be safe to
+  run on several workers at once
+
+Retries on job errors stay inside AbstractJob.run (its policy); queue
+attempts only count claims, i.e. crashes and lost leases.
+
+The web app runs one runner per process (settings.job_runner_enabled).
+A dedicated worker process:
+
+    python -m app.core.jobs.runner
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from app.core.jobs.backends import ClaimedJob, JobQueueBackend, active_backends
+from app.core.jobs.policies import QUEUE_PRIORITIES
+from app.core.jobs.registry import get_job_class
+
+logger = logging.getLogger(__name__)
+
+
+# Modules defining registered jobs (registration happens on import)
+JOB_MODULES = (
+    "app.governance.jobs",
+    "app.attendance.jobs",
+    "app.core.jobs.examples",
+    "app.ai.jobs",
+)
+
+
+# name -> (interval seconds, coroutine function)
+_PERIODIC_TASKS: Dict[str, Tuple[float, Callable[[], Awaitable[None]]]] = {}
+
+
+def register_periodic(name: str, interval_seconds: float):
+    """Decorator: run a coroutine function every interval_seconds on each runner."""
+    def decorator(func: Callable[[], Awaitable[None]]):
+        _PERIODIC_TASKS[name] = (interval_seconds, func)
+        return func
+    return decorator
+
+
+def _import_job_modules() -> None:
+    import importlib
+
+    for module in JOB_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.error(f"Could not load job module {module}: {e}")
+
+
+class JobRunner:
+    """Claims jobs from the queue backends and runs them."""
+
+    POLL_INTERVAL_SECONDS = 1.0
+    VISIBILITY_TIMEOUT_SECONDS = 60
+    HEARTBEAT_INTERVAL_SECONDS = 15
+    SHUTDOWN_GRACE_SECONDS = 30
+    PERIODIC_CHECK_SECONDS = 60
+
+    def __init__(self, concurrency: int = 4, queues: Optional[Sequence[str]] = None):
+        self.concurrency = max(1, concurrency)
+        self.queues = sorted(queues or QUEUE_PRIORITIES, key=lambda q: QUEUE_PRIORITIES.get(q, 100))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+
+        self._running: Dict[str, Tuple[asyncio.Task, JobQueueBackend]] = {}
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._periodic_last_run: Dict[str, float] = {}
+
+    # ============================================
+    # Lifecycle
+    # ============================================
+
+    def start(self) -> None:
+        """Start claiming on the running event loop (idempotent)."""
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        _import_job_modules()
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            loop.create_task(self._claim_loop()),
+            loop.create_task(self._heartbeat_loop()),
+            loop.create_task(self._periodic_loop()),
+        ]
+        logger.info(f"Job runner {self.worker_id} started ({self.concurrency} slots)")
+
+    def wake(self) -> None:
+        """Claim now instead of at the next poll (e.g. after a local enqueue)."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop claiming, let running jobs finish briefly, requeue the rest."""
+        self._stopping = True
+        if self._tasks:
+            # Let an in-flight claim finish so its jobs are started, not stranded
+            self.wake()
+            await asyncio.gather(self._tasks[0], return_exceptions=True)
+
+        if self._running:
+            tasks = [task for task, _ in self._running.values()]
+            _, pending = await asyncio.wait(tasks, timeout=self.SHUTDOWN_GRACE_SECONDS)
+            for task in pending:
+                task.cancel()  # _execute requeues on cancellation
+            if pending:
+                await asyncio.wait(pending)
+
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    # ============================================
+    # Claiming
+    # ============================================
+
+    async def _claim_loop(self) -> None:
+        while not self._stopping:
+            claimed = 0
+            free = self.concurrency - len(self._running)
+            if free > 0:
+                claimed = await self._claim(free)
+
+            if free <= 0 or claimed < free:
+                # Idle or full: wait for a poll, a local enqueue or a free slot
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _claim(self, free: int) -> int:
+        claimed = 0
+        try:
+            for backend in await active_backends():
+                if claimed >= free:
+                    break
+                jobs = await backend.claim(
+                    self.queues, free - claimed, self.worker_id, self.VISIBILITY_TIMEOUT_SECONDS,
+                )
+                for job in jobs:
+                    self._spawn(job, backend)
+                claimed += len(jobs)
+        except Exception as e:
+            logger.warning(f"Job claim failed: {e}")
+        return claimed
+
+    def _spawn(self, job: ClaimedJob, backend: JobQueueBackend) -> None:
+        task = asyncio.get_running_loop().create_task(self._execute(job, backend))
+        self._running[job.id] = (task, backend)
+
+        def _done(_task: asyncio.Task) -> None:
+            self._running.pop(job.id, None)
+            self.wake()  # A slot is free
+
+        task.add_done_callback(_done)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL_SECONDS)
+            by_backend: Dict[JobQueueBackend, list] = {}
+            for job_id, (_, backend) in list(self._running.items()):
+                by_backend.setdefault(backend, []).append(job_id)
+            for backend, job_ids in by_backend.items():
+                try:
+                    await backend.heartbeat(job_ids, self.worker_id, self.VISIBILITY_TIMEOUT_SECONDS)
+                except Exception as e:
+                    logger.warning(f"Job heartbeat failed: {e}")
+
+    # ============================================
+    # Periodic tasks
+    # ============================================
+
+    async def _periodic_loop(self) -> None:
+        while True:
+            await self._run_due_periodic()
+            await asyncio.sleep(self.PERIODIC_CHECK_SECONDS)
+
+    async def _run_due_periodic(self, now: Optional[float] = None) -> None:
+        """Run each periodic task whose interval has passed (first check: not yet due)."""
+        now = time.monotonic() if now is None else now
+        for name, (interval, func) in list(_PERIODIC_TASKS.items()):
+            last = self._periodic_last_run.setdefault(name, now)
+            if now - last < interval:
+                continue
+            self._periodic_last_run[name] = now
+            try:
+                await func()
+            except Exception as e:
+                logger.error(f"Periodic task {name} failed: {e}")
+
+    # ============================================
+    # Execution
+    # ============================================
+
+    async def _execute(self, claimed: ClaimedJob, backend: JobQueueBackend) -> None:
+        from app.core.database import AsyncSessionLocal
+
+        if claimed.attempts > claimed.max_attempts:
+            await self._finish(
+                claimed, backend,
+                f"Abandoned after {claimed.max_attempts} attempts (lease expired)",
+            )
+            return
+
+        job_class = get_job_class(claimed.job_class)
+        if job_class is None:
+            await self._finish(claimed, backend, f"Unknown job class: {claimed.job_class}")
+            return
+
+        try:
+            job = job_class(tenant_id=claimed.tenant_id, **claimed.params)
+            job.set_context(actor_user_id=claimed.actor_user_id, request_id=claimed.request_id)
+            async with AsyncSessionLocal() as session:
+                result = await job.run(session)
+        except asyncio.CancelledError:
+            # Shutdown: another worker picks it up
+            await asyncio.shield(self._release(claimed, backend))
+            raise
+        except Exception as e:
+            logger.exception(f"Job {claimed.job_key} crashed: {e}")
+            await self._finish(claimed, backend, str(e))
+            return
+
+        error = result.get("error") if isinstance(result, dict) else None
+        await self._finish(claimed, backend, error)
+
+    async def _finish(self, claimed: ClaimedJob, backend: JobQueueBackend, error: Optional[str]) -> None:
+        try:
+            await backend.complete(claimed.id, self.worker_id, error)
+        except Exception as e:
+            # The lease expires and the job is claimed again (idempotent)
+            logger.error(f"Could not complete job {claimed.job_key}: {e}")
+
+    async def _release(self, claimed: ClaimedJob, backend: JobQueueBackend) -> None:
+        try:
+            await backend.release(claimed.id, self.worker_id)
+        except Exception as e:
+            logger.error(f"Could not requeue job {claimed.job_key}: {e}")
+
+
+# ============================================
+# Global runner
+# ============================================
+
+_runner: Optional[JobRunner] = None
+
+
+def get_runner() -> JobRunner:
+    """Get the process's job runner."""
+    global _runner
+    if _runner is None:
+        from app.core.config import settings
+
+        queues = [q.strip() for q in settings.job_runner_queues.split(",") if q.strip()]
+        _runner = JobRunner(settings.job_runner_concurrency, queues or None)
+    return _runner
+
+
+async def run_worker() -> None:
+    """Run a standalone worker until interrupted."""
+    import signal
+
+    from app.core.database import close_db
+
+    runner = get_runner()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    runner.start()
+    await stop.wait()
+    await runner.stop()
+    await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
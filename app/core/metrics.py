@@ -43,6 +43,26 @@ database_query_duration_seconds = Histogram(
     ["operation", "table"]
 )
 
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+)
+
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Total SQL execution time per HTTP request in seconds",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+db_n_plus_one_total = Counter(
+    "db_n_plus_one_total",
+    "Requests where one statement fingerprint ran more than the N+1 threshold",
+    ["route"]
+)
+
 cache_hits_total = Counter(
     "cache_hits_total",
     "Total cache hits",
@@ -73,9 +93,37 @@ ai_request_duration_seconds = Histogram(
     ["provider", "model"]
 )
 
+audit_queue_depth = Gauge(
+    "audit_queue_depth",
+    "Audit events waiting to be written"
+)
+
+audit_flush_duration_seconds = Histogram(
+    "audit_flush_duration_seconds",
+    "Audit batch flush duration in seconds",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+audit_events_written_total = Counter(
+    "audit_events_written_total",
+    "Audit events written to the database",
+    ["mode"]
+)
+
+audit_events_spilled_total = Counter(
+    "audit_events_spilled_total",
+    "Audit events written to the local spill file on queue overflow or flush failure"
+)
+
 
 class MetricsRoute(APIRoute):
-    """Custom route class that tracks metrics."""
+    """
+    Custom route class that tracks metrics.
+    
+    The main app records the same request metrics app-wide, per route
+    template, in QueryStatsMiddleware; use this only for routers mounted
+    outside it.
+    """
     
     def get_route_handler(self) -> Callable:
         original_route_handler = super().get_route_handler()
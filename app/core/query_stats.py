@@ -0,0 +1,165 @@
+"""
+CUSTOS Query Stats
+
+SQL instrumentation through SQLAlchemy engine events.
+
+Every statement executed on the engine is timed (before/after cursor
+execute) and:
+- counted in database_queries_total / database_query_duration_seconds
+  by operation and table
+- added to the current request's QueryStats (a contextvar set by
+  QueryStatsMiddleware), keyed by a normalized statement fingerprint
+
+Fingerprints replace literals and bind parameters and collapse IN lists,
+so "SELECT ... WHERE id = $1" run once per row of a list shows up as one
+fingerprint with a high count: the N+1 pattern.
+
+USAGE:
+
+    from app.core.query_stats import get_query_stats
+
+    stats = get_query_stats()
+    if stats:
+        print(stats.count, stats.total_seconds)
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import database_queries_total, database_query_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+
+# Fingerprints longer than this are truncated (keeps logs readable)
+MAX_FINGERPRINT_LENGTH = 500
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PARAMS = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.I)
+_VALUES_LISTS = re.compile(r"\bVALUES\s*(?:\((?:[^()]|\([^()]*\))*\)\s*,?\s*)+", re.I)
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?([A-Za-z_][\w.]*)\"?", re.I)
+
+
+@lru_cache(maxsize=2048)
+def _analyze(statement: str) -> Tuple[str, str, str]:
+    """(fingerprint, operation, table) for a SQL statement."""
+    sql = _COMMENTS.sub(" ", statement)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (?)", sql)
+    sql = _VALUES_LISTS.sub("VALUES (?) ", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+
+    operation = sql.split(" ", 1)[0].upper() if sql else "UNKNOWN"
+    match = _TABLE.search(sql)
+    table = match.group(1).lower() if match else "-"
+    return sql[:MAX_FINGERPRINT_LENGTH], operation, table
+
+
+def fingerprint(statement: str) -> str:
+    """Normalized statement: literals and parameters replaced by '?'."""
+    return _analyze(statement)[0]
+
+
+@dataclass
+class QueryStats:
+    """Queries executed while handling one request (or job)."""
+    count: int = 0
+    total_seconds: float = 0.0
+    by_fingerprint: Counter = field(default_factory=Counter)
+    seconds_by_fingerprint: Dict[str, float] = field(default_factory=dict)
+
+    def record(self, statement_fingerprint: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.by_fingerprint[statement_fingerprint] += 1
+        self.seconds_by_fingerprint[statement_fingerprint] = (
+            self.seconds_by_fingerprint.get(statement_fingerprint, 0.0) + seconds
+        )
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints run more than threshold times (N+1 suspects), most first."""
+        return [
+            (fp, count)
+            for fp, count in self.by_fingerprint.most_common()
+            if count > threshold
+        ]
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Stats of the current request, or None outside a tracked request."""
+    return _query_stats.get()
+
+
+def start_query_stats() -> QueryStats:
+    """
+    Begin tracking queries in the current context.
+
+    The same QueryStats object is shared with tasks spawned afterwards
+    (they copy the context), so callers read it after awaiting them.
+    """
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+
+# ============================================
+# Engine hooks
+# ============================================
+
+_START_KEY = "query_stats_start"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    statement_fingerprint, operation, table = _analyze(statement)
+    database_queries_total.labels(operation=operation, table=table).inc()
+    database_query_duration_seconds.labels(operation=operation, table=table).observe(elapsed)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement_fingerprint, elapsed)
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get(_START_KEY)
+        if starts:
+            starts.pop()
+
+
+def install_query_hooks(engine: AsyncEngine) -> None:
+    """Attach the timing hooks to an engine (idempotent)."""
+    target = engine.sync_engine
+    if event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target, "handle_error", _handle_error)
@@ -10,6 +10,7 @@ FEATURES:
 - Automatic degradation with fallback responses
 - Error budget tracking
 - Audit integration for state changes
+- Circuit state shared across workers via Redis (local-only fallback)
 
 USAGE:
 
@@ -72,6 +73,7 @@ from app.core.resilience.state import (
     CircuitStateManager,
     get_state_manager,
 )
+from app.core.resilience.shared import SharedCircuitState, SharedCircuitStore
 
 # Circuit Breaker
 from app.core.resilience.circuit import (
@@ -104,6 +106,8 @@ __all__ = [
     "FeatureState",
     "CircuitStateManager",
     "get_state_manager",
+    "SharedCircuitState",
+    "SharedCircuitStore",
     # Circuit
     "CircuitBreaker",
     "CircuitOpenError",
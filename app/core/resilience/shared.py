@@ -0,0 +1,215 @@
+"""
+CUSTOS Shared Circuit State
+
+Redis-backed circuit state shared by every worker and node.
+
+Without it each worker discovers an outage on its own and sends its own
+failure_threshold failing calls before its circuit opens. With it,
+failures are counted cluster-wide and an OPEN circuit is seen by all
+workers within STATE_TTL_SECONDS.
+
+STORAGE (per feature):
+- circuit:{feature}                   hash: state, opened_at, half_open_at,
+                                      closed_at, half_open_successes
+- circuit:{feature}:fail:{bucket}     failure counter per fixed time bucket
+
+Failures are counted in BUCKETS_PER_WINDOW fixed buckets covering the
+policy window, so counting is O(buckets) and needs no cleanup (keys
+expire). All transitions run in Lua scripts, so concurrent workers cannot
+race each other: the policy thresholds (policies.py) are applied in Redis.
+
+The circuit state manager keeps deciding synchronously from its local
+state; calls here run as background tasks and their results are adopted
+into the local state. If Redis is unavailable everything stays local.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from app.core.resilience.policies import CircuitState, Feature, get_policy
+
+logger = logging.getLogger(__name__)
+
+
+# Local copy of the shared state is refreshed at most this often
+STATE_TTL_SECONDS = 1.0
+
+# Fixed buckets covering a policy's failure window
+BUCKETS_PER_WINDOW = 10
+
+_KEY_PREFIX = "circuit"
+
+
+# KEYS: state hash, failure buckets (current first)
+# ARGV: now, threshold, bucket ttl
+_RECORD_FAILURE = """
+local now = ARGV[1]
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+local failures = 0
+for i = 2, #KEYS do
+    failures = failures + tonumber(redis.call('GET', KEYS[i]) or '0')
+end
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'half_open' or (state == 'closed' and failures >= tonumber(ARGV[2])) then
+    state = 'open'
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', now, 'half_open_successes', 0)
+end
+return {state, redis.call('HGET', KEYS[1], 'opened_at') or '', failures, redis.call('HGET', KEYS[1], 'closed_at') or ''}
+"""
+
+# KEYS: state hash, failure buckets
+# ARGV: now, half_open_max_calls
+_RECORD_SUCCESS = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'half_open' then
+    local successes = redis.call('HINCRBY', KEYS[1], 'half_open_successes', 1)
+    if successes >= tonumber(ARGV[2]) then
+        state = 'closed'
+        redis.call('HSET', KEYS[1], 'state', 'closed', 'closed_at', ARGV[1], 'half_open_successes', 0)
+        for i = 2, #KEYS do
+            redis.call('DEL', KEYS[i])
+        end
+    end
+end
+return {state, redis.call('HGET', KEYS[1], 'opened_at') or '', 0, redis.call('HGET', KEYS[1], 'closed_at') or ''}
+"""
+
+# KEYS: state hash, failure buckets
+# ARGV: now, open_duration_seconds
+_GET_STATE = """
+local now = tonumber(ARGV[1])
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local opened_at = redis.call('HGET', KEYS[1], 'opened_at') or ''
+if state == 'open' and opened_at ~= '' and now > tonumber(opened_at) + tonumber(ARGV[2]) then
+    state = 'half_open'
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'half_open_at', ARGV[1], 'half_open_successes', 0)
+end
+local failures = 0
+for i = 2, #KEYS do
+    failures = failures + tonumber(redis.call('GET', KEYS[i]) or '0')
+end
+return {state, opened_at, failures, redis.call('HGET', KEYS[1], 'closed_at') or ''}
+"""
+
+# KEYS: state hash, failure buckets
+# ARGV: now, state
+_FORCE_STATE = """
+if ARGV[2] == 'open' then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', ARGV[1], 'half_open_successes', 0)
+else
+    redis.call('HSET', KEYS[1], 'state', 'closed', 'closed_at', ARGV[1], 'half_open_successes', 0)
+    for i = 2, #KEYS do
+        redis.call('DEL', KEYS[i])
+    end
+end
+return {ARGV[2], redis.call('HGET', KEYS[1], 'opened_at') or '', 0, redis.call('HGET', KEYS[1], 'closed_at') or ''}
+"""
+
+
+@dataclass
+class SharedCircuitState:
+    """Circuit state as stored in Redis."""
+    state: CircuitState
+    opened_at: Optional[float]
+    recent_failures: int
+    closed_at: Optional[float] = None
+
+
+class SharedCircuitStore:
+    """
+    Lua-scripted circuit transitions in Redis.
+
+    Every method returns None when Redis is unavailable; callers then
+    keep their local state. Never raises.
+    """
+
+    def __init__(self):
+        self._scripts: dict = {}
+        self._client: Optional[Any] = None
+
+    async def _script(self, name: str, source: str):
+        from app.core.cache import get_cache
+
+        cache = await get_cache()
+        if not cache.is_connected:
+            return None
+        if cache._client is not self._client:
+            # (Re)connected: scripts are bound to the client
+            self._client = cache._client
+            self._scripts = {}
+        if name not in self._scripts:
+            self._scripts[name] = self._client.register_script(source)
+        return self._scripts[name]
+
+    @staticmethod
+    def _bucket_seconds(feature: Feature) -> int:
+        return max(1, get_policy(feature).window_seconds // BUCKETS_PER_WINDOW)
+
+    def _keys(self, feature: Feature, now: float) -> List[str]:
+        """State hash key, then the window's failure buckets (current first)."""
+        bucket_seconds = self._bucket_seconds(feature)
+        current = int(now // bucket_seconds)
+        base = f"{_KEY_PREFIX}:{feature.value}"
+        return [base] + [
+            f"{base}:fail:{bucket}"
+            for bucket in range(current, current - BUCKETS_PER_WINDOW, -1)
+        ]
+
+    async def _call(
+        self,
+        name: str,
+        source: str,
+        feature: Feature,
+        *args: Any,
+    ) -> Optional[SharedCircuitState]:
+        try:
+            script = await self._script(name, source)
+            if script is None:
+                return None
+            now = time.time()
+            result = await script(keys=self._keys(feature, now), args=[now, *args])
+        except Exception as e:
+            logger.debug(f"Shared circuit {name} failed for {feature.value}: {e}")
+            return None
+
+        state, opened_at, failures, closed_at = result
+        return SharedCircuitState(
+            state=CircuitState(state),
+            opened_at=float(opened_at) if opened_at else None,
+            recent_failures=int(failures),
+            closed_at=float(closed_at) if closed_at else None,
+        )
+
+    async def record_failure(self, feature: Feature) -> Optional[SharedCircuitState]:
+        """Count a failure; opens the shared circuit past the threshold."""
+        policy = get_policy(feature)
+        bucket_ttl = policy.window_seconds + self._bucket_seconds(feature)
+        return await self._call(
+            "record_failure", _RECORD_FAILURE, feature,
+            policy.failure_threshold, bucket_ttl,
+        )
+
+    async def record_success(self, feature: Feature) -> Optional[SharedCircuitState]:
+        """Count a half-open success; closes the shared circuit after enough."""
+        return await self._call(
+            "record_success", _RECORD_SUCCESS, feature,
+            get_policy(feature).half_open_max_calls,
+        )
+
+    async def get_state(self, feature: Feature) -> Optional[SharedCircuitState]:
+        """Current shared state (moves OPEN to HALF_OPEN when due)."""
+        return await self._call(
+            "get_state", _GET_STATE, feature,
+            get_policy(feature).open_duration_seconds,
+        )
+
+    async def force_state(
+        self,
+        feature: Feature,
+        state: CircuitState,
+    ) -> Optional[SharedCircuitState]:
+        """Force OPEN or CLOSED cluster-wide."""
+        return await self._call("force_state", _FORCE_STATE, feature, state.value)
@@ -4,17 +4,29 @@ CUSTOS Circuit State Manager
 Tracks failure counts and circuit states per feature.
 
 STORAGE:
-- In-memory for speed (resets on restart)
-- Could be extended to Redis for multi-instance
+- In-memory for speed: every decision is made from local state
+- Shared across workers through Redis when available (shared.py):
+  failures and transitions are published in background tasks, and the
+  local state adopts the shared state at most every STATE_TTL_SECONDS.
+  Without Redis (or outside an event loop) the state is local-only.
 """
 
+import asyncio
 import logging
+import time
+from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional, List
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
 from dataclasses import dataclass, field
-from threading import Lock
+from threading import Lock, RLock
 
+from app.core.config import settings
 from app.core.resilience.policies import Feature, CircuitState, get_policy
+from app.core.resilience.shared import (
+    STATE_TTL_SECONDS,
+    SharedCircuitState,
+    SharedCircuitStore,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +52,7 @@ class FeatureState:
     """
     feature: Feature
     state: CircuitState = CircuitState.CLOSED
-    failures: List[FailureRecord] = field(default_factory=list)
+    failures: Deque[FailureRecord] = field(default_factory=deque)
     
     # State transitions
     opened_at: Optional[datetime] = None
@@ -57,13 +69,18 @@ class FeatureState:
     last_failure_at: Optional[datetime] = None
     last_success_at: Optional[datetime] = None
     
+    # Shared (Redis) state, as last seen
+    shared_state: Optional[CircuitState] = None
+    shared_synced_at: float = 0.0  # time.monotonic()
+    
     def get_recent_failures(self, window_seconds: int) -> int:
         """Count failures within the time window."""
         now = datetime.now(timezone.utc)
         cutoff = now - timedelta(seconds=window_seconds)
         
-        # Clean up old failures
-        self.failures = [f for f in self.failures if f.timestamp > cutoff]
+        # Failures are appended in time order: drop expired ones from the left
+        while self.failures and self.failures[0].timestamp <= cutoff:
+            self.failures.popleft()
         
         return len(self.failures)
 
@@ -74,6 +91,10 @@ class CircuitStateManager:
     
     Thread-safe singleton for tracking failure counts
     and circuit states across the application.
+    
+    With circuit_shared_state_enabled, failures and transitions are also
+    published to Redis and the shared state is adopted locally, so one
+    worker's outage detection opens the circuit on every worker.
     """
     
     _instance: Optional["CircuitStateManager"] = None
@@ -92,7 +113,9 @@ class CircuitStateManager:
             return
         
         self._states: Dict[Feature, FeatureState] = {}
-        self._state_lock = Lock()
+        self._state_lock = RLock()  # can_execute -> get_circuit_state re-enters
+        self._shared = SharedCircuitStore() if settings.circuit_shared_state_enabled else None
+        self._shared_tasks: Set[asyncio.Task] = set()
         self._initialized = True
         
         # Initialize states for all features
@@ -118,6 +141,10 @@ class CircuitStateManager:
             policy = get_policy(feature)
             now = datetime.now(timezone.utc)
             
+            if time.monotonic() - state.shared_synced_at > STATE_TTL_SECONDS:
+                state.shared_synced_at = time.monotonic()
+                self._sync_shared(feature, "get_state")
+            
             if state.state == CircuitState.OPEN:
                 # Check if open duration has passed
                 if state.opened_at:
@@ -138,6 +165,10 @@ class CircuitStateManager:
             state.total_successes += 1
             state.last_success_at = now
             
+            # Successes only matter to the shared state while it recovers
+            if CircuitState.HALF_OPEN in (state.state, state.shared_state):
+                self._sync_shared(feature, "record_success")
+            
             if state.state == CircuitState.HALF_OPEN:
                 state.half_open_successes += 1
                 
@@ -170,6 +201,8 @@ class CircuitStateManager:
             state.total_failures += 1
             state.last_failure_at = now
             
+            self._sync_shared(feature, "record_failure")
+            
             if state.state == CircuitState.HALF_OPEN:
                 # Any failure in HALF_OPEN reopens the circuit
                 self._transition_to_open(feature, reason="half_open_failure")
@@ -213,14 +246,16 @@ class CircuitStateManager:
         """Force a circuit to open (for manual intervention)."""
         with self._state_lock:
             self._transition_to_open(feature, reason=reason)
+            self._sync_shared(feature, "force_state", CircuitState.OPEN)
     
     def force_close(self, feature: Feature) -> None:
         """Force a circuit to close (for recovery)."""
         with self._state_lock:
             self._transition_to_closed(feature)
+            self._sync_shared(feature, "force_state", CircuitState.CLOSED)
     
     def reset(self, feature: Feature) -> None:
-        """Reset all state for a feature."""
+        """Reset all local state for a feature (shared state is kept)."""
         with self._state_lock:
             self._states[feature] = FeatureState(feature=feature)
     
@@ -269,7 +304,7 @@ class CircuitStateManager:
         
         state.state = CircuitState.CLOSED
         state.closed_at = datetime.now(timezone.utc)
-        state.failures = []  # Clear failures on close
+        state.failures = deque()  # Clear failures on close
         state.half_open_calls = 0
         state.half_open_successes = 0
         
@@ -277,6 +312,66 @@ class CircuitStateManager:
         
         self._schedule_audit_log(feature, old_state, CircuitState.CLOSED, "recovered")
     
+    # ============================================
+    # Shared state (Redis)
+    # ============================================
+    
+    def _sync_shared(self, feature: Feature, method: str, *args) -> None:
+        """Run a SharedCircuitStore method in the background and adopt its result."""
+        if self._shared is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (scripts, threads): local-only
+        
+        call = getattr(self._shared, method)
+        task = loop.create_task(self._run_shared(feature, call, *args))
+        self._shared_tasks.add(task)
+        task.add_done_callback(self._shared_tasks.discard)
+    
+    async def _run_shared(
+        self,
+        feature: Feature,
+        call: Callable[..., Awaitable[Optional[SharedCircuitState]]],
+        *args,
+    ) -> None:
+        shared = await call(feature, *args)
+        if shared is not None:
+            self._adopt_shared(feature, shared)
+    
+    def _adopt_shared(self, feature: Feature, shared: SharedCircuitState) -> None:
+        """
+        Move the local circuit to the shared state when the shared
+        transition is newer than the local one (results may arrive late).
+        """
+        with self._state_lock:
+            state = self.get_state(feature)
+            state.shared_state = shared.state
+            state.shared_synced_at = time.monotonic()
+            
+            def ts(value: Optional[datetime]) -> float:
+                return value.timestamp() if value else 0.0
+            
+            opened_at = shared.opened_at or 0.0
+            if shared.state == CircuitState.OPEN:
+                newer = (
+                    (state.state == CircuitState.CLOSED and opened_at > ts(state.closed_at))
+                    or (state.state == CircuitState.HALF_OPEN and opened_at > ts(state.half_open_at))
+                )
+                if newer:
+                    self._transition_to_open(feature, reason="shared_state")
+                    state.opened_at = datetime.fromtimestamp(opened_at, timezone.utc)
+            
+            elif shared.state == CircuitState.HALF_OPEN:
+                if state.state == CircuitState.CLOSED and opened_at > ts(state.closed_at):
+                    state.opened_at = datetime.fromtimestamp(opened_at, timezone.utc)
+                    self._transition_to_half_open(feature)
+            
+            elif state.state != CircuitState.CLOSED:
+                if (shared.closed_at or 0.0) > ts(state.opened_at):
+                    self._transition_to_closed(feature)
+    
     def _schedule_audit_log(
         self,
         feature: Feature,
@@ -14,6 +14,7 @@ from rq import Queue, Worker
 from rq.job import Job
 
 from app.core.config import settings
+from app.core.jobs.policies import TaskQueues  # Lanes shared with the job runner
 
 logger = logging.getLogger("custos.tasks")
 
@@ -25,15 +26,6 @@ def get_redis_connection() -> Redis:
     return Redis.from_url(redis_url)
 
 
-# Task queues with different priorities
-class TaskQueues:
-    """Named queues for different task types."""
-    HIGH = "custos_high"      # Critical operations
-    DEFAULT = "custos"        # Normal AI operations  
-    LOW = "custos_low"        # Bulk/batch operations
-    AI_BATCH = "custos_ai"    # Large AI batches only
-
-
 # Queue instances (lazy loaded)
 _queues: dict[str, Queue] = {}
 
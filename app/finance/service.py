@@ -37,6 +37,7 @@ from app.finance.schemas import (
     DuesReport,
     ClassFeesSummary,
 )
+from app.parents.dashboard import invalidate_family_dashboards
 
 
 class FeeService:
@@ -266,6 +267,7 @@ class FeeService:
         enrollments = result.scalars().all()
         
         accounts_created = 0
+        new_students = []
         
         for enrollment in enrollments:
             # Check if account exists
@@ -292,8 +294,10 @@ class FeeService:
             )
             self.session.add(account)
             accounts_created += 1
+            new_students.append(enrollment.student_id)
         
         await self.session.flush()
+        await invalidate_family_dashboards(self.session, self.tenant_id, new_students)
         return accounts_created
     
     async def get_student_account(
@@ -351,6 +355,7 @@ class FeeService:
         account.has_overdue = overdue_count > 0
         
         await self.session.flush()
+        await invalidate_family_dashboards(self.session, self.tenant_id, [account.student_id])
         return account
     
     async def _get_account_by_id(
@@ -392,6 +397,7 @@ class FeeService:
         
         generated = 0
         invoice_ids = []
+        invoiced_students = []
         errors = []
         
         for account in accounts:
@@ -457,12 +463,14 @@ class FeeService:
                 await self.session.flush()
                 
                 invoice_ids.append(invoice.id)
+                invoiced_students.append(account.student_id)
                 generated += 1
                 
             except Exception as e:
                 errors.append(str(e))
         
         await self.session.flush()
+        await invalidate_family_dashboards(self.session, self.tenant_id, invoiced_students)
         return generated, invoice_ids, errors
     
     async def _get_invoice_for_installment(
@@ -546,6 +554,9 @@ class FeeService:
             invoice.status = InvoiceStatus.OVERDUE
         
         await self.session.flush()
+        await invalidate_family_dashboards(
+            self.session, self.tenant_id, [invoice.student_id for invoice in invoices],
+        )
         return len(invoices)
     
     # ============================================
@@ -13,6 +13,7 @@ CORE PRINCIPLES:
 from app.governance.models import (
     AuditLog,
     DataAccessLog,
+    GovernancePartitionStat,
     ConsentRecord,
     InspectionExport,
     ActionType,
@@ -30,6 +31,7 @@ __all__ = [
     # Models
     "AuditLog",
     "DataAccessLog",
+    "GovernancePartitionStat",
     "ConsentRecord",
     "InspectionExport",
     # Enums
@@ -0,0 +1,462 @@
+"""
+CUSTOS Inspection Export Engine
+
+Streams inspection exports to disk with bounded memory.
+
+Each scope is a list of sections (one table each). Every section is read
+through a server-side cursor (yield_per) as plain column rows, written in
+chunks and hashed as it is written, so memory stays flat regardless of
+tenant size and the file is never re-read for its checksum.
+
+FORMATS:
+- jsonl: one JSON object per line. A metadata line first, then
+  {"_section": <name>, ...columns} per row, then a summary line.
+- csv: a zip archive with one <section>.csv per section and a
+  manifest.json (metadata + per-section row counts). The zip is streamed
+  (data descriptors), so it is hashed in the same single pass.
+
+PROGRESS:
+rows_exported / rows_total / progress_updated_at on InspectionExport are
+updated from a separate session every PROGRESS_INTERVAL_SECONDS, so they
+can be polled while the export transaction streams.
+
+USAGE:
+
+    engine = InspectionExportEngine(session, tenant_id)
+    result = await engine.run(export)
+"""
+
+import asyncio
+import csv
+import hashlib
+import importlib
+import io
+import json
+import os
+import time
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timezone
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Date, DateTime, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.governance.models import InspectionExport, InspectionScope
+
+
+# Declared format -> file extension
+EXPORT_FORMATS = {
+    "jsonl": "jsonl",
+    "csv": "csv.zip",
+}
+
+# Formats accepted from older clients
+FORMAT_ALIASES = {"json": "jsonl"}
+
+
+def normalize_export_format(file_format: Optional[str]) -> str:
+    """Map a requested file format to a supported one."""
+    value = (file_format or "jsonl").lower()
+    value = FORMAT_ALIASES.get(value, value)
+    if value not in EXPORT_FORMATS:
+        raise ValidationError(
+            f"Unsupported export format: {file_format}. "
+            f"Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return value
+
+
+# ============================================
+# Sections
+# ============================================
+
+@dataclass(frozen=True)
+class ExportSection:
+    """
+    One exported table.
+
+    date_column limits rows to the export's date range; reference data
+    (classes, routes, ...) has none and is exported whole.
+    """
+    name: str
+    model_path: str  # "module.path:ClassName"
+    date_column: Optional[str] = None
+    exclude: Tuple[str, ...] = ()
+
+    @property
+    def model(self):
+        module, _, class_name = self.model_path.partition(":")
+        return getattr(importlib.import_module(module), class_name)
+
+
+ACADEMIC_SECTIONS = (
+    ExportSection("students", "app.users.models:StudentProfile"),
+    ExportSection("classes", "app.academics.models:Class"),
+    ExportSection("sections", "app.academics.models:Section"),
+    ExportSection("subjects", "app.academics.models:Subject"),
+    ExportSection("exam_results", "app.examinations.models:ExamResult", "created_at"),
+)
+
+FINANCE_SECTIONS = (
+    ExportSection("fee_structures", "app.finance.models:FeeStructure"),
+    ExportSection("fee_invoices", "app.finance.models:FeeInvoice", "invoice_date"),
+    ExportSection("fee_payments", "app.finance.models:FeePayment", "payment_date"),
+    ExportSection("fee_receipts", "app.finance.models:FeeReceipt", "generated_at"),
+)
+
+HR_SECTIONS = (
+    ExportSection(
+        "employees", "app.hr.models:Employee",
+        exclude=("bank_account_number", "bank_ifsc"),
+    ),
+    ExportSection("payroll_runs", "app.hr.models:PayrollRun", "created_at"),
+    ExportSection("salary_slips", "app.hr.models:SalarySlip", "generated_at"),
+    ExportSection("leave_applications", "app.hr.models:LeaveApplication", "from_date"),
+)
+
+TRANSPORT_SECTIONS = (
+    ExportSection("vehicles", "app.transport.models:Vehicle"),
+    ExportSection("drivers", "app.transport.models:Driver"),
+    ExportSection("routes", "app.transport.models:Route"),
+    ExportSection("route_stops", "app.transport.models:RouteStop"),
+    ExportSection("transport_assignments", "app.transport.models:StudentTransport"),
+)
+
+HOSTEL_SECTIONS = (
+    ExportSection("hostels", "app.hostel.models:Hostel"),
+    ExportSection("hostel_rooms", "app.hostel.models:HostelRoom"),
+    ExportSection("hostel_beds", "app.hostel.models:Bed"),
+    ExportSection("hostel_assignments", "app.hostel.models:StudentHostelAssignment"),
+)
+
+ATTENDANCE_SECTIONS = (
+    ExportSection("student_attendance", "app.attendance.models:StudentAttendance", "attendance_date"),
+    ExportSection("teacher_attendance", "app.attendance.models:TeacherAttendance", "attendance_date"),
+    ExportSection("leave_requests", "app.attendance.models:LeaveRequest", "start_date"),
+)
+
+AUDIT_SECTIONS = (
+    ExportSection("audit_logs", "app.governance.models:AuditLog", "timestamp"),
+    ExportSection("data_access_logs", "app.governance.models:DataAccessLog", "timestamp"),
+)
+
+SCOPE_SECTIONS: Dict[InspectionScope, Tuple[ExportSection, ...]] = {
+    InspectionScope.ACADEMIC: ACADEMIC_SECTIONS,
+    InspectionScope.FINANCE: FINANCE_SECTIONS,
+    InspectionScope.HR: HR_SECTIONS,
+    InspectionScope.TRANSPORT: TRANSPORT_SECTIONS,
+    InspectionScope.HOSTEL: HOSTEL_SECTIONS,
+    InspectionScope.ATTENDANCE: ATTENDANCE_SECTIONS,
+    InspectionScope.FULL: (
+        ACADEMIC_SECTIONS + FINANCE_SECTIONS + HR_SECTIONS + TRANSPORT_SECTIONS
+        + HOSTEL_SECTIONS + ATTENDANCE_SECTIONS + AUDIT_SECTIONS
+    ),
+}
+
+
+def sections_for(
+    scope: InspectionScope,
+    filters_json: Optional[dict] = None,
+) -> List[ExportSection]:
+    """Sections for a scope, optionally narrowed by filters_json["sections"]."""
+    sections = list(SCOPE_SECTIONS[scope])
+    wanted = (filters_json or {}).get("sections")
+    if wanted:
+        unknown = set(wanted) - {s.name for s in sections}
+        if unknown:
+            raise ValidationError(
+                f"Unknown sections for {scope.value} export: {', '.join(sorted(unknown))}"
+            )
+        sections = [s for s in sections if s.name in wanted]
+    return sections
+
+
+# ============================================
+# Output formats
+# ============================================
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return _json_default(value)
+
+
+class _HashingWriter:
+    """
+    Write-only binary stream that hashes and counts what passes through.
+
+    Deliberately not seekable, so zipfile streams entries with data
+    descriptors instead of seeking back to patch headers.
+    """
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._file.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+
+class _JsonlFormat:
+    def __init__(self, out: _HashingWriter):
+        self.out = out
+        self.section: Optional[str] = None
+
+    def begin(self, metadata: dict) -> None:
+        self._line({"_type": "export_metadata", **metadata})
+
+    def begin_section(self, section: str, columns: List[str]) -> None:
+        self.section = section
+
+    def write_rows(self, rows: List[dict]) -> None:
+        self.out.write(b"".join(
+            (json.dumps({"_section": self.section, **row}, default=_json_default) + "\n").encode()
+            for row in rows
+        ))
+
+    def end_section(self) -> None:
+        self.section = None
+
+    def finish(self, summary: dict) -> None:
+        self._line({"_type": "export_summary", **summary})
+
+    def _line(self, record: dict) -> None:
+        self.out.write((json.dumps(record, default=_json_default) + "\n").encode())
+
+
+class _CsvZipFormat:
+    def __init__(self, out: _HashingWriter):
+        self.zip = zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED)
+        self.metadata: dict = {}
+        self._entry = None
+        self._text = None
+        self._csv = None
+
+    def begin(self, metadata: dict) -> None:
+        self.metadata = metadata
+
+    def begin_section(self, section: str, columns: List[str]) -> None:
+        self._entry = self.zip.open(f"{section}.csv", mode="w", force_zip64=True)
+        self._text = io.TextIOWrapper(self._entry, encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._text, fieldnames=columns)
+        self._csv.writeheader()
+
+    def write_rows(self, rows: List[dict]) -> None:
+        self._csv.writerows(
+            {key: _csv_value(value) for key, value in row.items()} for row in rows
+        )
+
+    def end_section(self) -> None:
+        self._text.close()  # Also closes the zip entry
+        self._entry = self._text = self._csv = None
+
+    def finish(self, summary: dict) -> None:
+        manifest = {"export_metadata": self.metadata, "export_summary": summary}
+        self.zip.writestr(
+            "manifest.json", json.dumps(manifest, indent=2, default=_json_default),
+        )
+        self.zip.close()
+
+
+_FORMAT_WRITERS = {
+    "jsonl": _JsonlFormat,
+    "csv": _CsvZipFormat,
+}
+
+
+# ============================================
+# Engine
+# ============================================
+
+@dataclass
+class ExportResult:
+    """Outcome of a finished export."""
+    file_path: str  # Relative to settings.storage_path
+    file_size_bytes: int
+    file_checksum: str  # SHA-256 hex
+    rows_exported: int
+    section_counts: Dict[str, int]
+
+
+class InspectionExportEngine:
+    """
+    Writes one inspection export file.
+
+    Does not commit the caller's session; progress goes through its own
+    short-lived sessions.
+    """
+
+    # Rows fetched per cursor round trip and written per chunk
+    CHUNK_ROWS = 1000
+
+    # Minimum seconds between progress updates
+    PROGRESS_INTERVAL_SECONDS = 2.0
+
+    def __init__(self, session: AsyncSession, tenant_id: UUID):
+        self.session = session
+        self.tenant_id = tenant_id
+        self.storage_path = Path(settings.storage_path)
+
+    @staticmethod
+    def relative_path(tenant_id: UUID, reference_number: str, file_format: str) -> str:
+        extension = EXPORT_FORMATS[normalize_export_format(file_format)]
+        return f"{tenant_id}/exports/{reference_number}.{extension}"
+
+    async def count_rows(self, export: InspectionExport) -> int:
+        """Total rows the export will contain (for progress)."""
+        total = 0
+        for section in sections_for(export.scope, export.filters_json):
+            query = self._section_query(
+                section, export.date_from, export.date_to,
+                select(func.count()).select_from(section.model),
+            )
+            total += (await self.session.execute(query)).scalar() or 0
+        return total
+
+    async def run(self, export: InspectionExport) -> ExportResult:
+        """Stream every section of the export into its file."""
+        file_format = normalize_export_format(export.file_format)
+        sections = sections_for(export.scope, export.filters_json)
+        relative_path = self.relative_path(
+            self.tenant_id, export.reference_number, file_format,
+        )
+        target = self.storage_path / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".part")
+
+        metadata = {
+            "tenant_id": str(self.tenant_id),
+            "reference_number": export.reference_number,
+            "scope": export.scope.value,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "date_range": {
+                "from": export.date_from.isoformat() if export.date_from else None,
+                "to": export.date_to.isoformat() if export.date_to else None,
+            },
+            "filters": export.filters_json,
+            "sections": [s.name for s in sections],
+        }
+
+        counts: Dict[str, int] = {}
+        exported = 0
+        last_progress = time.monotonic()
+
+        try:
+            with open(partial, "wb") as raw:
+                out = _HashingWriter(raw)
+                writer = _FORMAT_WRITERS[file_format](out)
+                await asyncio.to_thread(writer.begin, metadata)
+
+                for section in sections:
+                    model = section.model
+                    columns = [
+                        c for c in model.__table__.columns
+                        if c.name not in section.exclude
+                    ]
+                    await asyncio.to_thread(
+                        writer.begin_section, section.name, [c.name for c in columns],
+                    )
+
+                    query = self._section_query(
+                        section, export.date_from, export.date_to, select(*columns),
+                    ).order_by(model.id).execution_options(yield_per=self.CHUNK_ROWS)
+
+                    counts[section.name] = 0
+                    stream = await self.session.stream(query)
+                    async for partition in stream.mappings().partitions(self.CHUNK_ROWS):
+                        rows = [dict(row) for row in partition]
+                        await asyncio.to_thread(writer.write_rows, rows)
+                        counts[section.name] += len(rows)
+                        exported += len(rows)
+
+                        if time.monotonic() - last_progress >= self.PROGRESS_INTERVAL_SECONDS:
+                            await self._report_progress(export.id, exported)
+                            last_progress = time.monotonic()
+
+                    await asyncio.to_thread(writer.end_section)
+
+                await asyncio.to_thread(
+                    writer.finish, {"rows_exported": exported, "section_counts": counts},
+                )
+                await asyncio.to_thread(raw.flush)
+                await asyncio.to_thread(os.fsync, raw.fileno())
+
+            os.replace(partial, target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+        await self._report_progress(export.id, exported)
+
+        return ExportResult(
+            file_path=relative_path,
+            file_size_bytes=out.size,
+            file_checksum=out.sha256.hexdigest(),
+            rows_exported=exported,
+            section_counts=counts,
+        )
+
+    def _section_query(
+        self,
+        section: ExportSection,
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        query,
+    ):
+        """Tenant, soft-delete and date-range filters for a section."""
+        model = section.model
+        query = query.where(model.tenant_id == self.tenant_id)
+        if "is_deleted" in model.__table__.columns:
+            query = query.where(model.is_deleted == False)
+
+        if section.date_column:
+            column = getattr(model, section.date_column)
+            is_date = isinstance(column.type, Date) and not isinstance(column.type, DateTime)
+            if date_from:
+                query = query.where(column >= (date_from.date() if is_date else date_from))
+            if date_to:
+                query = query.where(column <= (date_to.date() if is_date else date_to))
+        return query
+
+    async def _report_progress(self, export_id: UUID, rows_exported: int) -> None:
+        """Publish progress outside the export's (still open) transaction."""
+        from app.core.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(InspectionExport).where(
+                    InspectionExport.id == export_id,
+                ).values(
+                    rows_exported=rows_exported,
+                    progress_updated_at=datetime.now(timezone.utc),
+                )
+            )
+            await session.commit()
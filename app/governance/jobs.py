@@ -0,0 +1,98 @@
+"""
+CUSTOS Governance Background Jobs
+"""
+
+import logging
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.jobs import AbstractJob, JobType, RetryableError, register_job, register_periodic
+
+logger = logging.getLogger(__name__)
+
+
+@register_periodic("governance_partition_maintenance", interval_seconds=24 * 3600)
+async def partition_maintenance() -> None:
+    """Daily: create upcoming log partitions, detach expired ones."""
+    from app.governance.partitions import run_partition_maintenance
+
+    await run_partition_maintenance()
+
+
+@register_job
+class InspectionExportJob(AbstractJob):
+    """
+    Generate an inspection export file.
+    
+    The export streams to disk with bounded memory; rows_exported and
+    rows_total on the export report progress while it runs.
+    """
+    
+    job_type = JobType.EXPORT_INSPECTION
+    
+    def __init__(
+        self,
+        tenant_id: UUID,
+        export_id: UUID,
+        requested_by: Optional[UUID] = None,
+    ):
+        super().__init__(tenant_id)
+        # Queued jobs are rebuilt from their string params
+        self.export_id = UUID(str(export_id))
+        self.requested_by = UUID(str(requested_by)) if requested_by else None
+        self._actor_user_id = requested_by  # Set for audit
+    
+    def get_job_key(self) -> str:
+        """Unique key for idempotency."""
+        return f"inspection_export:{self.export_id}"
+    
+    def get_entity_type(self) -> str:
+        return "EXPORT"
+    
+    def get_entity_id(self) -> Optional[UUID]:
+        return self.export_id
+    
+    def _get_serializable_params(self) -> dict:
+        return {
+            "export_id": str(self.export_id),
+            "requested_by": str(self.requested_by) if self.requested_by else None,
+        }
+    
+    async def execute(self, session: AsyncSession) -> Any:
+        """Execute export generation."""
+        from app.governance.models import InspectionStatus
+        from app.governance.service import GovernanceService
+        
+        service = GovernanceService(session, self.tenant_id)
+        export = await service.generate_inspection_export(self.export_id)
+        
+        if export.status == InspectionStatus.FAILED:
+            raise RetryableError(export.error_message or "Export failed")
+        
+        return {
+            "export_id": str(self.export_id),
+            "file_path": export.file_path,
+            "rows_exported": export.rows_exported,
+            "file_checksum": export.file_checksum,
+        }
+
+
+async def start_inspection_export(
+    session: AsyncSession,
+    tenant_id: UUID,
+    export_id: UUID,
+    requested_by: Optional[UUID] = None,
+) -> dict:
+    """
+    Queue InspectionExportJob for the job runner (commits the session).
+    
+    A worker that dies mid-export loses its lease and another worker
+    runs the export again; an export abandoned after its attempts can be
+    started again (GovernanceService.EXPORT_STALE_MINUTES).
+    """
+    from app.core.jobs import enqueue
+    
+    job = InspectionExportJob(tenant_id, export_id, requested_by)
+    return await enqueue(job, session)
@@ -10,12 +10,12 @@ CORE PRINCIPLES:
 4. Works across ALL modules
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import String, Text, Boolean, DateTime, ForeignKey, Index, Integer
+from sqlalchemy import String, Text, Boolean, Date, DateTime, ForeignKey, Index, Integer, UniqueConstraint
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB, INET
 from sqlalchemy.orm import Mapped, mapped_column
@@ -149,14 +149,31 @@ class AuditLog(TenantBaseModel):
     This is critical for legal defensibility and compliance.
     
     Every significant action in the system creates an audit log entry.
+    
+    Partitioned by month on timestamp (see app/governance/partitions.py),
+    so the primary key is (id, timestamp).
     """
     __tablename__ = "governance_audit_logs"
     
     __table_args__ = (
-        Index("ix_audit_tenant_timestamp", "tenant_id", "timestamp"),
+        Index("ix_audit_tenant_timestamp", "tenant_id", "timestamp", "id"),
         Index("ix_audit_actor", "actor_user_id"),
         Index("ix_audit_entity", "entity_type", "entity_id"),
         Index("ix_audit_action", "action_type"),
+        # Trigram indexes for substring search (pg_trgm)
+        Index(
+            "ix_audit_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_audit_entity_name_trgm", "entity_name",
+            postgresql_using="gin", postgresql_ops={"entity_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_audit_actor_email_trgm", "actor_email",
+            postgresql_using="gin", postgresql_ops={"actor_email": "gin_trgm_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
     
     # Actor information
@@ -198,9 +215,10 @@ class AuditLog(TenantBaseModel):
     user_agent: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     request_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     
-    # Timestamp (immutable)
+    # Timestamp (immutable, partition key)
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         nullable=False,
     )
     
@@ -216,13 +234,16 @@ class DataAccessLog(TenantBaseModel):
     Tracks who accessed what data and when.
     
     Important for GDPR/privacy compliance and identifying data breaches.
+    
+    Partitioned by month on timestamp, like AuditLog.
     """
     __tablename__ = "governance_data_access_logs"
     
     __table_args__ = (
-        Index("ix_data_access_tenant_timestamp", "tenant_id", "timestamp"),
+        Index("ix_data_access_tenant_timestamp", "tenant_id", "timestamp", "id"),
         Index("ix_data_access_user", "user_id"),
         Index("ix_data_access_resource", "accessed_resource"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
     
     # Who accessed
@@ -257,8 +278,38 @@ class DataAccessLog(TenantBaseModel):
     success: Mapped[bool] = mapped_column(Boolean, default=True)
     records_accessed: Mapped[int] = mapped_column(Integer, default=1)
     
-    # Timestamp
+    # Timestamp (partition key)
     timestamp: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        nullable=False,
+    )
+
+
+# ============================================
+# Partition Stats
+# ============================================
+
+class GovernancePartitionStat(TenantBaseModel):
+    """
+    Per-tenant row count of one closed monthly log partition.
+    
+    Closed months are append-only in practice, so their counts are
+    computed once and reused for unfiltered totals.
+    """
+    __tablename__ = "governance_partition_stats"
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "table_name", "month",
+            name="uq_governance_partition_stat",
+        ),
+    )
+    
+    table_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    month: Mapped[date] = mapped_column(Date, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, default=0)
+    computed_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
     )
@@ -394,6 +445,14 @@ class InspectionExport(TenantBaseModel):
     file_size_bytes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     file_checksum: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     
+    # Progress (updated while the export streams)
+    rows_total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    rows_exported: Mapped[int] = mapped_column(Integer, default=0)
+    progress_updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
     # Timing
     requested_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -0,0 +1,199 @@
+"""
+CUSTOS Governance Log Partitions
+
+Monthly range partitions for the append-only governance log tables.
+
+governance_audit_logs and governance_data_access_logs are partitioned by
+RANGE (timestamp), one partition per calendar month, named
+<table>_yYYYYmMM, plus a <table>_default catch-all.
+
+MAINTENANCE:
+- ensure_partitions(): create partitions for the current month and
+  PARTITIONS_AHEAD months ahead (daily on the job runner, see
+  app.governance.jobs; also at app startup). Rows that already landed in
+  the default partition for a new month are moved into it first.
+- detach_expired_partitions(): DETACH partitions older than the retention
+  window. Detached tables are kept (renamed *_archived) for export and
+  cold storage; nothing is dropped here.
+
+Both take a transaction-level advisory lock so concurrent workers don't
+race on DDL.
+"""
+
+import logging
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+PARTITIONED_TABLES = (
+    "governance_audit_logs",
+    "governance_data_access_logs",
+)
+
+# Months of partitions created ahead of the current month
+PARTITIONS_AHEAD = 2
+
+# Months of partitions kept attached (audit trails: 7 years)
+DEFAULT_RETENTION_MONTHS = 84
+
+# Arbitrary constant for pg_advisory_xact_lock
+_ADVISORY_LOCK_KEY = 0x61756469  # "audi"
+
+_PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def _add_months(day: date, months: int) -> date:
+    """First day of the month `months` after day's month."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month of a monthly partition name, or None (e.g. the default partition)."""
+    match = _PARTITION_NAME.search(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def month_bounds(month: date) -> Tuple[date, date]:
+    """[start, end) of the month containing `month`."""
+    start = month.replace(day=1)
+    return start, _add_months(start, 1)
+
+
+class GovernancePartitionManager:
+    """Creates and detaches monthly partitions. Commits its own DDL."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def ensure_partitions(
+        self,
+        months_ahead: int = PARTITIONS_AHEAD,
+        today: Optional[date] = None,
+    ) -> List[str]:
+        """Create missing monthly partitions up to months_ahead. Returns created names."""
+        current = (today or date.today()).replace(day=1)
+        created = []
+
+        await self._lock()
+        for table in PARTITIONED_TABLES:
+            existing = set(await self.list_partitions(table))
+            if f"{table}_default" not in existing:
+                await self.session.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'
+                ))
+                created.append(f"{table}_default")
+            for offset in range(months_ahead + 1):
+                start, end = month_bounds(_add_months(current, offset))
+                name = partition_name(table, start)
+                if name in existing:
+                    continue
+                await self._create_partition(table, name, start, end)
+                created.append(name)
+
+        await self.session.commit()
+        if created:
+            logger.info(f"Created governance log partitions: {', '.join(created)}")
+        return created
+
+    async def _create_partition(self, table: str, name: str, start: date, end: date) -> None:
+        """
+        Create one monthly partition.
+
+        Attaching a range that the default partition already holds rows for
+        fails, so those rows are moved into the new table before it is
+        attached (same transaction, under the advisory lock).
+        """
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        in_range = f"timestamp >= '{start.isoformat()}' AND timestamp < '{end.isoformat()}'"
+
+        default_rows = await self.session.execute(text(
+            f'SELECT EXISTS (SELECT 1 FROM "{table}_default" WHERE {in_range})'
+        ))
+        if not default_rows.scalar():
+            await self.session.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" {bounds}'
+            ))
+            return
+
+        await self.session.execute(text(
+            f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        moved = await self.session.execute(text(
+            f'WITH moved AS (DELETE FROM "{table}_default" WHERE {in_range} RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ))
+        await self.session.execute(text(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" {bounds}'
+        ))
+        logger.info(f"Moved {moved.rowcount} rows from {table}_default into {name}")
+
+    async def detach_expired_partitions(
+        self,
+        retention_months: int = DEFAULT_RETENTION_MONTHS,
+        today: Optional[date] = None,
+    ) -> List[str]:
+        """Detach partitions entirely older than the retention window."""
+        cutoff = _add_months((today or date.today()).replace(day=1), -retention_months)
+        detached = []
+
+        await self._lock()
+        for table in PARTITIONED_TABLES:
+            for name in await self.list_partitions(table):
+                month = partition_month(name)
+                if month is None or _add_months(month, 1) > cutoff:
+                    continue
+                await self.session.execute(text(
+                    f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'
+                ))
+                await self.session.execute(text(
+                    f'ALTER TABLE "{name}" RENAME TO "{name}_archived"'
+                ))
+                detached.append(name)
+
+        await self.session.commit()
+        if detached:
+            logger.info(f"Detached governance log partitions: {', '.join(detached)}")
+        return detached
+
+    async def _lock(self) -> None:
+        await self.session.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY},
+        )
+
+    async def list_partitions(self, table: str) -> List[str]:
+        """Names of the partitions currently attached to table."""
+        result = await self.session.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :table"
+        ), {"table": table})
+        return [row[0] for row in result.all()]
+
+
+async def run_partition_maintenance(
+    retention_months: int = DEFAULT_RETENTION_MONTHS,
+) -> None:
+    """Ensure upcoming partitions and detach expired ones. Never raises."""
+    from app.core.database import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as session:
+            manager = GovernancePartitionManager(session)
+            await manager.ensure_partitions()
+            await manager.detach_expired_partitions(retention_months)
+    except Exception as e:
+        logger.error(f"Governance partition maintenance failed: {e}")
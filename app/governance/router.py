@@ -9,17 +9,19 @@ SECURITY:
 - NO access for teachers, students, parents
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.auth.dependencies import CurrentUser, require_permission
 from app.users.rbac import Permission
 from app.governance.service import GovernanceService
+from app.governance.jobs import start_inspection_export
+from app.platform.files.responses import ranged_file_response
 from app.governance.models import (
     ActionType,
     EntityType,
@@ -59,6 +61,7 @@ router = APIRouter(tags=["Governance"])
 @router.get("/audit-logs", response_model=List[AuditLogListItem])
 async def get_audit_logs(
     request: Request,
+    response: Response,
     user: CurrentUser,
     db: AsyncSession = Depends(get_db),
     action_type: Optional[ActionType] = None,
@@ -70,12 +73,16 @@ async def get_audit_logs(
     search: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     _=Depends(require_permission(Permission.AUDIT_VIEW)),
 ):
     """
     Get audit logs with optional filtering.
     
     Admin/Principal only. Returns immutable audit trail.
+    
+    Pagination: pass the X-Next-Cursor response header back as `cursor`
+    (keyset; preferred over `skip` for deep pages).
     """
     service = GovernanceService(db, user.tenant_id)
     
@@ -100,7 +107,11 @@ async def get_audit_logs(
         search=search,
     )
     
-    logs = await service.get_audit_logs(filters, skip, limit)
+    logs = await service.get_audit_logs(filters, skip, limit, cursor=cursor)
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = service.encode_cursor(
+            logs[-1].timestamp, logs[-1].id
+        )
     
     return [
         AuditLogListItem(
@@ -158,6 +169,7 @@ async def get_audit_log_detail(
 @router.get("/data-access", response_model=List[DataAccessLogListItem])
 async def get_data_access_logs(
     request: Request,
+    response: Response,
     user: CurrentUser,
     db: AsyncSession = Depends(get_db),
     user_id: Optional[UUID] = None,
@@ -167,12 +179,14 @@ async def get_data_access_logs(
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     _=Depends(require_permission(Permission.AUDIT_VIEW)),
 ):
     """
     Get data access logs for privacy compliance.
     
     Admin/Principal only. Shows who accessed what data.
+    Paginate with the X-Next-Cursor header, as for audit logs.
     """
     service = GovernanceService(db, user.tenant_id)
     
@@ -184,7 +198,11 @@ async def get_data_access_logs(
         date_to=date_to,
     )
     
-    logs = await service.get_data_access_logs(filters, skip, limit)
+    logs = await service.get_data_access_logs(filters, skip, limit, cursor=cursor)
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = service.encode_cursor(
+            logs[-1].timestamp, logs[-1].id
+        )
     
     return [
         DataAccessLogListItem(
@@ -435,7 +453,9 @@ async def create_inspection_export(
     """
     Request a new inspection export.
     
-    Admin/Principal only. Creates export request and starts generation.
+    Admin/Principal only. Creates the export request and starts
+    generation in the background; poll the export for status and
+    rows_exported / rows_total.
     """
     service = GovernanceService(db, user.tenant_id)
     
@@ -452,8 +472,7 @@ async def create_inspection_export(
         file_format=data.file_format,
     )
     
-    # Try to generate immediately (for now - could be async in production)
-    export = await service.generate_inspection_export(export.id)
+    await start_inspection_export(db, user.tenant_id, export.id, user.id)
     
     return InspectionExportResponse.model_validate(export)
 
@@ -498,16 +517,72 @@ async def download_inspection_export(
         ip_address=request.client.host if request.client else None,
     )
     
-    # In production, would return actual file
     return {
         "message": "Export marked as downloaded",
         "reference_number": export.reference_number,
         "file_path": export.file_path,
         "file_size_bytes": export.file_size_bytes,
         "file_checksum": export.file_checksum,
+        "download_url": str(request.url_for("get_inspection_export_file", export_id=export_id)),
     }
 
 
+@router.get("/inspection-exports/{export_id}/file")
+async def get_inspection_export_file(
+    export_id: UUID,
+    request: Request,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permission(Permission.AUDIT_EXPORT)),
+):
+    """
+    Stream a generated export file.
+    
+    Supports Range requests (206) so large exports can be resumed.
+    The SHA-256 checksum is the ETag.
+    """
+    service = GovernanceService(db, user.tenant_id)
+    
+    export = await service.get_inspection_export_by_id(export_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    if export.status not in [InspectionStatus.GENERATED, InspectionStatus.DOWNLOADED]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Export is not ready. Status: {export.status.value}",
+        )
+    if export.expires_at and export.expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=410, detail="Export has expired")
+    
+    path = service.get_export_file(export)
+    
+    # Log once per download, not once per resumed range
+    range_header = request.headers.get("range", "")
+    if not range_header or range_header.startswith("bytes=0-"):
+        if export.status == InspectionStatus.GENERATED:
+            await service.mark_export_downloaded(export_id)
+        await service.log_data_access(
+            user_id=user.id,
+            user_role=user.role,
+            user_email=user.email,
+            accessed_resource=f"inspection_export:{export.reference_number}",
+            access_type=AccessType.DOWNLOAD,
+            resource_id=export_id,
+            request_path=str(request.url.path),
+            ip_address=request.client.host if request.client else None,
+        )
+    
+    media_type = "application/zip" if path.suffix == ".zip" else "application/x-ndjson"
+    return ranged_file_response(
+        request,
+        path,
+        media_type=media_type,
+        filename=path.name,
+        etag=export.file_checksum,
+    )
+
+
 # ============================================
 # Summary Endpoints
 # ============================================
@@ -279,6 +279,12 @@ class InspectionExportResponse(BaseModel):
     # File
     file_format: Optional[str] = None
     file_size_bytes: Optional[int] = None
+    file_checksum: Optional[str] = None
+    
+    # Progress
+    rows_total: Optional[int] = None
+    rows_exported: int = 0
+    progress_updated_at: Optional[datetime] = None
     
     # Timing
     requested_at: datetime
@@ -313,7 +319,7 @@ class InspectionExportRequest(BaseModel):
     filters_json: Optional[dict] = None
     purpose: Optional[str] = None
     notes: Optional[str] = None
-    file_format: str = "json"  # json, csv
+    file_format: str = "jsonl"  # jsonl, csv (zip of per-section CSVs); "json" = jsonl
 
 
 class InspectionExportFilter(BaseModel):
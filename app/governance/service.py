@@ -10,19 +10,27 @@ CORE PRINCIPLES:
 4. Support inspection exports
 """
 
-import json
-import hashlib
-from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any
+import base64
+import logging
+from datetime import date, datetime, timezone, timedelta
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID, uuid4
 
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, or_, desc, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.exceptions import ResourceNotFoundError, ValidationError
+from app.core.metrics import audit_events_written_total
+from app.platform.audit.writer import audit_writer, is_sync_entity
+from app.governance.export import InspectionExportEngine, normalize_export_format
+from app.governance.partitions import GovernancePartitionManager, month_bounds, partition_month
 from app.governance.models import (
     AuditLog,
     DataAccessLog,
+    GovernancePartitionStat,
     ConsentRecord,
     InspectionExport,
     ActionType,
@@ -42,6 +50,8 @@ from app.governance.schemas import (
     InspectionExportFilter,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class GovernanceService:
     """
@@ -54,6 +64,9 @@ class GovernanceService:
     # Export expiry duration
     EXPORT_EXPIRY_HOURS = 72
     
+    # A processing export without progress for this long may be restarted
+    EXPORT_STALE_MINUTES = 10
+    
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
@@ -86,33 +99,50 @@ class GovernanceService:
         Called from all modules when significant actions occur.
         
         Audit logs are APPEND-ONLY and IMMUTABLE.
+        
+        Written asynchronously in batches (app/platform/audit/writer.py),
+        except for financial entity types which commit immediately.
         """
         # Serialize values to JSON-safe format
         old_value_json = self._serialize_value(old_value) if old_value is not None else None
         new_value_json = self._serialize_value(new_value) if new_value is not None else None
         
-        audit_log = AuditLog(
-            tenant_id=self.tenant_id,
-            actor_user_id=actor_user_id,
-            actor_role=actor_role,
-            actor_email=actor_email,
-            action_type=action_type,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            entity_name=entity_name,
-            old_value_json=old_value_json,
-            new_value_json=new_value_json,
-            description=description,
-            metadata_json=metadata,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            request_id=request_id,
-            timestamp=datetime.now(timezone.utc),
-        )
-        
-        self.session.add(audit_log)
-        await self.session.commit()
-        await self.session.refresh(audit_log)
+        now = datetime.now(timezone.utc)
+        row = {
+            "id": uuid4(),
+            "tenant_id": self.tenant_id,
+            "actor_user_id": actor_user_id,
+            "actor_role": actor_role,
+            "actor_email": actor_email,
+            "action_type": action_type,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "entity_name": entity_name,
+            "old_value_json": old_value_json,
+            "new_value_json": new_value_json,
+            "description": description,
+            "metadata_json": metadata,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "request_id": request_id,
+            "timestamp": now,
+            "created_at": now,
+            "updated_at": now,
+            "is_deleted": False,
+        }
+        audit_log = AuditLog(**row)
+        
+        if is_sync_entity(entity_type):
+            # Financial entities: the audit row must be durable before we return
+            self.session.add(audit_log)
+            await self.session.commit()
+            await self.session.refresh(audit_log)
+            audit_events_written_total.labels(mode="sync").inc()
+            return audit_log
+        
+        # Everything else goes through the batched writer; the returned
+        # object is transient (not attached to this session)
+        audit_writer.enqueue(AuditLog, row)
         return audit_log
     
     async def log_action_from_schema(self, data: AuditLogCreateInternal) -> AuditLog:
@@ -159,11 +189,14 @@ class GovernanceService:
         filters: Optional[AuditLogFilter] = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[AuditLog]:
         """
         Get audit logs with optional filtering.
         
-        Ordered by timestamp descending (newest first).
+        Ordered by (timestamp, id) descending (newest first). Pass the
+        cursor of the last row of a page (encode_cursor) to get the next
+        page with a keyset seek; skip is only honoured without a cursor.
         """
         query = select(AuditLog).where(
             AuditLog.tenant_id == self.tenant_id
@@ -183,6 +216,7 @@ class GovernanceService:
             if filters.date_to:
                 query = query.where(AuditLog.timestamp <= filters.date_to)
             if filters.search:
+                # Served by the pg_trgm GIN indexes
                 search_term = f"%{filters.search}%"
                 query = query.where(
                     or_(
@@ -192,11 +226,33 @@ class GovernanceService:
                     )
                 )
         
-        query = query.order_by(desc(AuditLog.timestamp)).offset(skip).limit(limit)
+        if cursor:
+            timestamp, log_id = self.decode_cursor(cursor)
+            query = query.where(tuple_(AuditLog.timestamp, AuditLog.id) < (timestamp, log_id))
+        elif skip:
+            query = query.offset(skip)
+        
+        query = query.order_by(desc(AuditLog.timestamp), desc(AuditLog.id)).limit(limit)
         
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
+    @staticmethod
+    def encode_cursor(timestamp: datetime, log_id: UUID) -> str:
+        """Opaque keyset cursor for a (timestamp, id) position."""
+        raw = f"{timestamp.isoformat()}|{log_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+        """Parse a cursor from encode_cursor."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            timestamp, log_id = raw.split("|", 1)
+            return datetime.fromisoformat(timestamp), UUID(log_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError("Invalid pagination cursor")
+    
     async def get_audit_log_by_id(self, log_id: UUID) -> Optional[AuditLog]:
         """Get a single audit log by ID."""
         query = select(AuditLog).where(
@@ -210,24 +266,125 @@ class GovernanceService:
         self,
         filters: Optional[AuditLogFilter] = None,
     ) -> int:
-        """Count audit logs with optional filtering."""
+        """
+        Count audit logs with optional filtering.
+        
+        Unfiltered counts come from per-partition stats (closed months)
+        plus a live count of the current month.
+        """
+        if not filters or not filters.model_dump(exclude_none=True):
+            return await self._count_from_partition_stats(AuditLog)
+        
         query = select(func.count(AuditLog.id)).where(
             AuditLog.tenant_id == self.tenant_id
         )
         
-        if filters:
-            if filters.action_type:
-                query = query.where(AuditLog.action_type == filters.action_type)
-            if filters.entity_type:
-                query = query.where(AuditLog.entity_type == filters.entity_type)
-            if filters.date_from:
-                query = query.where(AuditLog.timestamp >= filters.date_from)
-            if filters.date_to:
-                query = query.where(AuditLog.timestamp <= filters.date_to)
+        if filters.action_type:
+            query = query.where(AuditLog.action_type == filters.action_type)
+        if filters.entity_type:
+            query = query.where(AuditLog.entity_type == filters.entity_type)
+        if filters.date_from:
+            query = query.where(AuditLog.timestamp >= filters.date_from)
+        if filters.date_to:
+            query = query.where(AuditLog.timestamp <= filters.date_to)
         
         result = await self.session.execute(query)
         return result.scalar() or 0
     
+    async def _count_from_partition_stats(self, model) -> int:
+        """
+        Tenant row count for a partitioned log table.
+        
+        Each closed month is counted once (a pruned scan of one partition)
+        and cached in GovernancePartitionStat; only the current month and
+        rows before the first monthly partition are counted live.
+        """
+        table = model.__tablename__
+        now = datetime.now(timezone.utc)
+        current_month = now.date().replace(day=1)
+        
+        partition_months = sorted(
+            month
+            for month in (
+                partition_month(name)
+                for name in await GovernancePartitionManager(self.session).list_partitions(table)
+            )
+            if month is not None and month < current_month
+        )
+        
+        stats = {
+            row.month: row
+            for row in (await self.session.execute(
+                select(GovernancePartitionStat).where(
+                    GovernancePartitionStat.tenant_id == self.tenant_id,
+                    GovernancePartitionStat.table_name == table,
+                )
+            )).scalars().all()
+        }
+        
+        total = 0
+        fresh: Dict[date, int] = {}
+        for month in partition_months:
+            start, end = month_bounds(month)
+            stat = stats.get(month)
+            # Trust a stat computed after the month closed (plus a day for late writes)
+            closed_at = datetime.combine(end, datetime.min.time(), timezone.utc) + timedelta(days=1)
+            if stat and stat.computed_at >= closed_at:
+                total += stat.row_count
+                continue
+            
+            fresh[month] = await self._count_range(model, start, end)
+            total += fresh[month]
+        
+        first_month = partition_months[0] if partition_months else current_month
+        total += await self._count_range(model, None, first_month)
+        total += await self._count_range(model, current_month, None)
+        
+        if fresh:
+            await self._save_partition_stats(table, fresh, now)
+        return total
+    
+    async def _save_partition_stats(self, table: str, counts: Dict[date, int], now: datetime) -> None:
+        """
+        Upsert monthly counts in a session of their own.
+        
+        The caller's session is a read request's and is left untouched;
+        a failed write only means the months are counted again next time.
+        """
+        from app.core.database import AsyncSessionLocal
+        
+        try:
+            async with AsyncSessionLocal() as session:
+                for month, count in counts.items():
+                    await session.execute(
+                        pg_insert(GovernancePartitionStat).values(
+                            id=uuid4(),
+                            tenant_id=self.tenant_id,
+                            table_name=table,
+                            month=month,
+                            row_count=count,
+                            computed_at=now,
+                            created_at=now,
+                            updated_at=now,
+                            is_deleted=False,
+                        ).on_conflict_do_update(
+                            constraint="uq_governance_partition_stat",
+                            set_={"row_count": count, "computed_at": now, "updated_at": now},
+                        )
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Could not save partition stats for {table}: {e}")
+    
+    async def _count_range(self, model, start: Optional[date], end: Optional[date]) -> int:
+        """Exact tenant count for timestamp in [start, end) (pruned to partitions)."""
+        query = select(func.count()).select_from(model).where(model.tenant_id == self.tenant_id)
+        if start:
+            query = query.where(model.timestamp >= datetime.combine(start, datetime.min.time(), timezone.utc))
+        if end:
+            query = query.where(model.timestamp < datetime.combine(end, datetime.min.time(), timezone.utc))
+        return (await self.session.execute(query)).scalar() or 0
+    
     # ============================================
     # Data Access Log Operations
     # ============================================
@@ -299,8 +456,13 @@ class GovernanceService:
         filters: Optional[DataAccessLogFilter] = None,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[DataAccessLog]:
-        """Get data access logs with optional filtering."""
+        """
+        Get data access logs with optional filtering.
+        
+        Same (timestamp, id) keyset cursor as get_audit_logs.
+        """
         query = select(DataAccessLog).where(
             DataAccessLog.tenant_id == self.tenant_id
         )
@@ -317,7 +479,17 @@ class GovernanceService:
             if filters.date_to:
                 query = query.where(DataAccessLog.timestamp <= filters.date_to)
         
-        query = query.order_by(desc(DataAccessLog.timestamp)).offset(skip).limit(limit)
+        if cursor:
+            timestamp, log_id = self.decode_cursor(cursor)
+            query = query.where(
+                tuple_(DataAccessLog.timestamp, DataAccessLog.id) < (timestamp, log_id)
+            )
+        elif skip:
+            query = query.offset(skip)
+        
+        query = query.order_by(
+            desc(DataAccessLog.timestamp), desc(DataAccessLog.id)
+        ).limit(limit)
         
         result = await self.session.execute(query)
         return list(result.scalars().all())
@@ -526,13 +698,16 @@ class GovernanceService:
         filters_json: Optional[dict] = None,
         purpose: Optional[str] = None,
         notes: Optional[str] = None,
-        file_format: str = "json",
+        file_format: str = "jsonl",
     ) -> InspectionExport:
         """
         Create a new inspection export request.
         
-        The actual export generation can be done synchronously or async.
+        The file is generated by generate_inspection_export, normally in
+        the background (InspectionExportJob).
         """
+        file_format = normalize_export_format(file_format)
+        
         # Generate reference number
         ref_number = f"INS-{datetime.now().strftime('%Y%m%d')}-{str(uuid4())[:8].upper()}"
         
@@ -576,10 +751,11 @@ class GovernanceService:
         export_id: UUID,
     ) -> InspectionExport:
         """
-        Generate the actual export file.
+        Generate the export file.
         
-        This is a placeholder implementation.
-        In production, this would generate actual data exports.
+        Streams every section of the scope to disk (see
+        app/governance/export.py) in the declared file_format. Normally
+        run from InspectionExportJob; progress can be polled on the export.
         """
         query = select(InspectionExport).where(
             InspectionExport.tenant_id == self.tenant_id,
@@ -591,31 +767,31 @@ class GovernanceService:
         if not export:
             raise ResourceNotFoundError("Export not found")
         
-        if export.status not in [InspectionStatus.PENDING, InspectionStatus.FAILED]:
+        if not self._export_can_start(export):
             raise ValidationError(f"Export is already {export.status.value}")
         
+        engine = InspectionExportEngine(self.session, self.tenant_id)
+        rows_total = await engine.count_rows(export)  # Also validates sections
+        
         export.status = InspectionStatus.PROCESSING
+        export.error_message = None
+        export.rows_exported = 0
+        export.rows_total = rows_total
+        export.progress_updated_at = datetime.now(timezone.utc)
         await self.session.commit()
         
         try:
-            # Generate export data based on scope
-            export_data = await self._generate_export_data(
-                export.scope, export.date_from, export.date_to, export.filters_json
-            )
-            
-            # Save to file (placeholder - would use file storage in production)
-            file_content = json.dumps(export_data, indent=2, default=str)
-            file_path = f"exports/{export.reference_number}.{export.file_format}"
-            file_size = len(file_content.encode("utf-8"))
-            file_checksum = hashlib.sha256(file_content.encode()).hexdigest()
+            export_result = await engine.run(export)
             
             export.status = InspectionStatus.GENERATED
-            export.file_path = file_path
-            export.file_size_bytes = file_size
-            export.file_checksum = file_checksum
+            export.file_path = export_result.file_path
+            export.file_size_bytes = export_result.file_size_bytes
+            export.file_checksum = export_result.file_checksum
+            export.rows_exported = export_result.rows_exported
             export.generated_at = datetime.now(timezone.utc)
             
         except Exception as e:
+            await self.session.rollback()
             export.status = InspectionStatus.FAILED
             export.error_message = str(e)
         
@@ -623,82 +799,23 @@ class GovernanceService:
         await self.session.refresh(export)
         return export
     
-    async def _generate_export_data(
-        self,
-        scope: InspectionScope,
-        date_from: Optional[datetime],
-        date_to: Optional[datetime],
-        filters_json: Optional[dict],
-    ) -> dict:
-        """
-        Generate export data based on scope.
-        
-        Placeholder implementation - returns metadata only.
-        In production, this would query actual data.
-        """
-        export_data = {
-            "export_metadata": {
-                "tenant_id": str(self.tenant_id),
-                "scope": scope.value,
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-                "date_range": {
-                    "from": date_from.isoformat() if date_from else None,
-                    "to": date_to.isoformat() if date_to else None,
-                },
-                "filters": filters_json,
-            },
-            "data": {},
-        }
-        
-        if scope == InspectionScope.ACADEMIC:
-            export_data["data"] = {
-                "students": [],
-                "classes": [],
-                "subjects": [],
-                "attendance": [],
-                "assessments": [],
-            }
-        elif scope == InspectionScope.FINANCE:
-            export_data["data"] = {
-                "fee_structures": [],
-                "payments": [],
-                "invoices": [],
-            }
-        elif scope == InspectionScope.HR:
-            export_data["data"] = {
-                "employees": [],
-                "payroll_runs": [],
-                "salary_slips": [],
-                "leave_records": [],
-            }
-        elif scope == InspectionScope.TRANSPORT:
-            export_data["data"] = {
-                "vehicles": [],
-                "routes": [],
-                "assignments": [],
-            }
-        elif scope == InspectionScope.HOSTEL:
-            export_data["data"] = {
-                "hostels": [],
-                "rooms": [],
-                "assignments": [],
-            }
-        elif scope == InspectionScope.ATTENDANCE:
-            export_data["data"] = {
-                "attendance_records": [],
-            }
-        elif scope == InspectionScope.FULL:
-            export_data["data"] = {
-                "academic": {},
-                "finance": {},
-                "hr": {},
-                "transport": {},
-                "hostel": {},
-                "attendance": {},
-                "audit_logs": [],
-            }
-        
-        return export_data
+    def _export_can_start(self, export: InspectionExport) -> bool:
+        """Pending/failed exports, or processing ones whose worker went silent."""
+        if export.status in [InspectionStatus.PENDING, InspectionStatus.FAILED]:
+            return True
+        if export.status == InspectionStatus.PROCESSING and export.progress_updated_at:
+            silent_for = datetime.now(timezone.utc) - export.progress_updated_at
+            return silent_for > timedelta(minutes=self.EXPORT_STALE_MINUTES)
+        return False
+    
+    def get_export_file(self, export: InspectionExport) -> Path:
+        """Absolute path of a generated export file."""
+        if not export.file_path:
+            raise ResourceNotFoundError("Export file not found")
+        path = Path(settings.storage_path) / export.file_path
+        if not path.is_file():
+            raise ResourceNotFoundError("Export file not found")
+        return path
     
     async def get_inspection_exports(
         self,
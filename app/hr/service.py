@@ -1011,6 +1011,9 @@ class HRService:
             if balance:
                 balance.used_days += application.total_days
                 balance.remaining_days = balance.total_allocated - balance.used_days
+            
+            if not application.is_half_day:
+                await self._excuse_leave_attendance(application)
         else:
             application.status = LeaveStatus.REJECTED
             application.approved_by = approved_by
@@ -1021,6 +1024,26 @@ class HRService:
         await self.session.refresh(application)
         return application
     
+    async def _excuse_leave_attendance(self, application: LeaveApplication) -> None:
+        """Mark staff attendance excused for the approved range (one UPDATE)."""
+        from app.attendance.service import AttendanceService
+        
+        user_id = (await self.session.execute(
+            select(Employee.user_id).where(
+                Employee.tenant_id == self.tenant_id,
+                Employee.id == application.employee_id,
+            )
+        )).scalar_one_or_none()
+        if not user_id:
+            return
+        
+        await AttendanceService(self.session, self.tenant_id).excuse_teacher_attendance(
+            user_id,
+            application.from_date,
+            application.to_date,
+            remarks=f"Leave approved: {application.reason[:100]}",
+        )
+    
     async def get_leave_application(self, app_id: UUID) -> LeaveApplication:
         """Get a leave application by ID."""
         query = select(LeaveApplication).where(
@@ -13,9 +13,21 @@ from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.core.database import init_db, close_db
+from app.platform.usage.counter import usage_counter
+from app.platform.audit.writer import audit_writer
+from app.governance.partitions import run_partition_maintenance
+from app.platform.observability.rollups import metrics_rollup
+from app.platform.control.enforcement import get_enforcement
+from app.platform.control.limits import get_limits
+from app.core.jobs.runner import get_runner
+from app.ai.gateway import close_ai_gateway
+from app.payments.clients import close_gateway_http_clients, get_gateway_config_cache
+from app.payments.webhooks import webhook_consumer
+from app.ai.ocr_preprocess import shutdown_ocr_pool
 from app.core.exceptions import CustosException
 from app.middleware.tenant import TenantMiddleware
 from app.middleware.logging import RequestLoggingMiddleware, setup_logging
+from app.middleware.query_stats import QueryStatsMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.api.v1 import router as v1_router
 from app.api.health import router as health_router
@@ -33,11 +45,35 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     # await init_db()  # Uncomment if you want auto table creation
+    usage_counter.start()
+    audit_writer.start()
+    get_enforcement().start()  # Plan cache invalidations from other workers
+    get_gateway_config_cache().start()  # ... and payment gateway config ones
+    get_limits().start()
+    if settings.database_url.startswith("postgresql"):
+        await run_partition_maintenance()  # Next months' log partitions
+        if settings.metrics_rollup_enabled:
+            metrics_rollup.start()
+        if settings.job_runner_enabled:
+            get_runner().start()
+        if settings.payment_webhook_consumer_enabled:
+            webhook_consumer.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    await get_runner().stop()  # Finish or requeue running jobs
+    await webhook_consumer.stop()  # Unfinished events are claimed again later
+    await metrics_rollup.stop()  # Write this worker's last metric deltas
+    await usage_counter.stop()  # Flush buffered usage before closing the pool
+    await get_limits().stop()  # Return quota reservations, persist billing signals
+    await audit_writer.stop()  # Drain queued audit events
+    await close_ai_gateway()  # Close the pooled AI HTTP connections
+    shutdown_ocr_pool()
+    await close_gateway_http_clients()
+    await get_gateway_config_cache().stop()
+    await get_enforcement().stop()
     await close_db()
 
 
@@ -91,13 +127,17 @@ Include tenant identifier in the `X-Tenant-ID` header for all requests.
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["X-Request-ID", "X-Response-Time", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
+        expose_headers=[
+            "X-Request-ID", "X-Response-Time", "X-RateLimit-Limit", "X-RateLimit-Remaining",
+            "X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-N-Plus-One",
+        ],
     )
     
     # Custom middleware (order matters - first added = outermost)
     app.add_middleware(RequestLoggingMiddleware)
     app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.rate_limit_requests)
     app.add_middleware(TenantMiddleware)
+    app.add_middleware(QueryStatsMiddleware)
     
     # Exception handlers
     @app.exception_handler(CustosException)
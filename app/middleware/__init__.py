@@ -6,8 +6,10 @@ HTTP middleware for cross-cutting concerns.
 
 from app.middleware.tenant import TenantMiddleware
 from app.middleware.logging import RequestLoggingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 
 __all__ = [
     "TenantMiddleware",
     "RequestLoggingMiddleware",
+    "QueryStatsMiddleware",
 ]
@@ -16,8 +16,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.exceptions import CustosException
-from app.tenants.modules import TenantModuleAccess, TenantModule
-from app.billing.models import Subscription, Plan, SubscriptionStatus
+from app.tenants.modules import TenantModule
+from app.billing.models import Subscription, SubscriptionStatus
+from app.platform.control.enforcement import get_enforcement
 
 
 class PlanEnforcementMiddleware(BaseHTTPMiddleware):
@@ -90,19 +91,14 @@ async def check_module_access(
     tenant_id: UUID,
     module: TenantModule,
 ) -> bool:
-    """Check if tenant has access to module."""
-    query = select(TenantModuleAccess).where(
-        TenantModuleAccess.tenant_id == tenant_id,
-        TenantModuleAccess.module_name == module.value,
-    )
-    result = await session.execute(query)
-    access = result.scalar_one_or_none()
-    
-    # If no explicit record, check plan defaults
-    if not access:
-        return await check_plan_includes_module(session, tenant_id, module)
+    """
+    Check if tenant has access to module.
     
-    return access.is_enabled
+    Explicit TenantModuleAccess records win over plan defaults; both are
+    precomputed in the cached plan info.
+    """
+    plan_info = await get_enforcement().get_plan_info(tenant_id, session)
+    return module.value in plan_info.modules
 
 
 async def check_plan_includes_module(
@@ -110,23 +106,10 @@ async def check_plan_includes_module(
     tenant_id: UUID,
     module: TenantModule,
 ) -> bool:
-    """Check if tenant's plan includes module."""
+    """Check if tenant's plan includes module (ignoring explicit overrides)."""
     from app.tenants.modules import DEFAULT_MODULES_BY_PLAN
     
-    query = select(Subscription).where(
-        Subscription.tenant_id == tenant_id,
-        Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIAL]),
-    )
-    result = await session.execute(query)
-    subscription = result.scalar_one_or_none()
-    
-    if not subscription:
-        # No subscription = free tier
-        return module in DEFAULT_MODULES_BY_PLAN.get("free", [])
-    
-    plan = subscription.plan
-    plan_tier = plan.tier.value if plan else "free"
-    
+    plan_tier = await get_tenant_plan(session, tenant_id)
     return module in DEFAULT_MODULES_BY_PLAN.get(plan_tier, [])
 
 
@@ -134,18 +117,9 @@ async def get_tenant_plan(
     session: AsyncSession,
     tenant_id: UUID,
 ) -> Optional[str]:
-    """Get tenant's plan tier."""
-    query = select(Subscription).where(
-        Subscription.tenant_id == tenant_id,
-        Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIAL]),
-    )
-    result = await session.execute(query)
-    subscription = result.scalar_one_or_none()
-    
-    if not subscription or not subscription.plan:
-        return "free"
-    
-    return subscription.plan.tier.value
+    """Get tenant's plan tier (free without an active or trial subscription)."""
+    plan_info = await get_enforcement().get_plan_info(tenant_id, session)
+    return plan_info.tier.value
 
 
 def require_module(module: TenantModule):
@@ -0,0 +1,98 @@
+"""
+CUSTOS Query Stats Middleware
+
+Per-request SQL accounting (see app/core/query_stats.py).
+
+For every HTTP request:
+- starts a QueryStats in the request context, fed by the engine hooks
+- exports per-route request, query-count and DB-time histograms
+  (labelled with the route template, not the raw path)
+- flags N+1 patterns: one statement fingerprint run more than
+  settings.db_n_plus_one_threshold times in a request
+- in debug mode, reports X-DB-Query-Count / X-DB-Time-Ms (and
+  X-DB-N-Plus-One) response headers
+
+Pure ASGI middleware, so the stats object is shared with the endpoint
+and the headers can be added when the response starts.
+"""
+
+import logging
+import time
+from typing import Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import (
+    http_requests_total,
+    http_request_duration_seconds,
+    http_request_db_queries,
+    http_request_db_seconds,
+    db_n_plus_one_total,
+)
+from app.core.query_stats import QueryStats, start_query_stats
+
+logger = logging.getLogger("custos.queries")
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware recording per-route request and query metrics."""
+    
+    def __init__(self, app, n_plus_one_threshold: int = settings.db_n_plus_one_threshold):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.debug_headers = settings.debug
+        # (route, fingerprint) pairs already logged at WARNING
+        self._reported: Set[Tuple[str, str]] = set()
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = start_query_stats()
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.debug_headers:
+                    headers = list(message.get("headers", []))
+                    headers.extend(self._debug_headers(stats))
+                    message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._record(scope, stats, status_code, time.perf_counter() - started)
+    
+    def _debug_headers(self, stats: QueryStats):
+        headers = [
+            (b"x-db-query-count", str(stats.count).encode()),
+            (b"x-db-time-ms", f"{stats.total_seconds * 1000:.1f}".encode()),
+        ]
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated:
+            headers.append((b"x-db-n-plus-one", str(repeated[0][1]).encode()))
+        return headers
+    
+    def _record(self, scope, stats: QueryStats, status_code: int, duration: float) -> None:
+        method = scope["method"]
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        
+        http_requests_total.labels(method=method, endpoint=route, status=status_code).inc()
+        http_request_duration_seconds.labels(method=method, endpoint=route).observe(duration)
+        http_request_db_queries.labels(method=method, route=route).observe(stats.count)
+        http_request_db_seconds.labels(method=method, route=route).observe(stats.total_seconds)
+        
+        for fingerprint, count in stats.repeated(self.n_plus_one_threshold):
+            db_n_plus_one_total.labels(route=route).inc()
+            key = (route, fingerprint)
+            level = logging.DEBUG if key in self._reported else logging.WARNING
+            self._reported.add(key)
+            logger.log(
+                level,
+                f"Possible N+1 on {method} {route}: {count} x {fingerprint}",
+                extra={"route": route, "query_count": count, "fingerprint": fingerprint},
+            )
@@ -0,0 +1,295 @@
+"""
+CUSTOS Parent Dashboard Data
+
+Family-wide reads behind the parent dashboards, plus their cache.
+
+LOADING: each data source is read once for all of a parent's children
+(grouped by student), not once per child:
+- fee accounts          SUM per student
+- open invoices         COUNT / SUM(balance_due) per student and status
+- next due invoice      DISTINCT ON (student) by due date
+- last payment          DISTINCT ON (student) by payment date
+- month attendance      attendance_summaries rollup rows
+
+CACHING: a built dashboard is kept in Redis per parent (CacheKeys.
+parent_dashboard, CacheTTL.PARENT_DASHBOARD). Fee, payment and
+attendance writes call invalidate_family_dashboards() for the students
+they touch; the linked parents' entries are deleted once the write's
+transaction commits, so a reader never re-caches uncommitted data.
+Without Redis every request is built from the database.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.attendance.models import AttendanceSummary
+from app.core.cache import CacheKeys, CacheTTL, get_cache
+from app.finance.models import FeeInvoice, FeePayment, InvoiceStatus, StudentFeeAccount
+from app.users.models import ParentStudentLink
+
+logger = logging.getLogger(__name__)
+
+
+# Cached dashboard views (ParentPortalService, ParentService)
+DASHBOARD_VIEWS = ("portal", "summary")
+
+OPEN_STATUSES = (InvoiceStatus.PENDING, InvoiceStatus.PARTIAL)
+
+
+# ============================================
+# Loading
+# ============================================
+
+@dataclass
+class ChildFees:
+    """One child's fee position."""
+    total_due: float = 0.0
+    total_paid: float = 0.0
+    pending_invoices: int = 0
+    overdue_invoices: int = 0
+    overdue_amount: float = 0.0
+    next_due_date: Optional[date] = None
+    next_due_amount: float = 0.0
+    last_payment_date: Optional[date] = None
+    last_payment_amount: float = 0.0
+
+
+@dataclass
+class FamilyFees:
+    """Fee positions of a parent's children, with family totals."""
+    children: Dict[UUID, ChildFees] = field(default_factory=dict)
+
+    @property
+    def total_due(self) -> float:
+        return sum(c.total_due for c in self.children.values())
+
+    @property
+    def total_paid(self) -> float:
+        return sum(c.total_paid for c in self.children.values())
+
+    @property
+    def total_overdue(self) -> float:
+        return sum(c.overdue_amount for c in self.children.values())
+
+    @property
+    def pending_invoices(self) -> int:
+        return sum(c.pending_invoices for c in self.children.values())
+
+    @property
+    def overdue_invoices(self) -> int:
+        return sum(c.overdue_invoices for c in self.children.values())
+
+    @property
+    def next_due(self) -> Optional[ChildFees]:
+        """The child whose open invoice falls due first."""
+        due = [c for c in self.children.values() if c.next_due_date]
+        return min(due, key=lambda c: c.next_due_date) if due else None
+
+    @property
+    def last_payment(self) -> Optional[ChildFees]:
+        """The child with the most recent payment."""
+        paid = [c for c in self.children.values() if c.last_payment_date]
+        return max(paid, key=lambda c: c.last_payment_date) if paid else None
+
+
+async def load_family_fees(
+    session: AsyncSession,
+    tenant_id: UUID,
+    student_ids: List[UUID],
+) -> FamilyFees:
+    """Fee positions for a set of students (four grouped queries)."""
+    fees = FamilyFees({student_id: ChildFees() for student_id in student_ids})
+    if not student_ids:
+        return fees
+
+    # Accounts
+    result = await session.execute(
+        select(
+            StudentFeeAccount.student_id,
+            func.sum(StudentFeeAccount.total_due),
+            func.sum(StudentFeeAccount.total_paid),
+        )
+        .where(
+            StudentFeeAccount.tenant_id == tenant_id,
+            StudentFeeAccount.student_id.in_(student_ids),
+            StudentFeeAccount.deleted_at.is_(None),
+        )
+        .group_by(StudentFeeAccount.student_id)
+    )
+    for student_id, total_due, total_paid in result.all():
+        fees.children[student_id].total_due = float(total_due or 0)
+        fees.children[student_id].total_paid = float(total_paid or 0)
+
+    # Open invoices by status
+    result = await session.execute(
+        select(
+            FeeInvoice.student_id,
+            FeeInvoice.status,
+            func.count(FeeInvoice.id),
+            func.sum(FeeInvoice.balance_due),
+        )
+        .where(
+            FeeInvoice.tenant_id == tenant_id,
+            FeeInvoice.student_id.in_(student_ids),
+            FeeInvoice.status.in_([*OPEN_STATUSES, InvoiceStatus.OVERDUE]),
+            FeeInvoice.deleted_at.is_(None),
+        )
+        .group_by(FeeInvoice.student_id, FeeInvoice.status)
+    )
+    for student_id, status, count, balance in result.all():
+        child = fees.children[student_id]
+        if status == InvoiceStatus.OVERDUE:
+            child.overdue_invoices += count
+            child.overdue_amount += float(balance or 0)
+        else:
+            child.pending_invoices += count
+
+    # Next due invoice per student
+    result = await session.execute(
+        select(FeeInvoice.student_id, FeeInvoice.due_date, FeeInvoice.balance_due)
+        .where(
+            FeeInvoice.tenant_id == tenant_id,
+            FeeInvoice.student_id.in_(student_ids),
+            FeeInvoice.status.in_(OPEN_STATUSES),
+            FeeInvoice.deleted_at.is_(None),
+        )
+        .distinct(FeeInvoice.student_id)
+        .order_by(FeeInvoice.student_id, FeeInvoice.due_date)
+    )
+    for student_id, due_date, balance in result.all():
+        fees.children[student_id].next_due_date = due_date
+        fees.children[student_id].next_due_amount = float(balance or 0)
+
+    # Last payment per student
+    result = await session.execute(
+        select(FeeInvoice.student_id, FeePayment.payment_date, FeePayment.amount_paid)
+        .join(FeeInvoice, FeePayment.invoice_id == FeeInvoice.id)
+        .where(
+            FeePayment.tenant_id == tenant_id,
+            FeeInvoice.student_id.in_(student_ids),
+            FeePayment.is_reversed == False,
+            FeePayment.deleted_at.is_(None),
+        )
+        .distinct(FeeInvoice.student_id)
+        .order_by(FeeInvoice.student_id, FeePayment.payment_date.desc())
+    )
+    for student_id, payment_date, amount in result.all():
+        fees.children[student_id].last_payment_date = payment_date
+        fees.children[student_id].last_payment_amount = float(amount or 0)
+
+    return fees
+
+
+async def load_month_attendance(
+    session: AsyncSession,
+    tenant_id: UUID,
+    student_ids: List[UUID],
+    year: int,
+    month: int,
+) -> Dict[UUID, float]:
+    """Attendance percentage per student for a month (students without a rollup row are omitted)."""
+    if not student_ids:
+        return {}
+    result = await session.execute(
+        select(AttendanceSummary.student_id, AttendanceSummary.attendance_percentage).where(
+            AttendanceSummary.tenant_id == tenant_id,
+            AttendanceSummary.student_id.in_(student_ids),
+            AttendanceSummary.year == year,
+            AttendanceSummary.month == month,
+        )
+    )
+    return {student_id: percentage for student_id, percentage in result.all()}
+
+
+# ============================================
+# Cache
+# ============================================
+
+async def get_cached_dashboard(tenant_id: UUID, parent_id: UUID, view: str) -> Optional[Dict[str, Any]]:
+    """A parent's cached dashboard, or None."""
+    cache = await get_cache()
+    return await cache.get(CacheKeys.parent_dashboard(tenant_id, parent_id, view))
+
+
+async def cache_dashboard(tenant_id: UUID, parent_id: UUID, view: str, value: Dict[str, Any]) -> None:
+    """Cache a built dashboard (JSON-serializable)."""
+    cache = await get_cache()
+    await cache.set(
+        CacheKeys.parent_dashboard(tenant_id, parent_id, view),
+        value,
+        ttl=CacheTTL.PARENT_DASHBOARD,
+    )
+
+
+# Keys to delete when a session commits
+_STALE_KEYS = "stale_parent_dashboards"
+
+_pending_deletes: Set[asyncio.Task] = set()
+
+
+async def invalidate_family_dashboards(
+    session: AsyncSession,
+    tenant_id: UUID,
+    student_ids: Iterable[UUID],
+) -> None:
+    """
+    Drop the cached dashboards of these students' parents.
+
+    Call from the write, in its transaction; the entries are deleted
+    after the session commits (and kept if it rolls back).
+    """
+    student_ids = {student_id for student_id in student_ids if student_id}
+    if not student_ids:
+        return
+
+    cache = await get_cache()
+    if not cache.is_connected:
+        return
+
+    result = await session.execute(
+        select(ParentStudentLink.parent_id)
+        .where(
+            ParentStudentLink.tenant_id == tenant_id,
+            ParentStudentLink.student_id.in_(student_ids),
+        )
+        .distinct()
+    )
+    keys = session.info.setdefault(_STALE_KEYS, set())
+    keys.update(
+        CacheKeys.parent_dashboard(tenant_id, parent_id, view)
+        for parent_id in result.scalars().all()
+        for view in DASHBOARD_VIEWS
+    )
+
+
+async def _delete_keys(keys: Set[str]) -> None:
+    cache = await get_cache()
+    await asyncio.gather(*(cache.delete(key) for key in keys))
+
+
+@event.listens_for(Session, "after_commit")
+def _delete_stale_dashboards(session: Session) -> None:
+    keys = session.info.pop(_STALE_KEYS, None)
+    if not keys:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning(f"Parent dashboards not invalidated (no event loop): {len(keys)} keys")
+        return
+    task = loop.create_task(_delete_keys(keys))
+    _pending_deletes.add(task)
+    task.add_done_callback(_pending_deletes.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_dashboards(session: Session) -> None:
+    session.info.pop(_STALE_KEYS, None)
@@ -165,6 +165,7 @@ class ChildSummary(BaseModel):
     section: str = ""
     roll_number: Optional[str] = None
     photo_url: Optional[str] = None
+    attendance_percentage: Optional[float] = None  # Current month
 
 
 class AttendanceSummary(BaseModel):
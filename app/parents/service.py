@@ -28,7 +28,13 @@ from app.finance.models import (
     FeeReceipt,
     InvoiceStatus,
 )
-from app.users.models import User
+from app.parents.dashboard import (
+    cache_dashboard,
+    get_cached_dashboard,
+    load_family_fees,
+    load_month_attendance,
+)
+from app.users.models import ParentStudentLink, User
 
 
 class ParentPortalService:
@@ -53,43 +59,30 @@ class ParentPortalService:
     
     async def get_children(self) -> List[ChildInfo]:
         """Get list of children linked to this parent."""
-        from app.users.models import ParentStudentLink
-        
-        # Get linked students
-        query = select(ParentStudentLink).where(
+        query = select(User, ParentStudentLink).join(
+            ParentStudentLink, ParentStudentLink.student_id == User.id,
+        ).where(
             ParentStudentLink.parent_id == self.parent_id,
             ParentStudentLink.tenant_id == self.tenant_id,
             ParentStudentLink.is_active == True,
-        )
+            User.tenant_id == self.tenant_id,
+            User.deleted_at.is_(None),
+        ).order_by(ParentStudentLink.created_at)
         
         result = await self.session.execute(query)
-        links = result.scalars().all()
-        
-        children = []
-        for link in links:
-            # Get student details
-            student_query = select(User).where(
-                User.id == link.student_id,
-                User.tenant_id == self.tenant_id,
-                User.deleted_at.is_(None),
-            )
-            student_result = await self.session.execute(student_query)
-            student = student_result.scalar_one_or_none()
-            
-            if student:
-                children.append(ChildInfo(
-                    student_id=student.id,
-                    name=student.full_name or student.email,
-                    class_name=getattr(link, 'class_name', None),
-                    roll_number=getattr(student, 'roll_number', None),
-                ))
         
-        return children
+        return [
+            ChildInfo(
+                student_id=student.id,
+                name=student.full_name or student.email,
+                class_name=getattr(link, 'class_name', None),
+                roll_number=getattr(student, 'roll_number', None),
+            )
+            for student, link in result.all()
+        ]
     
     async def verify_child_access(self, student_id: UUID) -> bool:
         """Verify parent has access to this student."""
-        from app.users.models import ParentStudentLink
-        
         query = select(ParentStudentLink).where(
             ParentStudentLink.parent_id == self.parent_id,
             ParentStudentLink.student_id == student_id,
@@ -105,109 +98,52 @@ class ParentPortalService:
     # ============================================
     
     async def get_dashboard(self) -> ParentDashboard:
-        """Get parent dashboard with financial summary."""
+        """
+        Get parent dashboard with financial summary.
+        
+        Cached per parent; see app.parents.dashboard for the grouped
+        queries and invalidation.
+        """
+        cached = await get_cached_dashboard(self.tenant_id, self.parent_id, "portal")
+        if cached is not None:
+            return ParentDashboard.model_validate(cached)
+        
         # Get parent info
-        parent_query = select(User).where(
+        parent_query = select(User.full_name).where(
             User.id == self.parent_id,
             User.tenant_id == self.tenant_id,
         )
-        parent_result = await self.session.execute(parent_query)
-        parent = parent_result.scalar_one_or_none()
-        
-        parent_name = parent.full_name if parent else "Parent"
+        parent_name = await self.session.scalar(parent_query) or "Parent"
         
         # Get children
         children = await self.get_children()
         student_ids = [c.student_id for c in children]
         
-        if not student_ids:
-            return ParentDashboard(
-                parent_id=self.parent_id,
-                parent_name=parent_name,
-                children=children,
-            )
-        
         # Aggregate financials across all children
-        total_due = 0.0
-        total_paid = 0.0
-        total_overdue = 0.0
-        pending_count = 0
-        overdue_count = 0
-        
-        for student_id in student_ids:
-            # Get account
-            account_query = select(StudentFeeAccount).where(
-                StudentFeeAccount.student_id == student_id,
-                StudentFeeAccount.tenant_id == self.tenant_id,
-                StudentFeeAccount.deleted_at.is_(None),
-            )
-            result = await self.session.execute(account_query)
-            accounts = result.scalars().all()
-            
-            for account in accounts:
-                total_due += float(account.total_due)
-                total_paid += float(account.total_paid)
-        
-        # Get overdue invoices
-        overdue_query = select(FeeInvoice).where(
-            FeeInvoice.student_id.in_(student_ids),
-            FeeInvoice.tenant_id == self.tenant_id,
-            FeeInvoice.status == InvoiceStatus.OVERDUE,
-            FeeInvoice.deleted_at.is_(None),
-        )
-        overdue_result = await self.session.execute(overdue_query)
-        overdue_invoices = overdue_result.scalars().all()
-        
-        for inv in overdue_invoices:
-            total_overdue += float(inv.balance_due)
-            overdue_count += 1
-        
-        # Get pending invoices
-        pending_query = select(func.count(FeeInvoice.id)).where(
-            FeeInvoice.student_id.in_(student_ids),
-            FeeInvoice.tenant_id == self.tenant_id,
-            FeeInvoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIAL]),
-            FeeInvoice.deleted_at.is_(None),
-        )
-        pending_count = await self.session.scalar(pending_query) or 0
-        
-        # Get next due
-        next_due_query = select(FeeInvoice).where(
-            FeeInvoice.student_id.in_(student_ids),
-            FeeInvoice.tenant_id == self.tenant_id,
-            FeeInvoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIAL]),
-            FeeInvoice.deleted_at.is_(None),
-        ).order_by(FeeInvoice.due_date).limit(1)
-        
-        next_due_result = await self.session.execute(next_due_query)
-        next_due = next_due_result.scalar_one_or_none()
-        
-        # Get last payment
-        last_payment_query = select(FeePayment).join(FeeInvoice).where(
-            FeeInvoice.student_id.in_(student_ids),
-            FeePayment.tenant_id == self.tenant_id,
-            FeePayment.is_reversed == False,
-            FeePayment.deleted_at.is_(None),
-        ).order_by(FeePayment.payment_date.desc()).limit(1)
-        
-        last_payment_result = await self.session.execute(last_payment_query)
-        last_payment = last_payment_result.scalar_one_or_none()
+        fees = await load_family_fees(self.session, self.tenant_id, student_ids)
+        next_due = fees.next_due
+        last_payment = fees.last_payment
         
-        return ParentDashboard(
+        dashboard = ParentDashboard(
             parent_id=self.parent_id,
             parent_name=parent_name,
             children=children,
-            total_due=total_due,
-            total_paid=total_paid,
-            total_overdue=total_overdue,
-            balance=total_due - total_paid,
-            next_due_date=next_due.due_date if next_due else None,
-            next_due_amount=float(next_due.balance_due) if next_due else 0.0,
-            pending_invoices=pending_count,
-            overdue_invoices=overdue_count,
-            last_payment_date=last_payment.payment_date if last_payment else None,
-            last_payment_amount=float(last_payment.amount_paid) if last_payment else 0.0,
+            total_due=fees.total_due,
+            total_paid=fees.total_paid,
+            total_overdue=fees.total_overdue,
+            balance=fees.total_due - fees.total_paid,
+            next_due_date=next_due.next_due_date if next_due else None,
+            next_due_amount=next_due.next_due_amount if next_due else 0.0,
+            pending_invoices=fees.pending_invoices,
+            overdue_invoices=fees.overdue_invoices,
+            last_payment_date=last_payment.last_payment_date if last_payment else None,
+            last_payment_amount=last_payment.last_payment_amount if last_payment else 0.0,
         )
+        
+        await cache_dashboard(
+            self.tenant_id, self.parent_id, "portal", dashboard.model_dump(mode="json"),
+        )
+        return dashboard
     
     # ============================================
     # Invoices
@@ -461,28 +397,39 @@ class ParentService:
     # ============================================
     
     async def get_dashboard(self, parent_id: UUID):
-        """Get comprehensive parent dashboard."""
-        from app.parents.schemas import (
-            ParentDashboardResponse, ChildSummary,
-            FeesSummary, AttendanceSummary, AcademicSummary,
-        )
-        
-        # Get children
-        children = await self.get_children(parent_id)
+        """
+        Get comprehensive parent dashboard.
         
-        # Aggregate data across all children
-        total_pending_fees = 0.0
-        total_paid_fees = 0.0
-        unread_notifications = 0
-        upcoming_events = []
+        Children and fee totals are cached per parent (see
+        app.parents.dashboard); the unread count is read live.
+        """
+        summary = await get_cached_dashboard(self.tenant_id, parent_id, "summary")
         
-        for child in children:
-            fees = await self.get_fees_summary(child.student_id)
-            total_pending_fees += fees.pending_amount
-            total_paid_fees += fees.paid_amount
+        if summary is None:
+            children = await self.get_children(parent_id)
+            student_ids = [c.student_id for c in children]
+            
+            # Aggregate data across all children
+            fees = await load_family_fees(self.session, self.tenant_id, student_ids)
+            today = date.today()
+            attendance = await load_month_attendance(
+                self.session, self.tenant_id, student_ids, today.year, today.month,
+            )
+            for child in children:
+                child.attendance_percentage = attendance.get(child.student_id)
+            
+            summary = {
+                "parent_id": str(parent_id),
+                "children": [c.model_dump(mode="json") for c in children],
+                "total_children": len(children),
+                "total_pending_fees": fees.total_due - fees.total_paid,
+                "total_paid_fees": fees.total_paid,
+                "upcoming_events": [],
+            }
+            await cache_dashboard(self.tenant_id, parent_id, "summary", summary)
         
         # Get notifications count
-        from app.notifications.models import Notification
+        from app.platform.notifications.models import Notification
         notif_query = select(func.count(Notification.id)).where(
             Notification.user_id == parent_id,
             Notification.tenant_id == self.tenant_id,
@@ -490,15 +437,7 @@ class ParentService:
         )
         unread_notifications = await self.session.scalar(notif_query) or 0
         
-        return {
-            "parent_id": str(parent_id),
-            "children": [c.model_dump() for c in children],
-            "total_children": len(children),
-            "total_pending_fees": total_pending_fees,
-            "total_paid_fees": total_paid_fees,
-            "unread_notifications": unread_notifications,
-            "upcoming_events": upcoming_events,
-        }
+        return {**summary, "unread_notifications": unread_notifications}
     
     # ============================================
     # Children
@@ -506,39 +445,31 @@ class ParentService:
     
     async def get_children(self, parent_id: UUID):
         """Get list of children linked to parent."""
-        from app.users.models import ParentStudentLink
         from app.parents.schemas import ChildSummary
         
-        query = select(ParentStudentLink).where(
+        query = select(User, ParentStudentLink).join(
+            ParentStudentLink, ParentStudentLink.student_id == User.id,
+        ).where(
             ParentStudentLink.parent_id == parent_id,
             ParentStudentLink.tenant_id == self.tenant_id,
             ParentStudentLink.is_active == True,
-        )
+            User.tenant_id == self.tenant_id,
+            User.deleted_at.is_(None),
+        ).order_by(ParentStudentLink.created_at)
         
         result = await self.session.execute(query)
-        links = result.scalars().all()
-        
-        children = []
-        for link in links:
-            student_query = select(User).where(
-                User.id == link.student_id,
-                User.tenant_id == self.tenant_id,
-                User.deleted_at.is_(None),
+        
+        return [
+            ChildSummary(
+                student_id=student.id,
+                name=student.full_name or student.email,
+                class_name=getattr(link, 'class_name', 'N/A'),
+                section=getattr(link, 'section_name', ''),
+                roll_number=getattr(student, 'roll_number', None),
+                photo_url=getattr(student, 'avatar_url', None),
             )
-            student_result = await self.session.execute(student_query)
-            student = student_result.scalar_one_or_none()
-            
-            if student:
-                children.append(ChildSummary(
-                    student_id=student.id,
-                    name=student.full_name or student.email,
-                    class_name=getattr(link, 'class_name', 'N/A'),
-                    section=getattr(link, 'section_name', ''),
-                    roll_number=getattr(student, 'roll_number', None),
-                    photo_url=getattr(student, 'avatar_url', None),
-                ))
-        
-        return children
+            for student, link in result.all()
+        ]
     
     async def get_child_detail(self, student_id: UUID):
         """Get detailed information for a child."""
@@ -625,19 +556,22 @@ class ParentService:
         month: int, 
         year: int,
     ):
-        """Get attendance summary."""
+        """Get attendance summary (from the monthly attendance rollup)."""
         from app.parents.schemas import AttendanceSummary
+        from app.attendance.service import AttendanceService
         
-        # Would query from attendance table
+        summary = await AttendanceService(self.session, self.tenant_id).get_attendance_summary(
+            student_id, year, month
+        )
         return AttendanceSummary(
             student_id=student_id,
             month=month,
             year=year,
-            total_days=22,
-            present_days=20,
-            absent_days=2,
-            late_days=1,
-            attendance_percentage=90.9,
+            total_days=summary.total_days,
+            present_days=summary.present_days,
+            absent_days=summary.absent_days,
+            late_days=summary.late_days,
+            attendance_percentage=summary.attendance_percentage,
             daily_records=[],
         )
     
@@ -649,37 +583,17 @@ class ParentService:
         """Get fee summary for a student."""
         from app.parents.schemas import FeesSummary
         
-        # Query from finance module
-        from app.finance.models import StudentFeeAccount, FeeInvoice, InvoiceStatus
-        
-        account_query = select(StudentFeeAccount).where(
-            StudentFeeAccount.student_id == student_id,
-            StudentFeeAccount.tenant_id == self.tenant_id,
-            StudentFeeAccount.deleted_at.is_(None),
-        )
-        result = await self.session.execute(account_query)
-        accounts = result.scalars().all()
-        
-        total_due = sum(float(a.total_due) for a in accounts)
-        total_paid = sum(float(a.total_paid) for a in accounts)
-        
-        # Count pending invoices
-        pending_query = select(func.count(FeeInvoice.id)).where(
-            FeeInvoice.student_id == student_id,
-            FeeInvoice.tenant_id == self.tenant_id,
-            FeeInvoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.PARTIAL]),
-            FeeInvoice.deleted_at.is_(None),
-        )
-        pending_count = await self.session.scalar(pending_query) or 0
+        fees = await load_family_fees(self.session, self.tenant_id, [student_id])
+        child = fees.children[student_id]
         
         return FeesSummary(
             student_id=student_id,
-            total_amount=total_due,
-            paid_amount=total_paid,
-            pending_amount=total_due - total_paid,
-            pending_invoices=pending_count,
-            next_due_date=None,
-            next_due_amount=0.0,
+            total_amount=child.total_due,
+            paid_amount=child.total_paid,
+            pending_amount=child.total_due - child.total_paid,
+            pending_invoices=child.pending_invoices,
+            next_due_date=child.next_due_date,
+            next_due_amount=child.next_due_amount,
         )
     
     async def get_invoices(
@@ -0,0 +1,166 @@
+"""
+CUSTOS Payment Gateway Clients
+
+Process-wide state shared by every PaymentService:
+
+- One pooled httpx client per gateway API (keep-alive, HTTP/2 when the
+  h2 package is installed), so checkouts reuse warm TCP/TLS connections
+  instead of handshaking on every call
+- A per-tenant cache of gateway credentials (GatewayConfigCache), so
+  requests do not re-read gateway_configs. Entries are dropped on every
+  worker when a config changes (invalidate_gateway_configs)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.payments.models import GatewayConfig, PaymentGateway
+from app.platform.control.entitlements import EntitlementCache
+
+logger = logging.getLogger(__name__)
+
+
+GATEWAY_INVALIDATION_CHANNEL = "custos:payment-gateways:invalidate"
+
+
+# ============================================
+# HTTP Clients
+# ============================================
+
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_gateway_http_client(base_url: str) -> httpx.AsyncClient:
+    """Pooled client for a gateway API, created on first use."""
+    client = _http_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.payment_http_max_connections,
+                max_keepalive_connections=settings.payment_http_max_connections,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(
+                settings.payment_http_timeout_seconds,
+                connect=settings.payment_http_connect_timeout_seconds,
+            ),
+        )
+        _http_clients[base_url] = client
+    return client
+
+
+async def close_gateway_http_clients() -> None:
+    """Close the pooled connections (shutdown)."""
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Could not close payment HTTP client: {e}")
+
+
+# ============================================
+# Gateway Config Cache
+# ============================================
+
+@dataclass(frozen=True)
+class GatewayCredentials:
+    """Session-independent copy of an active GatewayConfig."""
+    gateway: PaymentGateway
+    api_key: Optional[str]
+    api_secret: Optional[str]
+    webhook_secret: Optional[str]
+    merchant_id: Optional[str]
+    is_sandbox: bool
+
+    @classmethod
+    def from_config(cls, config: GatewayConfig) -> "GatewayCredentials":
+        return cls(
+            gateway=config.gateway,
+            api_key=config.api_key,
+            api_secret=config.api_secret,
+            webhook_secret=config.webhook_secret,
+            merchant_id=config.merchant_id,
+            is_sandbox=config.is_sandbox,
+        )
+
+
+@dataclass(frozen=True)
+class TenantGateways:
+    """A tenant's active gateway credentials."""
+    configs: Dict[PaymentGateway, GatewayCredentials] = field(default_factory=dict)
+
+    @property
+    def exists(self) -> bool:
+        # Tenants without gateways are cached briefly (negative entry)
+        return bool(self.configs)
+
+
+async def _load_tenant_gateways(tenant_id: UUID, db=None) -> TenantGateways:
+    async def _load(session) -> TenantGateways:
+        result = await session.execute(
+            select(GatewayConfig).where(
+                GatewayConfig.tenant_id == tenant_id,
+                GatewayConfig.is_active == True,
+                GatewayConfig.is_deleted == False,
+            )
+        )
+        return TenantGateways({
+            config.gateway: GatewayCredentials.from_config(config)
+            for config in result.scalars().all()
+        })
+
+    if db is not None:
+        return await _load(db)
+
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        return await _load(session)
+
+
+_config_cache: Optional[EntitlementCache] = None
+
+
+def get_gateway_config_cache() -> EntitlementCache:
+    """Per-tenant gateway credential cache (LRU + TTL, pub/sub invalidation)."""
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = EntitlementCache(_load_tenant_gateways, channel=GATEWAY_INVALIDATION_CHANNEL)
+    return _config_cache
+
+
+async def get_gateway_credentials(
+    tenant_id: UUID,
+    gateway: PaymentGateway,
+    db=None,
+) -> Optional[GatewayCredentials]:
+    """A tenant's active credentials for a gateway, or None."""
+    gateways = await get_gateway_config_cache().get(tenant_id, db)
+    return gateways.configs.get(gateway)
+
+
+def invalidate_gateway_configs(tenant_id: UUID) -> None:
+    """
+    Drop a tenant's cached gateway credentials on every worker.
+
+    Call after committing gateway config changes.
+    """
+    get_gateway_config_cache().invalidate(tenant_id)
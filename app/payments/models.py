@@ -10,6 +10,7 @@ from typing import Optional, List
 from uuid import UUID
 
 from sqlalchemy import String, Text, Boolean, Integer, Numeric, DateTime, ForeignKey, Index, JSON
+from sqlalchemy import UniqueConstraint, func
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -58,6 +59,14 @@ class RefundStatus(str, Enum):
     FAILED = "failed"
 
 
+class WebhookStatus(str, Enum):
+    """Webhook inbox state."""
+    PENDING = "pending"  # Waiting (or backing off) for the consumer
+    PROCESSING = "processing"  # Leased by a consumer
+    PROCESSED = "processed"
+    DEAD = "dead"  # Out of attempts; retried manually
+
+
 class GatewayConfig(TenantBaseModel):
     """
     Payment gateway configuration per tenant.
@@ -106,6 +115,7 @@ class PaymentOrder(TenantBaseModel):
         Index("ix_payment_order_tenant", "tenant_id", "status"),
         Index("ix_payment_order_student", "tenant_id", "student_id"),
         Index("ix_payment_order_invoice", "tenant_id", "invoice_id"),
+        Index("ix_payment_order_gateway_order", "tenant_id", "gateway_order_id"),
     )
     
     # Order reference
@@ -249,6 +259,7 @@ class PaymentRefund(TenantBaseModel):
     __table_args__ = (
         Index("ix_refund_tenant", "tenant_id", "status"),
         Index("ix_refund_transaction", "transaction_id", "status"),
+        Index("ix_refund_gateway_refund", "tenant_id", "gateway_refund_id"),
     )
     
     # Refund reference
@@ -299,15 +310,20 @@ class PaymentRefund(TenantBaseModel):
 
 class WebhookEvent(TenantBaseModel):
     """
-    Webhook events from payment gateways.
+    Webhook events from payment gateways (the webhook inbox).
     
-    Used for tracking and debugging.
+    Stored once per (gateway, event_id) when received and handled later
+    by the WebhookConsumer; events of one gateway order (ordering_key)
+    are handled one at a time, oldest first.
     """
     __tablename__ = "webhook_events"
     
     __table_args__ = (
+        UniqueConstraint("gateway", "event_id", name="uq_webhook_gateway_event"),
         Index("ix_webhook_tenant", "tenant_id", "gateway"),
         Index("ix_webhook_event", "gateway", "event_type"),
+        Index("ix_webhook_inbox", "status", "next_attempt_at"),
+        Index("ix_webhook_ordering", "ordering_key", "created_at"),
     )
     
     # Event reference
@@ -323,7 +339,18 @@ class WebhookEvent(TenantBaseModel):
     event_type: Mapped[str] = mapped_column(String(100), nullable=False)
     payload: Mapped[dict] = mapped_column(JSON, nullable=False)
     
+    # Gateway order the event belongs to (per-order ordering)
+    ordering_key: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    
     # Processing
+    status: Mapped[str] = mapped_column(String(20), default=WebhookStatus.PENDING.value)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    locked_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
     is_processed: Mapped[bool] = mapped_column(Boolean, default=False)
     processed_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
@@ -4,6 +4,8 @@ CUSTOS Payment Gateway Router
 API endpoints for payment operations.
 """
 
+import hashlib
+import json
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime, timezone
@@ -14,7 +16,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.auth.dependencies import CurrentUser, require_permission
 from app.users.rbac import Permission, SystemRole
+from app.payments.clients import get_gateway_credentials
 from app.payments.service import PaymentService, format_amount
+from app.payments.webhooks import accept_webhook, verify_signature
 from app.payments.models import PaymentGateway, PaymentStatus
 from app.payments.schemas import (
     GatewayConfigCreate, GatewayConfigUpdate, GatewayConfigResponse,
@@ -23,7 +27,7 @@ from app.payments.schemas import (
     RefundCreate, RefundResponse,
     PaymentHistoryResponse, PaymentHistoryItem,
     PaymentReceiptResponse, PaymentStats,
-    WebhookPayload, WebhookResponse,
+    WebhookPayload, WebhookResponse, WebhookEventResponse,
 )
 
 
@@ -238,6 +242,7 @@ async def verify_payment(
     
     # Update invoice payment status
     from app.finance.models import FeeInvoice, InvoiceStatus
+    from app.parents.dashboard import invalidate_family_dashboards
     from sqlalchemy import select
     
     order = await service.get_order(data.order_id)
@@ -252,7 +257,11 @@ async def verify_payment(
             invoice.paid_at = datetime.now(timezone.utc)
         else:
             invoice.status = InvoiceStatus.PARTIAL
-        await db.commit()
+    
+    # The captured order changed the student's fees, invoice or not
+    # (same key as the payment.captured webhook)
+    await invalidate_family_dashboards(db, user.tenant_id, [order.student_id])
+    await db.commit()
     
     return PaymentTransactionResponse(
         id=transaction.id,
@@ -420,26 +429,76 @@ async def get_payment_stats(
 # Webhooks
 # ============================================
 
-@router.post("/webhooks/razorpay", response_model=WebhookResponse)
+@router.post("/webhooks/razorpay/{tenant_id}", response_model=WebhookResponse)
 async def razorpay_webhook(
+    tenant_id: UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Razorpay webhook endpoint.
+    Razorpay webhook endpoint (configure one URL per school).
     
-    Note: This should validate webhook signature in production.
+    Verifies X-Razorpay-Signature with the school's webhook secret and
+    stores the event in the webhook inbox; handling happens in the
+    background. Redelivered events are acknowledged without effect.
     """
-    payload = await request.json()
+    body = await request.body()
+    
+    credentials = await get_gateway_credentials(tenant_id, PaymentGateway.RAZORPAY, db)
+    if not credentials or not credentials.webhook_secret:
+        raise HTTPException(status_code=404, detail="Webhook not configured")
+    
+    signature = request.headers.get("x-razorpay-signature", "")
+    if not verify_signature(body, signature, credentials.webhook_secret):
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
     
-    event_id = payload.get("event_id", "")
-    event_type = payload.get("event", "")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
     
-    # Get tenant from order (simplified)
-    # In production, would verify signature and extract tenant from order data
+    event_id = (
+        request.headers.get("x-razorpay-event-id")
+        or payload.get("id")
+        or hashlib.sha256(body).hexdigest()
+    )
+    accepted = await accept_webhook(
+        db,
+        tenant_id=tenant_id,
+        gateway=PaymentGateway.RAZORPAY,
+        event_id=event_id,
+        event_type=payload.get("event", ""),
+        payload=payload,
+    )
     
-    # For now, just store the webhook
-    return WebhookResponse(success=True, message="Webhook received")
+    return WebhookResponse(
+        success=True,
+        message="Webhook received" if accepted else "Duplicate webhook ignored",
+    )
+
+
+@router.get("/webhooks/dead", response_model=List[WebhookEventResponse])
+async def list_dead_webhooks(
+    user: CurrentUser,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permission(Permission.BILLING_MANAGE)),
+):
+    """List webhook events that failed every attempt."""
+    service = PaymentService(db, user.tenant_id)
+    return await service.list_dead_webhooks(limit)
+
+
+@router.post("/webhooks/{webhook_id}/retry", response_model=WebhookEventResponse)
+async def retry_webhook(
+    webhook_id: UUID,
+    user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permission(Permission.BILLING_MANAGE)),
+):
+    """Re-queue a dead-lettered webhook event."""
+    service = PaymentService(db, user.tenant_id)
+    return await service.retry_webhook(webhook_id)
 
 
 # ============================================
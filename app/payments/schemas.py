@@ -184,6 +184,21 @@ class WebhookResponse(BaseModel):
     message: str
 
 
+class WebhookEventResponse(BaseModel):
+    """Webhook inbox entry."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: UUID
+    event_id: str
+    gateway: PaymentGateway
+    event_type: str
+    status: str
+    attempts: int
+    error_message: Optional[str] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+
+
 # ============================================
 # Payment Link Schemas (for sharing)
 # ============================================
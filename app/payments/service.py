@@ -4,28 +4,38 @@ CUSTOS Payment Gateway Service
 Abstract payment gateway interface with Razorpay implementation.
 """
 
+import asyncio
 import hashlib
 import hmac
+import logging
 import secrets
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
 from uuid import UUID
 
+import httpx
 from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.exceptions import ResourceNotFoundError, ValidationError, PaymentError
+from app.payments.clients import (
+    get_gateway_credentials, get_gateway_http_client, invalidate_gateway_configs,
+)
 from app.payments.models import (
     GatewayConfig, PaymentOrder, PaymentTransaction, PaymentRefund, WebhookEvent,
-    PaymentGateway, PaymentStatus, PaymentMethod, RefundStatus,
+    PaymentGateway, PaymentStatus, PaymentMethod, RefundStatus, WebhookStatus,
 )
+from app.payments.webhooks import webhook_consumer
 from app.payments.schemas import (
     GatewayConfigCreate, GatewayConfigUpdate,
     PaymentOrderCreate, PaymentVerifyRequest, RefundCreate,
     PaymentStats,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def generate_order_number() -> str:
     """Generate unique order number."""
@@ -124,13 +134,85 @@ class PaymentGatewayInterface(ABC):
 # ============================================
 
 class RazorpayGateway(PaymentGatewayInterface):
-    """Razorpay payment gateway implementation."""
+    """
+    Razorpay payment gateway implementation.
+    
+    Calls share the process-wide pooled client for the API (see
+    app.payments.clients). Failed calls are retried when that is safe:
+    reads always, writes only when the request never reached Razorpay,
+    except order creation, which uses its receipt as idempotency key.
+    """
     
-    def __init__(self, api_key: str, api_secret: str, is_sandbox: bool = True):
+    API_URL = "https://api.razorpay.com/v1"
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    RETRY_BACKOFF_SECONDS = 0.25
+    
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        is_sandbox: bool = True,
+        base_url: Optional[str] = None,
+    ):
         self.api_key = api_key
         self.api_secret = api_secret
         self.is_sandbox = is_sandbox
-        self.base_url = "https://api.razorpay.com/v1"
+        self.base_url = base_url or self.API_URL
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return get_gateway_http_client(self.base_url)
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        action: str,
+        json: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        recover: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Call the API, retrying with backoff (settings.payment_http_retries).
+        
+        recover looks up the result of a write whose outcome is unknown
+        (sent, but timed out or got a 5xx); with it the write is retried
+        like a read, and a result it finds is returned instead.
+        """
+        idempotent = method == "GET" or recover is not None
+        attempts = settings.payment_http_retries + 1
+        
+        for attempt in range(1, attempts + 1):
+            ambiguous = False
+            try:
+                response = await self.http.request(
+                    method, path, json=json, params=params,
+                    auth=(self.api_key, self.api_secret),
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # Never reached the gateway
+                error, retry = str(e) or type(e).__name__, True
+            except httpx.TransportError as e:
+                error, retry, ambiguous = str(e) or type(e).__name__, idempotent, True
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                error = response.text
+                retry = response.status_code == 429 or (
+                    idempotent and response.status_code in self.RETRY_STATUSES
+                )
+                ambiguous = response.status_code >= 500
+            
+            if not retry or attempt == attempts:
+                raise PaymentError(f"Failed to {action}: {error}")
+            
+            logger.warning(f"Razorpay {action} failed (attempt {attempt}), retrying: {error}")
+            await asyncio.sleep(self.RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            
+            if ambiguous and recover is not None:
+                recovered = await recover()
+                if recovered:
+                    return recovered
     
     async def create_order(
         self,
@@ -139,25 +221,27 @@ class RazorpayGateway(PaymentGatewayInterface):
         receipt: str,
         notes: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Create Razorpay order."""
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/orders",
-                auth=(self.api_key, self.api_secret),
-                json={
-                    "amount": amount,
-                    "currency": currency,
-                    "receipt": receipt,
-                    "notes": notes or {},
-                },
-            )
-            
-            if response.status_code != 200:
-                raise PaymentError(f"Failed to create order: {response.text}")
-            
-            return response.json()
+        """Create Razorpay order (receipt = idempotency key)."""
+        return await self._request(
+            "POST",
+            "/orders",
+            "create order",
+            json={
+                "amount": amount,
+                "currency": currency,
+                "receipt": receipt,
+                "notes": notes or {},
+            },
+            recover=lambda: self._find_order(receipt),
+        )
+    
+    async def _find_order(self, receipt: str) -> Optional[Dict[str, Any]]:
+        """Order created with this receipt, if any."""
+        response = await self._request(
+            "GET", "/orders", "look up order", params={"receipt": receipt},
+        )
+        items = response.get("items") or []
+        return items[0] if items else None
     
     async def verify_payment(
         self,
@@ -177,18 +261,7 @@ class RazorpayGateway(PaymentGatewayInterface):
     
     async def fetch_payment(self, payment_id: str) -> Dict[str, Any]:
         """Fetch payment from Razorpay."""
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/payments/{payment_id}",
-                auth=(self.api_key, self.api_secret),
-            )
-            
-            if response.status_code != 200:
-                raise PaymentError(f"Failed to fetch payment: {response.text}")
-            
-            return response.json()
+        return await self._request("GET", f"/payments/{payment_id}", "fetch payment")
     
     async def create_refund(
         self,
@@ -197,37 +270,19 @@ class RazorpayGateway(PaymentGatewayInterface):
         notes: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Create Razorpay refund."""
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/payments/{payment_id}/refund",
-                auth=(self.api_key, self.api_secret),
-                json={
-                    "amount": amount,
-                    "notes": notes or {},
-                },
-            )
-            
-            if response.status_code != 200:
-                raise PaymentError(f"Failed to create refund: {response.text}")
-            
-            return response.json()
+        return await self._request(
+            "POST",
+            f"/payments/{payment_id}/refund",
+            "create refund",
+            json={
+                "amount": amount,
+                "notes": notes or {},
+            },
+        )
     
     async def fetch_refund(self, refund_id: str) -> Dict[str, Any]:
         """Fetch refund from Razorpay."""
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/refunds/{refund_id}",
-                auth=(self.api_key, self.api_secret),
-            )
-            
-            if response.status_code != 200:
-                raise PaymentError(f"Failed to fetch refund: {response.text}")
-            
-            return response.json()
+        return await self._request("GET", f"/refunds/{refund_id}", "fetch refund")
     
     def get_checkout_data(
         self,
@@ -312,19 +367,19 @@ class PaymentService:
         self, 
         gateway: PaymentGateway,
     ) -> PaymentGatewayInterface:
-        """Get gateway client with caching."""
+        """Get gateway client (credentials from the per-tenant cache)."""
         if gateway in self._gateway_cache:
             return self._gateway_cache[gateway]
         
-        config = await self._get_gateway_config(gateway)
-        if not config:
+        credentials = await get_gateway_credentials(self.tenant_id, gateway, self.session)
+        if not credentials:
             raise PaymentError(f"Gateway {gateway.value} is not configured")
         
         if gateway == PaymentGateway.RAZORPAY:
             client = RazorpayGateway(
-                api_key=config.api_key,
-                api_secret=config.api_secret,
-                is_sandbox=config.is_sandbox,
+                api_key=credentials.api_key,
+                api_secret=credentials.api_secret,
+                is_sandbox=credentials.is_sandbox,
             )
         else:
             raise PaymentError(f"Gateway {gateway.value} is not supported")
@@ -353,6 +408,7 @@ class PaymentService:
         self.session.add(config)
         await self.session.commit()
         await self.session.refresh(config)
+        invalidate_gateway_configs(self.tenant_id)
         return config
     
     async def update_gateway_config(
@@ -376,6 +432,7 @@ class PaymentService:
         
         await self.session.commit()
         await self.session.refresh(config)
+        invalidate_gateway_configs(self.tenant_id)
         return config
     
     async def list_gateway_configs(self) -> List[GatewayConfig]:
@@ -632,41 +689,58 @@ class PaymentService:
     # Webhooks
     # ========================================
     
-    async def process_webhook(
+    async def handle_webhook_event(
         self,
-        gateway: PaymentGateway,
-        event_id: str,
         event_type: str,
         payload: Dict[str, Any],
-    ) -> WebhookEvent:
-        """Process and store webhook event."""
-        # Store webhook
-        webhook = WebhookEvent(
-            tenant_id=self.tenant_id,
-            event_id=event_id,
-            gateway=gateway,
-            event_type=event_type,
-            payload=payload,
+    ) -> None:
+        """
+        Apply a webhook event (called by the WebhookConsumer).
+        
+        Runs in the consumer's transaction, which also marks the event
+        processed; raising leaves the event for a retry.
+        """
+        if event_type == "payment.captured":
+            await self._handle_payment_captured(payload)
+        elif event_type == "payment.failed":
+            await self._handle_payment_failed(payload)
+        elif event_type == "refund.processed":
+            await self._handle_refund_processed(payload)
+    
+    async def list_dead_webhooks(self, limit: int = 50) -> List[WebhookEvent]:
+        """Dead-lettered webhook events, newest first."""
+        query = (
+            select(WebhookEvent)
+            .where(
+                WebhookEvent.tenant_id == self.tenant_id,
+                WebhookEvent.status == WebhookStatus.DEAD.value,
+            )
+            .order_by(WebhookEvent.created_at.desc())
+            .limit(limit)
         )
-        self.session.add(webhook)
-        
-        # Process based on event type
-        try:
-            if event_type == "payment.captured":
-                await self._handle_payment_captured(payload)
-            elif event_type == "payment.failed":
-                await self._handle_payment_failed(payload)
-            elif event_type == "refund.processed":
-                await self._handle_refund_processed(payload)
-            
-            webhook.is_processed = True
-            webhook.processed_at = datetime.now(timezone.utc)
-        except Exception as e:
-            webhook.error_message = str(e)
-        
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+    
+    async def retry_webhook(self, webhook_id: UUID) -> WebhookEvent:
+        """Re-queue a dead-lettered webhook event with fresh attempts."""
+        query = select(WebhookEvent).where(
+            WebhookEvent.tenant_id == self.tenant_id,
+            WebhookEvent.id == webhook_id,
+        )
+        result = await self.session.execute(query)
+        webhook = result.scalar_one_or_none()
+        if not webhook:
+            raise ResourceNotFoundError("WebhookEvent", str(webhook_id))
+        if webhook.status != WebhookStatus.DEAD.value:
+            raise ValidationError("Only dead-lettered webhook events can be retried")
+        
+        webhook.status = WebhookStatus.PENDING.value
+        webhook.attempts = 0
+        webhook.next_attempt_at = datetime.now(timezone.utc)
         await self.session.commit()
         await self.session.refresh(webhook)
         
+        webhook_consumer.wake()
         return webhook
     
     async def _handle_payment_captured(self, payload: Dict[str, Any]) -> None:
@@ -678,6 +752,7 @@ class PaymentService:
         if order_id:
             # Find order by gateway_order_id
             query = select(PaymentOrder).where(
+                PaymentOrder.tenant_id == self.tenant_id,
                 PaymentOrder.gateway_order_id == order_id,
             )
             result = await self.session.execute(query)
@@ -685,6 +760,9 @@ class PaymentService:
             
             if order and order.status != PaymentStatus.SUCCESS:
                 order.status = PaymentStatus.SUCCESS
+                
+                from app.parents.dashboard import invalidate_family_dashboards
+                await invalidate_family_dashboards(self.session, self.tenant_id, [order.student_id])
     
     async def _handle_payment_failed(self, payload: Dict[str, Any]) -> None:
         """Handle payment failed webhook."""
@@ -693,6 +771,7 @@ class PaymentService:
         
         if order_id:
             query = select(PaymentOrder).where(
+                PaymentOrder.tenant_id == self.tenant_id,
                 PaymentOrder.gateway_order_id == order_id,
             )
             result = await self.session.execute(query)
@@ -708,6 +787,7 @@ class PaymentService:
         
         if refund_id:
             query = select(PaymentRefund).where(
+                PaymentRefund.tenant_id == self.tenant_id,
                 PaymentRefund.gateway_refund_id == refund_id,
             )
             result = await self.session.execute(query)
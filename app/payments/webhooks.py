@@ -0,0 +1,336 @@
+"""
+CUSTOS Payment Webhook Inbox
+
+Gateways retry webhooks until they get a 2xx, often in bursts, so
+receiving and handling are split:
+
+RECEIVING (request path): verify the signature, then
+    INSERT ... ON CONFLICT (gateway, event_id) DO NOTHING
+and answer 200. Redeliveries of a stored event are no-ops.
+
+HANDLING (WebhookConsumer, one per process): claims pending events in
+batches with FOR UPDATE SKIP LOCKED and runs PaymentService handlers,
+each event in its own transaction together with marking it processed,
+so an event's effects are committed exactly once.
+
+- Ordering: an event is only claimed when no older event of the same
+  gateway order (ordering_key) is pending or processing, so a
+  payment.failed never overtakes the payment.captured before it
+- Retries: a failed event backs off (BACKOFF_BASE_SECONDS, doubling)
+  and is dead-lettered (status "dead") after MAX_ATTEMPTS; dead events
+  are listed and re-queued through the payments API
+- Crashes: a claim is a lease (LEASE_SECONDS); an event whose consumer
+  died is claimed again once it expires, and the lost consumer's
+  handler effects are rolled back
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, exists, not_, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.payments.models import PaymentGateway, WebhookEvent, WebhookStatus
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# Receiving
+# ============================================
+
+def verify_signature(body: bytes, signature: str, secret: str) -> bool:
+    """HMAC-SHA256 of the raw body (Razorpay X-Razorpay-Signature)."""
+    if not signature or not secret:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def ordering_key(payload: Dict[str, Any]) -> Optional[str]:
+    """Gateway order an event belongs to (None = no ordering constraint)."""
+    entities = payload.get("payload", {})
+    payment = entities.get("payment", {}).get("entity", {})
+    order = entities.get("order", {}).get("entity", {})
+    refund = entities.get("refund", {}).get("entity", {})
+    return payment.get("order_id") or order.get("id") or refund.get("payment_id")
+
+
+async def accept_webhook(
+    session: AsyncSession,
+    tenant_id: UUID,
+    gateway: PaymentGateway,
+    event_id: str,
+    event_type: str,
+    payload: Dict[str, Any],
+) -> bool:
+    """Store a verified event in the inbox (commits); False for a redelivery."""
+    now = datetime.now(timezone.utc)
+    stmt = (
+        pg_insert(WebhookEvent)
+        .values(
+            id=uuid4(),
+            tenant_id=tenant_id,
+            event_id=event_id,
+            gateway=gateway,
+            event_type=event_type,
+            payload=payload,
+            ordering_key=ordering_key(payload),
+            status=WebhookStatus.PENDING.value,
+            attempts=0,
+            next_attempt_at=now,
+            is_processed=False,
+            created_at=now,
+            updated_at=now,
+            is_deleted=False,
+        )
+        .on_conflict_do_nothing(constraint="uq_webhook_gateway_event")
+        .returning(WebhookEvent.id)
+    )
+    result = await session.execute(stmt)
+    inserted = result.scalar_one_or_none() is not None
+    await session.commit()
+
+    if inserted:
+        webhook_consumer.wake()
+    return inserted
+
+
+# ============================================
+# Consumer
+# ============================================
+
+@dataclass
+class ClaimedWebhook:
+    id: UUID
+    tenant_id: UUID
+    event_type: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class WebhookConsumer:
+    """Drains the webhook inbox in the background."""
+
+    BATCH_SIZE = 50
+    CONCURRENCY = 8  # Events handled at once (distinct orders)
+    POLL_INTERVAL_SECONDS = 2.0
+    LEASE_SECONDS = 120
+    MAX_ATTEMPTS = 8
+    BACKOFF_BASE_SECONDS = 30
+    BACKOFF_MAX_SECONDS = 3600
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # ============================================
+    # Lifecycle
+    # ============================================
+
+    def start(self) -> None:
+        """Start draining on the running event loop (idempotent)."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def wake(self) -> None:
+        """Drain now instead of at the next poll (e.g. after a local accept)."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop draining; events being handled are rolled back and re-claimed later."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                handled = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Webhook inbox drain failed: {e}")
+                handled = 0
+
+            if handled < self.BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    # ============================================
+    # Draining
+    # ============================================
+
+    async def drain_once(self) -> int:
+        """Claim and handle one batch; returns the number of events claimed."""
+        events = await self._claim()
+        if not events:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.CONCURRENCY)
+
+        async def handle(event: ClaimedWebhook) -> None:
+            async with semaphore:
+                await self._handle(event)
+
+        await asyncio.gather(*(handle(event) for event in events))
+        return len(events)
+
+    async def _claim(self) -> List[ClaimedWebhook]:
+        from app.core.database import AsyncSessionLocal
+
+        now = datetime.now(timezone.utc)
+        earlier = aliased(WebhookEvent)
+        blocked = exists().where(
+            earlier.ordering_key == WebhookEvent.ordering_key,
+            earlier.status.in_([WebhookStatus.PENDING.value, WebhookStatus.PROCESSING.value]),
+            tuple_(earlier.created_at, earlier.id) < tuple_(WebhookEvent.created_at, WebhookEvent.id),
+        )
+        ready = (
+            select(WebhookEvent.id)
+            .where(
+                or_(
+                    and_(
+                        WebhookEvent.status == WebhookStatus.PENDING.value,
+                        WebhookEvent.next_attempt_at <= now,
+                    ),
+                    and_(
+                        WebhookEvent.status == WebhookStatus.PROCESSING.value,
+                        WebhookEvent.locked_until < now,
+                    ),
+                ),
+                not_(blocked),
+            )
+            .order_by(WebhookEvent.created_at)
+            .limit(self.BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(WebhookEvent)
+            .where(WebhookEvent.id.in_(ready.scalar_subquery()))
+            .values(
+                status=WebhookStatus.PROCESSING.value,
+                locked_until=now + timedelta(seconds=self.LEASE_SECONDS),
+                attempts=WebhookEvent.attempts + 1,
+                updated_at=now,
+            )
+            .returning(
+                WebhookEvent.id,
+                WebhookEvent.tenant_id,
+                WebhookEvent.event_type,
+                WebhookEvent.payload,
+                WebhookEvent.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(stmt)
+            rows = result.all()
+            await session.commit()
+
+        return [
+            ClaimedWebhook(
+                id=row.id,
+                tenant_id=row.tenant_id,
+                event_type=row.event_type,
+                payload=row.payload or {},
+                attempts=row.attempts,
+            )
+            for row in rows
+        ]
+
+    def _leased(self, event: ClaimedWebhook):
+        """Update of the event, only while this claim still holds it."""
+        return (
+            update(WebhookEvent)
+            .where(
+                WebhookEvent.id == event.id,
+                WebhookEvent.status == WebhookStatus.PROCESSING.value,
+                WebhookEvent.attempts == event.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _handle(self, event: ClaimedWebhook) -> None:
+        from app.core.database import AsyncSessionLocal
+        from app.payments.service import PaymentService
+
+        async with AsyncSessionLocal() as session:
+            try:
+                service = PaymentService(session, event.tenant_id)
+                await service.handle_webhook_event(event.event_type, event.payload)
+
+                now = datetime.now(timezone.utc)
+                result = await session.execute(
+                    self._leased(event).values(
+                        status=WebhookStatus.PROCESSED.value,
+                        is_processed=True,
+                        processed_at=now,
+                        locked_until=None,
+                        error_message=None,
+                        updated_at=now,
+                    )
+                )
+                if result.rowcount == 0:
+                    # Lease expired and another consumer has it: undo ours
+                    await session.rollback()
+                    logger.warning(f"Webhook {event.id} lease lost; handled by another consumer")
+                    return
+                await session.commit()
+                return
+            except Exception as e:
+                await session.rollback()
+                error = str(e) or type(e).__name__
+
+            await self._fail(session, event, error)
+
+    async def _fail(self, session: AsyncSession, event: ClaimedWebhook, error: str) -> None:
+        now = datetime.now(timezone.utc)
+        dead = event.attempts >= self.MAX_ATTEMPTS
+        delay = min(self.BACKOFF_BASE_SECONDS * 2 ** (event.attempts - 1), self.BACKOFF_MAX_SECONDS)
+
+        if dead:
+            logger.error(f"Webhook {event.id} ({event.event_type}) dead after {event.attempts} attempts: {error}")
+        else:
+            logger.warning(f"Webhook {event.id} ({event.event_type}) failed, retry in {delay}s: {error}")
+
+        try:
+            await session.execute(
+                self._leased(event).values(
+                    status=(WebhookStatus.DEAD if dead else WebhookStatus.PENDING).value,
+                    next_attempt_at=now + timedelta(seconds=delay),
+                    locked_until=None,
+                    error_message=error,
+                    updated_at=now,
+                )
+            )
+            await session.commit()
+        except Exception as e:
+            # The lease expires and the event is claimed again
+            logger.error(f"Could not record webhook {event.id} failure: {e}")
+
+
+# Global instance
+webhook_consumer = WebhookConsumer()
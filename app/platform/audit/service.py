@@ -2,13 +2,16 @@
 CUSTOS Audit Service
 """
 
+from datetime import datetime, timezone
 from typing import Optional, List
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import audit_events_written_total
 from app.platform.audit.models import AuditLog, AuditAction
+from app.platform.audit.writer import audit_writer, is_sync_entity
 
 
 class AuditService:
@@ -30,21 +33,38 @@ class AuditService:
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
     ) -> AuditLog:
-        """Create audit log entry."""
-        log = AuditLog(
-            tenant_id=self.tenant_id,
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            description=description,
-            old_values=old_values,
-            new_values=new_values,
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
-        self.session.add(log)
-        await self.session.commit()
+        """
+        Create audit log entry.
+        
+        Queued for the batched writer (app/platform/audit/writer.py);
+        financial resource types commit immediately.
+        """
+        now = datetime.now(timezone.utc)
+        row = {
+            "id": uuid4(),
+            "tenant_id": self.tenant_id,
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "description": description,
+            "old_values": old_values,
+            "new_values": new_values,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": now,
+            "updated_at": now,
+            "is_deleted": False,
+        }
+        log = AuditLog(**row)
+        
+        if is_sync_entity(resource_type):
+            self.session.add(log)
+            await self.session.commit()
+            audit_events_written_total.labels(mode="sync").inc()
+            return log
+        
+        audit_writer.enqueue(AuditLog, row)
         return log
     
     async def get_logs(
@@ -0,0 +1,345 @@
+"""
+CUSTOS Audit Trail Writer
+
+Asynchronous, batched writer for audit events.
+
+Audit logging used to commit inside the caller's request for every event:
+an extra transaction per audited mutation, and a failing audit write could
+roll back business state. Events are now put on a bounded in-process queue
+and a background task writes them as multi-row INSERTs, every
+audit_flush_interval_ms or audit_flush_batch_size events, whichever first.
+
+DURABILITY:
+- Queue overflow and failed flushes go to a local JSONL spill file
+  (settings.audit_spill_path), replayed on startup and after later
+  successful flushes. Events are never silently dropped.
+- Financial entity types are written synchronously by the callers
+  (see SYNC_ENTITY_TYPES) so their audit row commits with the change.
+- Graceful shutdown drains the queue (audit_writer.stop()).
+
+METRICS (app/core/metrics.py):
+- audit_queue_depth, audit_flush_duration_seconds,
+  audit_events_written_total, audit_events_spilled_total
+
+USAGE:
+
+    from app.platform.audit.writer import audit_writer
+
+    audit_writer.enqueue(AuditLog, row_dict)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from sqlalchemy import DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+
+from app.core.config import settings
+from app.core.metrics import (
+    audit_queue_depth,
+    audit_flush_duration_seconds,
+    audit_events_written_total,
+    audit_events_spilled_total,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Entity/resource types whose audit rows are written in the caller's
+# transaction instead of through the queue
+SYNC_ENTITY_TYPES = frozenset({"fee", "payment", "payroll", "salary_slip"})
+
+
+def is_sync_entity(entity_type: Any) -> bool:
+    """True if audit events for this entity type must be written synchronously."""
+    value = entity_type.value if isinstance(entity_type, Enum) else str(entity_type)
+    return value.lower() in SYNC_ENTITY_TYPES
+
+
+# Sentinel that tells the drain loop to finish
+_STOP = object()
+
+QueueItem = Tuple[Type, Dict[str, Any]]
+
+
+class AuditWriter:
+    """
+    Bounded queue + background drain task for audit rows.
+
+    One instance per process (audit_writer). Rows are plain column dicts
+    for a mapped model; ids and timestamps are assigned by the caller.
+    """
+
+    # Minimum seconds between spill replays after successful flushes
+    REPLAY_INTERVAL_SECONDS = 60
+
+    def __init__(
+        self,
+        flush_interval_ms: int = settings.audit_flush_interval_ms,
+        batch_size: int = settings.audit_flush_batch_size,
+        max_queue_size: int = settings.audit_queue_max_size,
+        spill_path: str = settings.audit_spill_path,
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self.spill_dir = Path(spill_path)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._models: Dict[str, Type] = {}
+        self._last_replay = 0.0
+
+    # ============================================
+    # Producer side
+    # ============================================
+
+    def enqueue(self, model: Type, row: Dict[str, Any]) -> None:
+        """Queue one audit row. Never blocks, never raises."""
+        self._models[model.__tablename__] = model
+        self.start()
+
+        if self._queue is None:
+            # No running event loop (scripts, sync contexts)
+            self._spill([(model, row)])
+            return
+
+        try:
+            self._queue.put_nowait((model, row))
+        except asyncio.QueueFull:
+            self._spill([(model, row)])
+        audit_queue_depth.set(self._queue.qsize())
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    # ============================================
+    # Lifecycle
+    # ============================================
+
+    def start(self) -> None:
+        """Start the drain task on the running event loop (idempotent)."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Drain the queue and stop the background task."""
+        if not self._task or self._task.done():
+            self._task = None
+            return
+
+        try:
+            self._queue.put_nowait(_STOP)
+        except asyncio.QueueFull:
+            # Make room for the sentinel; the displaced row goes to disk
+            self._spill([self._queue.get_nowait()])
+            self._queue.put_nowait(_STOP)
+
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        try:
+            await self.replay_spill()
+        except Exception as e:
+            logger.error(f"Audit spill replay failed: {e}")
+
+        while True:
+            batch, stopping = await self._collect_batch()
+            if batch:
+                await self._write_batch(batch)
+            if stopping:
+                return
+
+    async def _collect_batch(self) -> Tuple[List[QueueItem], bool]:
+        """Wait for one row, then gather until batch_size or the flush interval."""
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch + self._drain_nowait(), True
+            batch.append(item)
+
+        audit_queue_depth.set(self._queue.qsize())
+        return batch, False
+
+    def _drain_nowait(self) -> List[QueueItem]:
+        items = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                items.append(item)
+        return items
+
+    # ============================================
+    # Writing
+    # ============================================
+
+    async def _write_batch(self, batch: List[QueueItem]) -> None:
+        """Write a batch (one INSERT per model). Spills on failure."""
+        started = time.perf_counter()
+        try:
+            await self._insert(batch)
+        except Exception as e:
+            logger.error(f"Audit flush of {len(batch)} events failed, spilling: {e}")
+            self._spill(batch)
+            return
+        finally:
+            audit_flush_duration_seconds.observe(time.perf_counter() - started)
+
+        audit_events_written_total.labels(mode="async").inc(len(batch))
+
+        if time.monotonic() - self._last_replay > self.REPLAY_INTERVAL_SECONDS:
+            try:
+                await self.replay_spill()
+            except Exception as e:
+                logger.error(f"Audit spill replay failed: {e}")
+
+    async def _insert(self, batch: List[QueueItem]) -> None:
+        from app.core.database import AsyncSessionLocal
+
+        by_model: Dict[Type, List[Dict[str, Any]]] = {}
+        for model, row in batch:
+            by_model.setdefault(model, []).append(row)
+
+        async with AsyncSessionLocal() as session:
+            for model, rows in by_model.items():
+                # Replayed rows may already exist; audit rows are immutable
+                await session.execute(
+                    pg_insert(model).values(rows).on_conflict_do_nothing(
+                        index_elements=[c.name for c in model.__table__.primary_key],
+                    )
+                )
+            await session.commit()
+
+    # ============================================
+    # Spill file
+    # ============================================
+
+    def _spill_file(self) -> Path:
+        return self.spill_dir / f"audit-spill-{os.getpid()}.jsonl"
+
+    def _spill(self, batch: List[QueueItem]) -> None:
+        """Append rows to the local spill file."""
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._spill_file(), "a", encoding="utf-8") as f:
+                for model, row in batch:
+                    record = {
+                        "table": model.__tablename__,
+                        "row": {k: self._encode(v) for k, v in row.items()},
+                    }
+                    f.write(json.dumps(record, default=str) + "\n")
+            audit_events_spilled_total.inc(len(batch))
+        except Exception as e:
+            # Last resort: the events only survive in the log
+            logger.critical(f"Audit spill failed, {len(batch)} events lost: {e}; rows={batch!r}")
+
+    async def replay_spill(self) -> int:
+        """
+        Write spilled rows back to the database.
+
+        Each file is claimed by renaming it first, so concurrent workers
+        never replay the same file. Returns rows replayed.
+        """
+        self._last_replay = time.monotonic()
+        if not self.spill_dir.exists():
+            return 0
+
+        replayed = 0
+        for path in sorted(self.spill_dir.glob("audit-spill-*.jsonl")):
+            claimed = path.with_suffix(f".replaying-{os.getpid()}")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue  # Another worker claimed it
+
+            batch = []
+            with open(claimed, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        model = self._resolve_model(record["table"])
+                        if model is not None:
+                            batch.append((model, self._decode(model, record["row"])))
+
+            try:
+                for start in range(0, len(batch), self.batch_size):
+                    await self._insert(batch[start:start + self.batch_size])
+            except Exception as e:
+                logger.error(f"Audit spill replay failed for {claimed.name}: {e}")
+                os.rename(claimed, path)
+                break
+
+            os.remove(claimed)
+            replayed += len(batch)
+            audit_events_written_total.labels(mode="replay").inc(len(batch))
+
+        return replayed
+
+    def _resolve_model(self, table: str) -> Optional[Type]:
+        if table not in self._models:
+            from app.governance.models import AuditLog as GovernanceAuditLog
+            from app.platform.audit.models import AuditLog
+            for model in (GovernanceAuditLog, AuditLog):
+                self._models.setdefault(model.__tablename__, model)
+        model = self._models.get(table)
+        if model is None:
+            logger.error(f"Audit spill row for unknown table {table}; skipped")
+        return model
+
+    @staticmethod
+    def _encode(value: Any) -> Any:
+        if isinstance(value, UUID):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Enum):
+            return value.name  # SQLEnum persists and accepts member names
+        return value
+
+    @staticmethod
+    def _decode(model: Type, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = model.__table__.columns
+        decoded = {}
+        for key, value in row.items():
+            column_type = columns[key].type if key in columns else None
+            if value is not None and isinstance(column_type, PGUUID):
+                value = UUID(value)
+            elif value is not None and isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            decoded[key] = value
+        return decoded
+
+
+# Global writer instance
+audit_writer = AuditWriter()
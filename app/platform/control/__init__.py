@@ -54,6 +54,7 @@ from app.platform.control.enforcement import (
     TenantPlanInfo,
     PlanEnforcement,
     get_enforcement,
+    invalidate_entitlements,
     check_feature,
     require_feature,
     FeatureGate,
@@ -97,6 +98,7 @@ __all__ = [
     "TenantPlanInfo",
     "PlanEnforcement",
     "get_enforcement",
+    "invalidate_entitlements",
     "check_feature",
     "require_feature",
     "FeatureGate",
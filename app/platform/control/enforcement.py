@@ -4,7 +4,7 @@ CUSTOS Plan Enforcement
 Runtime feature gating based on tenant subscription plan.
 
 RULES:
-1. Every feature check is fast (in-memory cache)
+1. Every feature check is fast (in-memory cache, see entitlements.py)
 2. Clear "why unavailable" responses
 3. Graceful degradation when plans change
 4. No hard crashes on limit exceed
@@ -27,7 +27,7 @@ USAGE:
 
 import logging
 from enum import Enum
-from typing import Dict, Optional, Any, List, Set
+from typing import Dict, FrozenSet, Optional, Any, List, Set
 from uuid import UUID
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
@@ -35,6 +35,8 @@ from functools import wraps
 
 from fastapi import HTTPException
 
+from app.platform.control.entitlements import EntitlementCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -145,19 +147,27 @@ class FeatureCheckResult:
         }
 
 
-@dataclass
+@dataclass(frozen=True)
 class TenantPlanInfo:
-    """Cached plan information for a tenant."""
+    """
+    Cached entitlements for a tenant.
+    
+    features and modules are precomputed frozensets, so feature and
+    module checks are set lookups. Shared between requests: never mutate.
+    """
     tenant_id: UUID
     tier: PlanTier
-    features: Set[FeatureCode]
-    add_ons: Set[FeatureCode] = field(default_factory=set)
+    features: FrozenSet[FeatureCode]
+    modules: FrozenSet[str] = frozenset()  # Enabled TenantModule values
+    add_ons: FrozenSet[FeatureCode] = frozenset()
     custom_limits: Dict[str, int] = field(default_factory=dict)
+    subscription_status: Optional[str] = None
     is_trial: bool = False
     trial_ends_at: Optional[datetime] = None
     is_suspended: bool = False
     is_read_only: bool = False
-    disabled_features: Set[FeatureCode] = field(default_factory=set)
+    disabled_features: FrozenSet[FeatureCode] = frozenset()
+    exists: bool = True  # False = unknown tenant or failed read (negative cache entry)
     cached_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -166,7 +176,8 @@ class PlanEnforcement:
     Plan enforcement engine.
     
     Manages feature gating based on tenant subscription.
-    Uses in-memory cache for fast lookups.
+    Plan info is loaded with one joined query and kept in an
+    EntitlementCache (bounded LRU, jittered TTL, pub/sub invalidation).
     """
     
     _instance: Optional["PlanEnforcement"] = None
@@ -184,120 +195,120 @@ class PlanEnforcement:
         if self._initialized:
             return
         
-        self._plan_cache: Dict[UUID, TenantPlanInfo] = {}
+        self._plan_cache = EntitlementCache(self._load_plan_info)
+        self._plan_cache.TTL = self.CACHE_TTL
         self._initialized = True
     
     async def get_plan_info(self, tenant_id: UUID, db=None) -> TenantPlanInfo:
         """
         Get plan info for a tenant.
         
-        Uses cache if available and fresh.
+        Uses cache if available and fresh. Without a session, one is
+        opened for the load.
         """
-        # Check cache
-        if tenant_id in self._plan_cache:
-            cached = self._plan_cache[tenant_id]
-            age = (datetime.now(timezone.utc) - cached.cached_at).total_seconds()
-            if age < self.CACHE_TTL:
-                return cached
-        
-        # Load from database
-        plan_info = await self._load_plan_info(tenant_id, db)
-        self._plan_cache[tenant_id] = plan_info
-        return plan_info
+        return await self._plan_cache.get(tenant_id, db)
     
     async def _load_plan_info(self, tenant_id: UUID, db=None) -> TenantPlanInfo:
         """Load plan info from database."""
         if db is None:
-            # Return default if no DB session
+            from app.core.database import AsyncSessionLocal
+            
+            async with AsyncSessionLocal() as session:
+                return await self._load_plan_info(tenant_id, session)
+        
+        try:
+            return await self._query_plan_info(tenant_id, db)
+        except Exception as e:
+            logger.warning(f"Failed to load plan info for {tenant_id}: {e}")
+            # Not the tenant's real plan: cache it for NEGATIVE_TTL only
             return TenantPlanInfo(
                 tenant_id=tenant_id,
                 tier=PlanTier.FREE,
-                features=PLAN_FEATURES[PlanTier.FREE],
+                features=frozenset(PLAN_FEATURES[PlanTier.FREE]),
+                modules=_plan_modules(PlanTier.FREE),
+                exists=False,
             )
+    
+    async def _query_plan_info(self, tenant_id: UUID, db) -> TenantPlanInfo:
+        """
+        Tenant, live subscription, plan, feature toggles and module
+        overrides in one round trip.
+        """
+        from sqlalchemy import and_, case, func, select
+        from app.tenants.models import Tenant, TenantSettings, TenantStatus
+        from app.tenants.modules import TenantModuleAccess
+        from app.billing.models import Subscription, SubscriptionStatus, Plan
         
-        try:
-            from sqlalchemy import select
-            from app.tenants.models import Tenant, TenantStatus
-            from app.billing.models import Subscription, Plan
-            
-            # Get tenant
-            query = select(Tenant).where(
-                Tenant.id == tenant_id,
-                Tenant.is_deleted == False,
-            )
-            result = await db.execute(query)
-            tenant = result.scalar_one_or_none()
-            
-            if not tenant:
-                return TenantPlanInfo(
-                    tenant_id=tenant_id,
-                    tier=PlanTier.FREE,
-                    features=set(),
-                    is_suspended=True,
-                )
-            
-            # Determine tier from subscription
-            tier = PlanTier.FREE
-            is_trial = tenant.status == TenantStatus.TRIAL
-            
-            # Get active subscription
-            sub_query = select(Subscription).where(
-                Subscription.tenant_id == tenant_id,
-                Subscription.is_active == True,
-            )
-            sub_result = await db.execute(sub_query)
-            subscription = sub_result.scalar_one_or_none()
-            
-            if subscription:
-                # Get plan tier from subscription
-                plan_query = select(Plan).where(Plan.id == subscription.plan_id)
-                plan_result = await db.execute(plan_query)
-                plan = plan_result.scalar_one_or_none()
-                if plan:
-                    tier = PlanTier(plan.tier.value)
-            
-            # Get features for tier
-            features = PLAN_FEATURES.get(tier, set()).copy()
-            
-            # Add any tenant-specific add-ons
-            add_ons = set()
-            if tenant.metadata and tenant.metadata.get("add_ons"):
-                for addon in tenant.metadata.get("add_ons", []):
-                    try:
-                        add_ons.add(FeatureCode(addon))
-                        features.add(FeatureCode(addon))
-                    except ValueError:
-                        pass
-            
-            # Check for disabled features
-            disabled = set()
-            if tenant.metadata and tenant.metadata.get("disabled_features"):
-                for feat in tenant.metadata.get("disabled_features", []):
-                    try:
-                        disabled.add(FeatureCode(feat))
-                        features.discard(FeatureCode(feat))
-                    except ValueError:
-                        pass
-            
-            return TenantPlanInfo(
-                tenant_id=tenant_id,
-                tier=tier,
-                features=features,
-                add_ons=add_ons,
-                is_trial=is_trial,
-                trial_ends_at=tenant.trial_ends_at if hasattr(tenant, 'trial_ends_at') else None,
-                is_suspended=tenant.status == TenantStatus.SUSPENDED,
-                is_read_only=tenant.metadata.get("read_only", False) if tenant.metadata else False,
-                disabled_features=disabled,
+        def module_overrides(enabled: bool):
+            return select(func.array_agg(TenantModuleAccess.module_name)).where(
+                TenantModuleAccess.tenant_id == Tenant.id,
+                TenantModuleAccess.is_enabled == enabled,
+                TenantModuleAccess.is_deleted == False,
+            ).scalar_subquery()
+        
+        live = (SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIAL)
+        query = (
+            select(
+                Tenant.status,
+                Tenant.trial_ends_at,
+                Subscription.status.label("subscription_status"),
+                Plan.tier.label("plan_tier"),
+                TenantSettings.features.label("toggles"),
+                module_overrides(True).label("enabled_modules"),
+                module_overrides(False).label("disabled_modules"),
             )
-            
-        except Exception as e:
-            logger.warning(f"Failed to load plan info for {tenant_id}: {e}")
+            .select_from(Tenant)
+            .outerjoin(Subscription, and_(
+                Subscription.tenant_id == Tenant.id,
+                Subscription.is_deleted == False,
+            ))
+            .outerjoin(Plan, Plan.id == Subscription.plan_id)
+            .outerjoin(TenantSettings, TenantSettings.tenant_id == Tenant.id)
+            .where(Tenant.id == tenant_id, Tenant.is_deleted == False)
+            # Prefer a live subscription if a tenant has several rows
+            .order_by(case((Subscription.status.in_(live), 0), else_=1))
+            .limit(1)
+        )
+        row = (await db.execute(query)).one_or_none()
+        
+        if row is None:
             return TenantPlanInfo(
                 tenant_id=tenant_id,
                 tier=PlanTier.FREE,
-                features=PLAN_FEATURES[PlanTier.FREE],
+                features=frozenset(),
+                is_suspended=True,
+                exists=False,
             )
+        
+        # Tier from a live subscription; otherwise free
+        tier = PlanTier.FREE
+        if row.subscription_status in live and row.plan_tier is not None:
+            tier = PlanTier(row.plan_tier.value)
+        
+        toggles = row.toggles or {}
+        add_ons = frozenset(_feature_codes(toggles.get("add_ons", [])))
+        disabled = frozenset(_feature_codes(toggles.get("disabled_features", [])))
+        features = (frozenset(PLAN_FEATURES.get(tier, set())) | add_ons) - disabled
+        
+        # Explicit module records win over plan defaults
+        modules = (
+            (_plan_modules(tier) | frozenset(row.enabled_modules or ()))
+            - frozenset(row.disabled_modules or ())
+        )
+        
+        return TenantPlanInfo(
+            tenant_id=tenant_id,
+            tier=tier,
+            features=features,
+            modules=modules,
+            add_ons=add_ons,
+            subscription_status=row.subscription_status.value if row.subscription_status else None,
+            is_trial=row.status == TenantStatus.TRIAL,
+            trial_ends_at=row.trial_ends_at,
+            is_suspended=row.status == TenantStatus.SUSPENDED,
+            is_read_only=bool(toggles.get("read_only", False)),
+            disabled_features=disabled,
+        )
     
     def check_feature(
         self,
@@ -350,13 +361,19 @@ class PlanEnforcement:
         return PlanTier.ENTERPRISE
     
     def invalidate_cache(self, tenant_id: UUID):
-        """Invalidate cached plan info for a tenant."""
-        if tenant_id in self._plan_cache:
-            del self._plan_cache[tenant_id]
+        """Invalidate cached plan info for a tenant, on every worker."""
+        self._plan_cache.invalidate(tenant_id)
     
     def invalidate_all(self):
-        """Invalidate all cached plan info."""
-        self._plan_cache.clear()
+        """Invalidate all cached plan info, on every worker."""
+        self._plan_cache.invalidate_all()
+    
+    def start(self) -> None:
+        """Start listening for invalidations from other workers."""
+        self._plan_cache.start()
+    
+    async def stop(self) -> None:
+        await self._plan_cache.stop()
     
     def get_available_features(self, plan_info: TenantPlanInfo) -> List[str]:
         """Get list of available feature codes for a tenant."""
@@ -376,6 +393,24 @@ class PlanEnforcement:
         ]
 
 
+def _feature_codes(values) -> Set[FeatureCode]:
+    """Known FeatureCodes among values (unknown codes are ignored)."""
+    codes = set()
+    for value in values or ():
+        try:
+            codes.add(FeatureCode(value))
+        except ValueError:
+            pass
+    return codes
+
+
+def _plan_modules(tier: PlanTier) -> FrozenSet[str]:
+    """Module values a plan tier enables by default."""
+    from app.tenants.modules import DEFAULT_MODULES_BY_PLAN
+    
+    return frozenset(m.value for m in DEFAULT_MODULES_BY_PLAN.get(tier.value, []))
+
+
 # Global instance
 _enforcement: Optional[PlanEnforcement] = None
 
@@ -388,6 +423,16 @@ def get_enforcement() -> PlanEnforcement:
     return _enforcement
 
 
+def invalidate_entitlements(tenant_id: UUID) -> None:
+    """
+    Drop a tenant's cached plan info on every worker.
+    
+    Call after committing subscription, plan, module-access or feature
+    toggle changes.
+    """
+    get_enforcement().invalidate_cache(tenant_id)
+
+
 async def check_feature(
     tenant_id: UUID,
     feature: FeatureCode,
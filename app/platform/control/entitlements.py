@@ -0,0 +1,211 @@
+"""
+CUSTOS Entitlement Cache
+
+Per-process cache of tenant entitlements (plan tier, features, modules),
+shared by plan enforcement and the module/plan guards.
+
+- Bounded LRU (MAX_ENTRIES), so memory does not grow with tenant count
+- TTL with +/- jitter, so entries loaded together don't expire together
+- Negative caching: unknown tenants are cached briefly (NEGATIVE_TTL)
+- Single flight: concurrent misses for a tenant share one load
+- Cross-worker invalidation: invalidate() publishes on a Redis channel;
+  every worker's subscriber drops the entry. Without Redis only the
+  local entry is dropped and other workers catch up within the TTL.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+
+# Default pub/sub channel for invalidations; payload is a tenant id or "*"
+INVALIDATION_CHANNEL = "custos:entitlements:invalidate"
+
+_ALL = "*"
+
+Loader = Callable[[UUID, Any], Awaitable[Any]]
+
+
+class EntitlementCache:
+    """
+    LRU + TTL cache of entitlement objects keyed by tenant id.
+
+    The loader returns the entitlement object; objects with a false
+    `exists` attribute are cached for NEGATIVE_TTL only.
+    """
+
+    MAX_ENTRIES = 10000
+    TTL = 300  # seconds
+    NEGATIVE_TTL = 30
+    JITTER = 0.1  # +/- fraction of the TTL
+
+    # Seconds between subscriber reconnect attempts
+    RECONNECT_SECONDS = 5.0
+
+    def __init__(self, loader: Loader, channel: str = INVALIDATION_CHANNEL):
+        self._loader = loader
+        self._channel = channel
+        self._entries: "OrderedDict[UUID, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[UUID, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._publish_tasks: set = set()
+
+    # ============================================
+    # Lookup
+    # ============================================
+
+    def peek(self, tenant_id: UUID) -> Optional[Any]:
+        """Fresh cached value or None; never loads."""
+        entry = self._entries.get(tenant_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[tenant_id]
+            return None
+        self._entries.move_to_end(tenant_id)
+        return value
+
+    async def get(self, tenant_id: UUID, db=None) -> Any:
+        """Cached value, loading it (once across concurrent callers) on a miss."""
+        value = self.peek(tenant_id)
+        if value is not None:
+            return value
+
+        pending = self._inflight.get(tenant_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[tenant_id] = future
+        try:
+            value = await self._loader(tenant_id, db)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when no one else waits
+            raise
+        finally:
+            # An invalidation during the load detaches the future: the
+            # value may predate the change, so it is returned but not cached
+            current = self._inflight.get(tenant_id) is future
+            if current:
+                del self._inflight[tenant_id]
+
+        if current:
+            self._store(tenant_id, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, tenant_id: UUID, value: Any) -> None:
+        ttl = self.TTL if getattr(value, "exists", True) else self.NEGATIVE_TTL
+        ttl *= 1 + random.uniform(-self.JITTER, self.JITTER)
+        self._entries[tenant_id] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(tenant_id)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ============================================
+    # Invalidation
+    # ============================================
+
+    def invalidate(self, tenant_id: UUID, broadcast: bool = True) -> None:
+        """Drop a tenant's entry here and (broadcast) on every worker."""
+        self._entries.pop(tenant_id, None)
+        self._inflight.pop(tenant_id, None)
+        if broadcast:
+            self._publish(str(tenant_id))
+
+    def invalidate_all(self, broadcast: bool = True) -> None:
+        """Drop every entry here and (broadcast) on every worker."""
+        self._entries.clear()
+        self._inflight.clear()
+        if broadcast:
+            self._publish(_ALL)
+
+    def _publish(self, payload: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop: local invalidation only
+        task = loop.create_task(self._send(payload))
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+
+    async def _send(self, payload: str) -> None:
+        from app.core.cache import get_cache
+
+        cache = await get_cache()
+        if not cache.is_connected:
+            return
+        try:
+            await cache._client.publish(self._channel, payload)
+        except Exception as e:
+            logger.warning(f"Entitlement invalidation publish failed: {e}")
+
+    def _apply(self, payload: str) -> None:
+        if payload == _ALL:
+            self.invalidate_all(broadcast=False)
+            return
+        try:
+            self.invalidate(UUID(payload), broadcast=False)
+        except ValueError:
+            logger.warning(f"Ignoring invalid entitlement invalidation: {payload!r}")
+
+    # ============================================
+    # Subscriber lifecycle
+    # ============================================
+
+    def start(self) -> None:
+        """Start the invalidation subscriber on the running loop (idempotent)."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._subscribe())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _subscribe(self) -> None:
+        from app.core.cache import get_cache
+
+        while True:
+            cache = await get_cache()
+            if not cache.is_connected:
+                return  # Local-only; TTL bounds staleness
+
+            pubsub = cache._client.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                # Anything missed while disconnected
+                self.invalidate_all(broadcast=False)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._apply(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Entitlement invalidation subscriber failed: {e}")
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(self.RECONNECT_SECONDS)
@@ -8,6 +8,8 @@ RULES:
 2. Hard limits = block, require upgrade
 3. All usage changes are audit-safe
 4. No payment processing here (just signals)
+5. Counters are shared by all workers and survive restarts
+   (Redis with a database fallback, see usage_store.py)
 
 USAGE:
 
@@ -26,10 +28,14 @@ import logging
 from enum import Enum
 from typing import Dict, Optional, List, Any
 from uuid import UUID
-from datetime import datetime, timezone, timedelta, date
+from datetime import datetime, timezone
 from dataclasses import dataclass, field
 from threading import Lock
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.platform.control.usage_store import UsageCounterStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -116,32 +122,6 @@ DEFAULT_LIMITS: Dict[str, Dict[UsageType, UsageLimit]] = {
 }
 
 
-@dataclass
-class UsageRecord:
-    """Current usage for a tenant."""
-    tenant_id: UUID
-    usage_type: UsageType
-    current_usage: int = 0
-    period_start: date = field(default_factory=date.today)
-    overage_amount: int = 0
-    last_updated: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    
-    def reset_if_needed(self, reset_period: str):
-        """Reset usage if period has elapsed."""
-        today = date.today()
-        
-        if reset_period == "monthly":
-            if self.period_start.month != today.month or self.period_start.year != today.year:
-                self.current_usage = 0
-                self.overage_amount = 0
-                self.period_start = today.replace(day=1)
-        elif reset_period == "daily":
-            if self.period_start != today:
-                self.current_usage = 0
-                self.overage_amount = 0
-                self.period_start = today
-
-
 @dataclass
 class UsageCheckResult:
     """Result of a usage check."""
@@ -200,7 +180,9 @@ class UsageLimits:
     """
     Usage limit enforcement.
     
-    Tracks usage per tenant against plan limits.
+    Tracks usage per tenant against plan limits. Counters are shared by
+    all workers and persisted (see usage_store.py); checks and records
+    cost at most one round trip.
     """
     
     _instance: Optional["UsageLimits"] = None
@@ -218,115 +200,117 @@ class UsageLimits:
         if self._initialized:
             return
         
-        self._usage_cache: Dict[str, UsageRecord] = {}  # key: tenant_id:usage_type
-        self._billing_signals: List[BillingSignal] = []
-        self._signals_lock = Lock()
-        self._max_signals = 1000
+        self._store = UsageCounterStore()
         self._initialized = True
     
-    def _get_cache_key(self, tenant_id: UUID, usage_type: UsageType) -> str:
-        return f"{tenant_id}:{usage_type.value}"
+    def start(self) -> None:
+        """Start background persistence on the running loop."""
+        self._store.start()
     
-    def _get_usage_record(self, tenant_id: UUID, usage_type: UsageType) -> UsageRecord:
-        """Get or create usage record."""
-        key = self._get_cache_key(tenant_id, usage_type)
-        
-        if key not in self._usage_cache:
-            self._usage_cache[key] = UsageRecord(
-                tenant_id=tenant_id,
-                usage_type=usage_type,
-            )
-        
-        return self._usage_cache[key]
+    async def stop(self) -> None:
+        """Return unused reservations and persist buffered usage and signals."""
+        await self._store.stop()
     
     def _get_limit(self, tier: str, usage_type: UsageType) -> Optional[UsageLimit]:
         """Get limit for a tier and usage type."""
         tier_limits = DEFAULT_LIMITS.get(tier, DEFAULT_LIMITS.get("free", {}))
         return tier_limits.get(usage_type)
     
-    def check_usage(
+    @staticmethod
+    def _reset_period(limit_def: Optional[UsageLimit]) -> str:
+        # Unlimited usage is still counted, per month
+        return limit_def.reset_period if limit_def else "monthly"
+    
+    def _evaluate(
         self,
-        tenant_id: UUID,
         usage_type: UsageType,
-        tier: str,
-        amount: int = 1,
+        limit_def: Optional[UsageLimit],
+        current: int,
+        amount: int,
     ) -> UsageCheckResult:
-        """
-        Check if usage is within limits.
+        """Check result for current usage plus amount."""
+        # No limit defined = unlimited
+        if not limit_def:
+            return UsageCheckResult(
+                allowed=True,
+                blocked=False,
+                usage_type=usage_type,
+                current=current,
+                limit=0,
+                remaining=-1,  # Unlimited
+                percent_used=0,
+            )
         
-        Does NOT record usage - just checks.
-        """
-        with self._lock:
-            record = self._get_usage_record(tenant_id, usage_type)
-            limit_def = self._get_limit(tier, usage_type)
-            
-            # No limit defined = unlimited
-            if not limit_def:
-                return UsageCheckResult(
-                    allowed=True,
-                    blocked=False,
-                    usage_type=usage_type,
-                    current=record.current_usage,
-                    limit=0,
-                    remaining=-1,  # Unlimited
-                    percent_used=0,
-                )
-            
-            # Reset if period elapsed
-            record.reset_if_needed(limit_def.reset_period)
-            
-            projected = record.current_usage + amount
-            limit = limit_def.limit
-            remaining = max(0, limit - record.current_usage)
-            percent_used = (record.current_usage / limit * 100) if limit > 0 else 0
-            
-            # Check if within limits
-            if projected <= limit:
-                is_warning = percent_used >= (limit_def.warning_threshold * 100)
-                return UsageCheckResult(
-                    allowed=True,
-                    blocked=False,
-                    usage_type=usage_type,
-                    current=record.current_usage,
-                    limit=limit,
-                    remaining=remaining,
-                    percent_used=percent_used,
-                    is_warning=is_warning,
-                    message="Approaching limit" if is_warning else None,
-                )
-            
-            # Over limit
-            overage = projected - limit
-            overage_cost = overage * (limit_def.overage_rate or 0)
-            
-            if limit_def.limit_type == LimitType.HARD:
-                return UsageCheckResult(
-                    allowed=False,
-                    blocked=True,
-                    usage_type=usage_type,
-                    current=record.current_usage,
-                    limit=limit,
-                    remaining=remaining,
-                    percent_used=percent_used,
-                    message=f"Usage limit reached ({record.current_usage}/{limit}). Upgrade to continue.",
-                )
-            
-            # Soft limit - allowed with overage
+        projected = current + amount
+        limit = limit_def.limit
+        remaining = max(0, limit - current)
+        percent_used = (current / limit * 100) if limit > 0 else 0
+        
+        # Check if within limits
+        if projected <= limit:
+            is_warning = percent_used >= (limit_def.warning_threshold * 100)
             return UsageCheckResult(
                 allowed=True,
                 blocked=False,
                 usage_type=usage_type,
-                current=record.current_usage,
+                current=current,
                 limit=limit,
-                remaining=0,
+                remaining=remaining,
                 percent_used=percent_used,
-                is_overage=True,
-                overage_amount=overage,
-                overage_cost=overage_cost,
-                message=f"Over limit by {overage}. Overage charges may apply.",
+                is_warning=is_warning,
+                message="Approaching limit" if is_warning else None,
             )
+        
+        # Over limit
+        overage = projected - limit
+        overage_cost = overage * (limit_def.overage_rate or 0)
+        
+        if limit_def.limit_type == LimitType.HARD:
+            return UsageCheckResult(
+                allowed=False,
+                blocked=True,
+                usage_type=usage_type,
+                current=current,
+                limit=limit,
+                remaining=remaining,
+                percent_used=percent_used,
+                message=f"Usage limit reached ({current}/{limit}). Upgrade to continue.",
+            )
+        
+        # Soft limit - allowed with overage
+        return UsageCheckResult(
+            allowed=True,
+            blocked=False,
+            usage_type=usage_type,
+            current=current,
+            limit=limit,
+            remaining=0,
+            percent_used=percent_used,
+            is_overage=True,
+            overage_amount=overage,
+            overage_cost=overage_cost,
+            message=f"Over limit by {overage}. Overage charges may apply.",
+        )
     
-    def record_usage(
+    async def check_usage(
+        self,
+        tenant_id: UUID,
+        usage_type: UsageType,
+        tier: str,
+        amount: int = 1,
+    ) -> UsageCheckResult:
+        """
+        Check if usage is within limits.
+        
+        Does NOT record usage - just checks.
+        """
+        limit_def = self._get_limit(tier, usage_type)
+        current = await self._store.get(
+            tenant_id, usage_type.value, self._reset_period(limit_def),
+        )
+        return self._evaluate(usage_type, limit_def, current, amount)
+    
+    async def record_usage(
         self,
         tenant_id: UUID,
         usage_type: UsageType,
@@ -338,90 +322,100 @@ class UsageLimits:
         
         Also generates billing signals if needed.
         """
-        with self._lock:
-            record = self._get_usage_record(tenant_id, usage_type)
-            limit_def = self._get_limit(tier, usage_type)
-            
-            if limit_def:
-                record.reset_if_needed(limit_def.reset_period)
-            
-            record.current_usage += amount
-            record.last_updated = datetime.now(timezone.utc)
-            
-            # Calculate status
-            result = self.check_usage(tenant_id, usage_type, tier, 0)
-            
-            # Generate billing signals
-            if result.is_overage and limit_def and limit_def.overage_rate:
-                self._add_billing_signal(BillingSignal(
-                    tenant_id=tenant_id,
-                    signal_type="overage",
-                    usage_type=usage_type,
-                    amount=amount,
-                    cost=amount * limit_def.overage_rate,
-                ))
-            
-            if result.blocked:
-                self._add_billing_signal(BillingSignal(
-                    tenant_id=tenant_id,
-                    signal_type="limit_reached",
-                    usage_type=usage_type,
-                    amount=record.current_usage,
-                    cost=0,
-                ))
-            
-            return result
+        limit_def = self._get_limit(tier, usage_type)
+        current = await self._store.add(
+            tenant_id,
+            usage_type.value,
+            self._reset_period(limit_def),
+            amount,
+            limit=limit_def.limit if limit_def else None,
+        )
+        
+        # Calculate status
+        result = self._evaluate(usage_type, limit_def, current, 0)
+        
+        # Generate billing signals
+        if result.is_overage and limit_def and limit_def.overage_rate:
+            self._store.add_signal(BillingSignal(
+                tenant_id=tenant_id,
+                signal_type="overage",
+                usage_type=usage_type,
+                amount=amount,
+                cost=amount * limit_def.overage_rate,
+            ))
+        
+        if result.blocked:
+            self._store.add_signal(BillingSignal(
+                tenant_id=tenant_id,
+                signal_type="limit_reached",
+                usage_type=usage_type,
+                amount=current,
+                cost=0,
+            ))
+        
+        return result
     
-    def get_usage_summary(self, tenant_id: UUID, tier: str) -> Dict[str, dict]:
-        """Get usage summary for all tracked types."""
-        summary = {}
+    async def get_usage_summary(self, tenant_id: UUID, tier: str) -> Dict[str, dict]:
+        """Get usage summary for limited and used types (one round trip)."""
+        limit_defs = {usage_type: self._get_limit(tier, usage_type) for usage_type in UsageType}
+        counts = await self._store.get_many(
+            tenant_id,
+            [
+                (usage_type.value, self._reset_period(limit_def))
+                for usage_type, limit_def in limit_defs.items()
+            ],
+        )
         
-        for usage_type in UsageType:
-            key = self._get_cache_key(tenant_id, usage_type)
-            if key in self._usage_cache:
-                result = self.check_usage(tenant_id, usage_type, tier, 0)
-                summary[usage_type.value] = result.to_dict()
+        summary = {}
+        for usage_type, limit_def in limit_defs.items():
+            current = counts.get(usage_type.value, 0)
+            if limit_def or current:
+                summary[usage_type.value] = self._evaluate(
+                    usage_type, limit_def, current, 0,
+                ).to_dict()
         
         return summary
     
-    def reset_usage(self, tenant_id: UUID, usage_type: Optional[UsageType] = None):
-        """Reset usage for a tenant (all types or specific)."""
-        with self._lock:
-            if usage_type:
-                key = self._get_cache_key(tenant_id, usage_type)
-                if key in self._usage_cache:
-                    del self._usage_cache[key]
-            else:
-                keys_to_delete = [
-                    k for k in self._usage_cache
-                    if k.startswith(str(tenant_id))
-                ]
-                for key in keys_to_delete:
-                    del self._usage_cache[key]
-    
-    def _add_billing_signal(self, signal: BillingSignal):
-        """Add a billing signal."""
-        with self._signals_lock:
-            self._billing_signals.append(signal)
-            if len(self._billing_signals) > self._max_signals:
-                self._billing_signals.pop(0)
+    async def reset_usage(
+        self,
+        tenant_id: UUID,
+        usage_type: Optional[UsageType] = None,
+        tier: str = "free",
+    ):
+        """Reset current-period usage for a tenant (all types or specific)."""
+        usage_types = [usage_type] if usage_type else list(UsageType)
+        await self._store.reset(
+            tenant_id,
+            [
+                (ut.value, self._reset_period(self._get_limit(tier, ut)))
+                for ut in usage_types
+            ],
+        )
     
     def get_billing_signals(
         self,
         tenant_id: Optional[UUID] = None,
         limit: int = 100,
     ) -> List[dict]:
-        """Get recent billing signals."""
-        with self._signals_lock:
-            signals = self._billing_signals[-limit:]
-            if tenant_id:
-                signals = [s for s in signals if s.tenant_id == tenant_id]
-            return [s.to_dict() for s in signals]
+        """Get recent billing signals raised by this worker."""
+        signals = list(self._store.recent_signals)[-limit:]
+        if tenant_id:
+            signals = [s for s in signals if s.tenant_id == tenant_id]
+        return [s.to_dict() for s in signals]
+    
+    async def load_billing_signals(
+        self,
+        db: AsyncSession,
+        tenant_id: Optional[UUID] = None,
+        limit: int = 100,
+    ) -> List[dict]:
+        """Get unprocessed billing signals of all workers (persisted)."""
+        await self._store.flush()
+        return await self._store.load_signals(db, tenant_id, limit)
     
-    def clear_billing_signals(self):
-        """Clear billing signals (after processing)."""
-        with self._signals_lock:
-            self._billing_signals.clear()
+    async def clear_billing_signals(self, db: AsyncSession) -> int:
+        """Mark billing signals processed; returns how many were cleared."""
+        return await self._store.mark_signals_processed(db)
 
 
 # Global instance
@@ -447,7 +441,7 @@ async def check_usage(
     
     Does NOT record usage.
     """
-    return get_limits().check_usage(tenant_id, usage_type, tier, amount)
+    return await get_limits().check_usage(tenant_id, usage_type, tier, amount)
 
 
 async def record_usage(
@@ -461,9 +455,9 @@ async def record_usage(
     
     Also generates billing signals if needed.
     """
-    return get_limits().record_usage(tenant_id, usage_type, tier, amount)
+    return await get_limits().record_usage(tenant_id, usage_type, tier, amount)
 
 
 async def get_usage_summary(tenant_id: UUID, tier: str = "free") -> Dict[str, dict]:
     """Get usage summary for a tenant."""
-    return get_limits().get_usage_summary(tenant_id, tier)
+    return await get_limits().get_usage_summary(tenant_id, tier)
@@ -0,0 +1,66 @@
+"""
+CUSTOS Platform Control Models
+
+Persisted usage-limit counters and billing signals (platform-level,
+not tenant-scoped).
+"""
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, Float, Index, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base_model import BaseModel  # NOT TenantBaseModel
+
+
+class UsageCounter(BaseModel):
+    """
+    Usage of one limited resource by one tenant in one reset period.
+
+    Durable copy of the Redis counters used by UsageLimits, and the
+    counter itself when Redis is unavailable. Workers add their deltas
+    into the same row. period_key: "2026-10" (monthly), "2026-10-18"
+    (daily) or "all" (never resets).
+    """
+    __tablename__ = "platform_usage_counters"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "usage_type", "period_key",
+            name="uq_usage_counter_period",
+        ),
+    )
+
+    tenant_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), nullable=False)
+    usage_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    period_key: Mapped[str] = mapped_column(String(10), nullable=False)
+    count: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class BillingSignalRecord(BaseModel):
+    """
+    Billing signals raised by usage limits, coalesced per flush.
+
+    Signals of the same tenant, type and usage type raised within one
+    flush interval are stored as one row (signal_count > 1): amounts and
+    costs are summed for overage, the highest usage is kept otherwise.
+    """
+    __tablename__ = "platform_billing_signals"
+
+    __table_args__ = (
+        Index("ix_billing_signal_tenant_last", "tenant_id", "last_at"),
+        Index("ix_billing_signal_unprocessed", "processed_at", "last_at"),
+    )
+
+    tenant_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), nullable=False)
+    signal_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    usage_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, default=0)
+    cost: Mapped[float] = mapped_column(Float, default=0.0)
+    signal_count: Mapped[int] = mapped_column(Integer, default=1)
+    first_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
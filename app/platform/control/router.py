@@ -298,7 +298,7 @@ async def get_tenant_usage(
     return {
         "tenant_id": str(tenant_id),
         "tier": tier,
-        "usage": limits.get_usage_summary(tenant_id, tier),
+        "usage": await limits.get_usage_summary(tenant_id, tier),
     }
 
 
@@ -307,9 +307,10 @@ async def reset_tenant_usage(
     tenant_id: UUID,
     admin: CurrentPlatformAdmin,
     usage_type: Optional[str] = Query(default=None),
+    tier: str = Query(default="free"),
 ):
     """
-    Reset usage counters for a tenant.
+    Reset current-period usage counters for a tenant.
     
     If usage_type specified, resets only that type.
     Otherwise resets all usage.
@@ -319,12 +320,12 @@ async def reset_tenant_usage(
     if usage_type:
         try:
             ut = UsageType(usage_type)
-            limits.reset_usage(tenant_id, ut)
+            await limits.reset_usage(tenant_id, ut, tier)
             return {"message": f"Reset {usage_type} usage for {tenant_id}"}
         except ValueError:
             return {"error": f"Unknown usage type: {usage_type}"}
     
-    limits.reset_usage(tenant_id)
+    await limits.reset_usage(tenant_id, tier=tier)
     return {"message": f"Reset all usage for {tenant_id}"}
 
 
@@ -333,14 +334,15 @@ async def get_billing_signals(
     admin: CurrentPlatformAdmin,
     tenant_id: Optional[UUID] = Query(default=None),
     limit: int = Query(default=100, le=500),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get billing signals generated by usage limits.
+    Get unprocessed billing signals generated by usage limits.
     
     These are signals only - no actual charges processed here.
     """
     limits = get_limits()
-    signals = limits.get_billing_signals(tenant_id, limit)
+    signals = await limits.load_billing_signals(db, tenant_id, limit)
     
     return {
         "signals": signals,
@@ -351,12 +353,13 @@ async def get_billing_signals(
 @router.post("/billing-signals/clear")
 async def clear_billing_signals(
     admin: CurrentPlatformAdmin,
+    db: AsyncSession = Depends(get_db),
 ):
-    """Clear billing signals after processing."""
+    """Mark billing signals processed."""
     limits = get_limits()
-    limits.clear_billing_signals()
+    cleared = await limits.clear_billing_signals(db)
     
-    return {"message": "Billing signals cleared"}
+    return {"message": "Billing signals cleared", "count": cleared}
 
 
 # ============================================
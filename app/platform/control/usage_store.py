@@ -0,0 +1,633 @@
+"""
+CUSTOS Usage Limit Counters
+
+Shared counters behind UsageLimits, so every worker enforces the same
+quota and counts survive deploys.
+
+BACKENDS:
+- Redis (primary): usage:limit:{tenant}:{type}:{period}, incremented
+  atomically and expiring at the end of its reset period (+ grace)
+- Database (durable copy, and the counter when Redis is unavailable):
+  platform_usage_counters, one row per tenant/type/period, written
+  additively by a write-behind buffer every FLUSH_INTERVAL_SECONDS
+
+RESERVATIONS:
+A worker claims units from the Redis counter in blocks and uses them
+locally, so most add() calls do no I/O and one that needs a new block
+costs one round trip. Blocks shrink as the limit approaches (at most
+1/BLOCK_HEADROOM_DIVISOR of the remaining headroom), so near the limit
+every add goes to Redis and enforcement is exact. Counts seen by a
+worker include units other workers reserved but have not used yet;
+unused units are returned when idle and on shutdown.
+
+If a Redis counter is missing mid-period (eviction, restart) the worker
+that recreates it adds the persisted database count once.
+
+PERIODS:
+monthly -> "2026-10", daily -> "2026-10-18", never -> "all"
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+logger = logging.getLogger(__name__)
+
+
+# Redis counters stay readable this long after their period ends
+PERIOD_GRACE_SECONDS = 86400
+
+_KEY_PREFIX = "usage:limit"
+
+# (tenant_id, usage type value, period key)
+CounterKey = Tuple[UUID, str, str]
+
+# (tenant_id, signal type, usage type value)
+SignalKey = Tuple[UUID, str, str]
+
+
+def period_key(reset_period: str, today: Optional[date] = None) -> str:
+    """Key of the current reset period."""
+    today = today or date.today()
+    if reset_period == "daily":
+        return today.isoformat()
+    if reset_period == "monthly":
+        return today.strftime("%Y-%m")
+    return "all"
+
+
+def period_expiry(reset_period: str, today: Optional[date] = None) -> Optional[int]:
+    """Unix time the period's counter expires (end + grace); None if it never resets."""
+    today = today or date.today()
+    if reset_period == "daily":
+        end = today + timedelta(days=1)
+    elif reset_period == "monthly":
+        end = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+    else:
+        return None
+    return int(datetime.combine(end, dt_time.min).timestamp()) + PERIOD_GRACE_SECONDS
+
+
+def _chunks(deltas: Dict, size: int) -> Iterator[Dict]:
+    """Split deltas into key-ordered chunks of at most size keys."""
+    keys = sorted(deltas, key=str)
+    for i in range(0, len(keys), size):
+        yield {key: deltas[key] for key in keys[i:i + size]}
+
+
+@dataclass
+class _Reservation:
+    """Units this worker claimed from a Redis counter."""
+    available: int = 0       # Claimed, not used yet (negative while a claim is in flight)
+    counter_value: int = 0   # Redis counter after our last claim or read
+    synced_at: float = 0.0
+    used_at: float = 0.0
+
+    @property
+    def current(self) -> int:
+        return self.counter_value - self.available
+
+
+@dataclass
+class _SignalBatch:
+    """Billing signals coalesced for one flush."""
+    amount: int
+    cost: float
+    count: int
+    first_at: datetime
+    last_at: datetime
+
+
+class UsageCounterStore:
+    """
+    Usage-limit counters shared by all workers.
+
+    One instance per process (owned by UsageLimits). Safe for concurrent
+    coroutines on one event loop.
+    """
+
+    # Largest block claimed at once, as a fraction of the limit
+    BLOCK_FRACTION = 0.01
+    BLOCK_HEADROOM_DIVISOR = 10
+    UNLIMITED_BLOCK = 100
+
+    # A check re-reads the shared counter when the local view is older
+    SYNC_SECONDS = 2.0
+
+    # Unused reservations are returned after this long without use
+    RESERVATION_IDLE_SECONDS = 30.0
+
+    FLUSH_INTERVAL_SECONDS = 5.0
+    MAX_PENDING_KEYS = 5000
+
+    # Keys per insert statement; keeps bind parameters well under
+    # asyncpg's 32767 limit (UsageCounter ~8 per row, signals ~12)
+    FLUSH_CHUNK_SIZE = 1000
+
+    # Database-only mode: persisted counts are re-read this often
+    DB_READ_TTL_SECONDS = 5.0
+
+    # Recent signals kept in memory for this worker
+    MAX_RECENT_SIGNALS = 1000
+
+    def __init__(self):
+        self._reservations: Dict[CounterKey, _Reservation] = {}
+        self._db_counts: Dict[CounterKey, Tuple[float, int]] = {}
+
+        # Write-behind: deltas and signals not yet in the database
+        self._pending: Dict[CounterKey, int] = {}
+        self._signals: Dict[SignalKey, _SignalBatch] = {}
+        self.recent_signals: Deque[Any] = deque(maxlen=self.MAX_RECENT_SIGNALS)
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+    # ============================================
+    # Counters
+    # ============================================
+
+    @staticmethod
+    def _redis_key(key: CounterKey) -> str:
+        tenant_id, usage_type, period = key
+        return f"{_KEY_PREFIX}:{tenant_id}:{usage_type}:{period}"
+
+    @staticmethod
+    async def _redis():
+        from app.core.cache import get_cache
+
+        cache = await get_cache()
+        return cache._client if cache.is_connected else None
+
+    def _block_size(self, limit: Optional[int], counter_value: int) -> int:
+        if limit is None:
+            return self.UNLIMITED_BLOCK
+        headroom = limit - counter_value
+        if headroom <= 0:
+            return 0
+        return min(int(limit * self.BLOCK_FRACTION), headroom // self.BLOCK_HEADROOM_DIVISOR)
+
+    async def add(
+        self,
+        tenant_id: UUID,
+        usage_type: str,
+        reset_period: str,
+        amount: int,
+        limit: Optional[int] = None,
+    ) -> int:
+        """Add usage; returns the period's usage after it (all workers)."""
+        key = (tenant_id, usage_type, period_key(reset_period))
+        self._pending[key] = self._pending.get(key, 0) + amount
+        self._after_add()
+
+        now = time.monotonic()
+        res = self._reservations.get(key)
+        if res is None:
+            res = self._reservations[key] = _Reservation()
+        res.used_at = now
+
+        res.available -= amount
+        if res.available >= 0:
+            return res.current
+
+        # Out of reserved units: claim what is missing plus a block
+        claim = -res.available + self._block_size(limit, res.counter_value)
+        value = await self._claim(key, reset_period, claim)
+        if value is None:
+            res.available += amount  # Not claimed; counted in the database instead
+            return await self._db_add(key, amount)
+
+        res.available += claim
+        res.counter_value = max(res.counter_value, value)
+        res.synced_at = now
+        return res.current
+
+    async def _claim(self, key: CounterKey, reset_period: str, claim: int) -> Optional[int]:
+        """INCRBY the shared counter; None when Redis is unavailable."""
+        client = await self._redis()
+        if client is None:
+            return None
+        redis_key = self._redis_key(key)
+        expire_at = period_expiry(reset_period)
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.incrby(redis_key, claim)
+            if expire_at is not None:
+                pipe.expireat(redis_key, expire_at)
+            value = (await pipe.execute())[0]
+
+            if value == claim:
+                # We created the counter: restore anything persisted earlier
+                # in the period (Redis restart or eviction)
+                persisted = await self._db_read(key)
+                if persisted:
+                    value = await client.incrby(redis_key, persisted)
+            return value
+        except Exception as e:
+            logger.warning(f"Usage counter claim failed for {redis_key}: {e}")
+            return None
+
+    async def get(self, tenant_id: UUID, usage_type: str, reset_period: str) -> int:
+        """Current usage for the period; at most one round trip."""
+        key = (tenant_id, usage_type, period_key(reset_period))
+        res = self._reservations.get(key)
+        now = time.monotonic()
+        if res is not None and now - res.synced_at < self.SYNC_SECONDS:
+            return res.current
+
+        client = await self._redis()
+        if client is not None:
+            try:
+                value = await client.get(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Usage counter read failed: {e}")
+                value = None
+            if value is not None:
+                return self._synced(key, int(value), now)
+
+        return await self._db_count(key)
+
+    async def get_many(
+        self,
+        tenant_id: UUID,
+        usage_types: Iterable[Tuple[str, str]],
+    ) -> Dict[str, int]:
+        """Usage per type for (usage_type, reset_period) pairs; one round trip."""
+        keys = [(tenant_id, usage_type, period_key(reset_period)) for usage_type, reset_period in usage_types]
+        if not keys:
+            return {}
+
+        client = await self._redis()
+        if client is not None:
+            try:
+                values = await client.mget([self._redis_key(k) for k in keys])
+                now = time.monotonic()
+                return {
+                    key[1]: self._synced(key, int(value), now) if value is not None
+                    else await self._db_count(key)
+                    for key, value in zip(keys, values)
+                }
+            except Exception as e:
+                logger.warning(f"Usage counter read failed: {e}")
+
+        return {key[1]: await self._db_count(key) for key in keys}
+
+    def _synced(self, key: CounterKey, value: int, now: float) -> int:
+        res = self._reservations.get(key)
+        if res is None:
+            return value
+        res.counter_value = value
+        res.synced_at = now
+        return res.current
+
+    async def reset(self, tenant_id: UUID, usage_types: Iterable[Tuple[str, str]]) -> None:
+        """
+        Zero the current period's counters.
+
+        Other workers' unused reservations for these counters are not
+        revoked; they are used up or returned as usual.
+        """
+        keys = [(tenant_id, usage_type, period_key(reset_period)) for usage_type, reset_period in usage_types]
+        if not keys:
+            return
+        for key in keys:
+            self._reservations.pop(key, None)
+            self._db_counts.pop(key, None)
+            self._pending.pop(key, None)
+
+        client = await self._redis()
+        if client is not None:
+            try:
+                await client.delete(*[self._redis_key(k) for k in keys])
+            except Exception as e:
+                logger.warning(f"Usage counter reset failed in Redis: {e}")
+
+        from app.core.database import AsyncSessionLocal
+        from app.platform.control.models import UsageCounter
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                delete(UsageCounter).where(
+                    tuple_(
+                        UsageCounter.tenant_id,
+                        UsageCounter.usage_type,
+                        UsageCounter.period_key,
+                    ).in_(keys)
+                )
+            )
+            await session.commit()
+
+    # ============================================
+    # Database fallback
+    # ============================================
+
+    async def _db_read(self, key: CounterKey) -> int:
+        from app.core.database import AsyncSessionLocal
+        from app.platform.control.models import UsageCounter
+
+        tenant_id, usage_type, period = key
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(UsageCounter.count).where(
+                    UsageCounter.tenant_id == tenant_id,
+                    UsageCounter.usage_type == usage_type,
+                    UsageCounter.period_key == period,
+                )
+            )
+            return result.scalar() or 0
+
+    async def _db_count(self, key: CounterKey) -> int:
+        """
+        Persisted count plus this worker's increments since it was read.
+
+        Other workers' increments show up within a flush interval plus
+        DB_READ_TTL_SECONDS.
+        """
+        cached = self._db_counts.get(key)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.DB_READ_TTL_SECONDS:
+            return cached[1]
+        try:
+            value = await self._db_read(key) + self._pending.get(key, 0)
+        except Exception as e:
+            logger.error(f"Usage counter read failed: {e}")
+            return cached[1] if cached else self._pending.get(key, 0)
+        self._db_counts[key] = (now, value)
+        return value
+
+    async def _db_add(self, key: CounterKey, amount: int) -> int:
+        cached = self._db_counts.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.DB_READ_TTL_SECONDS:
+            value = cached[1] + amount
+            self._db_counts[key] = (cached[0], value)
+            return value
+        # A fresh read already includes the pending delta
+        return await self._db_count(key)
+
+    # ============================================
+    # Billing signals
+    # ============================================
+
+    def add_signal(self, signal: Any) -> None:
+        """Buffer a BillingSignal; persisted (coalesced) on the next flush."""
+        self.recent_signals.append(signal)
+
+        key = (signal.tenant_id, signal.signal_type, signal.usage_type.value)
+        batch = self._signals.get(key)
+        if batch is None:
+            self._signals[key] = _SignalBatch(
+                amount=signal.amount,
+                cost=signal.cost,
+                count=1,
+                first_at=signal.timestamp,
+                last_at=signal.timestamp,
+            )
+        else:
+            if signal.signal_type == "overage":
+                batch.amount += signal.amount
+                batch.cost += signal.cost
+            else:
+                batch.amount = max(batch.amount, signal.amount)
+            batch.count += 1
+            batch.last_at = signal.timestamp
+        self._after_add()
+
+    async def load_signals(
+        self,
+        session,
+        tenant_id: Optional[UUID] = None,
+        limit: int = 100,
+    ) -> List[dict]:
+        """Unprocessed persisted signals, newest first."""
+        from app.platform.control.models import BillingSignalRecord
+
+        query = select(BillingSignalRecord).where(BillingSignalRecord.processed_at.is_(None))
+        if tenant_id:
+            query = query.where(BillingSignalRecord.tenant_id == tenant_id)
+        query = query.order_by(BillingSignalRecord.last_at.desc()).limit(limit)
+
+        result = await session.execute(query)
+        return [
+            {
+                "tenant_id": str(record.tenant_id),
+                "signal_type": record.signal_type,
+                "usage_type": record.usage_type,
+                "amount": record.amount,
+                "cost": record.cost,
+                "count": record.signal_count,
+                "timestamp": record.last_at.isoformat(),
+                "first_at": record.first_at.isoformat(),
+            }
+            for record in result.scalars().all()
+        ]
+
+    async def mark_signals_processed(self, session) -> int:
+        """Mark every persisted signal processed; returns how many."""
+        from app.platform.control.models import BillingSignalRecord
+
+        await self.flush()
+        result = await session.execute(
+            update(BillingSignalRecord)
+            .where(BillingSignalRecord.processed_at.is_(None))
+            .values(processed_at=datetime.now(timezone.utc))
+        )
+        await session.commit()
+        self.recent_signals.clear()
+        return result.rowcount
+
+    # ============================================
+    # Flushing
+    # ============================================
+
+    @property
+    def pending_keys(self) -> int:
+        return len(self._pending) + len(self._signals)
+
+    def _after_add(self) -> None:
+        if not self._stopping:
+            self.start()
+        if self.pending_keys >= self.MAX_PENDING_KEYS and self._wakeup:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the periodic flush loop on the running event loop."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the loop, return all reservations and flush."""
+        self._stopping = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self._release_reservations(idle_seconds=0)
+        await self.flush()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.FLUSH_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+                await self._release_reservations(self.RESERVATION_IDLE_SECONDS)
+        except asyncio.CancelledError:
+            await asyncio.shield(self.flush())
+            raise
+
+    async def _release_reservations(self, idle_seconds: float) -> None:
+        """Give unused units of idle reservations back to the shared counters."""
+        now = time.monotonic()
+        idle = [
+            key for key, res in self._reservations.items()
+            if now - res.used_at >= idle_seconds and res.available >= 0
+        ]
+        if not idle:
+            return
+        released = {key: self._reservations.pop(key).available for key in idle}
+
+        client = await self._redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, available in released.items():
+                if available > 0:
+                    pipe.decrby(self._redis_key(key), available)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Returning usage reservations failed: {e}")
+
+    async def flush(self) -> None:
+        """Write buffered counter deltas and billing signals. Never raises."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            signals, self._signals = self._signals, {}
+
+            for chunk in _chunks(pending, self.FLUSH_CHUNK_SIZE):
+                await self._flush_chunk(chunk, {})
+            for chunk in _chunks(signals, self.FLUSH_CHUNK_SIZE):
+                await self._flush_chunk({}, chunk)
+
+    async def _flush_chunk(
+        self,
+        pending: Dict[CounterKey, int],
+        signals: Dict[SignalKey, _SignalBatch],
+    ) -> None:
+        try:
+            await self._write(pending, signals)
+        except Exception as e:
+            self._restore(pending, signals)
+            logger.error(
+                f"Usage limit flush of {len(pending) + len(signals)} keys failed, "
+                f"will retry: {e}"
+            )
+
+    def _restore(
+        self,
+        pending: Dict[CounterKey, int],
+        signals: Dict[SignalKey, _SignalBatch],
+    ) -> None:
+        if self.pending_keys + len(pending) + len(signals) > self.MAX_PENDING_KEYS:
+            logger.error(
+                f"Usage limit buffer full; dropped {len(pending)} counter "
+                f"deltas and {len(signals)} billing signals"
+            )
+            return
+        for key, amount in pending.items():
+            self._pending[key] = self._pending.get(key, 0) + amount
+        for key, batch in signals.items():
+            current = self._signals.get(key)
+            if current is None:
+                self._signals[key] = batch
+            else:
+                current.amount += batch.amount
+                current.cost += batch.cost
+                current.count += batch.count
+                current.first_at = min(current.first_at, batch.first_at)
+
+    async def _write(
+        self,
+        pending: Dict[CounterKey, int],
+        signals: Dict[SignalKey, _SignalBatch],
+    ) -> None:
+        """A chunk's counter upsert and signal insert, one transaction."""
+        from app.core.database import AsyncSessionLocal
+        from app.platform.control.models import BillingSignalRecord, UsageCounter
+
+        now = datetime.now(timezone.utc)
+        base = {"created_at": now, "updated_at": now, "is_deleted": False}
+
+        async with AsyncSessionLocal() as session:
+            if pending:
+                rows = [
+                    {
+                        **base,
+                        "id": uuid4(),
+                        "tenant_id": tenant_id,
+                        "usage_type": usage_type,
+                        "period_key": period,
+                        "count": amount,
+                    }
+                    # Sorted so concurrent workers lock rows in the same order
+                    for (tenant_id, usage_type, period), amount in sorted(
+                        pending.items(), key=lambda item: str(item[0])
+                    )
+                ]
+                stmt = pg_insert(UsageCounter).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    constraint="uq_usage_counter_period",
+                    set_={
+                        "count": func.coalesce(UsageCounter.count, 0) + stmt.excluded.count,
+                        "updated_at": now,
+                    },
+                )
+                await session.execute(stmt)
+
+            if signals:
+                await session.execute(
+                    pg_insert(BillingSignalRecord).values([
+                        {
+                            **base,
+                            "id": uuid4(),
+                            "tenant_id": tenant_id,
+                            "signal_type": signal_type,
+                            "usage_type": usage_type,
+                            "amount": batch.amount,
+                            "cost": batch.cost,
+                            "signal_count": batch.count,
+                            "first_at": batch.first_at,
+                            "last_at": batch.last_at,
+                        }
+                        for (tenant_id, signal_type, usage_type), batch in signals.items()
+                    ])
+                )
+
+            await session.commit()
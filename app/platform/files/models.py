@@ -0,0 +1,81 @@
+"""
+CUSTOS File Storage Models
+
+Content-addressed file records, the uploads referencing them, and
+per-tenant storage usage.
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import BigInteger, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base_model import TenantBaseModel
+
+
+class StoredFile(TenantBaseModel):
+    """
+    One stored copy of a file's content within a tenant.
+
+    Uploads with the same SHA-256 share the row (and the file on disk);
+    ref_count is the number of live FileUploads pointing at it. The
+    file is removed when the last one is deleted.
+    """
+    __tablename__ = "stored_files"
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "content_hash", name="uq_stored_file_hash"),
+        Index("ix_stored_files_tenant_path", "tenant_id", "path"),
+    )
+
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    path: Mapped[str] = mapped_column(String(500), nullable=False)  # Relative to storage_path
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    mime_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+
+
+class FileUpload(TenantBaseModel):
+    """
+    One upload: a reference to a StoredFile.
+
+    Deleting an upload soft-deletes this row and releases its reference
+    once; deleting it again changes nothing.
+    """
+    __tablename__ = "file_uploads"
+
+    __table_args__ = (
+        Index("ix_file_uploads_stored_file", "stored_file_id"),
+    )
+
+    stored_file_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("stored_files.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    uploaded_by: Mapped[Optional[UUID]] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True,  # NULL for references that predate upload records
+    )
+    original_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    folder: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+
+class TenantStorageUsage(TenantBaseModel):
+    """
+    Bytes and files a tenant stores on disk.
+
+    Maintained on upload and delete (deduplicated content counts once).
+    A missing row is seeded from a walk of the tenant's directory.
+    """
+    __tablename__ = "tenant_storage_usage"
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", name="uq_tenant_storage_usage_tenant"),
+    )
+
+    total_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    file_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -0,0 +1,161 @@
+"""
+CUSTOS File Responses
+
+HTTP responses for stored files with byte-range support, so large
+downloads (e.g. inspection exports, videos) can be resumed or fetched
+in parts, and ETag revalidation, so repeat downloads are 304s.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core.config import settings
+
+
+# Bytes read per chunk when streaming a file
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range into inclusive (start, end).
+
+    Returns None when there is no usable range (serve the whole file).
+    Raises ValueError when the range cannot be satisfied.
+    Multi-range requests are answered with the whole file.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    first, _, last = spec.partition("-")
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+
+    end = min(end, size - 1)
+    if start >= size or start > end:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, end
+
+
+async def _iter_file(path: Path, start: int, length: int) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        await asyncio.to_thread(f.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/").strip('"') == etag for tag in candidates)
+
+
+def _accel_response(path: Path, headers: dict, media_type: str) -> Optional[Response]:
+    """Hand the file to the front proxy (settings.file_accel_mode), if enabled."""
+    mode = settings.file_accel_mode
+    if mode == "nginx":
+        try:
+            relative = path.resolve().relative_to(Path(settings.storage_path).resolve())
+        except ValueError:
+            return None  # Not under the storage root nginx knows about
+        prefix = settings.file_accel_prefix.rstrip("/")
+        headers["X-Accel-Redirect"] = f"{prefix}/{quote(relative.as_posix())}"
+    elif mode == "sendfile":
+        headers["X-Sendfile"] = str(path.resolve())
+    else:
+        return None
+    # The proxy sets Content-Length and answers Range itself
+    headers.pop("Content-Length", None)
+    return Response(media_type=media_type, headers=headers)
+
+
+def ranged_file_response(
+    request: Request,
+    path: Path,
+    media_type: str = "application/octet-stream",
+    filename: Optional[str] = None,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Serve a file with conditional GET and Range support.
+
+    - If-None-Match matching the ETag -> 304 (repeat downloads)
+    - a single Range -> 206 (416 if unsatisfiable); If-Range with a
+      stale validator gets the whole file
+    - otherwise the whole file via FileResponse, or via the front proxy
+      (X-Accel-Redirect / X-Sendfile) when settings.file_accel_mode is set
+
+    etag defaults to one derived from the file's mtime and size; pass
+    the stored content hash where there is one.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = etag or f"{stat.st_mtime_ns:x}-{size:x}"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{etag}"',
+        "Cache-Control": "private, no-cache",  # Revalidate, then 304
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    accel = _accel_response(path, dict(headers), media_type)
+    if accel is not None:
+        return accel
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip('"') != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        # Whole file: chunked reads off the event loop, never fully in memory
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _iter_file(path, start, length),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -2,14 +2,17 @@
 CUSTOS File Router
 """
 
+import mimetypes
 from typing import Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.auth.dependencies import CurrentUser
+from app.core.exceptions import ValidationError
+from app.platform.files.responses import ranged_file_response
 from app.platform.files.service import FileService
 
 
@@ -48,28 +51,57 @@ async def upload_multiple(
 @router.get("/download")
 async def download_file(
     path: str,
+    request: Request,
     user: CurrentUser,
     db: AsyncSession = Depends(get_db),
 ):
-    """Download file."""
+    """
+    Download file.
+    
+    Supports Range requests and If-None-Match (the ETag is the content
+    hash, so unchanged files are answered with 304).
+    """
     service = FileService(db, user.tenant_id)
     file_path = service.get_file_path(path)
     
     if not file_path:
         return {"error": "File not found"}
     
-    return FileResponse(path=file_path)
+    stored = await service.get_stored_file(file_path)
+    media_type = (
+        (stored.mime_type if stored else None)
+        or mimetypes.guess_type(file_path.name)[0]
+        or "application/octet-stream"
+    )
+    return ranged_file_response(
+        request,
+        file_path,
+        media_type=media_type,
+        etag=stored.content_hash if stored else None,
+    )
 
 
 @router.delete("")
 async def delete_file(
-    path: str,
     user: CurrentUser,
+    upload_id: Optional[UUID] = None,
+    path: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    """Delete file."""
+    """
+    Delete file.
+    
+    By upload_id (from the upload response), or by path, which deletes
+    one of the caller's own uploads of that file. Repeating a delete
+    does nothing.
+    """
     service = FileService(db, user.tenant_id)
-    success = service.delete_file(path)
+    if upload_id:
+        success = await service.delete_upload(upload_id)
+    elif path:
+        success = await service.delete_file(path, user.user_id)
+    else:
+        raise ValidationError("upload_id or path is required")
     return {"success": success}
 
 
@@ -80,4 +112,4 @@ async def get_storage_usage(
 ):
     """Get storage usage."""
     service = FileService(db, user.tenant_id)
-    return service.get_storage_usage()
+    return await service.get_storage_usage()
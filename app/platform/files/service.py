@@ -1,20 +1,41 @@
 """
 CUSTOS File Upload Service
+
+Uploads are streamed to disk in chunks (hashed and size-checked as they
+arrive) and stored content-addressed per tenant:
+
+    {tenant_id}/objects/{sha[:2]}/{sha}{ext}
+
+Identical uploads within a tenant share one file. Every upload is a
+file_uploads row referencing its stored_files row (ref_count live
+uploads); deleting an upload releases exactly that reference.
+tenant_storage_usage keeps the tenant's stored bytes/files up to date on
+upload and delete.
+
+Files are only moved into place (or removed) once the session commits;
+a rolled-back upload leaves nothing behind but its removed partial file.
 """
 
-import os
+import asyncio
 import hashlib
+import logging
+import os
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import List, Optional, Tuple
 from uuid import UUID, uuid4
 
-from sqlalchemy import select, func
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from fastapi import UploadFile
 
 from app.core.config import settings
 from app.core.exceptions import ValidationError
+from app.platform.files.models import FileUpload, StoredFile, TenantStorageUsage
+
+logger = logging.getLogger(__name__)
 
 
 ALLOWED_EXTENSIONS = {
@@ -26,106 +47,385 @@ ALLOWED_EXTENSIONS = {
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
+# Bytes read from the upload per chunk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Partial uploads, inside the tenant directory (not counted as usage)
+INCOMING_DIR = ".incoming"
+
+
+# ============================================
+# Streaming
+# ============================================
+
+async def save_upload(file: UploadFile, target: Path, max_size: int) -> Tuple[int, str]:
+    """
+    Stream an upload to target in chunks.
+
+    Returns (size in bytes, SHA-256 hex). Writing and hashing run in a
+    thread; an upload over max_size is rejected as soon as it is known
+    to be (its partial file is removed).
+    """
+    too_large = ValidationError(f"File too large. Max: {max_size // (1024*1024)}MB")
+    if file.size is not None and file.size > max_size:
+        raise too_large
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+
+    def _write(out, chunk: bytes) -> None:
+        hasher.update(chunk)
+        out.write(chunk)
+
+    out = await asyncio.to_thread(open, target, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise too_large
+            await asyncio.to_thread(_write, out, chunk)
+    except BaseException:
+        out.close()
+        target.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(out.close)
+
+    return size, hasher.hexdigest()
+
+
+def _walk_usage(path: Path) -> Tuple[int, int]:
+    """(bytes, files) under path, skipping partial uploads."""
+    total_size = 0
+    file_count = 0
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d != INCOMING_DIR]
+        for name in files:
+            total_size += (Path(root) / name).stat().st_size
+            file_count += 1
+    return total_size, file_count
+
+
+# ============================================
+# File operations on commit
+# ============================================
+
+# (source, target) moves and (path, None) removals to apply on commit
+_PENDING_FILE_OPS = "pending_file_ops"
+
+
+def _on_commit(session: AsyncSession, source: Path, target: Optional[Path] = None) -> None:
+    """Move source to target (or remove source) once the session commits."""
+    session.info.setdefault(_PENDING_FILE_OPS, []).append((source, target))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_file_ops(session: Session) -> None:
+    ops: List[Tuple[Path, Optional[Path]]] = session.info.pop(_PENDING_FILE_OPS, None) or []
+    for source, target in ops:
+        try:
+            if target is None:
+                source.unlink(missing_ok=True)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, target)
+        except OSError as e:
+            logger.error(f"File operation after commit failed ({source} -> {target}): {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_file_ops(session: Session) -> None:
+    ops = session.info.pop(_PENDING_FILE_OPS, None) or []
+    for source, target in ops:
+        if target is not None:
+            # Uncommitted upload: drop its partial file
+            source.unlink(missing_ok=True)
+
+
+# ============================================
+# Service
+# ============================================
 
 class FileService:
     """File upload and storage."""
-    
+
     def __init__(self, session: AsyncSession, tenant_id: UUID):
         self.session = session
         self.tenant_id = tenant_id
         self.storage_path = Path(settings.storage_path)
-    
+
     def _get_tenant_path(self) -> Path:
         path = self.storage_path / str(self.tenant_id)
         path.mkdir(parents=True, exist_ok=True)
         return path
-    
+
     def _get_extension(self, filename: str) -> str:
         return Path(filename).suffix.lower()
-    
+
     def _get_category(self, extension: str) -> Optional[str]:
         for category, extensions in ALLOWED_EXTENSIONS.items():
             if extension in extensions:
                 return category
         return None
-    
+
+    def _resolve(self, relative_path: str) -> Optional[Path]:
+        """Full path of a stored file, if it lies inside this tenant's directory."""
+        tenant_root = (self.storage_path / str(self.tenant_id)).resolve()
+        full_path = (self.storage_path / relative_path).resolve()
+        if tenant_root not in full_path.parents:
+            return None
+        return full_path
+
+    def _relative(self, full_path: Path) -> str:
+        return full_path.relative_to(self.storage_path.resolve()).as_posix()
+
     async def upload(
         self,
         file: UploadFile,
         uploaded_by: UUID,
         folder: Optional[str] = None,
     ) -> dict:
-        """Upload file."""
+        """
+        Upload file.
+
+        Content already stored for the tenant is not written again; the
+        returned path is the shared copy (deduplicated=True). upload_id
+        identifies this upload's reference (for delete_upload). folder is
+        kept as metadata only, storage is content-addressed.
+        """
         ext = self._get_extension(file.filename)
         category = self._get_category(ext)
-        
+
         if not category:
             raise ValidationError(f"File type {ext} not allowed")
-        
-        content = await file.read()
-        
-        if len(content) > MAX_FILE_SIZE:
-            raise ValidationError(f"File too large. Max: {MAX_FILE_SIZE // (1024*1024)}MB")
-        
-        # Generate unique filename
-        new_filename = f"{uuid4().hex}{ext}"
-        
-        # Create folder
-        storage_dir = self._get_tenant_path()
-        if folder:
-            storage_dir = storage_dir / folder
-            storage_dir.mkdir(parents=True, exist_ok=True)
-        
-        file_path = storage_dir / new_filename
-        
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Calculate hash
-        file_hash = hashlib.sha256(content).hexdigest()
-        
-        relative_path = str(file_path.relative_to(self.storage_path))
-        
+
+        tenant_path = self._get_tenant_path()
+        incoming = tenant_path / INCOMING_DIR / f"{uuid4().hex}{ext}"
+        size, file_hash = await save_upload(file, incoming, MAX_FILE_SIZE)
+
+        try:
+            stored_file_id, relative_path, created = await self._add_reference(
+                file_hash,
+                f"{self.tenant_id}/objects/{file_hash[:2]}/{file_hash}{ext}",
+                size,
+                file.content_type,
+            )
+            upload = FileUpload(
+                tenant_id=self.tenant_id,
+                stored_file_id=stored_file_id,
+                uploaded_by=uploaded_by,
+                original_name=file.filename,
+                folder=folder,
+            )
+            self.session.add(upload)
+            await self.session.flush()
+            if created:
+                await self._add_usage(size, 1)
+        except BaseException:
+            incoming.unlink(missing_ok=True)
+            raise
+
+        target = self.storage_path / relative_path
+        if created or not target.exists():
+            _on_commit(self.session, incoming, target)
+        else:
+            incoming.unlink(missing_ok=True)
+
         return {
+            "upload_id": str(upload.id),
             "original_name": file.filename,
-            "stored_name": new_filename,
+            "stored_name": Path(relative_path).name,
             "path": relative_path,
-            "size_bytes": len(content),
+            "size_bytes": size,
             "mime_type": file.content_type,
             "category": category,
             "hash": file_hash,
+            "deduplicated": not created,
+            "folder": folder,
         }
-    
+
+    async def _add_reference(
+        self,
+        content_hash: str,
+        path: str,
+        size: int,
+        mime_type: Optional[str],
+    ) -> Tuple[UUID, str, bool]:
+        """Reference the tenant's copy of this content; returns (id, path, newly created)."""
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(StoredFile).values(
+            id=uuid4(),
+            tenant_id=self.tenant_id,
+            content_hash=content_hash,
+            path=path,
+            size_bytes=size,
+            mime_type=mime_type,
+            ref_count=1,
+            created_at=now,
+            updated_at=now,
+            is_deleted=False,
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_stored_file_hash",
+            set_={"ref_count": StoredFile.ref_count + 1, "updated_at": now},
+        ).returning(StoredFile.id, StoredFile.path, StoredFile.ref_count)
+
+        row = (await self.session.execute(stmt)).one()
+        return row.id, row.path, row.ref_count == 1
+
     def get_file_path(self, relative_path: str) -> Optional[Path]:
         """Get full file path."""
-        full_path = self.storage_path / relative_path
-        if full_path.exists():
+        full_path = self._resolve(relative_path)
+        if full_path and full_path.exists():
             return full_path
         return None
-    
-    def delete_file(self, relative_path: str) -> bool:
-        """Delete file."""
-        full_path = self.storage_path / relative_path
-        if full_path.exists():
-            os.remove(full_path)
+
+    async def get_stored_file(self, full_path: Path) -> Optional[StoredFile]:
+        """Record of a stored file (None for files stored before content addressing)."""
+        result = await self.session.execute(
+            select(StoredFile).where(
+                StoredFile.tenant_id == self.tenant_id,
+                StoredFile.path == self._relative(full_path),
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def delete_upload(self, upload_id: UUID) -> bool:
+        """
+        Delete one upload.
+
+        Releases that upload's reference only; the content is removed
+        from disk with its last reference. False if the upload does not
+        exist or was already deleted.
+        """
+        now = datetime.now(timezone.utc)
+        result = await self.session.execute(
+            update(FileUpload)
+            .where(
+                FileUpload.tenant_id == self.tenant_id,
+                FileUpload.id == upload_id,
+                FileUpload.is_deleted == False,
+            )
+            .values(is_deleted=True, deleted_at=now, updated_at=now)
+            .returning(FileUpload.stored_file_id)
+            .execution_options(synchronize_session=False)
+        )
+        stored_file_id = result.scalar_one_or_none()
+        if stored_file_id is None:
+            return False
+
+        await self._release(stored_file_id)
+        return True
+
+    async def delete_file(self, relative_path: str, deleted_by: UUID) -> bool:
+        """
+        Delete a file by path.
+
+        For shared content this deletes one of deleted_by's own uploads of
+        it (or one predating upload records), never another user's; once
+        none is left, deleting again does nothing.
+        """
+        full_path = self.get_file_path(relative_path)
+        if not full_path:
+            return False
+
+        stored = await self.get_stored_file(full_path)
+        if stored is None:
+            # Stored before content addressing: the path is the only reference
+            size = full_path.stat().st_size
+            _on_commit(self.session, full_path)
+            await self._add_usage(-size, -1, seed=False)
             return True
-        return False
-    
-    def get_storage_usage(self) -> dict:
+
+        result = await self.session.execute(
+            select(FileUpload.id)
+            .where(
+                FileUpload.tenant_id == self.tenant_id,
+                FileUpload.stored_file_id == stored.id,
+                FileUpload.is_deleted == False,
+                (FileUpload.uploaded_by == deleted_by) | FileUpload.uploaded_by.is_(None),
+            )
+            .order_by(FileUpload.uploaded_by.is_(None), FileUpload.created_at.desc())
+            .limit(1)
+        )
+        upload_id = result.scalar_one_or_none()
+        if upload_id is None:
+            return False
+        return await self.delete_upload(upload_id)
+
+    async def _release(self, stored_file_id: UUID) -> None:
+        """Drop one reference to stored content (and the content with the last one)."""
+        result = await self.session.execute(
+            select(StoredFile).where(StoredFile.id == stored_file_id).with_for_update()
+        )
+        stored = result.scalar_one_or_none()
+        if stored is None:
+            return
+
+        if stored.ref_count > 1:
+            stored.ref_count -= 1
+            await self.session.flush()
+            return
+
+        size = stored.size_bytes
+        _on_commit(self.session, self.storage_path / stored.path)
+        await self.session.delete(stored)
+        await self.session.flush()
+        await self._add_usage(-size, -1, seed=False)
+
+    # ============================================
+    # Storage Usage
+    # ============================================
+
+    async def _add_usage(self, size: int, files: int, seed: bool = True) -> None:
+        """Apply an upload/delete to the tenant's usage counter."""
+        result = await self.session.execute(
+            update(TenantStorageUsage)
+            .where(TenantStorageUsage.tenant_id == self.tenant_id)
+            .values(
+                total_bytes=TenantStorageUsage.total_bytes + size,
+                file_count=TenantStorageUsage.file_count + files,
+                updated_at=datetime.now(timezone.utc),
+            )
+        )
+        if result.rowcount == 0 and seed:
+            # First upload since counting began (not yet in place, so not in the walk)
+            await self._seed_usage()
+            await self._add_usage(size, files, seed=False)
+
+    async def _seed_usage(self) -> Optional[TenantStorageUsage]:
+        """Create the usage counter from a walk of the tenant's directory."""
+        total_size, file_count = await asyncio.to_thread(_walk_usage, self._get_tenant_path())
+        now = datetime.now(timezone.utc)
+        stmt = pg_insert(TenantStorageUsage).values(
+            id=uuid4(),
+            tenant_id=self.tenant_id,
+            total_bytes=total_size,
+            file_count=file_count,
+            created_at=now,
+            updated_at=now,
+            is_deleted=False,
+        ).on_conflict_do_nothing(constraint="uq_tenant_storage_usage_tenant")
+        result = await self.session.execute(stmt.returning(TenantStorageUsage))
+        return result.scalar_one_or_none()
+
+    async def get_storage_usage(self) -> dict:
         """Get storage usage for tenant."""
-        tenant_path = self._get_tenant_path()
-        total_size = 0
-        file_count = 0
-        
-        for root, dirs, files in os.walk(tenant_path):
-            for file in files:
-                file_path = Path(root) / file
-                total_size += file_path.stat().st_size
-                file_count += 1
-        
+        result = await self.session.execute(
+            select(TenantStorageUsage).where(TenantStorageUsage.tenant_id == self.tenant_id)
+        )
+        usage = result.scalar_one_or_none()
+        if usage is None:
+            usage = await self._seed_usage()
+        if usage is None:
+            # Seeded concurrently
+            result = await self.session.execute(
+                select(TenantStorageUsage).where(TenantStorageUsage.tenant_id == self.tenant_id)
+            )
+            usage = result.scalar_one()
+
         return {
-            "total_bytes": total_size,
-            "total_mb": round(total_size / (1024 * 1024), 2),
-            "file_count": file_count,
+            "total_bytes": usage.total_bytes,
+            "total_mb": round(usage.total_bytes / (1024 * 1024), 2),
+            "file_count": usage.file_count,
         }
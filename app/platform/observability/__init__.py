@@ -8,6 +8,7 @@ FEATURES:
 - Feature health snapshots
 - Alert threshold checking
 - Platform admin APIs
+- Cross-worker rollups and 5m/1h/1d series (rollups.py)
 
 USAGE:
 
@@ -49,7 +50,9 @@ USAGE:
 # Metrics
 from app.platform.observability.metrics import (
     MetricType,
+    LatencyHistogram,
     TenantMetrics,
+    MetricsReader,
     MetricsCollector,
     get_metrics_collector,
     record_request,
@@ -58,6 +61,15 @@ from app.platform.observability.metrics import (
     record_circuit_open,
 )
 
+# Rollups
+from app.platform.observability.rollups import (
+    ClusterMetricsView,
+    MetricRollupWriter,
+    metrics_rollup,
+    get_metrics_view,
+    get_series,
+)
+
 # Snapshots
 from app.platform.observability.snapshots import (
     HealthStatus,
@@ -85,13 +97,21 @@ from app.platform.observability.collectors import (
 __all__ = [
     # Metrics
     "MetricType",
+    "LatencyHistogram",
     "TenantMetrics",
+    "MetricsReader",
     "MetricsCollector",
     "get_metrics_collector",
     "record_request",
     "record_ai_call",
     "record_cache_access",
     "record_circuit_open",
+    # Rollups
+    "ClusterMetricsView",
+    "MetricRollupWriter",
+    "metrics_rollup",
+    "get_metrics_view",
+    "get_series",
     # Snapshots
     "HealthStatus",
     "FeatureStatus",
@@ -18,7 +18,8 @@ from dataclasses import dataclass, field
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.platform.observability.metrics import get_metrics_collector, TenantMetrics
+from app.platform.observability.metrics import MetricsReader, TenantMetrics
+from app.platform.observability.rollups import get_metrics_view
 from app.platform.observability.snapshots import (
     get_snapshot_service,
     HealthStatus,
@@ -244,11 +245,15 @@ class ObservabilityCollector:
     """
     
     def __init__(self):
-        self._metrics = get_metrics_collector()
         self._snapshots = get_snapshot_service()
         self._aggregator = MetricAggregator()
         self._alerts = AlertChecker()
     
+    @property
+    def _metrics(self) -> MetricsReader:
+        # Cluster-wide when rollups are running, else this worker's
+        return get_metrics_view()
+    
     async def collect_and_check(self) -> dict:
         """
         Perform a collection cycle.
@@ -9,20 +9,27 @@ Tracks per-tenant:
 - AI usage
 - Cache hit ratio
 - Circuit breaker opens
-- Response times
+- Response times (fixed-size latency histograms)
 
 NO EXTERNAL DEPENDENCIES - just Python counters.
+
+Recording is lock-free (per-thread shards) and O(1); finished 5-minute
+windows are kept in a per-tenant ring of previous windows.
 """
 
 import logging
+import math
+import threading
 import time
+from array import array
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any, Tuple
 from uuid import UUID
 from dataclasses import dataclass, field
 from threading import Lock
-from collections import defaultdict
+from collections import defaultdict, deque
 from enum import Enum
+from abc import ABC, abstractmethod
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +55,112 @@ class MetricPoint:
     labels: Dict[str, str] = field(default_factory=dict)
 
 
+class LatencyHistogram:
+    """
+    Fixed-size log-bucketed latency histogram (milliseconds).
+    
+    Bucket bounds grow by GROWTH (10%) from MIN_MS up to ~2 minutes, so
+    percentiles are within ~5% of the true value. Recording is O(1) and
+    percentile reads are O(buckets); memory is one small array of counts
+    regardless of traffic. Histograms with the same layout merge by
+    adding counts (across threads, workers or windows).
+    """
+    
+    MIN_MS = 0.1
+    GROWTH = 1.1
+    BUCKETS = 150  # Bucket 0 is [0, MIN_MS); the last one is overflow
+    
+    _LOG_GROWTH = math.log(GROWTH)
+    
+    __slots__ = ("counts", "count", "total", "max")
+    
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    @classmethod
+    def bucket_index(cls, value_ms: float) -> int:
+        if value_ms < cls.MIN_MS:
+            return 0
+        index = int(math.log(value_ms / cls.MIN_MS) / cls._LOG_GROWTH) + 1
+        return min(index, cls.BUCKETS - 1)
+    
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """Representative (geometric mid) value of a bucket."""
+        if index == 0:
+            return cls.MIN_MS / 2
+        return cls.MIN_MS * cls.GROWTH ** (index - 0.5)
+    
+    def record(self, value_ms: float) -> None:
+        self.counts[self.bucket_index(value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+    
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add another histogram's samples into this one."""
+        counts = self.counts
+        for index, value in enumerate(other.counts):
+            if value:
+                counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    
+    def subtract(self, other: "LatencyHistogram") -> None:
+        """Remove an earlier snapshot of this histogram (for deltas; max is kept)."""
+        counts = self.counts
+        for index, value in enumerate(other.counts):
+            if value:
+                counts[index] -= value
+        self.count -= other.count
+        self.total -= other.total
+    
+    @classmethod
+    def from_counts(
+        cls,
+        counts: List[int],
+        total: float = 0.0,
+        max_ms: float = 0.0,
+    ) -> "LatencyHistogram":
+        """Rebuild a histogram from stored bucket counts."""
+        histogram = cls()
+        for index, value in enumerate(counts[:cls.BUCKETS]):
+            histogram.counts[index] = value
+        histogram.count = sum(histogram.counts)
+        histogram.total = total
+        histogram.max = max_ms
+        return histogram
+    
+    def percentile(self, q: float) -> float:
+        """Approximate q-quantile (0..1) of recorded values."""
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen >= target:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def __len__(self) -> int:
+        return self.count
+
+
+def _window_start(now: float, duration: int) -> datetime:
+    """Start of the epoch-aligned window containing now (seconds)."""
+    return datetime.fromtimestamp(now - now % duration, timezone.utc)
+
+
 @dataclass
 class TenantMetrics:
     """Metrics for a single tenant."""
@@ -63,8 +176,8 @@ class TenantMetrics:
     circuit_opens: int = 0
     db_queries: int = 0
     
-    # Response times (rolling window)
-    response_times: List[float] = field(default_factory=list)
+    # Response time distribution for the window
+    response_times: LatencyHistogram = field(default_factory=LatencyHistogram)
     
     # Per-endpoint error tracking
     endpoint_errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
@@ -77,22 +190,58 @@ class TenantMetrics:
     window_start: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     last_updated: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     
+    _COUNTERS = (
+        "request_count",
+        "error_count",
+        "ai_call_count",
+        "ai_tokens_used",
+        "cache_hits",
+        "cache_misses",
+        "circuit_opens",
+        "db_queries",
+    )
+    
     def reset(self):
         """Reset all counters for new window."""
-        self.request_count = 0
-        self.error_count = 0
-        self.ai_call_count = 0
-        self.ai_tokens_used = 0
-        self.cache_hits = 0
-        self.cache_misses = 0
-        self.circuit_opens = 0
-        self.db_queries = 0
-        self.response_times = []
+        for name in self._COUNTERS:
+            setattr(self, name, 0)
+        self.response_times = LatencyHistogram()
         self.endpoint_errors = defaultdict(int)
         self.feature_calls = defaultdict(int)
         self.feature_errors = defaultdict(int)
         self.window_start = datetime.now(timezone.utc)
     
+    def merge(self, other: "TenantMetrics") -> None:
+        """Add another TenantMetrics (same tenant and window) into this one."""
+        for name in self._COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.response_times.merge(other.response_times)
+        for target, source in (
+            (self.endpoint_errors, other.endpoint_errors),
+            (self.feature_calls, other.feature_calls),
+            (self.feature_errors, other.feature_errors),
+        ):
+            for key, value in list(source.items()):
+                target[key] += value
+        self.last_updated = max(self.last_updated, other.last_updated)
+    
+    def subtract(self, other: "TenantMetrics") -> None:
+        """Remove an earlier snapshot of the same window (leaves the delta)."""
+        for name in self._COUNTERS:
+            setattr(self, name, getattr(self, name) - getattr(other, name))
+        self.response_times.subtract(other.response_times)
+        for target, source in (
+            (self.endpoint_errors, other.endpoint_errors),
+            (self.feature_calls, other.feature_calls),
+            (self.feature_errors, other.feature_errors),
+        ):
+            for key, value in list(source.items()):
+                target[key] -= value
+    
+    @property
+    def is_empty(self) -> bool:
+        return not any(getattr(self, name) for name in self._COUNTERS) and not self.response_times.count
+    
     @property
     def cache_hit_ratio(self) -> float:
         """Calculate cache hit ratio."""
@@ -111,18 +260,12 @@ class TenantMetrics:
     @property
     def avg_response_time_ms(self) -> float:
         """Calculate average response time."""
-        if not self.response_times:
-            return 0.0
-        return sum(self.response_times) / len(self.response_times)
+        return self.response_times.mean
     
     @property
     def p95_response_time_ms(self) -> float:
-        """Calculate 95th percentile response time."""
-        if not self.response_times:
-            return 0.0
-        sorted_times = sorted(self.response_times)
-        idx = int(len(sorted_times) * 0.95)
-        return sorted_times[min(idx, len(sorted_times) - 1)]
+        """Approximate 95th percentile response time."""
+        return self.response_times.percentile(0.95)
     
     def to_dict(self) -> dict:
         """Convert to dictionary for API response."""
@@ -146,8 +289,11 @@ class TenantMetrics:
             },
             "response_times": {
                 "avg_ms": round(self.avg_response_time_ms, 2),
+                "p50_ms": round(self.response_times.percentile(0.50), 2),
                 "p95_ms": round(self.p95_response_time_ms, 2),
-                "sample_count": len(self.response_times),
+                "p99_ms": round(self.response_times.percentile(0.99), 2),
+                "max_ms": round(self.response_times.max, 2),
+                "sample_count": self.response_times.count,
             },
             "top_errors": dict(
                 sorted(
@@ -159,20 +305,129 @@ class TenantMetrics:
         }
 
 
-class MetricsCollector:
+PLATFORM_TENANT_ID = UUID(int=0)
+
+
+class _MetricsShard:
+    """
+    One thread's metrics. Only its owner thread writes to it, so
+    recording needs no lock; readers merge all shards.
+    """
+    
+    def __init__(self, history_windows: int):
+        self.current: Dict[UUID, TenantMetrics] = {}
+        self.history: Dict[UUID, Deque[TenantMetrics]] = {}
+        self.platform = TenantMetrics(tenant_id=PLATFORM_TENANT_ID)
+        self.history_windows = history_windows
+    
+    def metrics_for(self, tenant_id: UUID, window_start: datetime) -> TenantMetrics:
+        """Current-window metrics for a tenant, rotating a finished window."""
+        metrics = self.current.get(tenant_id)
+        if metrics is None:
+            metrics = TenantMetrics(tenant_id=tenant_id, window_start=window_start)
+            self.current[tenant_id] = metrics
+        elif metrics.window_start < window_start:
+            self.archive(metrics)
+            metrics = TenantMetrics(tenant_id=tenant_id, window_start=window_start)
+            self.current[tenant_id] = metrics
+        return metrics
+    
+    def archive(self, metrics: TenantMetrics) -> None:
+        ring = self.history.get(metrics.tenant_id)
+        if ring is None:
+            ring = deque(maxlen=self.history_windows)
+            self.history[metrics.tenant_id] = ring
+        ring.append(metrics)
+
+
+class MetricsReader(ABC):
+    """
+    Read API shared by the local collector and the cross-worker view
+    (app/platform/observability/rollups.py).
+    
+    Subclasses provide the merged current-window metrics per tenant and
+    platform totals.
+    """
+    
+    WINDOW_DURATION_SECONDS = 300  # 5 minutes
+    
+    @abstractmethod
+    def _current_tenant_metrics(self) -> Dict[UUID, TenantMetrics]:
+        """Merged current-window metrics per tenant."""
+    
+    @abstractmethod
+    def _platform_totals(self) -> TenantMetrics:
+        """Merged current-window platform totals."""
+    
+    def get_platform_metrics(self) -> dict:
+        """Get platform-wide metrics."""
+        return {
+            "platform": self._platform_totals().to_dict(),
+            "active_tenants": len(self._current_tenant_metrics()),
+            "window_duration_seconds": self.WINDOW_DURATION_SECONDS,
+        }
+    
+    def get_tenant_metrics(self, tenant_id: UUID) -> dict:
+        """Get metrics for a specific tenant."""
+        metrics = self._current_tenant_metrics().get(tenant_id)
+        if metrics is None:
+            return {"tenant_id": str(tenant_id), "no_data": True}
+        return metrics.to_dict()
+    
+    def get_all_tenant_metrics(self) -> List[dict]:
+        """Get metrics for all tenants."""
+        return [m.to_dict() for m in self._current_tenant_metrics().values()]
+    
+    def _top_tenants(self, key, limit: int) -> List[dict]:
+        sorted_tenants = sorted(
+            self._current_tenant_metrics().values(),
+            key=key,
+            reverse=True,
+        )
+        return [m.to_dict() for m in sorted_tenants[:limit]]
+    
+    def get_top_tenants_by_requests(self, limit: int = 10) -> List[dict]:
+        """Get top tenants by request count."""
+        return self._top_tenants(lambda m: m.request_count, limit)
+    
+    def get_top_tenants_by_errors(self, limit: int = 10) -> List[dict]:
+        """Get top tenants by error count."""
+        return self._top_tenants(lambda m: m.error_count, limit)
+    
+    def get_top_tenants_by_ai_usage(self, limit: int = 10) -> List[dict]:
+        """Get top tenants by AI token usage."""
+        return self._top_tenants(lambda m: m.ai_tokens_used, limit)
+    
+    def get_degraded_tenants(self, error_rate_threshold: float = 0.1) -> List[dict]:
+        """Get tenants with high error rates (potentially degraded)."""
+        degraded = [
+            m for m in self._current_tenant_metrics().values()
+            if m.error_rate > error_rate_threshold and m.request_count >= 10
+        ]
+        return [m.to_dict() for m in sorted(
+            degraded,
+            key=lambda m: m.error_rate,
+            reverse=True,
+        )]
+
+
+class MetricsCollector(MetricsReader):
     """
     Global metrics collector.
     
-    Thread-safe singleton for collecting metrics across the application.
-    Maintains per-tenant metrics with automatic window rotation.
+    Each thread records into its own shard (threading.local), so the hot
+    path takes no lock; reads merge the shards. Windows are aligned to
+    WINDOW_DURATION_SECONDS boundaries, and finished windows move into a
+    per-tenant ring of HISTORY_WINDOWS previous windows instead of being
+    discarded.
+    
+    Platform-wide metrics are cumulative since process start.
     """
     
     _instance: Optional["MetricsCollector"] = None
     _lock = Lock()
     
-    # Window duration for metrics aggregation
-    WINDOW_DURATION_SECONDS = 300  # 5 minutes
-    MAX_RESPONSE_TIMES = 1000  # Rolling window size
+    HISTORY_WINDOWS = 12  # Previous windows kept per tenant (1 hour)
     
     def __new__(cls):
         if cls._instance is None:
@@ -186,23 +441,41 @@ class MetricsCollector:
         if self._initialized:
             return
         
-        self._tenant_metrics: Dict[UUID, TenantMetrics] = {}
-        self._platform_metrics = TenantMetrics(tenant_id=UUID(int=0))  # Global platform
-        self._metrics_lock = Lock()
+        self._local = threading.local()
+        self._shards: List[_MetricsShard] = []
+        self._shards_lock = Lock()  # Only taken when a thread's shard is created
+        self._window_cache: Tuple[float, Optional[datetime]] = (-1.0, None)
         self._initialized = True
     
-    def _get_tenant_metrics(self, tenant_id: UUID) -> TenantMetrics:
-        """Get or create tenant metrics."""
-        if tenant_id not in self._tenant_metrics:
-            self._tenant_metrics[tenant_id] = TenantMetrics(tenant_id=tenant_id)
-        return self._tenant_metrics[tenant_id]
+    # ============================================
+    # Recording (lock-free)
+    # ============================================
+    
+    def _shard(self) -> _MetricsShard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _MetricsShard(self.HISTORY_WINDOWS)
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+    
+    def _current_window(self) -> datetime:
+        now = time.time()
+        epoch = now - now % self.WINDOW_DURATION_SECONDS
+        cached = self._window_cache
+        if cached[0] != epoch:
+            # Racing threads compute the same value; last write wins
+            cached = (epoch, _window_start(now, self.WINDOW_DURATION_SECONDS))
+            self._window_cache = cached
+        return cached[1]
     
-    def _check_window_rotation(self, metrics: TenantMetrics):
-        """Check if we need to rotate the metrics window."""
-        now = datetime.now(timezone.utc)
-        if (now - metrics.window_start).total_seconds() > self.WINDOW_DURATION_SECONDS:
-            # Archive current metrics (could write to DB here)
-            metrics.reset()
+    def _record(self, tenant_id: UUID) -> Tuple[TenantMetrics, TenantMetrics]:
+        """(tenant metrics, platform metrics) for this thread, now."""
+        shard = self._shard()
+        metrics = shard.metrics_for(tenant_id, self._current_window())
+        metrics.last_updated = datetime.now(timezone.utc)
+        return metrics, shard.platform
     
     def record_request(
         self,
@@ -213,26 +486,19 @@ class MetricsCollector:
         error_message: Optional[str] = None,
     ):
         """Record an API request."""
-        with self._metrics_lock:
-            metrics = self._get_tenant_metrics(tenant_id)
-            self._check_window_rotation(metrics)
-            
-            metrics.request_count += 1
-            metrics.last_updated = datetime.now(timezone.utc)
-            
-            # Response time (keep rolling window)
-            if len(metrics.response_times) >= self.MAX_RESPONSE_TIMES:
-                metrics.response_times.pop(0)
-            metrics.response_times.append(response_time_ms)
-            
-            if is_error:
-                metrics.error_count += 1
-                metrics.endpoint_errors[endpoint] += 1
-            
-            # Also record platform-wide
-            self._platform_metrics.request_count += 1
-            if is_error:
-                self._platform_metrics.error_count += 1
+        metrics, platform = self._record(tenant_id)
+        
+        metrics.request_count += 1
+        metrics.response_times.record(response_time_ms)
+        if is_error:
+            metrics.error_count += 1
+            metrics.endpoint_errors[endpoint] += 1
+        
+        # Also record platform-wide
+        platform.request_count += 1
+        platform.response_times.record(response_time_ms)
+        if is_error:
+            platform.error_count += 1
     
     def record_ai_call(
         self,
@@ -241,17 +507,14 @@ class MetricsCollector:
         feature: str = "unknown",
     ):
         """Record an AI API call."""
-        with self._metrics_lock:
-            metrics = self._get_tenant_metrics(tenant_id)
-            self._check_window_rotation(metrics)
-            
-            metrics.ai_call_count += 1
-            metrics.ai_tokens_used += tokens_used
-            metrics.feature_calls[feature] += 1
-            metrics.last_updated = datetime.now(timezone.utc)
-            
-            self._platform_metrics.ai_call_count += 1
-            self._platform_metrics.ai_tokens_used += tokens_used
+        metrics, platform = self._record(tenant_id)
+        
+        metrics.ai_call_count += 1
+        metrics.ai_tokens_used += tokens_used
+        metrics.feature_calls[feature] += 1
+        
+        platform.ai_call_count += 1
+        platform.ai_tokens_used += tokens_used
     
     def record_cache_access(
         self,
@@ -259,18 +522,14 @@ class MetricsCollector:
         is_hit: bool,
     ):
         """Record a cache access."""
-        with self._metrics_lock:
-            metrics = self._get_tenant_metrics(tenant_id)
-            self._check_window_rotation(metrics)
-            
-            if is_hit:
-                metrics.cache_hits += 1
-                self._platform_metrics.cache_hits += 1
-            else:
-                metrics.cache_misses += 1
-                self._platform_metrics.cache_misses += 1
-            
-            metrics.last_updated = datetime.now(timezone.utc)
+        metrics, platform = self._record(tenant_id)
+        
+        if is_hit:
+            metrics.cache_hits += 1
+            platform.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+            platform.cache_misses += 1
     
     def record_circuit_open(
         self,
@@ -278,22 +537,17 @@ class MetricsCollector:
         feature: str,
     ):
         """Record a circuit breaker opening."""
-        with self._metrics_lock:
-            metrics = self._get_tenant_metrics(tenant_id)
-            self._check_window_rotation(metrics)
-            
-            metrics.circuit_opens += 1
-            metrics.feature_errors[feature] += 1
-            metrics.last_updated = datetime.now(timezone.utc)
-            
-            self._platform_metrics.circuit_opens += 1
+        metrics, platform = self._record(tenant_id)
+        
+        metrics.circuit_opens += 1
+        metrics.feature_errors[feature] += 1
+        platform.circuit_opens += 1
     
     def record_db_query(self, tenant_id: UUID):
         """Record a database query."""
-        with self._metrics_lock:
-            metrics = self._get_tenant_metrics(tenant_id)
-            metrics.db_queries += 1
-            self._platform_metrics.db_queries += 1
+        metrics, platform = self._record(tenant_id)
+        metrics.db_queries += 1
+        platform.db_queries += 1
     
     def record_feature_error(
         self,
@@ -301,74 +555,80 @@ class MetricsCollector:
         feature: str,
     ):
         """Record a feature-level error."""
-        with self._metrics_lock:
-            metrics = self._get_tenant_metrics(tenant_id)
-            metrics.feature_errors[feature] += 1
-            metrics.last_updated = datetime.now(timezone.utc)
+        metrics, _ = self._record(tenant_id)
+        metrics.feature_errors[feature] += 1
     
-    def get_tenant_metrics(self, tenant_id: UUID) -> dict:
-        """Get metrics for a specific tenant."""
-        with self._metrics_lock:
-            if tenant_id not in self._tenant_metrics:
-                return {"tenant_id": str(tenant_id), "no_data": True}
-            return self._tenant_metrics[tenant_id].to_dict()
-    
-    def get_platform_metrics(self) -> dict:
-        """Get platform-wide metrics."""
-        with self._metrics_lock:
-            return {
-                "platform": self._platform_metrics.to_dict(),
-                "active_tenants": len(self._tenant_metrics),
-                "window_duration_seconds": self.WINDOW_DURATION_SECONDS,
-            }
+    # ============================================
+    # Reading (merges shards)
+    # ============================================
     
-    def get_all_tenant_metrics(self) -> List[dict]:
-        """Get metrics for all tenants."""
-        with self._metrics_lock:
-            return [m.to_dict() for m in self._tenant_metrics.values()]
+    def _merged_windows(self) -> Dict[UUID, Dict[datetime, TenantMetrics]]:
+        """tenant -> window_start -> merged TenantMetrics, over all shards."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        
+        merged: Dict[UUID, Dict[datetime, TenantMetrics]] = {}
+        for shard in shards:
+            # list() snapshots are atomic under the GIL
+            windows = list(shard.current.values())
+            for ring in list(shard.history.values()):
+                windows.extend(list(ring))
+            for metrics in windows:
+                by_window = merged.setdefault(metrics.tenant_id, {})
+                target = by_window.get(metrics.window_start)
+                if target is None:
+                    target = TenantMetrics(
+                        tenant_id=metrics.tenant_id,
+                        window_start=metrics.window_start,
+                        last_updated=metrics.last_updated,
+                    )
+                    by_window[metrics.window_start] = target
+                target.merge(metrics)
+        return merged
     
-    def get_top_tenants_by_requests(self, limit: int = 10) -> List[dict]:
-        """Get top tenants by request count."""
-        with self._metrics_lock:
-            sorted_tenants = sorted(
-                self._tenant_metrics.values(),
-                key=lambda m: m.request_count,
-                reverse=True,
+    def _current_tenant_metrics(self) -> Dict[UUID, TenantMetrics]:
+        """Merged current-window metrics for every tenant seen."""
+        window = self._current_window()
+        return {
+            tenant_id: by_window.get(window) or TenantMetrics(
+                tenant_id=tenant_id, window_start=window,
+                last_updated=max(m.last_updated for m in by_window.values()),
             )
-            return [m.to_dict() for m in sorted_tenants[:limit]]
+            for tenant_id, by_window in self._merged_windows().items()
+        }
     
-    def get_top_tenants_by_errors(self, limit: int = 10) -> List[dict]:
-        """Get top tenants by error count."""
-        with self._metrics_lock:
-            sorted_tenants = sorted(
-                self._tenant_metrics.values(),
-                key=lambda m: m.error_count,
-                reverse=True,
-            )
-            return [m.to_dict() for m in sorted_tenants[:limit]]
+    def get_tenant_history(self, tenant_id: UUID) -> List[dict]:
+        """Previous (finished) windows for a tenant, oldest first."""
+        current = self._current_window()
+        by_window = self._merged_windows().get(tenant_id, {})
+        return [
+            by_window[start].to_dict()
+            for start in sorted(by_window)
+            if start < current
+        ]
     
-    def get_top_tenants_by_ai_usage(self, limit: int = 10) -> List[dict]:
-        """Get top tenants by AI token usage."""
-        with self._metrics_lock:
-            sorted_tenants = sorted(
-                self._tenant_metrics.values(),
-                key=lambda m: m.ai_tokens_used,
-                reverse=True,
-            )
-            return [m.to_dict() for m in sorted_tenants[:limit]]
+    def _platform_totals(self) -> TenantMetrics:
+        with self._shards_lock:
+            shards = list(self._shards)
+        
+        platform = TenantMetrics(tenant_id=PLATFORM_TENANT_ID)
+        if shards:
+            platform.window_start = min(s.platform.window_start for s in shards)
+        for shard in shards:
+            platform.merge(shard.platform)
+        return platform
     
-    def get_degraded_tenants(self, error_rate_threshold: float = 0.1) -> List[dict]:
-        """Get tenants with high error rates (potentially degraded)."""
-        with self._metrics_lock:
-            degraded = [
-                m for m in self._tenant_metrics.values()
-                if m.error_rate > error_rate_threshold and m.request_count >= 10
-            ]
-            return [m.to_dict() for m in sorted(
-                degraded,
-                key=lambda m: m.error_rate,
-                reverse=True,
-            )]
+    def snapshot_windows(self) -> Dict[Tuple[UUID, datetime], TenantMetrics]:
+        """
+        Merged metrics of every retained window, keyed (tenant, window_start).
+        
+        Each call returns fresh objects, safe to keep and compare later.
+        """
+        return {
+            (tenant_id, start): metrics
+            for tenant_id, by_window in self._merged_windows().items()
+            for start, metrics in by_window.items()
+        }
 
 
 # Global singleton
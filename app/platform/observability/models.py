@@ -0,0 +1,53 @@
+"""
+CUSTOS Observability Models
+
+Persisted metric rollups (platform-level, not tenant-scoped).
+"""
+
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, Float, Index, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.base_model import BaseModel  # NOT TenantBaseModel
+
+
+class MetricRollup(BaseModel):
+    """
+    Request/AI/cache metrics for one tenant and one time bucket.
+    
+    Every worker adds its deltas into the same row, so a row is the
+    cluster-wide total. Resolutions: 5m, 1h, 1d. Platform totals use the
+    zero tenant id (PLATFORM_TENANT_ID).
+    """
+    __tablename__ = "platform_metric_rollups"
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "resolution", "bucket_start",
+            name="uq_metric_rollup_bucket",
+        ),
+        Index("ix_metric_rollup_resolution_bucket", "resolution", "bucket_start"),
+    )
+    
+    tenant_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), nullable=False)
+    resolution: Mapped[str] = mapped_column(String(8), nullable=False)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    
+    # Counters
+    request_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    error_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    ai_call_count: Mapped[int] = mapped_column(BigInteger, default=0)
+    ai_tokens_used: Mapped[int] = mapped_column(BigInteger, default=0)
+    cache_hits: Mapped[int] = mapped_column(BigInteger, default=0)
+    cache_misses: Mapped[int] = mapped_column(BigInteger, default=0)
+    circuit_opens: Mapped[int] = mapped_column(BigInteger, default=0)
+    db_queries: Mapped[int] = mapped_column(BigInteger, default=0)
+    
+    # Latency histogram (LatencyHistogram bucket layout)
+    latency_buckets: Mapped[List[int]] = mapped_column(ARRAY(BigInteger), nullable=False)
+    latency_sum_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    latency_max_ms: Mapped[float] = mapped_column(Float, default=0.0)
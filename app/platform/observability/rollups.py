@@ -0,0 +1,436 @@
+"""
+CUSTOS Metric Rollups
+
+Cross-worker aggregation and persisted time series for observability.
+
+Each worker's MetricsCollector only sees its own requests, and loses
+everything on restart. The rollup writer periodically (and on every window
+rotation) takes the collector's window aggregates, subtracts what it has
+already written, and adds the deltas into platform_metric_rollups:
+
+    (tenant_id, resolution, bucket_start) -> counters + latency histogram
+
+at three resolutions (5m, 1h, 1d). Upserts ADD counters and histogram
+buckets element-wise, so rows are cluster-wide totals no matter how many
+workers write to them. Platform totals use PLATFORM_TENANT_ID.
+
+READING:
+- get_metrics_view(): a MetricsReader over the cluster-wide current 5m
+  window, refreshed after each flush. Falls back to the local collector
+  when rollups are disabled or the view is stale.
+- get_series(): trend series for one tenant (or the platform) at a
+  resolution, for capacity planning.
+
+Only counters and latency are persisted; per-endpoint/feature breakdowns
+stay process-local.
+
+RETENTION: 5m buckets for RETENTION_DAYS["5m"] days, hourly for
+RETENTION_DAYS["1h"] days, daily kept indefinitely.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, delete, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.platform.observability.metrics import (
+    PLATFORM_TENANT_ID,
+    LatencyHistogram,
+    MetricsCollector,
+    MetricsReader,
+    TenantMetrics,
+    _window_start,
+    get_metrics_collector,
+)
+from app.platform.observability.models import MetricRollup
+
+logger = logging.getLogger(__name__)
+
+
+# Resolution -> bucket length in seconds
+RESOLUTIONS: Dict[str, int] = {
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+# Days kept per resolution (None = forever)
+RETENTION_DAYS: Dict[str, Optional[int]] = {
+    "5m": 7,
+    "1h": 90,
+    "1d": None,
+}
+
+# Counter columns shared by TenantMetrics and MetricRollup
+COUNTER_COLUMNS = TenantMetrics._COUNTERS
+
+WindowKey = Tuple[UUID, datetime]
+BucketKey = Tuple[UUID, str, datetime]
+
+# Rows per INSERT statement
+_UPSERT_CHUNK = 500
+
+# Element-wise sum of the stored and incoming histogram buckets
+_MERGE_BUCKETS = literal_column(
+    "ARRAY(SELECT COALESCE(a, 0) + COALESCE(b, 0) "
+    "FROM unnest(platform_metric_rollups.latency_buckets, excluded.latency_buckets) AS t(a, b))"
+)
+
+
+def _to_metrics(row: MetricRollup) -> TenantMetrics:
+    """Rebuild TenantMetrics from a rollup row."""
+    metrics = TenantMetrics(
+        tenant_id=row.tenant_id,
+        window_start=row.bucket_start,
+        last_updated=row.updated_at or row.bucket_start,
+    )
+    for name in COUNTER_COLUMNS:
+        setattr(metrics, name, getattr(row, name) or 0)
+    metrics.response_times = LatencyHistogram.from_counts(
+        row.latency_buckets or [], row.latency_sum_ms or 0.0, row.latency_max_ms or 0.0,
+    )
+    return metrics
+
+
+class ClusterMetricsView(MetricsReader):
+    """
+    MetricsReader over rollup rows for one 5m window, all workers merged.
+
+    Built by the rollup writer; immutable once built.
+    """
+
+    def __init__(
+        self,
+        window_start: datetime,
+        tenants: Dict[UUID, TenantMetrics],
+        platform: TenantMetrics,
+    ):
+        self.window_start = window_start
+        self.built_at = time.monotonic()
+        self._tenants = tenants
+        self._platform = platform
+
+    def _current_tenant_metrics(self) -> Dict[UUID, TenantMetrics]:
+        return self._tenants
+
+    def _platform_totals(self) -> TenantMetrics:
+        return self._platform
+
+
+class MetricRollupWriter:
+    """
+    Periodic flush of collector window deltas into rollup rows.
+
+    One instance per process (metrics_rollup). Keeps the last flushed
+    snapshot of every window so only new increments are written; a failed
+    flush is retried with the accumulated delta on the next cycle.
+    """
+
+    FLUSH_INTERVAL_SECONDS = 60.0
+
+    # Seconds between retention sweeps
+    RETENTION_INTERVAL_SECONDS = 3600
+
+    def __init__(self, collector: Optional[MetricsCollector] = None):
+        self._collector = collector
+        self._flushed: Dict[WindowKey, TenantMetrics] = {}
+        self._view: Optional[ClusterMetricsView] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_retention = 0.0
+
+    @property
+    def collector(self) -> MetricsCollector:
+        return self._collector or get_metrics_collector()
+
+    # ============================================
+    # Lifecycle
+    # ============================================
+
+    def start(self) -> None:
+        """Start the flush loop on the running event loop (idempotent)."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write what is left (no-op if never started)."""
+        if self._task is None:
+            return
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+    def _next_sleep(self) -> float:
+        """Until the next flush interval or just past the next window rotation."""
+        window = self.collector.WINDOW_DURATION_SECONDS
+        until_rotation = window - time.time() % window + 1
+        return min(self.FLUSH_INTERVAL_SECONDS, until_rotation)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_sleep())
+            await self.flush()
+            await self.refresh_view()
+            if time.monotonic() - self._last_retention > self.RETENTION_INTERVAL_SECONDS:
+                await self.apply_retention()
+
+    # ============================================
+    # Flushing
+    # ============================================
+
+    def _collect_deltas(
+        self,
+    ) -> Tuple[Dict[WindowKey, TenantMetrics], Dict[BucketKey, TenantMetrics]]:
+        """(snapshot, bucket deltas) since the last successful flush."""
+        snapshot = self.collector.snapshot_windows()
+        buckets: Dict[BucketKey, TenantMetrics] = {}
+
+        for (tenant_id, start), metrics in snapshot.items():
+            delta = TenantMetrics(tenant_id=tenant_id, window_start=start)
+            delta.merge(metrics)
+            previous = self._flushed.get((tenant_id, start))
+            if previous is not None:
+                delta.subtract(previous)
+            if delta.is_empty:
+                continue
+
+            epoch = start.timestamp()
+            for resolution, seconds in RESOLUTIONS.items():
+                bucket_start = _window_start(epoch, seconds)
+                for owner in (tenant_id, PLATFORM_TENANT_ID):
+                    key = (owner, resolution, bucket_start)
+                    target = buckets.get(key)
+                    if target is None:
+                        target = TenantMetrics(tenant_id=owner, window_start=bucket_start)
+                        buckets[key] = target
+                    target.merge(delta)
+
+        return snapshot, buckets
+
+    async def flush(self) -> int:
+        """Write window deltas. Returns bucket rows upserted. Never raises."""
+        snapshot, buckets = self._collect_deltas()
+        if buckets:
+            try:
+                await self._upsert(buckets)
+            except Exception as e:
+                logger.error(f"Metric rollup flush of {len(buckets)} buckets failed: {e}")
+                return 0
+        # Windows gone from the collector's history drop out here too
+        self._flushed = snapshot
+        return len(buckets)
+
+    async def _upsert(self, buckets: Dict[BucketKey, TenantMetrics]) -> None:
+        from app.core.database import AsyncSessionLocal
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for (tenant_id, resolution, bucket_start), metrics in buckets.items():
+            row = {
+                "id": uuid4(),
+                "tenant_id": tenant_id,
+                "resolution": resolution,
+                "bucket_start": bucket_start,
+                "latency_buckets": list(metrics.response_times.counts),
+                "latency_sum_ms": metrics.response_times.total,
+                "latency_max_ms": metrics.response_times.max,
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": False,
+            }
+            for name in COUNTER_COLUMNS:
+                row[name] = getattr(metrics, name)
+            rows.append(row)
+
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(rows), _UPSERT_CHUNK):
+                stmt = pg_insert(MetricRollup).values(rows[start:start + _UPSERT_CHUNK])
+                update = {
+                    name: getattr(MetricRollup, name) + getattr(stmt.excluded, name)
+                    for name in COUNTER_COLUMNS
+                }
+                update["latency_buckets"] = _MERGE_BUCKETS
+                update["latency_sum_ms"] = MetricRollup.latency_sum_ms + stmt.excluded.latency_sum_ms
+                update["latency_max_ms"] = func.greatest(
+                    MetricRollup.latency_max_ms, stmt.excluded.latency_max_ms,
+                )
+                update["updated_at"] = stmt.excluded.updated_at
+                await session.execute(stmt.on_conflict_do_update(
+                    constraint="uq_metric_rollup_bucket", set_=update,
+                ))
+            await session.commit()
+
+    async def apply_retention(self) -> int:
+        """Delete buckets past their resolution's retention. Never raises."""
+        from app.core.database import AsyncSessionLocal
+
+        self._last_retention = time.monotonic()
+        now = datetime.now(timezone.utc)
+        expired = [
+            and_(
+                MetricRollup.resolution == resolution,
+                MetricRollup.bucket_start < now - timedelta(days=days),
+            )
+            for resolution, days in RETENTION_DAYS.items()
+            if days is not None
+        ]
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(delete(MetricRollup).where(or_(*expired)))
+                await session.commit()
+                return result.rowcount or 0
+        except Exception as e:
+            logger.error(f"Metric rollup retention failed: {e}")
+            return 0
+
+    # ============================================
+    # Cluster view
+    # ============================================
+
+    async def refresh_view(self) -> None:
+        """Rebuild the cluster-wide view of the current 5m window. Never raises."""
+        from app.core.database import AsyncSessionLocal
+
+        window = _window_start(time.time(), RESOLUTIONS["5m"])
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(MetricRollup).where(
+                        MetricRollup.resolution == "5m",
+                        MetricRollup.bucket_start == window,
+                    )
+                )
+                rows = result.scalars().all()
+        except Exception as e:
+            logger.error(f"Metric rollup view refresh failed: {e}")
+            return
+
+        tenants = {}
+        platform = TenantMetrics(tenant_id=PLATFORM_TENANT_ID, window_start=window)
+        for row in rows:
+            if row.tenant_id == PLATFORM_TENANT_ID:
+                platform = _to_metrics(row)
+            else:
+                tenants[row.tenant_id] = _to_metrics(row)
+        self._view = ClusterMetricsView(window, tenants, platform)
+
+    def view(self) -> Optional[ClusterMetricsView]:
+        """The cluster view, or None if never built or stale."""
+        view = self._view
+        if view is None:
+            return None
+        if time.monotonic() - view.built_at > 2 * self.FLUSH_INTERVAL_SECONDS + 5:
+            return None
+        return view
+
+
+# Global writer instance
+metrics_rollup = MetricRollupWriter()
+
+
+def get_metrics_view() -> MetricsReader:
+    """
+    Cluster-wide metrics when available, else this worker's collector.
+    
+    Note the platform totals differ: the cluster view covers the current 5m
+    window, the local collector everything since process start.
+    """
+    if settings.metrics_rollup_enabled:
+        view = metrics_rollup.view()
+        if view is not None:
+            return view
+    return get_metrics_collector()
+
+
+async def get_series(
+    session: AsyncSession,
+    tenant_id: Optional[UUID] = None,
+    resolution: str = "1h",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Rollup series for a tenant (or the platform when tenant_id is None),
+    oldest first. since defaults to 24 buckets back.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(seconds=RESOLUTIONS[resolution] * 24)
+
+    result = await session.execute(
+        select(MetricRollup).where(
+            MetricRollup.tenant_id == (tenant_id or PLATFORM_TENANT_ID),
+            MetricRollup.resolution == resolution,
+            MetricRollup.bucket_start >= since,
+            MetricRollup.bucket_start < until,
+        ).order_by(MetricRollup.bucket_start)
+    )
+    return [_to_metrics(row).to_dict() for row in result.scalars().all()]
+
+
+async def get_series_by_tenant(
+    session: AsyncSession,
+    tenant_ids: List[UUID],
+    resolution: str = "1h",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[UUID, List[dict]]:
+    """
+    get_series for many tenants in one query: {tenant_id: series}, each
+    oldest first. Tenants without rollups get an empty series.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    series: Dict[UUID, List[dict]] = {tenant_id: [] for tenant_id in tenant_ids}
+    if not tenant_ids:
+        return series
+
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(seconds=RESOLUTIONS[resolution] * 24)
+
+    result = await session.execute(
+        select(MetricRollup).where(
+            MetricRollup.tenant_id.in_(tenant_ids),
+            MetricRollup.resolution == resolution,
+            MetricRollup.bucket_start >= since,
+            MetricRollup.bucket_start < until,
+        ).order_by(MetricRollup.tenant_id, MetricRollup.bucket_start)
+    )
+    for row in result.scalars().all():
+        series.setdefault(row.tenant_id, []).append(_to_metrics(row).to_dict())
+    return series
+
+
+def series_trend(series: List[dict], path: Tuple[str, str]) -> Optional[float]:
+    """
+    Relative change of a metric between the first and second half of a
+    series (e.g. 0.25 = +25%). None without enough data.
+    """
+    values = [point.get(path[0], {}).get(path[1], 0) for point in series]
+    if len(values) < 2:
+        return None
+    half = len(values) // 2
+    before = sum(values[:half]) / half
+    after = sum(values[half:]) / (len(values) - half)
+    if before == 0:
+        return None
+    return round((after - before) / before, 4)
@@ -9,6 +9,7 @@ Access: Platform admins only
 """
 
 import logging
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
 
@@ -18,6 +19,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.platform.admin.dependencies import CurrentPlatformAdmin
 from app.platform.observability.metrics import get_metrics_collector
+from app.platform.observability.rollups import (
+    RESOLUTIONS,
+    get_metrics_view,
+    get_series,
+    get_series_by_tenant,
+    series_trend,
+)
 from app.platform.observability.snapshots import get_snapshot_service
 from app.platform.observability.collectors import (
     get_observability_collector,
@@ -64,7 +72,7 @@ async def get_platform_metrics(
     - Cache hit ratio
     - Active tenant count
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     return metrics.get_platform_metrics()
 
 
@@ -132,7 +140,7 @@ async def list_tenant_metrics(
     
     Sort by: requests, errors, or ai_tokens
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     
     if sort_by == "requests":
         return {"tenants": metrics.get_top_tenants_by_requests(limit)}
@@ -168,7 +176,7 @@ async def get_top_error_tenants(
     
     Useful for identifying problematic tenants.
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     return {"tenants": metrics.get_top_tenants_by_errors(limit)}
 
 
@@ -182,7 +190,7 @@ async def get_top_ai_usage_tenants(
     
     Useful for capacity planning and usage tracking.
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     return {"tenants": metrics.get_top_tenants_by_ai_usage(limit)}
 
 
@@ -194,10 +202,42 @@ async def get_tenant_metrics(
     """
     Get detailed metrics for a specific tenant.
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     return metrics.get_tenant_metrics(tenant_id)
 
 
+@router.get("/tenants/{tenant_id}/history")
+async def get_tenant_metrics_history(
+    tenant_id: UUID,
+    admin: CurrentPlatformAdmin,
+):
+    """
+    Get a tenant's previous metric windows (oldest first).
+    
+    Covers the answering worker only; see /series for cluster-wide trends.
+    """
+    metrics = get_metrics_collector()
+    return {"tenant_id": str(tenant_id), "windows": metrics.get_tenant_history(tenant_id)}
+
+
+@router.get("/tenants/{tenant_id}/series")
+async def get_tenant_metrics_series(
+    tenant_id: UUID,
+    admin: CurrentPlatformAdmin,
+    resolution: str = Query(default="1h", regex="^(5m|1h|1d)$"),
+    points: int = Query(default=24, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get a tenant's persisted metric series, all workers combined.
+    
+    Resolution: 5m, 1h or 1d. Returns the last `points` buckets.
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=RESOLUTIONS[resolution] * points)
+    series = await get_series(db, tenant_id, resolution, since)
+    return {"tenant_id": str(tenant_id), "resolution": resolution, "series": series}
+
+
 @router.get("/tenants/{tenant_id}/health")
 async def get_tenant_health(
     tenant_id: UUID,
@@ -224,18 +264,22 @@ async def get_tenant_health(
 @router.get("/capacity/summary")
 async def get_capacity_summary(
     admin: CurrentPlatformAdmin,
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Get capacity planning summary.
     
     Shows:
     - Current load
-    - Growth indicators
+    - Growth indicators (last 24h vs the 24h before, hourly rollups)
     - Approaching limits
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     platform = metrics.get_platform_metrics()
     
+    since = datetime.now(timezone.utc) - timedelta(hours=48)
+    hourly = await get_series(db, None, "1h", since)
+    
     return {
         "current_load": {
             "active_tenants": platform.get("active_tenants", 0),
@@ -249,12 +293,19 @@ async def get_capacity_summary(
             ),
             "can_onboard_more": platform.get("active_tenants", 0) < 900,
         },
+        "trends": {
+            "requests_change": series_trend(hourly, ("counters", "requests")),
+            "ai_tokens_change": series_trend(hourly, ("counters", "ai_tokens")),
+            "p95_ms_change": series_trend(hourly, ("response_times", "p95_ms")),
+            "hourly": hourly[-24:],
+        },
     }
 
 
 @router.get("/capacity/tenants-at-risk")
 async def get_tenants_at_risk(
     admin: CurrentPlatformAdmin,
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Get tenants approaching their limits.
@@ -263,14 +314,15 @@ async def get_tenants_at_risk(
     - High AI usage
     - High error rates
     - Slow response times
+    - Growing error rates or latency over the last 24h
     """
-    metrics = get_metrics_collector()
+    metrics = get_metrics_view()
     all_metrics = metrics.get_all_tenant_metrics()
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
     
-    at_risk = []
+    flagged = []
     
     for tm in all_metrics:
-        tenant_id = tm.get("tenant_id")
         counters = tm.get("counters", {})
         rates = tm.get("rates", {})
         response_times = tm.get("response_times", {})
@@ -289,11 +341,34 @@ async def get_tenants_at_risk(
         if response_times.get("p95_ms", 0) > 1000:
             risks.append("slow_responses")
         
+        # Trends only for tenants already flagged or busy
+        if risks or counters.get("requests", 0) >= 100:
+            flagged.append((tm, risks))
+    
+    # Hourly rollups of every flagged tenant in one query
+    series = await get_series_by_tenant(
+        db, [UUID(tm["tenant_id"]) for tm, _ in flagged], "1h", since
+    )
+    
+    at_risk = []
+    
+    for tm, risks in flagged:
+        hourly = series[UUID(tm["tenant_id"])]
+        trends = {
+            "errors_change": series_trend(hourly, ("counters", "errors")),
+            "p95_ms_change": series_trend(hourly, ("response_times", "p95_ms")),
+        }
+        if (trends["errors_change"] or 0) > 0.5:
+            risks.append("rising_errors")
+        if (trends["p95_ms_change"] or 0) > 0.5:
+            risks.append("rising_latency")
+        
         if risks:
             at_risk.append({
-                "tenant_id": tenant_id,
+                "tenant_id": tm["tenant_id"],
                 "risks": risks,
                 "metrics": tm,
+                "trends": trends,
             })
     
     return {"tenants_at_risk": at_risk}
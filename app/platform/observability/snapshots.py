@@ -24,7 +24,8 @@ from app.core.resilience import (
     get_state_manager,
     get_resilience_health,
 )
-from app.platform.observability.metrics import get_metrics_collector
+from app.platform.observability.metrics import MetricsReader
+from app.platform.observability.rollups import get_metrics_view
 
 logger = logging.getLogger(__name__)
 
@@ -139,7 +140,11 @@ class HealthSnapshotService:
     
     def __init__(self):
         self._state_manager = get_state_manager()
-        self._metrics = get_metrics_collector()
+    
+    @property
+    def _metrics(self) -> MetricsReader:
+        # Cluster-wide when rollups are running, else this worker's
+        return get_metrics_view()
     
     def get_tenant_snapshot(self, tenant_id: UUID) -> TenantHealthSnapshot:
         """
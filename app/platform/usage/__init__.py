@@ -3,5 +3,6 @@ CUSTOS Usage Tracking Module
 """
 
 from app.platform.usage.tracking import FeatureUsage, FeatureUsageService
+from app.platform.usage.counter import UsageCounterBuffer, usage_counter
 
-__all__ = ["FeatureUsage", "FeatureUsageService"]
+__all__ = ["FeatureUsage", "FeatureUsageService", "UsageCounterBuffer", "usage_counter"]
@@ -0,0 +1,412 @@
+"""
+CUSTOS Write-Behind Usage Counter
+
+Coalesces usage increments in process and writes them in batches.
+
+Hot features used to SELECT + UPDATE the same (tenant, feature, date) row
+and commit on every use, serializing requests on that row's lock. Instead,
+increments are added to an in-memory buffer and flushed periodically as
+one multi-row INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count
+per table.
+
+Two counter families share the buffer:
+- FeatureUsage: per tenant, feature, day
+- UsageLimit: per tenant, month, counter column (billing / AI quotas)
+
+LOSS SEMANTICS:
+- Increments are visible in the database after the next flush
+  (FLUSH_INTERVAL_SECONDS, or earlier once MAX_PENDING_KEYS is reached)
+- A graceful shutdown flushes everything (see usage_counter.stop())
+- A hard crash loses at most one flush interval of increments
+- Each flush writes in chunks of FLUSH_CHUNK_SIZE keys, one transaction
+  per chunk; a failed chunk is merged back and retried with the next
+  flush, and is only dropped (and logged) past MAX_RETAINED_KEYS
+
+When Redis is connected, pending deltas are mirrored with INCRBY so quota
+checks on any worker can include increments not yet flushed.
+
+USAGE:
+
+    from app.platform.usage.counter import usage_counter
+
+    await usage_counter.add_feature(tenant_id, "question:create", user_id=user_id)
+    await usage_counter.add_limit(tenant_id, "ai_requests_used")
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# UsageLimit columns that may be incremented through the buffer
+LIMIT_COUNTER_COLUMNS = frozenset({
+    "student_count",
+    "teacher_count",
+    "question_count",
+    "ai_requests_used",
+    "ocr_requests_used",
+    "lesson_plan_gen_used",
+    "question_gen_used",
+    "doubt_solver_used",
+    "total_tokens_used",
+})
+
+FeatureKey = Tuple[UUID, str, date]
+LimitKey = Tuple[UUID, int, int]
+
+
+class UsageCounterBuffer:
+    """
+    In-process write-behind buffer for usage counters.
+
+    One instance per process (usage_counter). Safe for concurrent
+    coroutines on one event loop: buffers are swapped without awaiting.
+    """
+
+    FLUSH_INTERVAL_SECONDS = 5.0
+
+    # Distinct keys buffered before an early flush
+    MAX_PENDING_KEYS = 5000
+
+    # Distinct keys kept when flushes fail before deltas are dropped
+    MAX_RETAINED_KEYS = 20000
+
+    # Keys per upsert statement; keeps bind parameters well under
+    # asyncpg's 32767 limit (FeatureUsage ~9 per row, UsageLimit ~17)
+    FLUSH_CHUNK_SIZE = 1000
+
+    # Mirror keys outlive a crashed worker's pending deltas only briefly
+    MIRROR_TTL_SECONDS = 3600
+
+    def __init__(
+        self,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        max_pending_keys: int = MAX_PENDING_KEYS,
+        max_retained_keys: int = MAX_RETAINED_KEYS,
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending_keys = max_pending_keys
+        self.max_retained_keys = max_retained_keys
+
+        self._features: Dict[FeatureKey, int] = {}
+        self._feature_users: Dict[FeatureKey, UUID] = {}
+        self._limits: Dict[LimitKey, Dict[str, int]] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # One lock for the buffer's lifetime: flushes never overlap, even
+        # across a stop()/start() cycle
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+
+    # ============================================
+    # Recording
+    # ============================================
+
+    async def add_feature(
+        self,
+        tenant_id: UUID,
+        feature: str,
+        amount: int = 1,
+        user_id: Optional[UUID] = None,
+        day: Optional[date] = None,
+    ) -> None:
+        """Buffer a FeatureUsage increment."""
+        key = (tenant_id, feature, day or datetime.now().date())
+        self._features[key] = self._features.get(key, 0) + amount
+        if user_id:
+            self._feature_users[key] = user_id
+
+        await cache.incr(
+            self._feature_mirror_key(*key), amount, ttl=self.MIRROR_TTL_SECONDS,
+        )
+        self._after_add()
+
+    async def add_limit(
+        self,
+        tenant_id: UUID,
+        column: str,
+        amount: int = 1,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+    ) -> None:
+        """Buffer a UsageLimit counter increment for a month."""
+        if column not in LIMIT_COUNTER_COLUMNS:
+            raise ValueError(f"Unknown usage counter: {column}")
+
+        now = datetime.now()
+        key = (tenant_id, year or now.year, month or now.month)
+        counters = self._limits.setdefault(key, {})
+        counters[column] = counters.get(column, 0) + amount
+
+        await cache.incr(
+            self._limit_mirror_key(*key, column), amount, ttl=self.MIRROR_TTL_SECONDS,
+        )
+        self._after_add()
+
+    # ============================================
+    # Pending (not yet flushed) counts
+    # ============================================
+
+    async def pending_feature(
+        self,
+        tenant_id: UUID,
+        feature: str,
+        day: Optional[date] = None,
+    ) -> int:
+        """Unflushed increments for a feature/day (all workers if Redis is up)."""
+        key = (tenant_id, feature, day or datetime.now().date())
+        mirrored = await cache.get_int(self._feature_mirror_key(*key))
+        if mirrored is not None:
+            return max(mirrored, 0)
+        return self._features.get(key, 0)
+
+    async def pending_limit(
+        self,
+        tenant_id: UUID,
+        column: str,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+    ) -> int:
+        """Unflushed increments for a UsageLimit counter (all workers if Redis is up)."""
+        now = datetime.now()
+        key = (tenant_id, year or now.year, month or now.month)
+        mirrored = await cache.get_int(self._limit_mirror_key(*key, column))
+        if mirrored is not None:
+            return max(mirrored, 0)
+        return self._limits.get(key, {}).get(column, 0)
+
+    @staticmethod
+    def _feature_mirror_key(tenant_id: UUID, feature: str, day: date) -> str:
+        return f"usage:pending:{tenant_id}:feature:{feature}:{day.isoformat()}"
+
+    @staticmethod
+    def _limit_mirror_key(tenant_id: UUID, year: int, month: int, column: str) -> str:
+        return f"usage:pending:{tenant_id}:limit:{year}-{month:02d}:{column}"
+
+    # ============================================
+    # Flushing
+    # ============================================
+
+    @property
+    def pending_keys(self) -> int:
+        return len(self._features) + len(self._limits)
+
+    def _after_add(self) -> None:
+        """Start the flush loop lazily and wake it when the buffer is full."""
+        if not self._stopping:
+            self.start()
+        if self.pending_keys >= self.max_pending_keys and self._wakeup:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the periodic flush loop on the running event loop."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and flush everything buffered."""
+        self._stopping = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            # Event loop shutting down without stop(): keep what we can
+            await asyncio.shield(self.flush())
+            raise
+
+    async def flush(self) -> None:
+        """Write all buffered deltas, chunk by chunk. Never raises."""
+        async with self._flush_lock:
+            # Swap buffers before awaiting so new increments go to fresh dicts
+            features, self._features = self._features, {}
+            feature_users, self._feature_users = self._feature_users, {}
+            limits, self._limits = self._limits, {}
+
+            for chunk in _chunks(features, self.FLUSH_CHUNK_SIZE):
+                users = {key: feature_users[key] for key in chunk if key in feature_users}
+                await self._flush_chunk(chunk, users, {})
+            for chunk in _chunks(limits, self.FLUSH_CHUNK_SIZE):
+                await self._flush_chunk({}, {}, chunk)
+
+    async def _flush_chunk(
+        self,
+        features: Dict[FeatureKey, int],
+        feature_users: Dict[FeatureKey, UUID],
+        limits: Dict[LimitKey, Dict[str, int]],
+    ) -> None:
+        try:
+            await self._write(features, feature_users, limits)
+        except Exception as e:
+            self._restore(features, feature_users, limits)
+            logger.error(
+                f"Usage counter flush of {len(features) + len(limits)} keys failed, "
+                f"will retry: {e}"
+            )
+            return
+
+        # Flushed deltas are now in the database; drop them from the mirror
+        for key, amount in features.items():
+            await cache.incr(self._feature_mirror_key(*key), -amount)
+        for key, counters in limits.items():
+            for column, amount in counters.items():
+                await cache.incr(self._limit_mirror_key(*key, column), -amount)
+
+    def _restore(
+        self,
+        features: Dict[FeatureKey, int],
+        feature_users: Dict[FeatureKey, UUID],
+        limits: Dict[LimitKey, Dict[str, int]],
+    ) -> None:
+        """Merge unflushed deltas back, dropping them past the retention bound."""
+        if self.pending_keys + len(features) + len(limits) > self.max_retained_keys:
+            logger.error(
+                f"Usage counter buffer full; dropped {len(features)} feature "
+                f"and {len(limits)} limit deltas"
+            )
+            return
+
+        for key, amount in features.items():
+            self._features[key] = self._features.get(key, 0) + amount
+        for key, user_id in feature_users.items():
+            self._feature_users.setdefault(key, user_id)
+        for key, counters in limits.items():
+            merged = self._limits.setdefault(key, {})
+            for column, amount in counters.items():
+                merged[column] = merged.get(column, 0) + amount
+
+    async def _write(
+        self,
+        features: Dict[FeatureKey, int],
+        feature_users: Dict[FeatureKey, UUID],
+        limits: Dict[LimitKey, Dict[str, int]],
+    ) -> None:
+        """One upsert per table, one transaction."""
+        from app.core.database import AsyncSessionLocal
+
+        now = datetime.now(timezone.utc)
+
+        async with AsyncSessionLocal() as session:
+            if features:
+                await session.execute(self._feature_upsert(features, feature_users, now))
+            if limits:
+                await session.execute(self._limit_upsert(limits, now))
+            await session.commit()
+
+    @staticmethod
+    def _feature_upsert(
+        features: Dict[FeatureKey, int],
+        feature_users: Dict[FeatureKey, UUID],
+        now: datetime,
+    ):
+        """
+        FeatureUsage upsert for a chunk.
+
+        Rows are sorted by key so concurrent workers lock rows in the
+        same order.
+        """
+        from app.platform.usage.tracking import FeatureUsage
+
+        rows = [
+            {
+                "id": uuid4(),
+                "tenant_id": tenant_id,
+                "feature": feature,
+                "date": day,
+                "count": amount,
+                "last_used_by": feature_users.get((tenant_id, feature, day)),
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": False,
+            }
+            for (tenant_id, feature, day), amount in sorted(
+                features.items(), key=lambda item: str(item[0])
+            )
+        ]
+        stmt = pg_insert(FeatureUsage).values(rows)
+        return stmt.on_conflict_do_update(
+            constraint="uq_tenant_feature_date",
+            set_={
+                "count": func.coalesce(FeatureUsage.count, 0) + stmt.excluded.count,
+                "last_used_by": func.coalesce(
+                    stmt.excluded.last_used_by, FeatureUsage.last_used_by
+                ),
+                "updated_at": now,
+            },
+        )
+
+    @staticmethod
+    def _limit_upsert(limits: Dict[LimitKey, Dict[str, int]], now: datetime):
+        """UsageLimit upsert for a chunk (rows sorted by key, as above)."""
+        from app.billing.models import UsageLimit
+
+        columns = sorted({c for counters in limits.values() for c in counters})
+        rows = [
+            {
+                "id": uuid4(),
+                "tenant_id": tenant_id,
+                "year": year,
+                "month": month,
+                **{c: counters.get(c, 0) for c in columns},
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": False,
+            }
+            for (tenant_id, year, month), counters in sorted(
+                limits.items(), key=lambda item: str(item[0])
+            )
+        ]
+        stmt = pg_insert(UsageLimit).values(rows)
+        return stmt.on_conflict_do_update(
+            constraint="uq_usage_limit_period",
+            set_={
+                **{
+                    c: func.coalesce(getattr(UsageLimit, c), 0) + stmt.excluded[c]
+                    for c in columns
+                },
+                "updated_at": now,
+            },
+        )
+
+
+def _chunks(deltas: Dict, size: int) -> Iterator[Dict]:
+    """Split deltas into key-ordered chunks of at most size keys."""
+    keys = sorted(deltas, key=str)
+    for i in range(0, len(keys), size):
+        yield {key: deltas[key] for key in keys[i:i + size]}
+
+
+# Global buffer instance
+usage_counter = UsageCounterBuffer()
@@ -15,6 +15,7 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.base_model import TenantBaseModel
+from app.platform.usage.counter import usage_counter
 
 
 class FeatureUsage(TenantBaseModel):
@@ -67,35 +68,17 @@ class FeatureUsageService:
         feature: str, 
         user_id: Optional[UUID] = None,
         amount: int = 1,
-    ) -> FeatureUsage:
-        """Increment usage counter for a feature."""
-        today = datetime.now().date()
+    ) -> None:
+        """
+        Increment usage counter for a feature.
         
-        # Try to get existing record
-        query = select(FeatureUsage).where(
-            FeatureUsage.tenant_id == self.tenant_id,
-            FeatureUsage.feature == feature,
-            FeatureUsage.date == today,
+        Write-behind: the increment is buffered and written in a batch
+        (see app/platform/usage/counter.py), so this never touches the
+        caller's session or locks the daily row.
+        """
+        await usage_counter.add_feature(
+            self.tenant_id, feature, amount=amount, user_id=user_id,
         )
-        result = await self.session.execute(query)
-        usage = result.scalar_one_or_none()
-        
-        if usage:
-            usage.count += amount
-            if user_id:
-                usage.last_used_by = user_id
-        else:
-            usage = FeatureUsage(
-                tenant_id=self.tenant_id,
-                feature=feature,
-                date=today,
-                count=amount,
-                last_used_by=user_id,
-            )
-            self.session.add(usage)
-        
-        await self.session.commit()
-        return usage
     
     async def get_daily_usage(
         self, 
@@ -111,7 +94,8 @@ class FeatureUsageService:
             FeatureUsage.date == target_date,
         )
         result = await self.session.execute(query)
-        return result.scalar() or 0
+        pending = await usage_counter.pending_feature(self.tenant_id, feature, target_date)
+        return (result.scalar() or 0) + pending
     
     async def get_monthly_usage(
         self, 
@@ -45,6 +45,9 @@ class TenantModuleAccess(TenantBaseModel):
     Module access control per tenant.
     
     Allows enabling/disabling features per school.
+    
+    Module checks read a cached, precomputed set: call
+    app.platform.control.invalidate_entitlements(tenant_id) after changes.
     """
     __tablename__ = "tenant_module_access"
     
@@ -15,6 +15,7 @@ from app.core.security import hash_password
 from app.core.exceptions import (
     DuplicateError, ResourceNotFoundError, ValidationError,
 )
+from app.platform.control.enforcement import invalidate_entitlements
 from app.tenants.models import Tenant, TenantStatus, TenantType
 from app.tenants.repository import TenantRepository
 from app.tenants.schemas import TenantCreate, TenantUpdate
@@ -149,6 +150,7 @@ class TenantService:
         tenant.is_verified = True
         tenant.verified_at = datetime.now(timezone.utc)
         await self.session.commit()
+        invalidate_entitlements(tenant_id)
         return tenant
     
     async def suspend(self, tenant_id: UUID, reason: Optional[str] = None) -> Tenant:
@@ -156,6 +158,7 @@ class TenantService:
         tenant = await self.get_by_id(tenant_id)
         tenant.status = TenantStatus.SUSPENDED
         await self.session.commit()
+        invalidate_entitlements(tenant_id)
         return tenant
     
     async def get_stats(self, tenant_id: UUID) -> dict:
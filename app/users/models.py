@@ -11,7 +11,7 @@ from uuid import UUID
 
 from sqlalchemy import (
     String, Text, Boolean, Integer, Date, DateTime, JSON,
-    ForeignKey, Table, Column, Enum as SQLEnum,
+    ForeignKey, Table, Column, Index, UniqueConstraint, Enum as SQLEnum,
 )
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -222,3 +222,33 @@ class ParentProfile(TenantBaseModel):
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="parent_profile")
+
+
+class ParentStudentLink(TenantBaseModel):
+    """
+    Parent (guardian) to student link.
+    
+    One row per parent and child; the parent portal reads a family's
+    children from here, and fee/attendance writes use the student index
+    to find the parents whose dashboards they change.
+    """
+    __tablename__ = "parent_student_links"
+    
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "parent_id", "student_id", name="uq_parent_student_link"),
+        Index("ix_parent_student_link_student", "tenant_id", "student_id"),
+    )
+    
+    parent_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    student_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    
+    relationship_type: Mapped[str] = mapped_column(String(20), default="parent")
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
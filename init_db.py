@@ -33,7 +33,7 @@ from app.finance.models import (
 from app.payments.models import GatewayConfig, PaymentOrder, PaymentTransaction, PaymentRefund, WebhookEvent
 
 # Attendance models
-from app.attendance.models import StudentAttendance, AttendanceSummary, LeaveRequest, TeacherAttendance
+from app.attendance.models import StudentAttendance, AttendanceSummary, ClassAttendanceDaily, LeaveRequest, TeacherAttendance
 
 # Calendar
 from app.calendar.models import CalendarEvent
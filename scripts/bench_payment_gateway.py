@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+CUSTOS Payment Gateway Client Benchmark
+
+Creates orders against a local stub of the Razorpay orders API, once
+with a new httpx client per call (the old behaviour) and once through
+RazorpayGateway's pooled client, and prints latency for both.
+
+The stub sleeps --handshake-ms on each new connection to stand in for
+the TCP + TLS setup a real gateway call pays (~100-300 ms from India to
+the API); reused connections skip it, as they do in production.
+
+Usage:
+    python scripts/bench_payment_gateway.py
+    python scripts/bench_payment_gateway.py --requests 200 --concurrency 20 --handshake-ms 150
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from uuid import uuid4
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.payments.clients import close_gateway_http_clients
+from app.payments.service import RazorpayGateway
+
+
+# ============================================
+# Stub server
+# ============================================
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, handshake: float) -> None:
+    await asyncio.sleep(handshake)  # New connection
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            headers = dict(
+                line.split(": ", 1)
+                for line in head.decode().split("\r\n")[1:]
+                if ": " in line
+            )
+            length = int(headers.get("content-length", headers.get("Content-Length", 0)))
+            body = json.loads(await reader.readexactly(length)) if length else {}
+
+            payload = json.dumps({
+                "id": f"order_{uuid4().hex[:14]}",
+                "entity": "order",
+                "amount": body.get("amount"),
+                "currency": body.get("currency"),
+                "receipt": body.get("receipt"),
+                "status": "created",
+            }).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+# ============================================
+# Runs
+# ============================================
+
+async def _per_call_client(base_url: str, receipt: str) -> None:
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{base_url}/orders",
+            auth=("rzp_test_key", "secret"),
+            json={"amount": 150000, "currency": "INR", "receipt": receipt, "notes": {}},
+        )
+        response.raise_for_status()
+
+
+async def _pooled_client(gateway: RazorpayGateway, receipt: str) -> None:
+    await gateway.create_order(amount=150000, currency="INR", receipt=receipt)
+
+
+async def _run(label: str, call, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call(f"BENCH-{label}-{i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"{label:<10} {requests / elapsed:8.1f} req/s   "
+        f"p50 {statistics.median(latencies):7.1f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms"
+    )
+
+
+async def main_async(args) -> None:
+    server = await asyncio.start_server(
+        lambda r, w: _handle(r, w, args.handshake_ms / 1000), "127.0.0.1", 0,
+    )
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}/v1"
+    gateway = RazorpayGateway("rzp_test_key", "secret", base_url=base_url)
+
+    print(f"{args.requests} orders, concurrency {args.concurrency}, handshake {args.handshake_ms} ms")
+    async with server:
+        await _run("per-call", lambda r: _per_call_client(base_url, r), args.requests, args.concurrency)
+        await _run("pooled", lambda r: _pooled_client(gateway, r), args.requests, args.concurrency)
+        await close_gateway_http_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CUSTOS payment gateway client benchmark")
+    parser.add_argument("--requests", type=int, default=100, help="Orders per run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Orders in flight")
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=120.0,
+        help="Simulated connection setup cost per new connection",
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
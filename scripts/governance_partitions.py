@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+CUSTOS Governance Log Partition Maintenance
+
+Creates upcoming monthly partitions for the governance log tables and
+detaches partitions older than the retention window. Safe to run
+concurrently (advisory lock). The job runner already does this daily;
+use this script where no runner is enabled, or for a custom retention:
+
+    15 2 * * *  python scripts/governance_partitions.py
+
+Usage:
+    python scripts/governance_partitions.py
+    python scripts/governance_partitions.py --retention-months 120
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import logging
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.governance.partitions import (
+    DEFAULT_RETENTION_MONTHS,
+    run_partition_maintenance,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CUSTOS governance partition maintenance")
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=DEFAULT_RETENTION_MONTHS,
+        help="Months of partitions to keep attached",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    asyncio.run(run_partition_maintenance(args.retention_months))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+CUSTOS AI Gateway Tests
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+import app.core.cache as cache_module
+from app.ai.gateway import AIGateway
+from app.ai.providers import openai as openai_provider
+from app.ai.providers.base import AIProvider, Completion
+from app.ai.providers.openai import OpenAIProvider
+from app.ai.providers.stub import StubProvider
+
+SCHEMA = {"questions": [{"question_text": "string", "marks": "integer"}]}
+
+
+class _CountingProvider(StubProvider):
+    """Stub provider that tracks how many calls are in flight at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(latency_seconds=0.01, **kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def complete(self, messages, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().complete(messages, **kwargs)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    """Use the gateway's in-process cache (no Redis in tests)."""
+    async def get_cache():
+        return SimpleNamespace(is_connected=False)
+
+    monkeypatch.setattr(cache_module, "get_cache", get_cache)
+
+
+def _messages(text: str):
+    return [{"role": "user", "content": text}]
+
+
+class TestConcurrency:
+    """Test per-tenant and global concurrency caps."""
+
+    async def test_tenant_cap(self):
+        """Test one tenant never has more than tenant_concurrency calls in flight."""
+        provider = _CountingProvider()
+        gateway = AIGateway(provider, max_concurrency=10, tenant_concurrency=2)
+        tenant_id = uuid4()
+
+        await asyncio.gather(*(
+            gateway.complete(_messages(f"question {i}"), tenant_id, temperature=0.9)
+            for i in range(6)
+        ))
+
+        assert provider.calls == 6
+        assert provider.peak == 2
+
+    async def test_global_cap(self):
+        """Test the process-wide cap holds across tenants."""
+        provider = _CountingProvider()
+        gateway = AIGateway(provider, max_concurrency=3, tenant_concurrency=2)
+
+        await asyncio.gather(*(
+            gateway.complete(_messages(f"question {i}"), uuid4(), temperature=0.9)
+            for i in range(8)
+        ))
+
+        assert provider.peak == 3
+
+
+class TestReuse:
+    """Test coalescing and the response cache."""
+
+    async def test_identical_requests_coalesce(self):
+        """Test concurrent identical requests share one provider call and bill once."""
+        provider = _CountingProvider()
+        gateway = AIGateway(provider)
+        tenant_id = uuid4()
+
+        responses = await asyncio.gather(*(
+            gateway.complete(_messages("explain photosynthesis"), tenant_id, temperature=0.9)
+            for _ in range(5)
+        ))
+
+        assert provider.calls == 1
+        assert gateway.coalesced == 4
+        assert sum(response.tokens_used for response in responses) == responses[0].tokens_used
+        assert len({response.content for response in responses}) == 1
+
+    async def test_deterministic_requests_cached(self):
+        """Test low-temperature responses are cached per tenant."""
+        provider = StubProvider()
+        gateway = AIGateway(provider, cache_ttl=60)
+        tenant_id = uuid4()
+
+        first = await gateway.complete(_messages("define osmosis"), tenant_id, temperature=0)
+        second = await gateway.complete(_messages("define osmosis"), tenant_id, temperature=0)
+        await gateway.complete(_messages("define osmosis"), uuid4(), temperature=0)
+
+        assert provider.calls == 2  # Other tenant misses
+        assert second.cached and second.tokens_used == 0
+        assert second.content == first.content
+
+    async def test_creative_requests_not_cached(self):
+        """Test high-temperature responses are not reused."""
+        provider = StubProvider()
+        gateway = AIGateway(provider, cache_ttl=60)
+
+        for _ in range(2):
+            await gateway.complete(_messages("write a poem"), None, temperature=0.9)
+
+        assert provider.calls == 2
+
+    async def test_invalid_json_not_cached(self):
+        """Test a structured call with invalid JSON raises and is retried."""
+        provider = StubProvider(responder=lambda messages: "not json")
+        gateway = AIGateway(provider, cache_ttl=60)
+
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await gateway.generate_structured("make questions", SCHEMA, temperature=0)
+
+        assert provider.calls == 2
+
+
+class TestStreaming:
+    """Test streamed structured responses."""
+
+    async def test_items_yielded_then_data_parsed(self):
+        """Test array items arrive one by one and the full response is parsed after."""
+        items = [{"question_text": f"Q{i}", "marks": i} for i in range(3)]
+        provider = StubProvider(responder=lambda messages: json.dumps({"questions": items}))
+        gateway = AIGateway(provider)
+
+        stream = gateway.stream_structured("make questions", SCHEMA, "questions")
+        received = [item async for item in stream]
+
+        assert received == items
+        assert stream.data == {"questions": items}
+        assert stream.completion_tokens > 1
+
+    async def test_reported_usage_billed(self, monkeypatch):
+        """Test the usage reported at the end of the stream replaces the estimate."""
+        class Provider(AIProvider):
+            async def complete(self, messages, **kwargs):
+                raise AssertionError("stream only")
+
+            async def stream(self, messages, **kwargs):
+                yield '{"questions": [{"question_text": "Q", "marks": 1}]}'
+                yield Completion(content="", model="m", prompt_tokens=120, completion_tokens=15)
+
+        recorded = []
+        monkeypatch.setattr(
+            AIGateway, "_record_usage",
+            staticmethod(lambda tenant_id, tokens, feature: recorded.append(tokens)),
+        )
+
+        stream = AIGateway(Provider()).stream_structured("make questions", SCHEMA, "questions", uuid4())
+        received = [item async for item in stream]
+
+        assert received == [{"question_text": "Q", "marks": 1}]
+        assert (stream.prompt_tokens, stream.completion_tokens) == (120, 15)
+        assert recorded == [135]
+
+    async def test_openai_requests_stream_usage(self, monkeypatch):
+        """Test OpenAI streams ask for usage and end with it as a Completion."""
+        def chunk(content=None, usage=None):
+            choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content else []
+            return SimpleNamespace(choices=choices, usage=usage, model="gpt-test")
+
+        requests = []
+
+        async def create(**kwargs):
+            requests.append(kwargs)
+
+            async def chunks():
+                yield chunk("[1, ")
+                yield chunk("2]")
+                yield chunk(usage=SimpleNamespace(prompt_tokens=30, completion_tokens=4))
+
+            return chunks()
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(openai_provider, "get_openai_client", lambda: client)
+
+        received = [delta async for delta in OpenAIProvider().stream(_messages("count"))]
+
+        assert requests[0]["stream_options"] == {"include_usage": True}
+        assert received[:2] == ["[1, ", "2]"]
+        assert received[2] == Completion(content="", model="gpt-test", prompt_tokens=30, completion_tokens=4)
@@ -0,0 +1,165 @@
+"""
+CUSTOS AI Streaming Tests
+"""
+
+import json
+from datetime import date
+from uuid import uuid4
+
+import pytest
+
+from app.ai import question_gen_router, router as ai_router
+from app.ai.question_gen_schemas import GenerateQuestionsRequest
+from app.ai.schemas import GenerateAILessonPlanRequest
+from app.ai.streaming import JSONArrayStreamParser, format_sse
+from app.auth.schemas import AuthContext
+
+ITEMS = [
+    {"question": 'Which symbol closes an array: "]" or "}"?', "marks": 1},
+    {"question": "Escape \\ and quote \" inside {braces} and [brackets]", "options": ["[", "{", "\\"]},
+    {"question": "Nested", "meta": {"tags": ["a", "b"], "depth": {"x": [1, 2]}}},
+]
+
+TEXT = "```json\n" + json.dumps({
+    "title": "Set [1] {draft}",
+    "other": [{"question": "not this one"}],
+    "questions": ITEMS,
+    "after": [{"question": "nor this"}],
+}) + "\n```"
+
+
+def _feed_all(parser: JSONArrayStreamParser, chunks) -> list:
+    received = []
+    for chunk in chunks:
+        received.extend(parser.feed(chunk))
+    return received
+
+
+class TestJSONArrayStreamParser:
+    """Test objects are recovered however the text is split."""
+
+    def test_whole_text(self):
+        """Test the keyed array's objects are returned, others ignored."""
+        parser = JSONArrayStreamParser("questions")
+        assert parser.feed(TEXT) == ITEMS
+        assert parser.items == ITEMS
+
+    def test_every_split_point(self):
+        """Test two chunks split at any position give the same objects."""
+        for split in range(len(TEXT) + 1):
+            parser = JSONArrayStreamParser("questions")
+            assert _feed_all(parser, [TEXT[:split], TEXT[split:]]) == ITEMS, split
+
+    def test_single_characters(self):
+        """Test one character at a time gives each object as it closes."""
+        parser = JSONArrayStreamParser("questions")
+        completed_at = []
+        for i, c in enumerate(TEXT):
+            if parser.feed(c):
+                completed_at.append(i)
+
+        assert parser.items == ITEMS
+        assert len(completed_at) == len(ITEMS)
+        assert all(TEXT[i] == "}" for i in completed_at)
+
+    def test_without_key_takes_first_array(self):
+        """Test without a key the first array in the text is parsed."""
+        parser = JSONArrayStreamParser()
+        assert _feed_all(parser, TEXT) == [{"question": "not this one"}]
+
+    def test_bare_array(self):
+        """Test a top-level array is parsed when no key is given."""
+        parser = JSONArrayStreamParser()
+        assert parser.feed(json.dumps(ITEMS)) == ITEMS
+
+    def test_key_inside_string_ignored(self):
+        """Test the key appearing as a string value does not start the array."""
+        text = json.dumps({"note": "questions", "list": [{"a": 1}], "questions": [{"b": 2}]})
+        assert JSONArrayStreamParser("questions").feed(text) == [{"b": 2}]
+
+    def test_malformed_and_non_object_items_skipped(self):
+        """Test invalid objects and scalars in the array are skipped."""
+        parser = JSONArrayStreamParser("questions")
+        completed = parser.feed('{"questions": [{"a": 1}, 7, {"b": nope}, {"c": 3}]}')
+        assert completed == [{"a": 1}, {"c": 3}]
+
+
+def test_format_sse():
+    """Test one event is framed as an SSE message."""
+    assert format_sse("item", {"n": 1}) == 'event: item\ndata: {"n": 1}\n\n'
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def user():
+    return AuthContext(
+        user_id=uuid4(), tenant_id=uuid4(), email="teacher@school.test",
+        roles=["TEACHER"], permissions=set(),
+    )
+
+
+async def _consume(response) -> list:
+    """(event, data) pairs of an SSE response body."""
+    body = "".join([chunk async for chunk in response.body_iterator])
+    events = []
+    for message in body.strip().split("\n\n"):
+        event, data = message.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+class TestStreamEndpoints:
+    """Test the SSE endpoints with a real AuthContext."""
+
+    async def test_stream_questions(self, monkeypatch, user):
+        """Test questions are streamed for the requesting teacher."""
+        class Service:
+            def __init__(self, session, tenant_id):
+                pass
+
+            async def stream_questions(self, request, teacher_id):
+                yield {"event": "question", "data": {"teacher_id": str(teacher_id)}}
+                yield {"event": "done", "data": {"questions_created": 1}}
+
+        monkeypatch.setattr(question_gen_router, "AIQuestionGenService", Service)
+        monkeypatch.setattr(question_gen_router, "AsyncSessionLocal", _Session)
+        request = GenerateQuestionsRequest(class_id=uuid4(), subject_id=uuid4(), topic_id=uuid4())
+
+        events = await _consume(await question_gen_router.stream_questions(request, user))
+
+        assert events == [
+            ("question", {"teacher_id": str(user.user_id)}),
+            ("done", {"questions_created": 1}),
+        ]
+
+    async def test_stream_lesson_plan(self, monkeypatch, user):
+        """Test lesson plan units are streamed for the requesting teacher."""
+        class Service:
+            def __init__(self, session, tenant_id):
+                pass
+
+            async def stream_lesson_plan(self, teacher_id, request):
+                yield {"event": "unit", "data": {"teacher_id": str(teacher_id)}}
+                yield {"event": "done", "data": {}}
+
+        monkeypatch.setattr(ai_router, "AILessonPlanService", Service)
+        monkeypatch.setattr(ai_router, "AsyncSessionLocal", _Session)
+        request = GenerateAILessonPlanRequest(
+            class_id=uuid4(), subject_id=uuid4(), syllabus_subject_id=uuid4(),
+            start_date=date(2026, 11, 1), end_date=date(2027, 3, 31),
+        )
+
+        events = await _consume(await ai_router.stream_ai_lesson_plan(request, user))
+
+        assert [event for event, _ in events] == ["unit", "done"]
+        assert events[0][1] == {"teacher_id": str(user.user_id)}
@@ -0,0 +1,352 @@
+"""
+CUSTOS Analytics Snapshot Tests
+"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.analytics.models import AnalyticsPeriod
+from app.analytics.service import AnalyticsService
+
+
+START, END = date(2026, 10, 12), date(2026, 10, 18)
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalar(self):
+        return self.value
+
+    def all(self):
+        return self.value
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.value)
+
+
+class _Session:
+    """Each execute returns the next queued value."""
+
+    def __init__(self, *values):
+        self.values = list(values)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return _Result(self.values.pop(0))
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _service(**grouped) -> AnalyticsService:
+    """A service whose grouped queries return the given dicts (default: empty)."""
+    service = AnalyticsService(session=None, tenant_id=uuid4())
+    for name in (
+        "_get_enrolled_students",
+        "_count_daily_loop_sessions",
+        "_get_daily_loop_data",
+        "_get_weekly_test_data",
+        "_get_lesson_eval_data",
+        "_get_attendance_data",
+        "_get_teaching_assignments",
+        "_get_lesson_plan_progress",
+        "_get_schedule_adherence",
+        "_get_assessment_results_by_pair",
+        "_count_assessments_by_creator",
+    ):
+        value = grouped.get(name, set() if name == "_get_enrolled_students" else {})
+
+        async def query(*args, _value=value, **kwargs):
+            return _value
+
+        setattr(service, name, query)
+    return service
+
+
+class TestStudentMetrics:
+    """Test per-student metrics from grouped aggregates."""
+
+    async def test_inactive_student_gets_zero_row(self):
+        """Test an enrolled student with no activity still gets an entry."""
+        student, klass = uuid4(), uuid4()
+        service = _service(_get_enrolled_students={(student, klass)})
+
+        metrics = await service._compute_student_metrics(START, END)
+
+        assert metrics[(student, klass)] == service._empty_student_metrics()
+
+    async def test_inactive_student_sees_class_session_total(self):
+        """Test a student who skipped every daily loop has 0 of N sessions."""
+        student, klass, subject = uuid4(), uuid4(), uuid4()
+        service = _service(
+            _get_enrolled_students={(student, klass)},
+            _count_daily_loop_sessions={(klass, subject): 4},
+        )
+
+        metrics = await service._compute_student_metrics(START, END)
+
+        assert metrics[(student, klass)]["daily"]["total"] == 4
+        assert metrics[(student, klass)]["daily"]["participation_pct"] == 0.0
+
+    async def test_attendance_excused_days_excluded(self):
+        """Test participation rate leaves excused days out of the denominator."""
+        student, klass = uuid4(), uuid4()
+        service = _service(_get_attendance_data={(student, klass): (10, 6, 2, 2, 0)})
+
+        attendance = (await service._compute_student_metrics(START, END))[(student, klass)]["attendance"]
+
+        assert attendance["present_days"] == 8
+        assert attendance["attendance_pct"] == 70.0
+        assert attendance["participation_rate"] == 87.5
+
+
+class TestTeacherMetrics:
+    """Test per-teacher metrics from grouped aggregates."""
+
+    async def test_lesson_and_schedule_come_from_queries(self):
+        """Test coverage and adherence are computed, not hardcoded."""
+        teacher = uuid4()
+        service = _service(
+            _get_lesson_plan_progress={teacher: (8, 6)},
+            _get_schedule_adherence={teacher: (20, 15)},
+        )
+
+        metrics = (await service._compute_teacher_metrics(START, END))[teacher]
+
+        assert metrics["lesson"] == {"planned": 8, "completed": 6, "coverage_pct": 75.0}
+        assert metrics["schedule"] == {"scheduled": 20, "conducted": 15, "adherence_pct": 75.0}
+
+    async def test_participation_only_over_assigned_pairs(self):
+        """Test participation and mastery use the teacher's own class/subjects."""
+        teacher, klass, maths, science = uuid4(), uuid4(), uuid4(), uuid4()
+        service = _service(
+            _get_teaching_assignments={teacher: {(klass, maths)}},
+            _get_assessment_results_by_pair={
+                (klass, maths): (10, 8, 700.0),
+                (klass, science): (10, 1, 100.0),  # Another teacher's subject
+            },
+            _count_daily_loop_sessions={(klass, maths): 3, (klass, science): 5},
+        )
+
+        metrics = (await service._compute_teacher_metrics(START, END))[teacher]
+
+        assert metrics["participation"] == {"participation_pct": 80.0, "mastery_avg": 70.0}
+        assert metrics["assessment"]["daily_loops"] == 3
+
+    async def test_assigned_teacher_without_activity(self):
+        """Test an assigned teacher with no data gets an all-zero entry."""
+        teacher = uuid4()
+        service = _service(_get_teaching_assignments={teacher: {(uuid4(), uuid4())}})
+
+        metrics = await service._compute_teacher_metrics(START, END)
+
+        assert metrics[teacher] == service._empty_teacher_metrics()
+
+    async def test_snapshot_rows_for_every_teacher(self):
+        """Test bulk generation builds one row per teacher in scope."""
+        teachers = [uuid4(), uuid4()]
+        service = _service(
+            _get_teaching_assignments={teachers[0]: {(uuid4(), uuid4())}},
+            _get_schedule_adherence={teachers[1]: (4, 4)},
+        )
+
+        rows = await service._derive_teacher_snapshot_rows(START, END, AnalyticsPeriod.WEEKLY)
+
+        by_teacher = {row["teacher_id"]: row for row in rows}
+        assert set(by_teacher) == set(teachers)
+        assert float(by_teacher[teachers[1]]["schedule_adherence_pct"]) == 100.0
+        assert by_teacher[teachers[0]]["periods_scheduled"] == 0
+
+
+class TestClassAggregation:
+    """Test class snapshot rows built from aggregated averages."""
+
+    def test_average_student_rows(self):
+        """Test in-memory averages are keyed by class snapshot field."""
+        service = _service()
+        rows = [
+            {field: 40 for field in service._CLASS_AVERAGE_FIELDS.values()},
+            {field: 81 for field in service._CLASS_AVERAGE_FIELDS.values()},
+        ]
+
+        averages = service._average_student_rows(rows)
+
+        assert set(averages) == set(service._CLASS_AVERAGE_FIELDS)
+        assert averages["avg_mastery_pct"] == 60.5
+        assert service._average_student_rows([]) == {}
+
+    def test_class_row_rounds_averages(self):
+        """Test averages are stored as 2-place Decimals, missing ones as 0."""
+        service = _service()
+
+        row = service._build_class_snapshot_row(
+            class_id=uuid4(),
+            total_students=3,
+            averages={"avg_mastery_pct": 66.666, "avg_attendance_pct": None},
+            period_start=START,
+            period_end=END,
+            period_type=AnalyticsPeriod.WEEKLY,
+        )
+
+        assert row["total_students"] == 3
+        assert row["avg_mastery_pct"] == Decimal("66.67")
+        assert row["avg_attendance_pct"] == Decimal("0.0")
+        assert row["common_weak_topics_json"] is None
+
+    async def test_topics_from_concept_columns(self):
+        """Test topic analysis works on concept-only rows."""
+        service = _service()
+        rows = [
+            SimpleNamespace(weak_concepts_json=[{"name": "fractions"}], strong_concepts_json=None),
+            SimpleNamespace(
+                weak_concepts_json=[{"name": "fractions"}, {"name": "ratios"}],
+                strong_concepts_json=[{"name": "angles"}],
+            ),
+        ]
+
+        weak, strong, weak_count, strong_count = await service._analyze_class_topics(rows)
+
+        assert weak[0] == {"name": "fractions", "student_count": 2}
+        assert strong == [{"name": "angles", "student_count": 1}]
+        assert (weak_count, strong_count) == (2, 1)
+
+
+class TestConcepts:
+    """Test weak/strong concepts from grouped daily loop accuracy."""
+
+    async def test_concepts_banded_by_accuracy(self):
+        """Test topics split into weak and strong by accuracy, per student."""
+        a, b = uuid4(), uuid4()
+        fractions, ratios, angles, decimals = uuid4(), uuid4(), uuid4(), uuid4()
+        session = _Session([
+            (a, fractions, "Fractions", 10, 2),
+            (a, ratios, "Ratios", 4, 1),
+            (a, angles, "Angles", 5, 5),
+            (a, decimals, "Decimals", 10, 5),  # Moderate: neither list
+            (b, angles, "Angles", 3, 3),
+        ])
+        service = AnalyticsService(session=session, tenant_id=uuid4())
+
+        concepts = await service._compute_student_concepts(START, END)
+
+        weak, strong = concepts[a]
+        assert [c["name"] for c in weak] == ["Fractions", "Ratios"]
+        assert weak[0] == {
+            "topic_id": str(fractions), "name": "Fractions", "attempts": 10, "accuracy_pct": 20.0,
+        }
+        assert [c["name"] for c in strong] == ["Angles"]
+        assert concepts[b][0] == [] and concepts[b][1][0]["name"] == "Angles"
+        sql = _sql(session.statements[0])
+        assert "GROUP BY daily_loop_attempts.student_id, daily_loop_sessions.topic_id" in sql
+        assert "HAVING count(daily_loop_attempts.id) >=" in sql
+
+    async def test_single_student(self):
+        """Test the per-student path filters the same query to one student."""
+        student = uuid4()
+        session = _Session([(student, uuid4(), "Fractions", 3, 0)])
+        service = AnalyticsService(session=session, tenant_id=uuid4())
+
+        weak, strong = await service._analyze_concepts(student, START, END)
+
+        assert [c["name"] for c in weak] == ["Fractions"] and strong == []
+        assert "daily_loop_attempts.student_id = " in _sql(session.statements[0])
+        assert await AnalyticsService(
+            session=_Session([]), tenant_id=uuid4()
+        )._analyze_concepts(student, START, END) == ([], [])
+
+
+class TestSyllabusCoverage:
+    """Test class coverage from lesson plan units grouped by class."""
+
+    async def test_class_coverage_from_units(self):
+        """Test each class gets its completed share of planned units."""
+        a, b = uuid4(), uuid4()
+        session = _Session([(a, 8, 6), (b, 4, 0)])
+        service = AnalyticsService(session=session, tenant_id=uuid4())
+
+        coverage = await service._get_class_syllabus_coverages(START, END)
+
+        assert coverage == {a: 75.0, b: 0.0}
+        assert "GROUP BY lesson_plans.class_id" in _sql(session.statements[0])
+
+    async def test_class_without_plans(self):
+        """Test a class with no running lesson plans has 0 coverage."""
+        service = AnalyticsService(session=_Session([]), tenant_id=uuid4())
+        assert await service._get_class_syllabus_coverage(uuid4(), None, START, END) == 0.0
+
+
+class TestTeacherDashboard:
+    """Test the teacher dashboard summary."""
+
+    async def test_total_students_counted(self):
+        """Test students are counted across the teacher's assigned classes."""
+        snapshot = SimpleNamespace(
+            class_id=uuid4(), syllabus_coverage_pct=Decimal("50"),
+            student_participation_pct=Decimal("80"), class_mastery_avg=Decimal("60"),
+            engagement_score=Decimal("70"),
+        )
+        session = _Session([snapshot], 42)
+        service = AnalyticsService(session=session, tenant_id=uuid4())
+
+        dashboard = await service.get_teacher_dashboard(uuid4(), START, END)
+
+        assert dashboard["total_students"] == 42
+        assert dashboard["total_classes"] == 1
+        sql = _sql(session.statements[1])
+        assert "count(distinct(student_profiles.user_id))" in sql
+        assert "teaching_assignments" in sql
+
+
+class TestPrincipalDashboard:
+    """Test the principal dashboard is served from the tenant rollup."""
+
+    async def test_served_from_rollup(self):
+        """Test a stored rollup is returned without re-aggregating."""
+        rollup = SimpleNamespace(**{field: 0 for field in AnalyticsService._ROLLUP_FIELDS})
+        rollup.total_students = 120
+        rollup.school_avg_mastery = Decimal("71.25")
+
+        class _Session:
+            async def execute(self, statement):
+                return _Result(rollup)
+
+        service = AnalyticsService(session=_Session(), tenant_id=uuid4())
+
+        async def compute(*args):
+            raise AssertionError("rollup should not be recomputed")
+
+        service._compute_tenant_rollup = compute
+        dashboard = await service.get_principal_dashboard(START, END)
+
+        assert dashboard["total_students"] == 120
+        assert dashboard["school_avg_mastery"] == 71.25
+        assert dashboard["period_start"] == START
+
+    async def test_missing_rollup_is_computed(self):
+        """Test snapshots generated before the rollup existed still show."""
+
+        class _Session:
+            async def execute(self, statement):
+                return _Result(None)
+
+        service = AnalyticsService(session=_Session(), tenant_id=uuid4())
+
+        async def compute(*args):
+            return {"total_classes": 4, "school_avg_mastery": Decimal("55.00")}
+
+        service._compute_tenant_rollup = compute
+        dashboard = await service.get_principal_dashboard(START, END)
+
+        assert dashboard["total_classes"] == 4
+        assert dashboard["school_avg_mastery"] == 55.0
@@ -0,0 +1,88 @@
+"""
+CUSTOS Attendance Rollup Tests
+"""
+
+from datetime import date
+from uuid import uuid4
+
+from app.attendance.models import AttendanceStatus
+from app.attendance.rollups import AttendanceChange, AttendanceRollup
+
+
+DAY = date(2026, 10, 18)
+
+
+def _rollup() -> AttendanceRollup:
+    return AttendanceRollup(session=None, tenant_id=uuid4())
+
+
+class TestAttendanceRollupRecord:
+    """Test status transitions become the right count deltas."""
+
+    def test_new_present_record(self):
+        """Test a new record adds a school day and a class-day student."""
+        rollup = _rollup()
+        student, klass = uuid4(), uuid4()
+        rollup.record(student, klass, None, DAY, None, AttendanceStatus.PRESENT)
+
+        summary = rollup._summary_deltas[(student, 2026, 10)]
+        assert summary == {"total_days": 1, "present_days": 1}
+        class_day = rollup._class_deltas[(klass, None, DAY)]
+        assert class_day == {"present_count": 1, "total_students": 1}
+
+    def test_status_change_moves_counts(self):
+        """Test present -> absent moves the day without changing totals."""
+        rollup = _rollup()
+        student, klass = uuid4(), uuid4()
+        rollup.record(student, klass, None, DAY, AttendanceStatus.PRESENT, AttendanceStatus.ABSENT)
+
+        summary = rollup._summary_deltas[(student, 2026, 10)]
+        assert summary["total_days"] == 0
+        assert summary["present_days"] == -1
+        assert summary["absent_days"] == 1
+        assert summary["unexcused_days"] == 1
+        class_day = rollup._class_deltas[(klass, None, DAY)]
+        assert class_day == {"present_count": -1, "absent_count": 1}
+
+    def test_unchanged_status_is_ignored(self):
+        """Test re-marking with the same status records nothing."""
+        rollup = _rollup()
+        rollup.record(uuid4(), uuid4(), None, DAY, AttendanceStatus.LATE, AttendanceStatus.LATE)
+        assert rollup._summary_deltas == {}
+        assert rollup._class_deltas == {}
+
+    def test_holiday_is_not_a_school_day(self):
+        """Test holidays only count in the class-day rollup."""
+        rollup = _rollup()
+        student, klass = uuid4(), uuid4()
+        rollup.record(student, klass, None, DAY, None, AttendanceStatus.HOLIDAY)
+
+        assert rollup._summary_deltas[(student, 2026, 10)] == {}
+        assert rollup._class_deltas[(klass, None, DAY)] == {
+            "holiday_count": 1,
+            "total_students": 1,
+        }
+
+    def test_removed_record(self):
+        """Test deleting a record drops the student from the class-day."""
+        rollup = _rollup()
+        student, klass = uuid4(), uuid4()
+        rollup.record(student, klass, None, DAY, AttendanceStatus.EXCUSED, None)
+
+        summary = rollup._summary_deltas[(student, 2026, 10)]
+        assert summary == {"total_days": -1, "excused_days": -1}
+        assert rollup._class_deltas[(klass, None, DAY)]["total_students"] == -1
+
+    def test_deltas_accumulate_per_month(self):
+        """Test several days of one student share one summary delta."""
+        rollup = _rollup()
+        student, klass = uuid4(), uuid4()
+        for day in (1, 2, 3):
+            rollup.record_change(AttendanceChange(
+                student, klass, None, date(2026, 10, day), None, AttendanceStatus.PRESENT,
+            ))
+        rollup.record(student, klass, None, date(2026, 11, 2), None, AttendanceStatus.ABSENT)
+
+        assert rollup._summary_deltas[(student, 2026, 10)]["present_days"] == 3
+        assert rollup._summary_deltas[(student, 2026, 11)]["absent_days"] == 1
+        assert len(rollup._class_deltas) == 4
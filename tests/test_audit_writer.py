@@ -0,0 +1,121 @@
+"""
+CUSTOS Audit Writer Tests
+"""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.governance.models import ActionType, AuditLog, EntityType
+from app.platform.audit.writer import AuditWriter, is_sync_entity
+
+
+def _row(**overrides) -> dict:
+    now = datetime.now(timezone.utc)
+    row = {
+        "id": uuid4(),
+        "tenant_id": uuid4(),
+        "actor_user_id": None,
+        "action_type": ActionType.UPDATE,
+        "entity_type": EntityType.STUDENT,
+        "description": "Updated profile",
+        "timestamp": now,
+        "created_at": now,
+        "updated_at": now,
+        "is_deleted": False,
+    }
+    row.update(overrides)
+    return row
+
+
+def _writer(tmp_path, **kwargs) -> AuditWriter:
+    """A writer whose inserts are recorded instead of hitting the database."""
+    writer = AuditWriter(spill_path=str(tmp_path), **kwargs)
+    writer.inserted = []
+
+    async def insert(batch):
+        writer.inserted.append(list(batch))
+
+    writer._insert = insert
+    return writer
+
+
+class TestSyncEntities:
+    """Test which audit events bypass the queue."""
+
+    def test_financial_entities_are_sync(self):
+        """Test fee/payment types are written synchronously, others queued."""
+        assert is_sync_entity("payment")
+        assert is_sync_entity("FEE")
+        assert not is_sync_entity(EntityType.STUDENT)
+
+
+class TestAuditWriter:
+    """Test batching, draining and spill/replay."""
+
+    async def test_rows_flushed_in_batches(self, tmp_path):
+        """Test queued rows are written in batches of at most batch_size."""
+        writer = _writer(tmp_path, flush_interval_ms=1000, batch_size=3)
+        rows = [_row() for _ in range(7)]
+
+        for row in rows:
+            writer.enqueue(AuditLog, row)
+        await writer.stop()
+
+        assert all(len(batch) <= 3 for batch in writer.inserted)
+        written = [row for batch in writer.inserted for _, row in batch]
+        assert written == rows
+
+    async def test_stop_without_events(self, tmp_path):
+        """Test stopping an idle writer returns and writes nothing."""
+        writer = _writer(tmp_path)
+        writer.start()
+        await writer.stop()
+        assert writer.inserted == []
+
+    def test_no_event_loop_spills(self, tmp_path):
+        """Test enqueue outside an event loop goes to the spill file."""
+        writer = _writer(tmp_path)
+        writer.enqueue(AuditLog, _row())
+
+        assert writer.queue_depth == 0
+        assert len(writer._spill_file().read_text().splitlines()) == 1
+
+    async def test_full_queue_spills(self, tmp_path):
+        """Test overflow is spilled rather than dropped or blocking."""
+        writer = _writer(tmp_path, max_queue_size=1)
+        writer.start()
+        writer._task.cancel()  # Keep the queue from draining
+
+        writer.enqueue(AuditLog, _row())
+        writer.enqueue(AuditLog, _row())
+
+        assert writer.queue_depth == 1
+        assert len(writer._spill_file().read_text().splitlines()) == 1
+
+    async def test_failed_flush_spills(self, tmp_path):
+        """Test a failing INSERT moves the batch to the spill file."""
+        writer = AuditWriter(spill_path=str(tmp_path))
+
+        async def insert(batch):
+            raise ConnectionError("database unavailable")
+
+        writer._insert = insert
+        await writer._write_batch([(AuditLog, _row()), (AuditLog, _row())])
+
+        assert len(writer._spill_file().read_text().splitlines()) == 2
+
+    async def test_replay_restores_column_types(self, tmp_path):
+        """Test spilled rows replay with UUIDs and datetimes decoded."""
+        writer = _writer(tmp_path)
+        row = _row(actor_user_id=uuid4())
+        writer._spill([(AuditLog, row)])
+
+        assert await writer.replay_spill() == 1
+
+        (model, replayed), = writer.inserted[0]
+        assert model is AuditLog
+        assert replayed["id"] == row["id"]
+        assert replayed["actor_user_id"] == row["actor_user_id"]
+        assert replayed["timestamp"] == row["timestamp"]
+        assert replayed["action_type"] == "UPDATE"
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,127 @@
+"""
+CUSTOS Shared Circuit State Tests
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.resilience.policies import CircuitState, Feature, get_policy
+from app.core.resilience.shared import (
+    BUCKETS_PER_WINDOW,
+    SharedCircuitState,
+    SharedCircuitStore,
+)
+from app.core.resilience.state import CircuitStateManager, FailureRecord, FeatureState
+
+
+FEATURE = Feature.AI_LESSON_PLAN
+
+
+@pytest.fixture
+def manager():
+    """The circuit manager with clean local state for FEATURE."""
+    manager = CircuitStateManager()
+    manager.reset(FEATURE)
+    yield manager
+    manager.reset(FEATURE)
+
+
+class TestSharedCircuitStore:
+    """Test Redis key layout and script result parsing."""
+
+    def test_keys_cover_the_window(self):
+        """Test the state key comes first, then one bucket per window slice."""
+        store = SharedCircuitStore()
+        bucket = store._bucket_seconds(FEATURE)
+        now = 1_000_000.0
+
+        keys = store._keys(FEATURE, now)
+
+        assert keys[0] == f"circuit:{FEATURE.value}"
+        assert len(keys) == 1 + BUCKETS_PER_WINDOW
+        assert keys[1] == f"circuit:{FEATURE.value}:fail:{int(now // bucket)}"
+        assert bucket * BUCKETS_PER_WINDOW <= get_policy(FEATURE).window_seconds
+
+    async def test_script_result_parsed(self):
+        """Test the Lua reply becomes a SharedCircuitState."""
+        store = SharedCircuitStore()
+        calls = []
+
+        async def script(keys, args):
+            calls.append((keys, args))
+            return ["open", "1700000000.5", 7, ""]
+
+        async def get_script(name, source):
+            return script
+
+        store._script = get_script
+        shared = await store.record_failure(FEATURE)
+
+        assert shared == SharedCircuitState(CircuitState.OPEN, 1700000000.5, 7, None)
+        assert calls[0][1][1] == get_policy(FEATURE).failure_threshold
+
+    async def test_redis_unavailable(self):
+        """Test no Redis, or a failing script, yields None (stay local)."""
+        store = SharedCircuitStore()
+
+        async def no_script(name, source):
+            return None
+
+        store._script = no_script
+        assert await store.get_state(FEATURE) is None
+
+        async def broken(keys, args):
+            raise ConnectionError("redis down")
+
+        async def broken_script(name, source):
+            return broken
+
+        store._script = broken_script
+        assert await store.record_success(FEATURE) is None
+
+
+class TestAdoptSharedState:
+    """Test the local circuit follows newer shared transitions only."""
+
+    def test_shared_open_opens_local(self, manager):
+        """Test another worker opening the circuit opens it here."""
+        opened_at = time.time()
+        manager._adopt_shared(FEATURE, SharedCircuitState(CircuitState.OPEN, opened_at, 5))
+
+        state = manager.get_state(FEATURE)
+        assert state.state == CircuitState.OPEN
+        assert state.opened_at.timestamp() == pytest.approx(opened_at)
+
+    def test_stale_open_ignored(self, manager):
+        """Test an OPEN older than the local close is not adopted."""
+        state = manager.get_state(FEATURE)
+        state.closed_at = datetime.now(timezone.utc)
+        stale = (state.closed_at - timedelta(minutes=5)).timestamp()
+
+        manager._adopt_shared(FEATURE, SharedCircuitState(CircuitState.OPEN, stale, 5))
+
+        assert state.state == CircuitState.CLOSED
+        assert state.shared_state == CircuitState.OPEN
+
+    def test_shared_close_closes_local(self, manager):
+        """Test a cluster-wide recovery closes a locally open circuit."""
+        manager._transition_to_open(FEATURE, reason="test")
+        closed_at = time.time() + 1
+
+        manager._adopt_shared(
+            FEATURE, SharedCircuitState(CircuitState.CLOSED, None, 0, closed_at),
+        )
+
+        assert manager.get_state(FEATURE).state == CircuitState.CLOSED
+
+    def test_failures_pruned_from_left(self):
+        """Test expired failures are dropped and recent ones counted."""
+        now = datetime.now(timezone.utc)
+        state = FeatureState(feature=FEATURE)
+        for age in (120, 90, 5, 1):
+            state.failures.append(FailureRecord(now - timedelta(seconds=age), "Timeout", ""))
+
+        assert state.get_recent_failures(60) == 2
+        assert len(state.failures) == 2
@@ -0,0 +1,170 @@
+"""
+CUSTOS Entitlement Cache Tests
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+import app.tenants.service as tenant_service
+from app.platform.control.enforcement import PlanEnforcement, PlanTier
+from app.platform.control.entitlements import EntitlementCache
+from app.tenants.service import TenantService
+
+
+def _cache():
+    """A cache whose loader records the tenants it loads."""
+    calls = []
+
+    async def loader(tenant_id, db):
+        calls.append(tenant_id)
+        await asyncio.sleep(0)
+        return SimpleNamespace(exists=True, tier="basic")
+
+    return EntitlementCache(loader), calls
+
+
+class TestEntitlementCache:
+    """Test TTL, LRU, negative caching and single-flight loads."""
+
+    async def test_hit_does_not_reload(self):
+        """Test a second lookup is served from the cache."""
+        cache, calls = _cache()
+        tenant_id = uuid4()
+
+        first = await cache.get(tenant_id)
+        assert await cache.get(tenant_id) is first
+        assert calls == [tenant_id]
+
+    async def test_concurrent_misses_share_one_load(self):
+        """Test simultaneous misses for a tenant call the loader once."""
+        cache, calls = _cache()
+        tenant_id = uuid4()
+
+        results = await asyncio.gather(*(cache.get(tenant_id) for _ in range(10)))
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    async def test_load_error_reaches_every_waiter(self):
+        """Test a failing load raises for all waiters and is not cached."""
+        async def loader(tenant_id, db):
+            await asyncio.sleep(0)
+            raise ConnectionError("database unavailable")
+
+        cache = EntitlementCache(loader)
+        tenant_id = uuid4()
+        results = await asyncio.gather(
+            cache.get(tenant_id), cache.get(tenant_id), return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert cache.peek(tenant_id) is None
+
+    def test_unknown_tenant_cached_briefly(self):
+        """Test a missing tenant is cached with the shorter negative TTL."""
+        known, unknown = uuid4(), uuid4()
+        cache, _ = _cache()
+        cache._store(known, SimpleNamespace(exists=True))
+        cache._store(unknown, SimpleNamespace(exists=False))
+
+        now = time.monotonic()
+        assert cache._entries[unknown][0] - now <= EntitlementCache.NEGATIVE_TTL * 1.1
+        assert cache._entries[known][0] - now >= EntitlementCache.TTL * 0.9
+
+    async def test_lru_eviction(self, monkeypatch):
+        """Test the least recently used tenant is evicted past MAX_ENTRIES."""
+        monkeypatch.setattr(EntitlementCache, "MAX_ENTRIES", 2)
+        cache, _ = _cache()
+        a, b, c = uuid4(), uuid4(), uuid4()
+
+        await cache.get(a)
+        await cache.get(b)
+        cache.peek(a)  # a is now most recent
+        await cache.get(c)
+
+        assert cache.peek(b) is None
+        assert cache.peek(a) is not None
+        assert len(cache) == 2
+
+    async def test_invalidation_during_load_is_not_cached(self):
+        """Test a value loaded across an invalidation is returned, not stored."""
+        tenant_id = uuid4()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def loader(tid, db):
+            started.set()
+            await release.wait()
+            return SimpleNamespace(exists=True)
+
+        cache = EntitlementCache(loader)
+        pending = asyncio.ensure_future(cache.get(tenant_id))
+        await started.wait()
+        cache.invalidate(tenant_id, broadcast=False)
+        release.set()
+
+        assert (await pending).exists
+        assert cache.peek(tenant_id) is None
+
+    def test_invalidation_messages(self):
+        """Test subscriber payloads drop one tenant or everything."""
+        cache, _ = _cache()
+        a, b = uuid4(), uuid4()
+        cache._store(a, SimpleNamespace(exists=True))
+        cache._store(b, SimpleNamespace(exists=True))
+
+        cache._apply(str(a))
+        assert cache.peek(a) is None and cache.peek(b) is not None
+
+        cache._apply("not-a-uuid")
+        assert len(cache) == 1
+
+        cache._apply("*")
+        assert len(cache) == 0
+
+
+class TestPlanInfoFreshness:
+    """Test plan info is not served stale after failures or status changes."""
+
+    async def test_failed_read_cached_briefly(self, monkeypatch):
+        """Test the FREE fallback for a failed read expires after NEGATIVE_TTL."""
+        enforcement = PlanEnforcement()
+
+        async def failing_query(tenant_id, db):
+            raise ConnectionError("database unavailable")
+
+        monkeypatch.setattr(enforcement, "_query_plan_info", failing_query)
+        tenant_id = uuid4()
+
+        info = await enforcement.get_plan_info(tenant_id, db=object())
+
+        assert info.tier == PlanTier.FREE
+        expires_at = enforcement._plan_cache._entries[tenant_id][0]
+        assert expires_at - time.monotonic() <= EntitlementCache.NEGATIVE_TTL * 1.1
+
+    @pytest.mark.parametrize("method", ["activate", "suspend"])
+    async def test_status_change_invalidates(self, monkeypatch, method):
+        """Test activating or suspending a tenant drops its cached plan info."""
+        invalidated = []
+        tenant = SimpleNamespace(status=None)
+
+        class Session:
+            async def commit(self):
+                assert invalidated == []
+
+        service = TenantService(Session())
+
+        async def get_by_id(tenant_id):
+            return tenant
+
+        monkeypatch.setattr(service, "get_by_id", get_by_id)
+        monkeypatch.setattr(tenant_service, "invalidate_entitlements", invalidated.append)
+        tenant_id = uuid4()
+
+        await getattr(service, method)(tenant_id)
+
+        assert invalidated == [tenant_id]
@@ -0,0 +1,118 @@
+"""
+CUSTOS Ranged File Response Tests
+"""
+
+import pytest
+from starlette.requests import Request
+
+from app.platform.files.responses import _etag_matches, parse_range, ranged_file_response
+
+
+def _request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/files/download",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    })
+
+
+async def _body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+class TestParseRange:
+    """Test single byte-range parsing."""
+
+    def test_no_header_means_whole_file(self):
+        """Test missing or non-byte ranges serve the whole file."""
+        assert parse_range(None, 100) is None
+        assert parse_range("items=0-5", 100) is None
+
+    def test_bounded_range(self):
+        """Test an explicit range is inclusive."""
+        assert parse_range("bytes=10-19", 100) == (10, 19)
+
+    def test_open_ended_range(self):
+        """Test "start-" runs to the end of the file."""
+        assert parse_range("bytes=90-", 100) == (90, 99)
+
+    def test_suffix_range(self):
+        """Test "-N" is the last N bytes (clamped to the file)."""
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=-500", 100) == (0, 99)
+
+    def test_end_clamped_to_size(self):
+        """Test an end past the file is clamped."""
+        assert parse_range("bytes=50-1000", 100) == (50, 99)
+
+    def test_multi_range_serves_whole_file(self):
+        """Test multi-range requests fall back to the whole file."""
+        assert parse_range("bytes=0-1,5-6", 100) is None
+
+    @pytest.mark.parametrize("header", [
+        "bytes=100-",     # Starts past the end
+        "bytes=20-10",    # Reversed
+        "bytes=-0",       # Empty suffix
+        "bytes=a-b",      # Not numbers
+        "bytes=-",
+    ])
+    def test_unsatisfiable(self, header):
+        """Test invalid or unsatisfiable ranges raise ValueError (416)."""
+        with pytest.raises(ValueError):
+            parse_range(header, 100)
+
+
+class TestEtagMatches:
+    """Test If-None-Match comparison."""
+
+    def test_exact_and_weak_match(self):
+        """Test strong and weak validators both match (weak comparison)."""
+        assert _etag_matches('"abc"', "abc")
+        assert _etag_matches('W/"abc"', "abc")
+
+    def test_list_and_wildcard(self):
+        """Test any listed tag, or *, matches."""
+        assert _etag_matches('"x", "abc"', "abc")
+        assert _etag_matches("*", "abc")
+
+    def test_no_match(self):
+        """Test a missing header or other tags do not match."""
+        assert not _etag_matches(None, "abc")
+        assert not _etag_matches('"abcd"', "abc")
+
+
+class TestRangedFileResponse:
+    """Test conditional and partial downloads."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / "file.bin"
+        path.write_bytes(bytes(range(100)))
+        return path
+
+    def test_not_modified(self, path):
+        """Test a matching If-None-Match is answered with 304."""
+        response = ranged_file_response(_request(if_none_match='"hash"'), path, etag="hash")
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"hash"'
+
+    async def test_partial_content(self, path):
+        """Test a Range is answered with exactly those bytes."""
+        response = ranged_file_response(_request(range="bytes=10-19"), path, etag="hash")
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 10-19/100"
+        assert await _body(response) == bytes(range(10, 20))
+
+    def test_unsatisfiable_range(self, path):
+        """Test an unsatisfiable Range is answered with 416."""
+        response = ranged_file_response(_request(range="bytes=500-"), path, etag="hash")
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */100"
+
+    def test_stale_if_range_gets_whole_file(self, path):
+        """Test If-Range with another validator ignores the Range."""
+        response = ranged_file_response(
+            _request(range="bytes=10-19", if_range='"old"'), path, etag="hash",
+        )
+        assert response.status_code == 200
@@ -0,0 +1,138 @@
+"""
+CUSTOS File Upload Tests
+"""
+
+import hashlib
+import io
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.exceptions import ValidationError
+from app.platform.files import service as file_service
+from app.platform.files.service import FileService, _on_commit, save_upload
+
+
+def _upload(data: bytes, size=None) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="notes.txt", size=size)
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class TestSaveUpload:
+    """Test uploads are streamed, hashed and size-checked."""
+
+    async def test_size_and_hash(self, tmp_path, monkeypatch):
+        """Test the returned size and SHA-256 match the content across chunks."""
+        monkeypatch.setattr(file_service, "UPLOAD_CHUNK_SIZE", 7)
+        data = b"custos " * 100
+        target = tmp_path / "in" / "file.txt"
+
+        size, digest = await save_upload(_upload(data), target, max_size=10_000)
+
+        assert size == len(data)
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert target.read_bytes() == data
+
+    async def test_oversized_stream_removes_partial_file(self, tmp_path, monkeypatch):
+        """Test a stream crossing the limit is rejected and its file removed."""
+        monkeypatch.setattr(file_service, "UPLOAD_CHUNK_SIZE", 4)
+        target = tmp_path / "file.txt"
+
+        with pytest.raises(ValidationError):
+            await save_upload(_upload(b"x" * 64), target, max_size=16)
+        assert not target.exists()
+
+    async def test_declared_size_rejected_up_front(self, tmp_path):
+        """Test a known multipart size over the limit is rejected before writing."""
+        target = tmp_path / "file.txt"
+        with pytest.raises(ValidationError):
+            await save_upload(_upload(b"x", size=1_000), target, max_size=16)
+        assert not target.exists()
+
+
+class TestFileOpsOnCommit:
+    """Test files are moved or removed only once the session commits."""
+
+    def test_move_applied_on_commit(self, tmp_path):
+        """Test a queued move happens in after_commit."""
+        session = SimpleNamespace(info={})
+        incoming = tmp_path / ".incoming" / "a.txt"
+        incoming.parent.mkdir()
+        incoming.write_bytes(b"data")
+        target = tmp_path / "objects" / "ab" / "a.txt"
+
+        _on_commit(session, incoming, target)
+        assert not target.exists()
+        file_service._apply_file_ops(session)
+
+        assert target.read_bytes() == b"data"
+        assert not incoming.exists()
+        assert session.info == {}
+
+    def test_rollback_drops_incoming_and_keeps_existing(self, tmp_path):
+        """Test a rollback removes uncommitted uploads but no stored file."""
+        session = SimpleNamespace(info={})
+        incoming = tmp_path / "incoming.txt"
+        incoming.write_bytes(b"new")
+        stored = tmp_path / "stored.txt"
+        stored.write_bytes(b"old")
+
+        _on_commit(session, incoming, tmp_path / "target.txt")
+        _on_commit(session, stored)
+        file_service._discard_file_ops(session)
+
+        assert not incoming.exists()
+        assert stored.exists()
+        assert not (tmp_path / "target.txt").exists()
+
+
+class TestDeleteUpload:
+    """Test deletes release exactly one reference."""
+
+    async def test_repeated_delete_is_noop(self):
+        """Test an already deleted upload releases nothing."""
+        released = []
+
+        class _Session:
+            info = {}
+
+            async def execute(self, statement):
+                return _Result(None)  # The guarded UPDATE matched no live upload
+
+        service = FileService(_Session(), uuid4())
+
+        async def release(stored_file_id):
+            released.append(stored_file_id)
+
+        service._release = release
+        assert await service.delete_upload(uuid4()) is False
+        assert released == []
+
+    async def test_delete_releases_its_stored_file(self):
+        """Test a live upload releases the stored file it references."""
+        stored_file_id = uuid4()
+        released = []
+
+        class _Session:
+            info = {}
+
+            async def execute(self, statement):
+                return _Result(stored_file_id)
+
+        service = FileService(_Session(), uuid4())
+
+        async def release(released_id):
+            released.append(released_id)
+
+        service._release = release
+        assert await service.delete_upload(uuid4()) is True
+        assert released == [stored_file_id]
@@ -0,0 +1,158 @@
+"""
+CUSTOS Governance Partition Tests
+"""
+
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.core.jobs import runner as runner_module
+from app.core.jobs.runner import JobRunner, register_periodic
+from app.governance.partitions import (
+    GovernancePartitionManager,
+    _add_months,
+    month_bounds,
+    partition_month,
+    partition_name,
+)
+from app.governance.service import GovernanceService
+
+
+class _Result:
+    def __init__(self, value=None):
+        self.value = value
+        self.rowcount = 3
+
+    def scalar(self):
+        return self.value
+
+
+class _RecordingSession:
+    """Records executed SQL; EXISTS checks answer `default_has_rows`."""
+
+    def __init__(self, default_has_rows: bool):
+        self.default_has_rows = default_has_rows
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        return _Result(self.default_has_rows if sql.startswith("SELECT EXISTS") else None)
+
+
+class TestPartitionNames:
+    """Test monthly partition naming and bounds."""
+
+    def test_name_round_trip(self):
+        """Test partition_month parses what partition_name builds."""
+        name = partition_name("governance_audit_logs", date(2026, 3, 1))
+        assert name == "governance_audit_logs_y2026m03"
+        assert partition_month(name) == date(2026, 3, 1)
+
+    def test_default_partition_has_no_month(self):
+        """Test the catch-all partition is not a monthly one."""
+        assert partition_month("governance_audit_logs_default") is None
+        assert partition_month("governance_audit_logs_y2026m03_archived") is None
+
+    def test_month_bounds_cross_year(self):
+        """Test December ends on the next January 1st."""
+        assert month_bounds(date(2026, 12, 15)) == (date(2026, 12, 1), date(2027, 1, 1))
+
+    def test_add_months_backwards(self):
+        """Test negative offsets (retention cutoff) wrap years."""
+        assert _add_months(date(2026, 2, 1), -3) == date(2025, 11, 1)
+
+
+class TestCreatePartition:
+    """Test rows in the default partition are moved before attaching."""
+
+    async def test_plain_create_without_default_rows(self):
+        """Test an empty range is created directly as a partition."""
+        session = _RecordingSession(default_has_rows=False)
+        manager = GovernancePartitionManager(session)
+        await manager._create_partition(
+            "governance_audit_logs", "governance_audit_logs_y2026m11",
+            date(2026, 11, 1), date(2026, 12, 1),
+        )
+
+        assert len(session.statements) == 2
+        assert "PARTITION OF" in session.statements[1]
+
+    async def test_default_rows_moved_then_attached(self):
+        """Test rows are moved out of the default partition before ATTACH."""
+        session = _RecordingSession(default_has_rows=True)
+        manager = GovernancePartitionManager(session)
+        await manager._create_partition(
+            "governance_audit_logs", "governance_audit_logs_y2026m11",
+            date(2026, 11, 1), date(2026, 12, 1),
+        )
+
+        create, move, attach = session.statements[1:]
+        assert "LIKE \"governance_audit_logs\"" in create
+        assert "DELETE FROM \"governance_audit_logs_default\"" in move
+        assert "INSERT INTO \"governance_audit_logs_y2026m11\"" in move
+        assert attach.startswith('ALTER TABLE "governance_audit_logs" ATTACH PARTITION')
+
+
+class TestAuditCursor:
+    """Test keyset pagination cursors."""
+
+    def test_round_trip(self):
+        """Test decode_cursor returns what encode_cursor was given."""
+        timestamp = datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc)
+        log_id = uuid4()
+        cursor = GovernanceService.encode_cursor(timestamp, log_id)
+        assert GovernanceService.decode_cursor(cursor) == (timestamp, log_id)
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is a validation error."""
+        with pytest.raises(ValidationError):
+            GovernanceService.decode_cursor("not-a-cursor")
+
+
+class TestPeriodicTasks:
+    """Test the runner's periodic maintenance hook."""
+
+    async def test_runs_once_interval_has_passed(self, monkeypatch):
+        """Test a task is not due on the first check, then runs per interval."""
+        monkeypatch.setattr(runner_module, "_PERIODIC_TASKS", {})
+        calls = []
+
+        @register_periodic("test_task", interval_seconds=100)
+        async def task():
+            calls.append(1)
+
+        runner = JobRunner()
+        await runner._run_due_periodic(now=0)
+        await runner._run_due_periodic(now=50)
+        assert calls == []
+        await runner._run_due_periodic(now=100)
+        await runner._run_due_periodic(now=150)
+        assert calls == [1]
+
+    async def test_failure_does_not_stop_other_tasks(self, monkeypatch):
+        """Test one failing task is logged and the others still run."""
+        monkeypatch.setattr(runner_module, "_PERIODIC_TASKS", {})
+        calls = []
+
+        @register_periodic("failing", interval_seconds=1)
+        async def failing():
+            raise RuntimeError("database down")
+
+        @register_periodic("working", interval_seconds=1)
+        async def working():
+            calls.append(1)
+
+        runner = JobRunner()
+        await runner._run_due_periodic(now=0)
+        await runner._run_due_periodic(now=1)
+        assert calls == [1]
+
+    def test_partition_maintenance_is_registered(self):
+        """Test governance registers its daily partition maintenance."""
+        import app.governance.jobs  # noqa: F401
+
+        interval, _ = runner_module._PERIODIC_TASKS["governance_partition_maintenance"]
+        assert interval == 24 * 3600
@@ -0,0 +1,180 @@
+"""
+CUSTOS Job Runner Tests
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import app.core.database as database
+from app.core.jobs import runner as runner_module
+from app.core.jobs.backends import ClaimedJob, JobQueueBackend, PostgresJobBackend
+from app.core.jobs.policies import TaskQueues
+from app.core.jobs.runner import JobRunner
+
+
+class _Backend(JobQueueBackend):
+    """Hands out queued jobs and records what the runner reports back."""
+
+    def __init__(self, jobs=()):
+        self.jobs = list(jobs)
+        self.completed = []
+        self.released = []
+
+    async def claim(self, queues, limit, worker_id, visibility_seconds):
+        claimed, self.jobs = self.jobs[:limit], self.jobs[limit:]
+        return claimed
+
+    async def complete(self, job_id, worker_id, error=None):
+        self.completed.append((job_id, error))
+
+    async def release(self, job_id, worker_id):
+        self.released.append(job_id)
+
+
+class _Session:
+    def __init__(self):
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def all(self):
+        return []
+
+    async def commit(self):
+        pass
+
+
+def _job(**overrides) -> ClaimedJob:
+    values = dict(
+        id=str(uuid4()), tenant_id=uuid4(), job_class="TestJob", job_key="test:1",
+        params={"value": 3}, attempts=1, max_attempts=3,
+    )
+    values.update(overrides)
+    return ClaimedJob(**values)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Short-lived sessions opened by the runner and backends."""
+    session = _Session()
+    monkeypatch.setattr(database, "AsyncSessionLocal", lambda: session)
+    return session
+
+
+@pytest.fixture
+def job_class(monkeypatch):
+    """Register a job class whose run() behaviour is set per test."""
+    class TestJob:
+        outcome = {"status": "completed"}
+        started = None
+
+        def __init__(self, tenant_id, value):
+            self.value = value
+
+        def set_context(self, actor_user_id=None, request_id=None):
+            pass
+
+        async def run(self, session):
+            if TestJob.started:
+                TestJob.started.set()
+            if isinstance(TestJob.outcome, BaseException):
+                raise TestJob.outcome
+            if TestJob.outcome == "hang":
+                await asyncio.sleep(3600)
+            return TestJob.outcome
+
+    monkeypatch.setattr(
+        runner_module, "get_job_class", lambda name: TestJob if name == "TestJob" else None,
+    )
+    return TestJob
+
+
+class TestClaiming:
+    """Test lanes, slots and the SKIP LOCKED claim."""
+
+    def test_lanes_in_priority_order(self):
+        """Test a runner claims its lanes highest priority first."""
+        runner = JobRunner(queues=[TaskQueues.LOW, TaskQueues.HIGH, TaskQueues.DEFAULT])
+        assert runner.queues == [TaskQueues.HIGH, TaskQueues.DEFAULT, TaskQueues.LOW]
+
+    async def test_claim_fills_free_slots_across_backends(self, monkeypatch):
+        """Test claims stop at the free slot count, taking from each backend in turn."""
+        first, second = _Backend([_job()]), _Backend([_job(), _job(), _job()])
+
+        async def backends():
+            return [first, second]
+
+        monkeypatch.setattr(runner_module, "active_backends", backends)
+        runner = JobRunner(concurrency=3)
+        spawned = []
+        runner._spawn = lambda job, backend: spawned.append(backend)
+
+        assert await runner._claim(3) == 3
+        assert spawned == [first, second, second]
+        assert len(second.jobs) == 1
+
+    async def test_postgres_claim_skips_locked_rows(self, session):
+        """Test the Postgres claim leases ready rows with FOR UPDATE SKIP LOCKED."""
+        await PostgresJobBackend().claim([TaskQueues.DEFAULT], 5, "worker-1", 60)
+
+        sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert sql.startswith("UPDATE job_queue")
+
+
+class TestExecution:
+    """Test how claimed jobs finish, fail or go back to the queue."""
+
+    async def test_completed_job(self, session, job_class):
+        """Test a successful run completes the queue entry without error."""
+        backend, job = _Backend(), _job()
+        await JobRunner()._execute(job, backend)
+        assert backend.completed == [(job.id, None)]
+
+    async def test_job_error_recorded(self, session, job_class):
+        """Test an error result or a crash completes the entry with the error."""
+        backend = _Backend()
+        job_class.outcome = {"status": "failed", "error": "bad input"}
+        await JobRunner()._execute(_job(), backend)
+
+        job_class.outcome = RuntimeError("boom")
+        await JobRunner()._execute(_job(), backend)
+
+        assert [error for _, error in backend.completed] == ["bad input", "boom"]
+
+    async def test_exhausted_and_unknown_jobs(self, session, job_class):
+        """Test over-claimed and unregistered jobs are finished, not run."""
+        backend = _Backend()
+        await JobRunner()._execute(_job(attempts=4, max_attempts=3), backend)
+        await JobRunner()._execute(_job(job_class="Missing"), backend)
+
+        errors = [error for _, error in backend.completed]
+        assert errors[0].startswith("Abandoned after 3 attempts")
+        assert errors[1] == "Unknown job class: Missing"
+
+    async def test_stop_requeues_unfinished_jobs(self, session, job_class):
+        """Test shutdown returns jobs still running after the grace period."""
+        job_class.outcome = "hang"
+        job_class.started = asyncio.Event()
+        backend, job = _Backend(), _job()
+        runner = JobRunner()
+        runner.SHUTDOWN_GRACE_SECONDS = 0.01
+
+        runner._spawn(job, backend)
+        await job_class.started.wait()
+        await runner.stop()
+
+        assert backend.released == [job.id]
+        assert backend.completed == []
+        assert runner._running == {}
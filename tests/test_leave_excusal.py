@@ -0,0 +1,137 @@
+"""
+CUSTOS Leave Excusal Tests
+"""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Insert, Update
+
+from app.attendance import service as attendance_service
+from app.attendance.models import AttendanceStatus
+from app.attendance.rollups import AttendanceRollup
+from app.attendance.service import AttendanceService
+
+
+class _Result:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return self
+
+
+class _Session:
+    """Returns queued results in order and records every statement."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self.results.pop(0) if self.results else _Result()
+
+
+def _leave(start: date, end: date):
+    return SimpleNamespace(
+        id=uuid4(), student_id=uuid4(), start_date=start, end_date=end, reason="Family trip",
+    )
+
+
+def _recording_rollup(monkeypatch):
+    """Swap in a rollup that keeps itself for inspection instead of flushing."""
+    rollups = []
+
+    class _Rollup(AttendanceRollup):
+        def __init__(self, session, tenant_id):
+            super().__init__(session, tenant_id)
+            rollups.append(self)
+
+        async def flush(self):
+            pass
+
+    monkeypatch.setattr(attendance_service, "AttendanceRollup", _Rollup)
+    return rollups
+
+
+class TestLeaveExcusal:
+    """Test approved leave is excused with set-based statements."""
+
+    async def test_range_is_one_update(self, monkeypatch):
+        """Test a multi-day leave issues one UPDATE and records every change."""
+        rollups = _recording_rollup(monkeypatch)
+        klass = uuid4()
+        start = date(2026, 9, 1)
+        session = _Session(_Result([
+            (klass, None, start, AttendanceStatus.ABSENT),
+            (klass, None, start + timedelta(days=1), AttendanceStatus.PRESENT),
+        ]))
+        leave = _leave(start, start + timedelta(days=9))
+
+        await AttendanceService(session, uuid4())._mark_leave_period_as_excused(leave)
+
+        assert len(session.statements) == 1
+        assert isinstance(session.statements[0], Update)
+        assert "BETWEEN" in str(session.statements[0].compile(dialect=postgresql.dialect()))
+        summary = rollups[0]._summary_deltas[(leave.student_id, 2026, 9)]
+        assert summary["excused_days"] == 2
+        assert summary["absent_days"] == -1
+        assert summary["present_days"] == -1
+
+    async def test_past_leave_precreates_nothing(self, monkeypatch):
+        """Test a leave that already ended only updates existing records."""
+        _recording_rollup(monkeypatch)
+        session = _Session(_Result())
+        leave = _leave(date(2026, 9, 1), date(2026, 9, 3))
+
+        await AttendanceService(session, uuid4())._mark_leave_period_as_excused(
+            leave, precreate_future=True,
+        )
+
+        assert len(session.statements) == 1
+
+    async def test_future_days_precreated_in_one_insert(self, monkeypatch):
+        """Test upcoming working days get EXCUSED rows in a single INSERT."""
+        rollups = _recording_rollup(monkeypatch)
+        klass, section = uuid4(), uuid4()
+        start = date.today() + timedelta(days=1)
+        holiday = start + timedelta(days=1)
+        session = _Session(
+            _Result(),                           # UPDATE: nothing marked yet
+            _Result([(klass, section)]),         # Latest class/section
+            _Result([holiday]),                  # Non-working days
+            _Result([start, start + timedelta(days=2)]),  # Inserted dates
+        )
+        leave = _leave(start, start + timedelta(days=2))
+
+        await AttendanceService(session, uuid4())._mark_leave_period_as_excused(
+            leave, precreate_future=True,
+        )
+
+        insert = session.statements[-1]
+        assert isinstance(insert, Insert)
+        params = insert.compile(dialect=postgresql.dialect()).params
+        assert len([key for key in params if key.startswith("attendance_date")]) == 2
+        assert holiday not in params.values()
+        assert len(rollups[0]._class_deltas) == 2
+
+    async def test_excuse_teacher_attendance(self):
+        """Test staff leave excuses the range with one UPDATE."""
+        session = _Session(_Result(rowcount=3))
+
+        updated = await AttendanceService(session, uuid4()).excuse_teacher_attendance(
+            uuid4(), date(2026, 9, 1), date(2026, 9, 5), remarks="Leave approved: Medical",
+        )
+
+        assert updated == 3
+        assert isinstance(session.statements[0], Update)
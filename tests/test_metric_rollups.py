@@ -0,0 +1,216 @@
+"""
+CUSTOS Metric Rollup Tests
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.platform.observability import rollups
+from app.platform.observability import router as observability_router
+from app.platform.observability.metrics import (
+    PLATFORM_TENANT_ID,
+    LatencyHistogram,
+    MetricsCollector,
+)
+from app.platform.observability.rollups import (
+    RESOLUTIONS,
+    ClusterMetricsView,
+    MetricRollupWriter,
+    _to_metrics,
+    get_metrics_view,
+    get_series_by_tenant,
+    series_trend,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_collector(monkeypatch):
+    """MetricsCollector is a singleton; give each test its own instance."""
+    monkeypatch.setattr(MetricsCollector, "_instance", None)
+
+
+def _writer(collector: MetricsCollector) -> MetricRollupWriter:
+    """A writer whose upserts are recorded instead of hitting the database."""
+    writer = MetricRollupWriter(collector)
+    writer.upserted = []
+
+    async def upsert(buckets):
+        writer.upserted.append(buckets)
+
+    writer._upsert = upsert
+    return writer
+
+
+class TestRollupFlush:
+    """Test only new increments are written, at every resolution."""
+
+    async def test_first_flush_writes_every_resolution(self):
+        """Test a window's counts go to tenant and platform buckets per resolution."""
+        collector, tenant_id = MetricsCollector(), uuid4()
+        collector.record_request(tenant_id, "/api/v1/students", 12.0)
+        writer = _writer(collector)
+
+        assert await writer.flush() == 2 * len(RESOLUTIONS)
+
+        buckets = writer.upserted[0]
+        assert {owner for owner, _, _ in buckets} == {tenant_id, PLATFORM_TENANT_ID}
+        assert {resolution for _, resolution, _ in buckets} == set(RESOLUTIONS)
+        assert all(metrics.request_count == 1 for metrics in buckets.values())
+
+    async def test_repeat_flush_writes_only_deltas(self):
+        """Test an unchanged window writes nothing and new requests write their delta."""
+        collector, tenant_id = MetricsCollector(), uuid4()
+        collector.record_request(tenant_id, "/a", 5.0)
+        writer = _writer(collector)
+        await writer.flush()
+
+        assert await writer.flush() == 0
+
+        collector.record_request(tenant_id, "/a", 7.0, is_error=True)
+        await writer.flush()
+        (delta,) = [m for (owner, res, _), m in writer.upserted[-1].items()
+                    if owner == tenant_id and res == "5m"]
+        assert delta.request_count == 1
+        assert delta.error_count == 1
+        assert delta.response_times.count == 1
+
+    async def test_failed_flush_retries_accumulated_delta(self):
+        """Test increments from a failed flush are written by the next one."""
+        collector, tenant_id = MetricsCollector(), uuid4()
+        collector.record_request(tenant_id, "/a", 5.0)
+        writer = _writer(collector)
+        recording = writer._upsert
+
+        async def failing(buckets):
+            raise ConnectionError("database unavailable")
+
+        writer._upsert = failing
+        assert await writer.flush() == 0
+
+        collector.record_request(tenant_id, "/a", 5.0)
+        writer._upsert = recording
+        await writer.flush()
+        totals = [m.request_count for (owner, res, _), m in writer.upserted[0].items()
+                  if owner == tenant_id and res == "1d"]
+        assert totals == [2]
+
+
+class TestRollupReading:
+    """Test rollup rows are read back as metrics."""
+
+    def test_row_to_metrics(self):
+        """Test counters and histogram buckets are rebuilt from a row."""
+        histogram = LatencyHistogram()
+        for value in (10.0, 20.0, 400.0):
+            histogram.record(value)
+        row = SimpleNamespace(
+            tenant_id=uuid4(),
+            bucket_start=datetime(2026, 10, 18, 9, tzinfo=timezone.utc),
+            updated_at=None,
+            latency_buckets=list(histogram.counts),
+            latency_sum_ms=histogram.total,
+            latency_max_ms=histogram.max,
+            **{name: 0 for name in rollups.COUNTER_COLUMNS},
+        )
+        row.request_count = 3
+
+        metrics = _to_metrics(row)
+
+        assert metrics.request_count == 3
+        assert metrics.response_times.count == 3
+        assert metrics.response_times.percentile(1.0) == 400.0
+        assert metrics.last_updated == row.bucket_start
+
+    def test_series_trend(self):
+        """Test the relative change between the halves of a series."""
+        series = [{"counters": {"requests": value}} for value in (10, 10, 15, 15)]
+        assert series_trend(series, ("counters", "requests")) == 0.5
+        assert series_trend(series[:1], ("counters", "requests")) is None
+        zeros = [{"counters": {"requests": 0}}] * 2
+        assert series_trend(zeros, ("counters", "requests")) is None
+
+    def test_view_falls_back_to_local_collector(self, monkeypatch):
+        """Test a missing or stale cluster view serves this worker's collector."""
+        writer = MetricRollupWriter()
+        monkeypatch.setattr(rollups, "metrics_rollup", writer)
+        assert isinstance(get_metrics_view(), MetricsCollector)
+
+        view = ClusterMetricsView(datetime.now(timezone.utc), {}, SimpleNamespace())
+        writer._view = view
+        assert get_metrics_view() is view
+
+        view.built_at -= 3 * writer.FLUSH_INTERVAL_SECONDS
+        assert writer.view() is None
+
+    async def test_unknown_resolution(self):
+        """Test series reads reject resolutions that are not stored."""
+        with pytest.raises(ValueError):
+            await rollups.get_series(session=None, resolution="1w")
+
+
+def _rollup_row(tenant_id, hour: int, errors: int) -> SimpleNamespace:
+    row = SimpleNamespace(
+        tenant_id=tenant_id,
+        bucket_start=datetime(2026, 10, 18, hour, tzinfo=timezone.utc),
+        updated_at=None,
+        latency_buckets=[],
+        latency_sum_ms=0.0,
+        latency_max_ms=0.0,
+        **{name: 0 for name in rollups.COUNTER_COLUMNS},
+    )
+    row.request_count = 100
+    row.error_count = errors
+    return row
+
+
+class _Session:
+    """Returns the given rollup rows for every query, recording statements."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.rows))
+
+
+class TestTenantsAtRisk:
+    """Test flagged tenants' trends are read in one grouped query."""
+
+    async def test_series_by_tenant_one_query(self):
+        """Test every tenant's series comes from a single IN query."""
+        a, b, idle = uuid4(), uuid4(), uuid4()
+        session = _Session([_rollup_row(a, 8, 1), _rollup_row(a, 9, 2), _rollup_row(b, 9, 0)])
+
+        series = await get_series_by_tenant(session, [a, b, idle])
+
+        assert [len(series[a]), len(series[b]), series[idle]] == [2, 1, []]
+        assert len(session.statements) == 1
+        sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+        assert "platform_metric_rollups.tenant_id IN" in sql
+        assert "ORDER BY platform_metric_rollups.tenant_id, platform_metric_rollups.bucket_start" in sql
+        assert await get_series_by_tenant(_Session([]), []) == {}
+
+    async def test_endpoint_reads_series_once(self, monkeypatch):
+        """Test the endpoint flags rising errors with one rollup query for all tenants."""
+        rising, quiet = uuid4(), uuid4()
+        tenants = [
+            {"tenant_id": str(rising), "counters": {"requests": 500}},
+            {"tenant_id": str(quiet), "counters": {"requests": 5}},
+        ]
+        monkeypatch.setattr(
+            observability_router, "get_metrics_view",
+            lambda: SimpleNamespace(get_all_tenant_metrics=lambda: tenants),
+        )
+        session = _Session([_rollup_row(rising, 8, 1), _rollup_row(rising, 9, 4)])
+
+        response = await observability_router.get_tenants_at_risk(admin=None, db=session)
+
+        assert len(session.statements) == 1
+        assert [t["tenant_id"] for t in response["tenants_at_risk"]] == [str(rising)]
+        assert response["tenants_at_risk"][0]["risks"] == ["rising_errors"]
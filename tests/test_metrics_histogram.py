@@ -0,0 +1,97 @@
+"""
+CUSTOS Metrics Histogram Tests
+"""
+
+import random
+from uuid import uuid4
+
+import pytest
+
+from app.platform.observability.metrics import LatencyHistogram, MetricsReader, TenantMetrics
+
+
+def _histogram(values) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+class TestLatencyHistogram:
+    """Test log-bucketed latency percentiles."""
+
+    def test_percentiles_within_bucket_error(self):
+        """Test p50/p95/p99 are within ~5% of the exact values."""
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(4, 1) for _ in range(20000))
+        histogram = _histogram(values)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            assert histogram.percentile(q) == pytest.approx(exact, rel=0.06)
+
+    def test_empty_and_max(self):
+        """Test an empty histogram reads 0 and p100 is the recorded max."""
+        assert LatencyHistogram().percentile(0.99) == 0.0
+        histogram = _histogram([1.0, 2.0, 250.0])
+        assert histogram.percentile(1.0) == 250.0
+        assert histogram.mean == pytest.approx(253.0 / 3)
+
+    def test_tiny_and_huge_values(self):
+        """Test values below MIN_MS and past the last bucket are still counted."""
+        histogram = _histogram([0.01, 10 ** 9])
+        assert histogram.counts[0] == 1
+        assert histogram.counts[LatencyHistogram.BUCKETS - 1] == 1
+        assert len(histogram) == 2
+
+    def test_merge_equals_recording_together(self):
+        """Test merged histograms match one histogram of all values."""
+        a, b = [1.0, 5.0, 30.0], [2.0, 400.0]
+        merged = _histogram(a)
+        merged.merge(_histogram(b))
+        together = _histogram(a + b)
+
+        assert list(merged.counts) == list(together.counts)
+        assert merged.count == 5
+        assert merged.max == 400.0
+
+    def test_subtract_leaves_delta(self):
+        """Test subtracting an earlier snapshot leaves only newer samples."""
+        histogram = _histogram([1.0, 5.0])
+        earlier = LatencyHistogram.from_counts(list(histogram.counts), histogram.total, histogram.max)
+        histogram.record(80.0)
+        histogram.subtract(earlier)
+
+        assert histogram.count == 1
+        assert histogram.total == pytest.approx(80.0)
+        assert list(histogram.counts) == list(_histogram([80.0]).counts)
+
+    def test_from_counts_round_trip(self):
+        """Test stored bucket counts rebuild the same percentiles."""
+        histogram = _histogram([3.0, 9.0, 27.0, 81.0])
+        rebuilt = LatencyHistogram.from_counts(list(histogram.counts), histogram.total, histogram.max)
+        assert rebuilt.count == 4
+        assert rebuilt.percentile(0.5) == histogram.percentile(0.5)
+
+
+class TestTenantMetrics:
+    """Test per-tenant window arithmetic."""
+
+    def test_subtract_leaves_delta(self):
+        """Test counters and per-key stats subtract to the delta."""
+        tenant_id = uuid4()
+        now = TenantMetrics(tenant_id=tenant_id, request_count=5)
+        now.feature_calls["ai"] = 3
+        earlier = TenantMetrics(tenant_id=tenant_id, request_count=2)
+        earlier.feature_calls["ai"] = 1
+        earlier.feature_calls["ocr"] = 1
+
+        now.subtract(earlier)
+
+        assert now.request_count == 3
+        assert now.feature_calls == {"ai": 2, "ocr": -1}
+
+    def test_reader_is_abstract(self):
+        """Test MetricsReader cannot be used without its data methods."""
+        with pytest.raises(TypeError):
+            MetricsReader()
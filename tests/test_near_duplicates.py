@@ -0,0 +1,172 @@
+"""
+CUSTOS Near-Duplicate Index Tests
+"""
+
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import app.core.database as database
+from app.academics.models.questions import Question
+from app.ai import near_duplicates
+from app.ai.jobs import question_signature_backfill
+from app.ai.near_duplicates import (
+    BANDS,
+    NUM_PERM,
+    NearDuplicateIndex,
+    backfill_signatures,
+    band_keys,
+    jaccard,
+    minhash,
+    signatures,
+    word_set,
+)
+
+
+def _estimate(a: str, b: str) -> float:
+    """Jaccard estimate from the fraction of equal MinHash values."""
+    sig_a, sig_b = minhash(word_set(a)), minhash(word_set(b))
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+class TestSignatures:
+    """Test MinHash signatures and LSH band keys."""
+
+    def test_word_set_normalizes(self):
+        """Test case, punctuation and spacing do not change the word set."""
+        assert word_set("What is  the Area, of a circle?") == word_set("what is the area of a CIRCLE")
+
+    def test_jaccard(self):
+        """Test exact Jaccard similarity of word sets."""
+        assert jaccard({"a", "b"}, {"a", "b"}) == 1.0
+        assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+        assert jaccard(set(), {"a"}) == 0.0
+
+    def test_minhash_is_deterministic(self):
+        """Test signatures are stable (they are stored and compared later)."""
+        words = word_set("find the derivative of x squared")
+        assert minhash(words) == minhash(set(words))
+        assert len(minhash(words)) == NUM_PERM
+        assert minhash(set()) == []
+
+    def test_minhash_estimates_jaccard(self):
+        """Test the equal-value fraction approximates Jaccard similarity."""
+        a = "the quick brown fox jumps over the lazy dog near the river bank today"
+        b = "the quick brown fox jumps over the lazy cat near the river bank today"
+        exact = jaccard(word_set(a), word_set(b))
+        assert abs(_estimate(a, b) - exact) < 0.15
+
+    def test_near_duplicates_share_a_band(self):
+        """Test texts above the duplicate threshold collide in at least one band."""
+        a = "calculate the area of a circle whose radius is seven centimetres using pi as twenty two by seven"
+        b = "calculate the area of a circle whose radius is seven centimetres using pi as twenty two over seven"
+        keys_a = band_keys(minhash(word_set(a)))
+        keys_b = band_keys(minhash(word_set(b)))
+        assert len(keys_a) == BANDS
+        assert set(keys_a) & set(keys_b)
+
+    def test_unrelated_texts_do_not_collide(self):
+        """Test unrelated texts share no band key."""
+        keys_a = band_keys(minhash(word_set("name the capital city of france")))
+        keys_b = band_keys(minhash(word_set("solve for x in two x plus three equals eleven")))
+        assert not set(keys_a) & set(keys_b)
+
+    def test_band_keys_fit_bigint(self):
+        """Test band keys are signed 64-bit values."""
+        keys = band_keys(minhash(word_set("photosynthesis happens in chloroplasts")))
+        assert all(-(2 ** 63) <= key < 2 ** 63 for key in keys)
+        assert band_keys([]) == []
+
+    def test_signatures_batch(self):
+        """Test the batch helper matches per-text signatures and band keys."""
+        texts = ["define osmosis", "define diffusion", ""]
+        computed = signatures(texts)
+        assert computed[0] == (minhash(word_set(texts[0])), band_keys(minhash(word_set(texts[0]))))
+        assert computed[2] == ([], [])
+
+
+class TestIndex:
+    """Test signatures are written in bounded upserts."""
+
+    async def test_index_writes_every_question(self):
+        """Test each (question, text) pair becomes one upserted row."""
+        statements = []
+
+        class _Session:
+            async def execute(self, statement):
+                statements.append(statement)
+
+        index = NearDuplicateIndex(_Session(), uuid4())
+        questions = [(uuid4(), f"question number {i} about fractions") for i in range(3)]
+
+        assert await index.index(iter(questions)) == 3
+        assert len(statements) == 1
+
+
+class TestKeepingCurrent:
+    """Test the periodic backfill and re-indexing of edited questions."""
+
+    def test_backfill_is_periodic(self):
+        """Test the backfill is registered with the job runner."""
+        from app.core.jobs.runner import _PERIODIC_TASKS
+
+        assert _PERIODIC_TASKS["question_signature_backfill"][1] is question_signature_backfill
+
+    async def test_backfill_indexes_each_tenant(self, monkeypatch):
+        """Test every tenant with stale questions is indexed, even if one fails."""
+        a, b, c = uuid4(), uuid4(), uuid4()
+        indexed = []
+
+        class _Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement):
+                return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [a, b, c]))
+
+            async def commit(self):
+                pass
+
+        async def ensure_indexed(index):
+            if index.tenant_id == b:
+                raise ConnectionError("database unavailable")
+            indexed.append(index.tenant_id)
+            return 5
+
+        monkeypatch.setattr(database, "AsyncSessionLocal", _Session)
+        monkeypatch.setattr(NearDuplicateIndex, "ensure_indexed", ensure_indexed)
+
+        assert await backfill_signatures() == 10
+        assert indexed == [a, c]
+
+    async def test_edited_text_reindexed_after_commit(self, monkeypatch):
+        """Test a question whose text changed is re-indexed once the edit commits."""
+        reindexed = []
+
+        async def reindex(edited):
+            reindexed.append(edited)
+
+        monkeypatch.setattr(near_duplicates, "_reindex", reindex)
+        question = Question(id=uuid4(), tenant_id=uuid4(), question_text="Define osmosis.")
+        session = SimpleNamespace(dirty=[question, SimpleNamespace()], info={})
+
+        near_duplicates._collect_edited_questions(session, None)
+        near_duplicates._reindex_edited_questions(session)
+        await asyncio.gather(*near_duplicates._pending_reindex)
+
+        assert reindexed == [{question.id: (question.tenant_id, "Define osmosis.")}]
+        assert session.info == {}
+
+    def test_rolled_back_edit_not_reindexed(self, monkeypatch):
+        """Test an edit that rolls back leaves the index alone."""
+        question = Question(id=uuid4(), tenant_id=uuid4(), question_text="Define osmosis.")
+        session = SimpleNamespace(dirty=[question], info={})
+
+        near_duplicates._collect_edited_questions(session, None)
+        near_duplicates._forget_edited_questions(session)
+        near_duplicates._reindex_edited_questions(session)
+
+        assert near_duplicates._pending_reindex == set()
@@ -0,0 +1,178 @@
+"""
+CUSTOS OCR Preprocessing Tests
+"""
+
+import base64
+import io
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+import app.ai.ocr_service as ocr_service
+import app.core.database as database
+from app.ai import ocr_preprocess
+from app.ai.jobs import OCRProcessJob
+from app.ai.ocr_models import OCRJobStatus
+from app.ai.ocr_preprocess import _skew_angle, prepare_page, preprocess_image
+from app.ai.ocr_service import OCRService
+from app.core.jobs.backends import ClaimedJob, JobQueueBackend
+from app.core.jobs.runner import JobRunner
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+
+def _page(width=1200, height=1600, angle=0.0):
+    """A white page of dark text-like lines, optionally rotated."""
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for y in range(100, height - 100, 40):
+        draw.rectangle((80, y, width - 80, y + 8), fill=0)
+    if angle:
+        image = image.rotate(angle, expand=False, fillcolor=255)
+    return image
+
+
+def _save(image, path, format="PNG"):
+    image.save(path, format=format)
+    return str(path)
+
+
+def _decode(data: str):
+    return Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+class TestPreprocessImage:
+    """Test pages are cleaned up and shrunk."""
+
+    def test_downscaled_grayscale_jpeg(self, tmp_path):
+        """Test a large colour photo becomes a bounded grayscale JPEG."""
+        path = _save(_page(3000, 4000).convert("RGB"), tmp_path / "page.png")
+
+        data, media_type = preprocess_image(path, max_dimension=1000)
+
+        image = _decode(data)
+        assert media_type == "image/jpeg"
+        assert image.format == "JPEG"
+        assert image.mode == "L"
+        assert max(image.size) <= 1000
+
+    def test_skew_detected(self):
+        """Test the deskew angle undoes a small rotation."""
+        assert _skew_angle(_page()) == 0.0
+        assert _skew_angle(_page(angle=3.0)) == pytest.approx(-3.0, abs=ocr_preprocess.DESKEW_STEP)
+
+    def test_undecodable_image_sent_unchanged(self, tmp_path):
+        """Test bytes Pillow cannot read are passed through as they are."""
+        path = tmp_path / "scan.png"
+        path.write_bytes(b"not an image")
+
+        data, media_type = preprocess_image(str(path))
+
+        assert base64.b64decode(data) == b"not an image"
+        assert media_type == "image/png"
+
+
+class TestPreparePage:
+    """Test pages are preprocessed off the event loop."""
+
+    async def test_runs_in_pool(self, tmp_path, monkeypatch):
+        """Test prepare_page hands the work to the preprocessing pool."""
+        pool = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(ocr_preprocess, "get_ocr_pool", lambda: pool)
+        path = _save(_page(), tmp_path / "page.png")
+
+        try:
+            data, media_type = await prepare_page(path)
+        finally:
+            pool.shutdown()
+
+        assert media_type == "image/jpeg"
+        assert _decode(data).mode == "L"
+
+    async def test_missing_file(self, tmp_path):
+        """Test a missing page fails before reaching the pool."""
+        with pytest.raises(FileNotFoundError):
+            await prepare_page(str(tmp_path / "missing.jpg"))
+
+
+class TestOCRJob:
+    """Test the queued job and per-page merging."""
+
+    def test_job_rebuilt_from_params(self):
+        """Test the job round-trips through its serialized params."""
+        job = OCRProcessJob(uuid4(), uuid4(), run_number=2)
+        params = job._get_serializable_params()
+        rebuilt = OCRProcessJob(job.tenant_id, **params)
+
+        assert rebuilt.ocr_job_id == job.ocr_job_id
+        assert rebuilt.get_job_key() == f"ocr_process:{job.ocr_job_id}:2"
+
+    async def test_runner_executes_queued_job(self, monkeypatch):
+        """Test a claimed OCR job runs through the job lifecycle to completion."""
+        processed = []
+
+        class Service:
+            def __init__(self, session, tenant_id):
+                pass
+
+            async def process_job(self, ocr_job_id):
+                processed.append(ocr_job_id)
+                return SimpleNamespace(status=OCRJobStatus.COMPLETED, results_extracted=2)
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement):
+                return SimpleNamespace(scalar_one_or_none=lambda: None)
+
+            def add(self, instance):
+                pass
+
+            async def commit(self):
+                pass
+
+        class Backend(JobQueueBackend):
+            def __init__(self):
+                self.completed = []
+
+            async def claim(self, queues, limit, worker_id, visibility_seconds):
+                return []
+
+            async def complete(self, job_id, worker_id, error=None):
+                self.completed.append((job_id, error))
+
+            async def release(self, job_id, worker_id):
+                pass
+
+        monkeypatch.setattr(ocr_service, "OCRService", Service)
+        monkeypatch.setattr(database, "AsyncSessionLocal", Session)
+        job = OCRProcessJob(uuid4(), uuid4(), run_number=1)
+        claimed = ClaimedJob(
+            id="1", tenant_id=job.tenant_id, job_class="OCRProcessJob",
+            job_key=job.get_job_key(), params=job._get_serializable_params(),
+            attempts=1, max_attempts=3,
+        )
+        backend = Backend()
+
+        await JobRunner()._execute(claimed, backend)
+
+        assert processed == [job.ocr_job_id]
+        assert backend.completed == [("1", None)]
+
+    def test_page_results_merged(self):
+        """Test students and errors from every page are combined."""
+        merged = OCRService._merge_page_results([
+            {"success": True, "students": [{"student_identifier": "1"}]},
+            {"success": False, "students": [], "errors": ["blurry"]},
+        ])
+
+        assert merged["success"] is True
+        assert merged["students"] == [{"student_identifier": "1"}]
+        assert merged["errors"] == ["Page 2: blurry"]
@@ -0,0 +1,217 @@
+"""
+CUSTOS Parent Dashboard Tests
+"""
+
+import asyncio
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.auth.schemas import AuthContext
+from app.core.cache import CacheKeys
+from app.finance.models import InvoiceStatus
+from app.parents import dashboard
+from app.payments import router as payments_router
+from app.payments.models import PaymentGateway, PaymentStatus
+from app.payments.schemas import PaymentVerifyRequest
+from app.parents.dashboard import (
+    DASHBOARD_VIEWS,
+    ChildFees,
+    FamilyFees,
+    _delete_stale_dashboards,
+    _forget_stale_dashboards,
+    invalidate_family_dashboards,
+    load_family_fees,
+    load_month_attendance,
+)
+
+
+class _Session:
+    """Each execute returns the next queued list of rows."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.info = {}
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        rows = self.results.pop(0)
+        return SimpleNamespace(
+            all=lambda: rows,
+            scalars=lambda: SimpleNamespace(all=lambda: rows),
+        )
+
+
+class _Cache:
+    def __init__(self, is_connected=True):
+        self.is_connected = is_connected
+        self.deleted = []
+
+    async def delete(self, key):
+        self.deleted.append(key)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = _Cache()
+
+    async def get_cache():
+        return cache
+
+    monkeypatch.setattr(dashboard, "get_cache", get_cache)
+    return cache
+
+
+class TestFamilyFees:
+    """Test grouped loading and family totals."""
+
+    async def test_grouped_queries_fill_each_child(self):
+        """Test four grouped queries cover every child, whatever their number."""
+        a, b = uuid4(), uuid4()
+        session = _Session(
+            [(a, Decimal("5000"), Decimal("2000")), (b, Decimal("3000"), None)],
+            [
+                (a, InvoiceStatus.PENDING, 2, Decimal("1500")),
+                (a, InvoiceStatus.OVERDUE, 1, Decimal("1500")),
+                (b, InvoiceStatus.PARTIAL, 1, Decimal("3000")),
+            ],
+            [(a, date(2026, 11, 1), Decimal("500")), (b, date(2026, 10, 25), Decimal("3000"))],
+            [(a, date(2026, 9, 30), Decimal("2000"))],
+        )
+
+        fees = await load_family_fees(session, uuid4(), [a, b])
+
+        assert len(session.statements) == 4
+        assert (fees.total_due, fees.total_paid, fees.total_overdue) == (8000.0, 2000.0, 1500.0)
+        assert (fees.pending_invoices, fees.overdue_invoices) == (3, 1)
+        assert fees.next_due is fees.children[b]
+        assert fees.last_payment is fees.children[a]
+        assert "DISTINCT ON" in str(session.statements[2].compile(dialect=postgresql.dialect()))
+
+    async def test_no_children(self):
+        """Test a parent without children reads nothing."""
+        session = _Session()
+
+        fees = await load_family_fees(session, uuid4(), [])
+
+        assert fees.children == {}
+        assert fees.next_due is None and fees.last_payment is None
+        assert await load_month_attendance(session, uuid4(), [], 2026, 10) == {}
+        assert session.statements == []
+
+    def test_child_without_activity(self):
+        """Test a child with no invoices or payments keeps zero defaults."""
+        fees = FamilyFees({uuid4(): ChildFees()})
+        assert fees.total_due == 0.0
+        assert fees.next_due is None
+
+
+class TestDashboardCache:
+    """Test per-parent keys and commit-time invalidation."""
+
+    def test_key_layout(self):
+        """Test keys are scoped by tenant, parent and view."""
+        tenant_id, parent_id = uuid4(), uuid4()
+        assert CacheKeys.parent_dashboard(tenant_id, parent_id, "portal") == \
+            f"custos:{tenant_id}:parent:dashboard:{parent_id}:portal"
+
+    async def test_deleted_after_commit(self, cache):
+        """Test linked parents' dashboards are deleted once the write commits."""
+        tenant_id, parent_id = uuid4(), uuid4()
+        session = _Session([parent_id])
+
+        await invalidate_family_dashboards(session, tenant_id, [uuid4(), None])
+        assert cache.deleted == []
+
+        _delete_stale_dashboards(session)
+        await asyncio.gather(*dashboard._pending_deletes)
+
+        assert sorted(cache.deleted) == sorted(
+            CacheKeys.parent_dashboard(tenant_id, parent_id, view) for view in DASHBOARD_VIEWS
+        )
+        assert session.info == {}
+
+    async def test_rollback_keeps_entries(self, cache):
+        """Test a rolled-back write leaves the cached dashboards alone."""
+        session = _Session([uuid4()])
+
+        await invalidate_family_dashboards(session, uuid4(), [uuid4()])
+        _forget_stale_dashboards(session)
+        _delete_stale_dashboards(session)
+
+        assert cache.deleted == []
+        assert dashboard._pending_deletes == set()
+
+    async def test_skipped_without_redis(self, cache):
+        """Test no parent lookup happens when there is no cache to clear."""
+        cache.is_connected = False
+        session = _Session()
+
+        await invalidate_family_dashboards(session, uuid4(), [uuid4()])
+
+        assert session.statements == []
+
+
+class TestPaymentInvalidation:
+    """Test a verified payment clears the paying student's family dashboards."""
+
+    @pytest.mark.parametrize("invoice", [
+        None,
+        SimpleNamespace(amount_paid=0, total_amount=100, status=InvoiceStatus.PENDING, student_id=None),
+    ])
+    async def test_verify_invalidates_by_order_student(self, monkeypatch, invoice):
+        """Test the order's student is invalidated whether or not an invoice is linked."""
+        order = SimpleNamespace(invoice_id=uuid4(), student_id=uuid4(), amount=5000)
+        transaction = SimpleNamespace(
+            id=uuid4(), transaction_id="TXN-1", order_id=uuid4(), amount=5000, currency="INR",
+            gateway=PaymentGateway.RAZORPAY, gateway_payment_id="pay_1", method=None,
+            method_details=None, status=PaymentStatus.SUCCESS, initiated_at=None,
+            completed_at=None, error_code=None, error_message=None,
+            created_at=datetime.now(timezone.utc),
+        )
+
+        class Service:
+            def __init__(self, session, tenant_id):
+                pass
+
+            async def verify_payment(self, data):
+                return transaction
+
+            async def get_order(self, order_id):
+                return order
+
+        class Db:
+            commits = 0
+
+            async def execute(self, statement):
+                return SimpleNamespace(scalar_one_or_none=lambda: invoice)
+
+            async def commit(self):
+                self.commits += 1
+
+        invalidated = []
+
+        async def invalidate(session, tenant_id, student_ids):
+            invalidated.extend(student_ids)
+
+        monkeypatch.setattr(payments_router, "PaymentService", Service)
+        monkeypatch.setattr(dashboard, "invalidate_family_dashboards", invalidate)
+        user = AuthContext(
+            user_id=uuid4(), tenant_id=uuid4(), email="parent@school.test",
+            roles=["PARENT"], permissions=set(),
+        )
+        db = Db()
+
+        await payments_router.verify_payment(
+            PaymentVerifyRequest(order_id=uuid4(), gateway_payment_id="pay_1"), user, db,
+        )
+
+        assert invalidated == [order.student_id]
+        assert db.commits == 1
+        if invoice:
+            assert invoice.status == InvoiceStatus.PARTIAL
@@ -0,0 +1,149 @@
+"""
+CUSTOS Payment Gateway Client Tests
+"""
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.core.exceptions import PaymentError
+from app.payments import clients
+from app.payments.clients import (
+    GATEWAY_INVALIDATION_CHANNEL,
+    close_gateway_http_clients,
+    get_gateway_credentials,
+    get_gateway_http_client,
+)
+from app.payments.models import PaymentGateway
+from app.payments.service import RazorpayGateway
+from app.platform.control.entitlements import EntitlementCache
+
+BASE_URL = "https://razorpay.test/v1"
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """
+    Route the gateway's pooled client to a handler; set api.responses to
+    a list of responses or exceptions, one per request.
+    """
+    api = SimpleNamespace(requests=[], responses=[])
+
+    def handler(request: httpx.Request):
+        api.requests.append((request.method, request.url.path, request.url.params.get("receipt")))
+        response = api.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setitem(
+        clients._http_clients,
+        BASE_URL,
+        httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(RazorpayGateway, "RETRY_BACKOFF_SECONDS", 0)
+    return api
+
+
+def _gateway() -> RazorpayGateway:
+    return RazorpayGateway("key", "secret", base_url=BASE_URL)
+
+
+class TestHTTPClients:
+    """Test the process-wide pooled clients."""
+
+    async def test_client_shared_until_closed(self):
+        """Test one client per API, replaced after shutdown closes it."""
+        url = f"https://pool-{uuid4()}.test"
+        client = get_gateway_http_client(url)
+        assert get_gateway_http_client(url) is client
+
+        await close_gateway_http_clients()
+
+        assert client.is_closed
+        assert clients._http_clients == {}
+        assert get_gateway_http_client(url) is not client
+        await close_gateway_http_clients()
+
+
+class TestRetries:
+    """Test which failed calls are retried."""
+
+    async def test_read_retried_on_server_error(self, api):
+        """Test a GET is retried after a 503."""
+        api.responses = [httpx.Response(503), httpx.Response(200, json={"id": "pay_1"})]
+
+        assert await _gateway().fetch_payment("pay_1") == {"id": "pay_1"}
+        assert len(api.requests) == 2
+
+    async def test_write_not_retried_after_reaching_gateway(self, api):
+        """Test a refund that may have been applied is not sent twice."""
+        api.responses = [httpx.Response(500, text="server error")]
+
+        with pytest.raises(PaymentError):
+            await _gateway().create_refund("pay_1", 100)
+        assert len(api.requests) == 1
+
+    async def test_write_retried_when_never_sent(self, api):
+        """Test connection failures and rate limits retry writes too."""
+        api.responses = [
+            httpx.ConnectError("refused"),
+            httpx.Response(429),
+            httpx.Response(200, json={"id": "rfnd_1"}),
+        ]
+
+        assert await _gateway().create_refund("pay_1", 100) == {"id": "rfnd_1"}
+        assert len(api.requests) == 3
+
+    async def test_retries_exhausted(self, api):
+        """Test the last error is raised after settings.payment_http_retries."""
+        api.responses = [httpx.Response(503, text="unavailable")] * 3
+
+        with pytest.raises(PaymentError, match="unavailable"):
+            await _gateway().fetch_refund("rfnd_1")
+        assert len(api.requests) == 3
+
+    async def test_order_recovered_by_receipt(self, api):
+        """Test an order whose creation timed out is found, not created again."""
+        api.responses = [
+            httpx.ReadTimeout("timed out"),
+            httpx.Response(200, json={"items": [{"id": "order_1", "receipt": "R-1"}]}),
+        ]
+
+        order = await _gateway().create_order(1000, "INR", "R-1")
+
+        assert order["id"] == "order_1"
+        assert api.requests == [("POST", "/v1/orders", None), ("GET", "/v1/orders", "R-1")]
+
+
+class TestGatewayConfigCache:
+    """Test per-tenant credential caching."""
+
+    async def test_credentials_loaded_once(self, monkeypatch):
+        """Test credentials are read from the database once per tenant."""
+        config = SimpleNamespace(
+            gateway=PaymentGateway.RAZORPAY, api_key="key", api_secret="secret",
+            webhook_secret="whsec", merchant_id=None, is_sandbox=True,
+        )
+        db = SimpleNamespace(queries=0)
+
+        async def execute(statement):
+            db.queries += 1
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [config]))
+
+        db.execute = execute
+        monkeypatch.setattr(
+            clients, "_config_cache",
+            EntitlementCache(clients._load_tenant_gateways, channel=GATEWAY_INVALIDATION_CHANNEL),
+        )
+        tenant_id = uuid4()
+
+        first = await get_gateway_credentials(tenant_id, PaymentGateway.RAZORPAY, db)
+        second = await get_gateway_credentials(tenant_id, PaymentGateway.RAZORPAY, db)
+
+        assert first is second
+        assert first.webhook_secret == "whsec"
+        assert db.queries == 1
+        assert await get_gateway_credentials(tenant_id, PaymentGateway.STRIPE, db) is None
@@ -0,0 +1,186 @@
+"""
+CUSTOS Payment Webhook Inbox Tests
+"""
+
+import hashlib
+import hmac
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import app.core.database as database
+import app.payments.service as payment_service
+from app.payments import webhooks
+from app.payments.models import PaymentGateway
+from app.payments.webhooks import (
+    ClaimedWebhook,
+    WebhookConsumer,
+    accept_webhook,
+    ordering_key,
+    verify_signature,
+)
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class _Session:
+    """Records statements; each execute returns the next queued result."""
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self.results.pop(0) if self.results else SimpleNamespace(rowcount=1)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = _Session()
+    monkeypatch.setattr(database, "AsyncSessionLocal", lambda: session)
+    return session
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """PaymentService stand-in; set handler.error to make handling fail."""
+    handler = SimpleNamespace(events=[], error=None)
+
+    class Service:
+        def __init__(self, session, tenant_id):
+            pass
+
+        async def handle_webhook_event(self, event_type, payload):
+            handler.events.append(event_type)
+            if handler.error:
+                raise handler.error
+
+    monkeypatch.setattr(payment_service, "PaymentService", Service)
+    return handler
+
+
+def _event(attempts=1) -> ClaimedWebhook:
+    return ClaimedWebhook(
+        id=uuid4(), tenant_id=uuid4(), event_type="payment.captured",
+        payload={}, attempts=attempts,
+    )
+
+
+class TestReceiving:
+    """Test verification and the idempotent inbox insert."""
+
+    def test_verify_signature(self):
+        """Test only the HMAC of the exact body with the secret is accepted."""
+        body = b'{"event": "payment.captured"}'
+        signature = hmac.new(b"whsec", body, hashlib.sha256).hexdigest()
+
+        assert verify_signature(body, signature, "whsec")
+        assert not verify_signature(body + b" ", signature, "whsec")
+        assert not verify_signature(body, signature, "other")
+        assert not verify_signature(body, "", "whsec")
+        assert not verify_signature(body, signature, "")
+
+    @pytest.mark.parametrize("payload,key", [
+        ({"payload": {"payment": {"entity": {"id": "pay_1", "order_id": "order_1"}}}}, "order_1"),
+        ({"payload": {"order": {"entity": {"id": "order_2"}}}}, "order_2"),
+        ({"payload": {"refund": {"entity": {"id": "rfnd_1", "payment_id": "pay_3"}}}}, "pay_3"),
+        ({"payload": {}}, None),
+        ({}, None),
+    ])
+    def test_ordering_key(self, payload, key):
+        """Test events are grouped by the gateway order they belong to."""
+        assert ordering_key(payload) == key
+
+    async def test_accept_is_idempotent(self, monkeypatch):
+        """Test the insert skips known events and only new ones wake the consumer."""
+        wakes = []
+        monkeypatch.setattr(webhooks.webhook_consumer, "wake", lambda: wakes.append(1))
+        session = _Session([
+            SimpleNamespace(scalar_one_or_none=lambda: uuid4()),
+            SimpleNamespace(scalar_one_or_none=lambda: None),
+        ])
+        payload = {"payload": {"order": {"entity": {"id": "order_1"}}}}
+
+        args = (session, uuid4(), PaymentGateway.RAZORPAY, "evt_1", "order.paid", payload)
+        assert await accept_webhook(*args) is True
+        assert await accept_webhook(*args) is False
+
+        sql = _sql(session.statements[0])
+        assert "ON CONFLICT ON CONSTRAINT uq_webhook_gateway_event DO NOTHING" in sql
+        assert session.statements[0].compile().params["ordering_key"] == "order_1"
+        assert session.commits == 2
+        assert wakes == [1]
+
+
+class TestConsumer:
+    """Test claiming, handling and failure backoff."""
+
+    async def test_claim_skips_locked_and_blocked_events(self, session):
+        """Test the claim leases with SKIP LOCKED behind older events of the same order."""
+        session.results = [SimpleNamespace(all=lambda: [])]
+
+        assert await WebhookConsumer()._claim() == []
+
+        sql = _sql(session.statements[0])
+        assert sql.startswith("UPDATE webhook_events")
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "NOT (EXISTS" in sql
+        assert session.commits == 1
+
+    async def test_handled_event_marked_processed(self, session, handler):
+        """Test a handled event is marked processed in the same transaction."""
+        await WebhookConsumer()._handle(_event())
+
+        assert handler.events == ["payment.captured"]
+        values = session.statements[0].compile().params
+        assert values["status"] == "processed"
+        assert session.commits == 1
+
+    async def test_lost_lease_rolled_back(self, session, handler):
+        """Test the handler's effects are undone if another consumer took the event."""
+        session.results = [SimpleNamespace(rowcount=0)]
+
+        await WebhookConsumer()._handle(_event())
+
+        assert session.rollbacks == 1
+        assert session.commits == 0
+
+    async def test_failure_backs_off(self, session, handler):
+        """Test a failed event goes back to pending with a doubling delay."""
+        handler.error = RuntimeError("ledger locked")
+
+        await WebhookConsumer()._handle(_event(attempts=3))
+
+        params = session.statements[0].compile().params
+        assert session.rollbacks == 1
+        assert params["status"] == "pending"
+        assert params["error_message"] == "ledger locked"
+        delay = (params["next_attempt_at"] - params["updated_at"]).total_seconds()
+        assert delay == WebhookConsumer.BACKOFF_BASE_SECONDS * 4
+
+    async def test_dead_after_max_attempts(self, session, handler):
+        """Test an event failing its last attempt is dead-lettered."""
+        handler.error = RuntimeError("bad payload")
+
+        await WebhookConsumer()._handle(_event(attempts=WebhookConsumer.MAX_ATTEMPTS))
+
+        assert session.statements[0].compile().params["status"] == "dead"
@@ -0,0 +1,100 @@
+"""
+CUSTOS Query Stats Tests
+"""
+
+import logging
+from types import SimpleNamespace
+
+from app.core.query_stats import (
+    _after_cursor_execute,
+    _analyze,
+    _before_cursor_execute,
+    _handle_error,
+    fingerprint,
+    get_query_stats,
+    start_query_stats,
+)
+from app.middleware.query_stats import QueryStatsMiddleware
+
+
+def _execute(conn, statement: str) -> None:
+    """Run the engine hooks around a (pretend) statement."""
+    _before_cursor_execute(conn, None, statement, None, None, False)
+    _after_cursor_execute(conn, None, statement, None, None, False)
+
+
+class TestFingerprint:
+    """Test statements are normalized so repeats share a fingerprint."""
+
+    def test_parameters_and_literals(self):
+        """Test bind styles, strings and numbers all become '?'."""
+        a = fingerprint("SELECT * FROM users WHERE id = $1 AND name = 'Asha' LIMIT 10")
+        b = fingerprint("SELECT * FROM users WHERE id = %(id_1)s AND name = 'Ravi' LIMIT 20")
+        assert a == b == "SELECT * FROM users WHERE id = ? AND name = ? LIMIT ?"
+
+    def test_in_and_values_lists_collapse(self):
+        """Test IN and multi-row VALUES lists of any length look the same."""
+        assert fingerprint("SELECT 1 FROM t WHERE id IN ($1, $2, $3)") == \
+            fingerprint("SELECT 1 FROM t WHERE id IN ($1)")
+        assert fingerprint("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)") == \
+            fingerprint("INSERT INTO t (a, b) VALUES ($1, $2)")
+
+    def test_operation_and_table(self):
+        """Test the metric labels come from the statement."""
+        assert _analyze('UPDATE "fee_invoices" SET paid = $1')[1:] == ("UPDATE", "fee_invoices")
+        assert _analyze("/* c */ SELECT now()")[1:] == ("SELECT", "-")
+
+
+class TestQueryStats:
+    """Test per-request accounting through the engine hooks."""
+
+    def test_hooks_record_into_current_stats(self):
+        """Test each executed statement is counted in the request's stats."""
+        stats = start_query_stats()
+        conn = SimpleNamespace(info={})
+        for student_id in range(5):
+            _execute(conn, f"SELECT * FROM marks WHERE student_id = {student_id}")
+        _execute(conn, "SELECT * FROM students")
+
+        assert get_query_stats() is stats
+        assert stats.count == 6
+        assert stats.repeated(3) == [("SELECT * FROM marks WHERE student_id = ?", 5)]
+        assert stats.repeated(5) == []
+
+    def test_failed_statement_discards_its_start(self):
+        """Test handle_error pops the timer so nesting stays balanced."""
+        conn = SimpleNamespace(info={})
+        _before_cursor_execute(conn, None, "SELECT 1", None, None, False)
+        _handle_error(SimpleNamespace(connection=conn))
+        assert conn.info["query_stats_start"] == []
+
+
+class TestQueryStatsMiddleware:
+    """Test per-request headers and N+1 reporting."""
+
+    async def test_debug_headers_and_n_plus_one(self, caplog):
+        """Test counts are reported and an N+1 is logged once at WARNING."""
+        async def app(scope, receive, send):
+            conn = SimpleNamespace(info={})
+            for i in range(4):
+                _execute(conn, f"SELECT * FROM fees WHERE id = {i}")
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = QueryStatsMiddleware(app, n_plus_one_threshold=2)
+        middleware.debug_headers = True
+        scope = {"type": "http", "method": "GET", "route": SimpleNamespace(path="/fees")}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        with caplog.at_level(logging.DEBUG, logger="custos.queries"):
+            await middleware(scope, None, send)
+            await middleware(scope, None, send)
+
+        headers = dict(sent[0]["headers"])
+        assert headers[b"x-db-query-count"] == b"4"
+        assert headers[b"x-db-n-plus-one"] == b"4"
+        levels = [r.levelno for r in caplog.records if "Possible N+1" in r.getMessage()]
+        assert levels == [logging.WARNING, logging.DEBUG]
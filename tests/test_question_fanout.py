@@ -0,0 +1,143 @@
+"""
+CUSTOS Question Generation Fan-out Tests
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.ai import question_gen_service as qgen
+from app.ai.question_gen_service import AIQuestionGenService
+from app.core.exceptions import ValidationError
+
+
+def _params(count: int, difficulty: str = "medium") -> dict:
+    return {"count": count, "difficulty": difficulty, "question_type": "mcq"}
+
+
+def _question(text: str) -> dict:
+    return {"question": text, "options": ["a", "b"], "correct_answer": "a"}
+
+
+def _service(responses=None) -> AIQuestionGenService:
+    """
+    A service whose provider calls pop the next queued response for
+    their chunk (exceptions are raised) and which "creates" questions
+    by returning the generated dicts.
+    """
+    service = AIQuestionGenService(session=None, tenant_id=uuid4())
+    responses = {key: list(value) for key, value in (responses or {}).items()}
+
+    async def generate(input_snapshot):
+        params = input_snapshot["parameters"]
+        await asyncio.sleep(0)
+        response = responses[params.get("chunk", 0)].pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return {"questions": response, "tokens_used": 10}
+
+    async def create(ai_response, **kwargs):
+        return list(ai_response["questions"])
+
+    service._generate_with_ai = generate
+    service._create_questions = create
+    return service
+
+
+async def _run(service, params):
+    return await service._generate_and_create(
+        input_snapshot={"parameters": params},
+        topic=None, subject_id=uuid4(), teacher_id=uuid4(),
+        difficulty=None, question_type=None,
+    )
+
+
+class TestPlanChunks:
+    """Test requests are split into balanced, varied chunks."""
+
+    def test_small_request_is_one_call(self):
+        """Test a request up to CHUNK_SIZE is not split."""
+        service = _service()
+        assert service._plan_chunks(_params(qgen.CHUNK_SIZE)) == [_params(qgen.CHUNK_SIZE)]
+
+    def test_counts_balanced(self):
+        """Test chunk counts add up and differ by at most one."""
+        chunks = _service()._plan_chunks(_params(23))
+
+        counts = [chunk["count"] for chunk in chunks]
+        assert counts == [8, 8, 7]
+        assert len({chunk["variation"] for chunk in chunks}) == 3
+
+    def test_mixed_difficulty_spread(self):
+        """Test a mixed request gives chunks their own difficulties."""
+        chunks = _service()._plan_chunks(_params(50, "mixed"))
+
+        difficulties = [chunk["difficulty"] for chunk in chunks]
+        assert difficulties == list(qgen.MIXED_CHUNK_DIFFICULTIES[:5])
+        assert sum(chunk["count"] for chunk in chunks) == 50
+
+
+class TestChunks:
+    """Test per-chunk retries and deduplication."""
+
+    async def test_retry_after_error(self):
+        """Test a failed call is retried within the chunk."""
+        service = _service({0: [ValidationError("bad json"), [_question("What is osmosis?")]]})
+
+        result = await service._generate_chunk({}, _params(5))
+
+        assert result["attempts"] == 2
+        assert len(result["questions"]) == 1
+        assert result["tokens_used"] == 10
+
+    async def test_empty_results_exhaust_attempts(self):
+        """Test a chunk with no usable questions reports an error."""
+        service = _service({0: [[], [{"question": ""}]]})
+
+        result = await service._generate_chunk({}, _params(5))
+
+        assert result["questions"] == []
+        assert result["error"] == "No questions in AI response"
+        assert result["tokens_used"] == 20
+
+    def test_dedup_against_accepted(self):
+        """Test near-identical questions across chunks are dropped."""
+        service = _service()
+        accepted = []
+        first = service._dedup_batch([_question("What is the function of the heart?")], accepted)
+        second = service._dedup_batch([
+            _question("What is the function of the heart"),
+            _question("Name the chambers of the heart."),
+        ], accepted)
+
+        assert len(first) == 1
+        assert [q["question"] for q in second] == ["Name the chambers of the heart."]
+        assert len(accepted) == 2
+
+
+class TestGenerateAndCreate:
+    """Test the fan-out as a whole."""
+
+    async def test_partial_failure_keeps_successful_chunks(self):
+        """Test a failing chunk is reported while the others are created."""
+        service = _service({
+            0: [[_question("Define photosynthesis."), _question("Define respiration.")]],
+            1: [ValidationError("timeout"), ValidationError("timeout")],
+            2: [[_question("Why do leaves look green?")]],
+        })
+        service._plan_chunks = lambda params: [{**params, "chunk": i, "count": 2} for i in range(3)]
+
+        snapshot, created = await _run(service, _params(6))
+
+        assert len(created) == 3
+        assert snapshot["tokens_used"] == 20
+        assert sorted(chunk["accepted"] for chunk in snapshot["chunks"]) == [0, 1, 2]
+        assert [chunk["error"] for chunk in snapshot["chunks"]].count("timeout") == 1
+
+    async def test_all_chunks_failing_raises(self):
+        """Test the request fails only if no chunk produced questions."""
+        service = _service({0: [ValidationError("timeout"), ValidationError("timeout")]})
+
+        with pytest.raises(ValidationError):
+            await _run(service, _params(5))
@@ -0,0 +1,118 @@
+"""
+CUSTOS Usage Counter Buffer Tests
+"""
+
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.platform.usage.counter import UsageCounterBuffer, _chunks
+
+
+# asyncpg's bind parameter limit per statement
+MAX_BIND_PARAMS = 32767
+
+
+def _features(count: int) -> dict:
+    tenant_id = uuid4()
+    return {(tenant_id, f"feature:{i}", date(2026, 10, 18)): 1 for i in range(count)}
+
+
+def _bind_params(stmt) -> int:
+    return len(stmt.compile(dialect=postgresql.dialect()).params)
+
+
+class TestChunking:
+    """Test flushes are split into bounded statements."""
+
+    def test_chunks_cover_all_keys(self):
+        """Test every key lands in exactly one chunk."""
+        deltas = _features(2500)
+        chunks = list(_chunks(deltas, 1000))
+
+        assert [len(c) for c in chunks] == [1000, 1000, 500]
+        merged = {}
+        for chunk in chunks:
+            merged.update(chunk)
+        assert merged == deltas
+
+    def test_chunks_are_key_ordered(self):
+        """Test chunks follow one global key order (consistent row locking)."""
+        deltas = _features(30)
+        keys = [key for chunk in _chunks(deltas, 7) for key in chunk]
+        assert keys == sorted(deltas, key=str)
+
+    def test_feature_chunk_fits_bind_limit(self):
+        """Test a full FeatureUsage chunk stays under asyncpg's limit."""
+        deltas = _features(UsageCounterBuffer.FLUSH_CHUNK_SIZE)
+        stmt = UsageCounterBuffer._feature_upsert(deltas, {}, datetime.now(timezone.utc))
+        assert _bind_params(stmt) < MAX_BIND_PARAMS
+
+    def test_limit_chunk_fits_bind_limit(self):
+        """Test a full UsageLimit chunk (every column) stays under asyncpg's limit."""
+        from app.platform.usage.counter import LIMIT_COUNTER_COLUMNS
+
+        limits = {
+            (uuid4(), 2026, 10): {column: 1 for column in LIMIT_COUNTER_COLUMNS}
+            for _ in range(UsageCounterBuffer.FLUSH_CHUNK_SIZE)
+        }
+        stmt = UsageCounterBuffer._limit_upsert(limits, datetime.now(timezone.utc))
+        assert _bind_params(stmt) < MAX_BIND_PARAMS
+
+
+class TestFlush:
+    """Test flush writes chunks and requeues failures per chunk."""
+
+    async def test_full_buffer_is_written_in_chunks(self):
+        """Test a buffer at the early-flush threshold is written completely."""
+        buffer = UsageCounterBuffer()
+        written = []
+
+        async def write(features, feature_users, limits):
+            written.append(len(features) + len(limits))
+
+        buffer._write = write
+        buffer._features = _features(buffer.MAX_PENDING_KEYS)
+        await buffer.flush()
+
+        assert sum(written) == buffer.MAX_PENDING_KEYS
+        assert max(written) <= buffer.FLUSH_CHUNK_SIZE
+        assert buffer.pending_keys == 0
+
+    async def test_failed_chunk_is_requeued(self):
+        """Test only the failed chunk is kept for the next flush."""
+        buffer = UsageCounterBuffer()
+        calls = []
+
+        async def write(features, feature_users, limits):
+            calls.append(features)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+
+        buffer._write = write
+        buffer._features = _features(2500)
+        await buffer.flush()
+
+        assert len(calls) == 3
+        assert buffer._features == calls[1]
+
+    async def test_failed_chunk_dropped_past_retention(self):
+        """Test deltas are dropped once the retention bound is exceeded."""
+        buffer = UsageCounterBuffer(max_retained_keys=10)
+
+        async def write(features, feature_users, limits):
+            raise RuntimeError("database down")
+
+        buffer._write = write
+        buffer._features = _features(20)
+        await buffer.flush()
+
+        assert buffer.pending_keys == 0
+
+    async def test_add_limit_rejects_unknown_column(self):
+        """Test only known UsageLimit counters can be buffered."""
+        buffer = UsageCounterBuffer()
+        with pytest.raises(ValueError):
+            await buffer.add_limit(uuid4(), "not_a_counter")
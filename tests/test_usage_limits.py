@@ -0,0 +1,255 @@
+"""
+CUSTOS Usage Limit Counter Tests
+"""
+
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import app.core.database as database
+from app.platform.control.usage_store import (
+    PERIOD_GRACE_SECONDS,
+    UsageCounterStore,
+    period_expiry,
+    period_key,
+)
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def incrby(self, key, amount):
+        self.ops.append(("incrby", key, amount))
+
+    def decrby(self, key, amount):
+        self.ops.append(("incrby", key, -amount))
+
+    def expireat(self, key, when):
+        self.redis.expiry[key] = when
+
+    async def execute(self):
+        return [await self.redis.incrby(key, amount) for _, key, amount in self.ops]
+
+
+class _Redis:
+    """In-memory stand-in for the few Redis commands the store uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        self.round_trips += 1
+        return _Pipeline(self)
+
+    async def incrby(self, key, amount):
+        self.values[key] = self.values.get(key, 0) + amount
+        return self.values[key]
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.values.get(key)
+
+
+def _store(redis=None, persisted=0) -> UsageCounterStore:
+    """A store on the given Redis (None = unavailable) and database count."""
+    store = UsageCounterStore()
+    store._stopping = True  # No background flush loop in tests
+
+    async def get_redis():
+        return redis
+
+    async def db_read(key):
+        return persisted
+
+    store._redis = get_redis
+    store._db_read = db_read
+    return store
+
+
+class TestPeriods:
+    """Test reset period keys and Redis expiry."""
+
+    def test_period_keys(self):
+        """Test daily, monthly and never-resetting keys."""
+        today = date(2026, 10, 18)
+        assert period_key("daily", today) == "2026-10-18"
+        assert period_key("monthly", today) == "2026-10"
+        assert period_key("never", today) == "all"
+
+    def test_daily_expiry(self):
+        """Test a daily counter expires a grace period after midnight."""
+        expires = period_expiry("daily", date(2026, 10, 18))
+        midnight = datetime(2026, 10, 19).timestamp()
+        assert expires == int(midnight) + PERIOD_GRACE_SECONDS
+
+    @pytest.mark.parametrize("today,next_month", [
+        (date(2026, 10, 31), date(2026, 11, 1)),
+        (date(2026, 12, 1), date(2027, 1, 1)),
+        (date(2028, 2, 29), date(2028, 3, 1)),
+    ])
+    def test_monthly_expiry(self, today, next_month):
+        """Test a monthly counter expires after the first of the next month."""
+        first = datetime(next_month.year, next_month.month, 1)
+        assert period_expiry("monthly", today) == int(first.timestamp()) + PERIOD_GRACE_SECONDS
+
+    def test_never_expires(self):
+        """Test lifetime counters have no expiry."""
+        assert period_expiry("never") is None
+
+
+class TestReservations:
+    """Test block reservations against the shared counter."""
+
+    def test_blocks_shrink_near_limit(self):
+        """Test the claimed block is bounded by the remaining headroom."""
+        store = UsageCounterStore()
+        assert store._block_size(10_000, 0) == 100
+        assert store._block_size(10_000, 9_900) == 10
+        assert store._block_size(10_000, 9_995) == 0
+        assert store._block_size(None, 0) == store.UNLIMITED_BLOCK
+
+    async def test_adds_use_reserved_units(self):
+        """Test most adds are served locally from a claimed block."""
+        redis = _Redis()
+        store = _store(redis)
+        tenant_id = uuid4()
+
+        for expected in range(1, 51):
+            assert await store.add(tenant_id, "ai_calls", "monthly", 1, limit=10_000) == expected
+
+        assert redis.round_trips == 1
+        key = store._redis_key((tenant_id, "ai_calls", period_key("monthly")))
+        assert redis.values[key] == 101  # 1 used + a block of 100
+        assert key in redis.expiry
+
+    async def test_workers_share_one_limit(self):
+        """Test two workers' adds count toward one limit, exactly at the end."""
+        redis = _Redis()
+        a, b = _store(redis), _store(redis)
+        tenant_id = uuid4()
+
+        for _ in range(50):
+            await a.add(tenant_id, "students", "never", 1, limit=100)
+            last = await b.add(tenant_id, "students", "never", 1, limit=100)
+
+        assert last == 100
+        await a._release_reservations(idle_seconds=0)
+        await b._release_reservations(idle_seconds=0)
+        assert redis.values[a._redis_key((tenant_id, "students", "all"))] == 100
+
+    async def test_recreated_counter_restores_persisted_count(self):
+        """Test a counter lost from Redis is seeded from the database once."""
+        redis = _Redis()
+        store = _store(redis, persisted=40)
+
+        assert await store.add(uuid4(), "ai_calls", "daily", 1, limit=100) == 41
+
+    async def test_database_fallback(self):
+        """Test without Redis the persisted count plus pending adds is used."""
+        store = _store(None, persisted=7)
+        tenant_id = uuid4()
+
+        assert await store.add(tenant_id, "ai_calls", "daily", 2) == 9
+        assert await store.add(tenant_id, "ai_calls", "daily", 1) == 10
+        assert store._pending[(tenant_id, "ai_calls", period_key("daily"))] == 3
+
+
+class TestWriteBehind:
+    """Test buffered deltas and billing signals."""
+
+    def _signal(self, tenant_id, signal_type, amount, cost=0.0):
+        return SimpleNamespace(
+            tenant_id=tenant_id,
+            signal_type=signal_type,
+            usage_type=SimpleNamespace(value="ai_calls"),
+            amount=amount,
+            cost=cost,
+            timestamp=datetime.now(timezone.utc),
+        )
+
+    def test_signals_coalesce(self):
+        """Test overages add up and threshold signals keep the maximum."""
+        store = _store()
+        tenant_id = uuid4()
+        store.add_signal(self._signal(tenant_id, "overage", 5, 1.5))
+        store.add_signal(self._signal(tenant_id, "overage", 3, 0.5))
+        store.add_signal(self._signal(tenant_id, "threshold", 80))
+        store.add_signal(self._signal(tenant_id, "threshold", 90))
+
+        overage = store._signals[(tenant_id, "overage", "ai_calls")]
+        threshold = store._signals[(tenant_id, "threshold", "ai_calls")]
+        assert (overage.amount, overage.cost, overage.count) == (8, 2.0, 2)
+        assert (threshold.amount, threshold.count) == (90, 2)
+        assert len(store.recent_signals) == 4
+
+    async def test_failed_flush_keeps_deltas(self):
+        """Test a failing write leaves the deltas buffered for the next flush."""
+        store = _store(None)
+        tenant_id = uuid4()
+        await store.add(tenant_id, "ai_calls", "daily", 4)
+
+        async def failing(pending, signals):
+            raise ConnectionError("database unavailable")
+
+        store._write = failing
+        await store.flush()
+        await store.add(tenant_id, "ai_calls", "daily", 1)
+
+        assert store._pending == {(tenant_id, "ai_calls", period_key("daily")): 5}
+
+
+    async def test_large_flush_written_in_chunks(self, monkeypatch):
+        """Test more keys than one chunk go out as several bounded statements."""
+        statements = []
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement):
+                statements.append(statement)
+
+            async def commit(self):
+                pass
+
+        monkeypatch.setattr(database, "AsyncSessionLocal", Session)
+        store = _store(None)
+        tenant_id = uuid4()
+        store._pending = {(tenant_id, "ai_calls", f"2026-10-{i:04d}"): 1 for i in range(2500)}
+        store.add_signal(self._signal(tenant_id, "overage", 5, 1.5))
+
+        await store.flush()
+
+        params = [len(s.compile(dialect=postgresql.dialect()).params) for s in statements]
+        assert len(statements) == 4  # 1000 + 1000 + 500 counters, then signals
+        assert max(params) < 32767
+        assert store._pending == {} and store._signals == {}
+
+    async def test_failed_chunk_keeps_only_its_deltas(self):
+        """Test a failing chunk is restored while the others are written."""
+        store = _store(None)
+        store.FLUSH_CHUNK_SIZE = 2
+        tenant_id = uuid4()
+        store._pending = {(tenant_id, "ai_calls", f"p{i}"): 1 for i in range(5)}
+        written = []
+
+        async def write(pending, signals):
+            if (tenant_id, "ai_calls", "p2") in pending:
+                raise ConnectionError("database unavailable")
+            written.extend(pending)
+
+        store._write = write
+        await store.flush()
+
+        assert len(written) == 3
+        assert set(store._pending) == {(tenant_id, "ai_calls", "p2"), (tenant_id, "ai_calls", "p3")}